@@ -0,0 +1,52 @@
+"""Add run rollups and rollup rebuild jobs
+
+Revision ID: a56de4e2df02
+Revises: 8d3d3b74360e
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'a56de4e2df02'
+down_revision: Union[str, None] = '8d3d3b74360e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("ALTER TYPE jobtype ADD VALUE IF NOT EXISTS 'ROLLUP_REBUILD'")
+    op.add_column('jobs', sa.Column('params', postgresql.JSONB(astext_type=sa.Text()), server_default='{}', nullable=False))
+
+    op.create_table('run_rollups',
+    sa.Column('granularity', sa.Enum('MINUTE', 'HOUR', 'DAY', name='rollupgranularity'), nullable=False),
+    sa.Column('scope_type', sa.Enum('WORKFLOW', 'AGENT', 'PROJECT', name='rollupscope'), nullable=False),
+    sa.Column('scope_id', sa.UUID(), nullable=False),
+    sa.Column('env', sa.String(length=20), nullable=False),
+    sa.Column('bucket_start', sa.DateTime(), nullable=False),
+    sa.Column('total_runs', sa.BigInteger(), nullable=False),
+    sa.Column('succeeded_runs', sa.BigInteger(), nullable=False),
+    sa.Column('failed_runs', sa.BigInteger(), nullable=False),
+    sa.Column('cancelled_runs', sa.BigInteger(), nullable=False),
+    sa.Column('timeout_runs', sa.BigInteger(), nullable=False),
+    sa.Column('duration_sum_seconds', sa.BigInteger(), nullable=False),
+    sa.Column('duration_count', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('granularity', 'scope_type', 'scope_id', 'env', 'bucket_start')
+    )
+    # Rebuilds delete by time range across all scopes
+    op.create_index('ix_run_rollups_bucket_start', 'run_rollups', ['bucket_start'], unique=False)
+    op.create_index(op.f('ix_workflow_executions_started_at'), 'workflow_executions', ['started_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_workflow_executions_started_at'), table_name='workflow_executions')
+    op.drop_index('ix_run_rollups_bucket_start', table_name='run_rollups')
+    op.drop_table('run_rollups')
+    sa.Enum(name='rollupscope').drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name='rollupgranularity').drop(op.get_bind(), checkfirst=True)
+    op.drop_column('jobs', 'params')
+    # Postgres can't drop enum values; ROLLUP_REBUILD stays in jobtype
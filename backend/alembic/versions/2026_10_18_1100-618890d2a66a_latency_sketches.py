@@ -0,0 +1,39 @@
+"""Add latency sketch bins
+
+Revision ID: 618890d2a66a
+Revises: a56de4e2df02
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '618890d2a66a'
+down_revision: Union[str, None] = 'a56de4e2df02'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('latency_sketch_bins',
+    sa.Column('metric', sa.Enum('RUN_DURATION', 'STEP_DURATION', name='sketchmetric'), nullable=False),
+    sa.Column('granularity', postgresql.ENUM('MINUTE', 'HOUR', 'DAY', name='rollupgranularity', create_type=False), nullable=False),
+    sa.Column('scope_type', sa.Enum('WORKFLOW', 'AGENT', 'PROJECT', 'TOOL', 'STEP_TYPE', name='sketchscope'), nullable=False),
+    sa.Column('scope_key', sa.String(length=100), nullable=False),
+    sa.Column('bucket_start', sa.DateTime(), nullable=False),
+    sa.Column('bin_index', sa.Integer(), nullable=False),
+    sa.Column('count', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('metric', 'granularity', 'scope_type', 'scope_key', 'bucket_start', 'bin_index')
+    )
+    op.create_index(op.f('ix_latency_sketch_bins_bucket_start'), 'latency_sketch_bins', ['bucket_start'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_latency_sketch_bins_bucket_start'), table_name='latency_sketch_bins')
+    op.drop_table('latency_sketch_bins')
+    sa.Enum(name='sketchscope').drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name='sketchmetric').drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,41 @@
+"""Add agent stats
+
+Revision ID: b69e35ec713e
+Revises: 618890d2a66a
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'b69e35ec713e'
+down_revision: Union[str, None] = '618890d2a66a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('agent_stats',
+    sa.Column('agent_id', sa.UUID(), nullable=False),
+    sa.Column('total_runs', sa.BigInteger(), nullable=False),
+    sa.Column('failed_runs', sa.BigInteger(), nullable=False),
+    sa.Column('in_flight_runs', sa.BigInteger(), nullable=False),
+    sa.Column('last_run_at', sa.DateTime(), nullable=True),
+    sa.Column('total_steps', sa.BigInteger(), nullable=False),
+    sa.Column('failed_steps', sa.BigInteger(), nullable=False),
+    sa.Column('error_rate_ewma', sa.Float(), nullable=True),
+    sa.Column('latency_ewma_ms', sa.Float(), nullable=True),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('last_error_at', sa.DateTime(), nullable=True),
+    sa.Column('last_heartbeat', sa.DateTime(), nullable=True),
+    sa.Column('reported_health', sa.String(length=20), nullable=True),
+    sa.ForeignKeyConstraint(['agent_id'], ['agents.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('agent_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('agent_stats')
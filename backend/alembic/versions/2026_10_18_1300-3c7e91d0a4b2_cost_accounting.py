@@ -0,0 +1,56 @@
+"""Add token usage, costs and cost rollups
+
+Revision ID: 3c7e91d0a4b2
+Revises: b69e35ec713e
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '3c7e91d0a4b2'
+down_revision: Union[str, None] = 'b69e35ec713e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('workflow_executions', sa.Column('tokens_prompt', sa.BigInteger(), server_default='0', nullable=False))
+    op.add_column('workflow_executions', sa.Column('tokens_completion', sa.BigInteger(), server_default='0', nullable=False))
+    op.add_column('workflow_executions', sa.Column('usd_cost', sa.Numeric(precision=14, scale=6), server_default='0', nullable=False))
+
+    op.add_column('workflow_steps', sa.Column('model', sa.String(length=100), nullable=True))
+    op.add_column('workflow_steps', sa.Column('tokens_prompt', sa.Integer(), nullable=True))
+    op.add_column('workflow_steps', sa.Column('tokens_completion', sa.Integer(), nullable=True))
+    op.add_column('workflow_steps', sa.Column('usd_cost', sa.Numeric(precision=14, scale=6), nullable=True))
+    op.create_index('ix_workflow_steps_usage_at', 'workflow_steps', [sa.text('coalesce(completed_at, started_at)')], unique=False)
+
+    op.create_table('cost_rollups',
+    sa.Column('scope_type', postgresql.ENUM('WORKFLOW', 'AGENT', 'PROJECT', name='rollupscope', create_type=False), nullable=False),
+    sa.Column('scope_id', sa.UUID(), nullable=False),
+    sa.Column('bucket_start', sa.DateTime(), nullable=False),
+    sa.Column('model', sa.String(length=100), nullable=False),
+    sa.Column('steps', sa.BigInteger(), nullable=False),
+    sa.Column('tokens_prompt', sa.BigInteger(), nullable=False),
+    sa.Column('tokens_completion', sa.BigInteger(), nullable=False),
+    sa.Column('usd_cost', sa.Numeric(precision=18, scale=6), nullable=False),
+    sa.PrimaryKeyConstraint('scope_type', 'scope_id', 'bucket_start', 'model')
+    )
+    op.create_index('ix_cost_rollups_bucket_start', 'cost_rollups', ['bucket_start'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_cost_rollups_bucket_start', table_name='cost_rollups')
+    op.drop_table('cost_rollups')
+    op.drop_index('ix_workflow_steps_usage_at', table_name='workflow_steps')
+    op.drop_column('workflow_steps', 'usd_cost')
+    op.drop_column('workflow_steps', 'tokens_completion')
+    op.drop_column('workflow_steps', 'tokens_prompt')
+    op.drop_column('workflow_steps', 'model')
+    op.drop_column('workflow_executions', 'usd_cost')
+    op.drop_column('workflow_executions', 'tokens_completion')
+    op.drop_column('workflow_executions', 'tokens_prompt')
@@ -0,0 +1,64 @@
+"""Add budgets and budget alerts
+
+Revision ID: 8d2f5a61c9e3
+Revises: 3c7e91d0a4b2
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '8d2f5a61c9e3'
+down_revision: Union[str, None] = '3c7e91d0a4b2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('budgets',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('project_id', sa.UUID(), nullable=False),
+    sa.Column('scope_type', postgresql.ENUM('WORKFLOW', 'AGENT', 'PROJECT', name='rollupscope', create_type=False), nullable=False),
+    sa.Column('scope_id', sa.UUID(), nullable=False),
+    sa.Column('period', sa.Enum('DAILY', 'MONTHLY', name='budgetperiod'), nullable=False),
+    sa.Column('limit_usd', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.Column('alert_threshold', sa.Float(), nullable=False),
+    sa.Column('action', sa.Enum('REJECT', 'QUEUE', name='budgetaction'), nullable=False),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.Column('spent_usd', sa.Numeric(precision=18, scale=6), nullable=False),
+    sa.Column('reconciled_at', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('scope_type', 'scope_id', 'period', name='uq_budgets_scope_period')
+    )
+    op.create_index(op.f('ix_budgets_project_id'), 'budgets', ['project_id'], unique=False)
+
+    op.create_table('budget_alerts',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('budget_id', sa.UUID(), nullable=False),
+    sa.Column('kind', sa.Enum('THRESHOLD', 'EXHAUSTED', name='budgetalertkind'), nullable=False),
+    sa.Column('period_start', sa.DateTime(), nullable=False),
+    sa.Column('spent_usd', sa.Numeric(precision=18, scale=6), nullable=False),
+    sa.Column('limit_usd', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['budget_id'], ['budgets.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('budget_id', 'period_start', 'kind', name='uq_budget_alerts_budget_period_kind')
+    )
+    op.create_index(op.f('ix_budget_alerts_budget_id'), 'budget_alerts', ['budget_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_budget_alerts_budget_id'), table_name='budget_alerts')
+    op.drop_table('budget_alerts')
+    op.drop_index(op.f('ix_budgets_project_id'), table_name='budgets')
+    op.drop_table('budgets')
+    sa.Enum(name='budgetalertkind').drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name='budgetaction').drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name='budgetperiod').drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,53 @@
+"""Add incidents
+
+Revision ID: e4b7c2a9f150
+Revises: 8d2f5a61c9e3
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4b7c2a9f150'
+down_revision: Union[str, None] = '8d2f5a61c9e3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('incidents',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('project_id', sa.UUID(), nullable=False),
+    sa.Column('owner_id', sa.UUID(), nullable=True),
+    sa.Column('title', sa.String(length=255), nullable=False),
+    sa.Column('severity', sa.Enum('SEV1', 'SEV2', 'SEV3', name='incidentseverity'), nullable=False),
+    sa.Column('status', sa.Enum('OPEN', 'MITIGATED', 'RESOLVED', name='incidentstatus'), nullable=False),
+    sa.Column('sla_minutes', sa.Integer(), nullable=False),
+    sa.Column('scope_type', postgresql.ENUM('WORKFLOW', 'AGENT', 'PROJECT', name='rollupscope', create_type=False), nullable=False),
+    sa.Column('scope_id', sa.UUID(), nullable=False),
+    sa.Column('signal', sa.Enum('FAILURE_RATE', 'LATENCY', name='incidentsignal'), nullable=False),
+    sa.Column('baseline', sa.Float(), nullable=True),
+    sa.Column('observed', sa.Float(), nullable=True),
+    sa.Column('run_ids', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('resolved_at', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['owner_id'], ['users.id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_incidents_project_status', 'incidents', ['project_id', 'status'], unique=False)
+    op.create_index('uq_incidents_unresolved_signal', 'incidents', ['scope_type', 'scope_id', 'signal'], unique=True, postgresql_where=sa.text("status <> 'RESOLVED'"))
+
+
+def downgrade() -> None:
+    op.drop_index('uq_incidents_unresolved_signal', table_name='incidents', postgresql_where=sa.text("status <> 'RESOLVED'"))
+    op.drop_index('ix_incidents_project_status', table_name='incidents')
+    op.drop_table('incidents')
+    sa.Enum(name='incidentsignal').drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name='incidentstatus').drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name='incidentseverity').drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,70 @@
+"""Move API keys to their own table, stored as HMAC digests
+
+Revision ID: a3f19c7d52e8
+Revises: e4b7c2a9f150
+Create Date: 2026-10-18 16:00:00.000000
+
+Existing keys keep working: their digests are computed from the plaintext
+column before it is dropped. Downgrading cannot restore the plaintext, so
+keys have to be recreated afterwards.
+"""
+from datetime import datetime
+import uuid
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.security import api_key_prefix, hash_api_key
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3f19c7d52e8'
+down_revision: Union[str, None] = 'e4b7c2a9f150'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    api_keys = op.create_table('api_keys',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('prefix', sa.String(length=16), nullable=False),
+    sa.Column('key_hash', sa.String(length=64), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'name', name='uq_api_keys_user_name')
+    )
+    op.create_index(op.f('ix_api_keys_user_id'), 'api_keys', ['user_id'], unique=False)
+    op.create_index(op.f('ix_api_keys_key_hash'), 'api_keys', ['key_hash'], unique=True)
+
+    now = datetime.utcnow()
+    rows = op.get_bind().execute(sa.text("SELECT id, api_key FROM users WHERE api_key IS NOT NULL")).all()
+    if rows:
+        op.bulk_insert(api_keys, [
+            {
+                'id': uuid.uuid4(),
+                'user_id': user_id,
+                'name': 'default',
+                'prefix': api_key_prefix(api_key),
+                'key_hash': hash_api_key(api_key),
+                'created_at': now,
+                'updated_at': now,
+            }
+            for user_id, api_key in rows
+        ])
+
+    op.drop_index(op.f('ix_users_api_key'), table_name='users')
+    op.drop_column('users', 'api_key_hash')
+    op.drop_column('users', 'api_key')
+
+
+def downgrade() -> None:
+    op.add_column('users', sa.Column('api_key', sa.String(length=255), nullable=True))
+    op.add_column('users', sa.Column('api_key_hash', sa.String(length=255), nullable=True))
+    op.create_index(op.f('ix_users_api_key'), 'users', ['api_key'], unique=True)
+    op.drop_index(op.f('ix_api_keys_key_hash'), table_name='api_keys')
+    op.drop_index(op.f('ix_api_keys_user_id'), table_name='api_keys')
+    op.drop_table('api_keys')
@@ -0,0 +1,25 @@
+"""Add users.token_epoch for token revocation
+
+Revision ID: 5b8e0d3f7a21
+Revises: a3f19c7d52e8
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '5b8e0d3f7a21'
+down_revision: Union[str, None] = 'a3f19c7d52e8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('token_epoch', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'token_epoch')
@@ -0,0 +1,25 @@
+"""Add users.auth_version for cached principal invalidation
+
+Revision ID: c7a4e19d03b6
+Revises: 5b8e0d3f7a21
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7a4e19d03b6'
+down_revision: Union[str, None] = '5b8e0d3f7a21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('auth_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'auth_version')
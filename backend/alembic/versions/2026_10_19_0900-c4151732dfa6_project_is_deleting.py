@@ -0,0 +1,25 @@
+"""Add projects.is_deleting, set while a delete job removes the project
+
+Revision ID: c4151732dfa6
+Revises: c7a4e19d03b6
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4151732dfa6'
+down_revision: Union[str, None] = 'c7a4e19d03b6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('projects', sa.Column('is_deleting', sa.Boolean(), server_default=sa.false(), nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('projects', 'is_deleting')
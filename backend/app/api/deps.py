@@ -1,16 +1,18 @@
 """
 API dependencies for dependency injection
 """
-from typing import Optional, AsyncGenerator
-from fastapi import Depends, HTTPException, status
+from typing import Optional, AsyncGenerator, Callable
+from uuid import UUID
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials, APIKeyHeader
 from sqlalchemy.ext.asyncio import AsyncSession
 from jose import JWTError
 
 from app.db.session import get_db
-from app.core.security import decode_token
+from app.core.security import decode_token_cached
 from app.models.user import User
-from app.services.user_service import UserService
+from app.services.project_service import ProjectService
+from app.services.user_service import UserService, Principal
 
 # Security schemes
 bearer_scheme = HTTPBearer(auto_error=False)
@@ -21,13 +23,16 @@ async def get_current_user(
     db: AsyncSession = Depends(get_db),
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme),
     api_key: Optional[str] = Depends(api_key_header),
-) -> User:
+) -> Principal:
     """
     Get current authenticated user from JWT token or API key
     
     Supports two authentication methods:
     1. Bearer token (JWT) in Authorization header
     2. API key in X-API-Key header
+    
+    Returns the user's cached Principal; depend on get_current_active_user
+    for the full user record.
     """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -37,9 +42,9 @@ async def get_current_user(
     
     # Try API key authentication first
     if api_key:
-        user = await UserService.get_by_api_key(db, api_key)
-        if user and user.is_active:
-            return user
+        principal = await UserService.get_principal_by_api_key(db, api_key)
+        if principal and principal.is_active:
+            return principal
         raise credentials_exception
     
     # Try JWT authentication
@@ -48,50 +53,50 @@ async def get_current_user(
     
     try:
         token = credentials.credentials
-        payload = decode_token(token)
+        payload = decode_token_cached(token)
         
         # Verify token type
         if payload.get("type") != "access":
             raise credentials_exception
         
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
+        user_id = UUID(payload.get("sub"))
             
-    except JWTError:
+    except (JWTError, TypeError, ValueError):
         raise credentials_exception
     
-    # Get user from database
-    from uuid import UUID
-    user = await UserService.get_by_id(db, UUID(user_id))
+    # Cached, so most requests don't touch the database
+    principal = await UserService.get_principal(db, user_id)
     
-    if user is None:
+    # Revoked by logout, deactivation or a password change
+    if principal is None or payload.get("ep", 0) < principal.token_epoch:
         raise credentials_exception
     
-    if not user.is_active:
+    if not principal.is_active:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Inactive user"
         )
     
-    return user
+    return principal
 
 
 async def get_current_active_user(
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
 ) -> User:
-    """Get current active user"""
-    if not current_user.is_active:
+    """Get current active user's full record (read from the database)"""
+    user = await UserService.get_by_id(db, current_user.id)
+    if user is None or not user.is_active:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Inactive user"
         )
-    return current_user
+    return user
 
 
 async def get_current_admin_user(
-    current_user: User = Depends(get_current_user),
-) -> User:
+    current_user: Principal = Depends(get_current_user),
+) -> Principal:
     """Get current user (must be admin or owner)"""
     if not current_user.is_admin_or_owner:
         raise HTTPException(
@@ -102,8 +107,8 @@ async def get_current_admin_user(
 
 
 async def get_current_superuser(
-    current_user: User = Depends(get_current_user),
-) -> User:
+    current_user: Principal = Depends(get_current_user),
+) -> Principal:
     """Get current user (must be superuser)"""
     if not current_user.is_superuser:
         raise HTTPException(
@@ -111,3 +116,49 @@ async def get_current_superuser(
             detail="Not enough permissions"
         )
     return current_user
+
+
+async def authorize_project(
+    db: AsyncSession,
+    principal: Principal,
+    project_id: UUID,
+    detail: str,
+    missing_detail: Optional[str] = "Project not found",
+) -> None:
+    """
+    Ensure the user owns a project
+    
+    Projects listed in the principal are allowed without a query; others
+    are checked against the database, since the principal may predate them.
+    Raises 404 with ``missing_detail`` for unknown projects (403 with
+    ``detail`` if it is None) and 403 with ``detail`` for others' projects.
+    """
+    if principal.owns(project_id):
+        return
+    
+    owner_id = await ProjectService.get_owner_id(db, project_id)
+    if owner_id is None and missing_detail is not None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=missing_detail
+        )
+    if owner_id != principal.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=detail
+        )
+
+
+def route_timeout(timeout_ms: int) -> Callable[[Request], None]:
+    """
+    Per-route default request deadline
+    
+    Applies when the client doesn't send X-Request-Timeout. List it before
+    anything that opens a DB session, e.g. in the route decorator:
+    
+        @router.get("/slow", dependencies=[Depends(route_timeout(10_000))])
+    """
+    def set_default_timeout(request: Request) -> None:
+        request.state.default_timeout_ms = timeout_ms
+    
+    return set_default_timeout
@@ -2,17 +2,18 @@
 Agent API Endpoints
 RESTful API for agent management
 """
+from datetime import datetime
 from typing import Optional
 from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.session import get_db
-from app.api.deps import get_current_user
-from app.models.user import User
+from app.api.deps import get_current_user, authorize_project
+from app.services.user_service import Principal
 from app.models.project import Project
 from app.services.agent_service import AgentService
-from app.services.project_service import ProjectService
+from app.services.agent_stats_service import AgentStatsService, derive_health
 from app.schemas.agent import (
     AgentCreate,
     AgentUpdate,
@@ -28,7 +29,7 @@ router = APIRouter(prefix="/agents", tags=["Agents"])
 async def create_agent(
     agent_data: AgentCreate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ) -> AgentResponse:
     """
     Create a new agent
@@ -36,17 +37,10 @@ async def create_agent(
     Requires the user to own the project specified in project_id
     """
     # Verify project ownership
-    project = await ProjectService.get_by_id(db, UUID(agent_data.project_id))
-    if not project:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Project not found"
-        )
-    if project.owner_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You don't have permission to create agents in this project"
-        )
+    await authorize_project(
+        db, current_user, UUID(agent_data.project_id),
+        "You don't have permission to create agents in this project",
+    )
     
     agent = await AgentService.create(db, agent_data, current_user.id)
     return AgentResponse.model_validate(agent)
@@ -61,7 +55,7 @@ async def list_agents(
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(20, ge=1, le=100, description="Items per page"),
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ) -> AgentListResponse:
     """
     List all agents for a project
@@ -76,17 +70,10 @@ async def list_agents(
         )
     
     # Verify project access
-    project = await ProjectService.get_by_id(db, UUID(project_id))
-    if not project:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Project not found"
-        )
-    if project.owner_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You don't have permission to view agents in this project"
-        )
+    await authorize_project(
+        db, current_user, UUID(project_id),
+        "You don't have permission to view agents in this project",
+    )
     
     skip = (page - 1) * page_size
     agents, total = await AgentService.get_by_project(
@@ -114,7 +101,7 @@ async def list_agents(
 async def get_agent(
     agent_id: str,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ) -> AgentResponse:
     """
     Get a specific agent by ID
@@ -135,12 +122,11 @@ async def get_agent(
         )
     
     # Verify project ownership
-    project = await ProjectService.get_by_id(db, agent.project_id)
-    if not project or project.owner_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You don't have permission to view this agent"
-        )
+    await authorize_project(
+        db, current_user, agent.project_id,
+        "You don't have permission to view this agent",
+        missing_detail=None,
+    )
     
     return AgentResponse.model_validate(agent)
 
@@ -150,7 +136,7 @@ async def update_agent(
     agent_id: str,
     agent_data: AgentUpdate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ) -> AgentResponse:
     """
     Update an existing agent
@@ -172,12 +158,11 @@ async def update_agent(
         )
     
     # Verify project ownership
-    project = await ProjectService.get_by_id(db, existing_agent.project_id)
-    if not project or project.owner_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You don't have permission to update this agent"
-        )
+    await authorize_project(
+        db, current_user, existing_agent.project_id,
+        "You don't have permission to update this agent",
+        missing_detail=None,
+    )
     
     agent = await AgentService.update(db, agent_uuid, agent_data)
     return AgentResponse.model_validate(agent)
@@ -187,7 +172,7 @@ async def update_agent(
 async def delete_agent(
     agent_id: str,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ) -> None:
     """
     Delete an agent
@@ -209,12 +194,11 @@ async def delete_agent(
         )
     
     # Verify project ownership
-    project = await ProjectService.get_by_id(db, existing_agent.project_id)
-    if not project or project.owner_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You don't have permission to delete this agent"
-        )
+    await authorize_project(
+        db, current_user, existing_agent.project_id,
+        "You don't have permission to delete this agent",
+        missing_detail=None,
+    )
     
     await AgentService.delete(db, agent_uuid)
 
@@ -223,7 +207,7 @@ async def delete_agent(
 async def get_agent_health(
     agent_id: str,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ) -> AgentHealthResponse:
     """
     Get agent health metrics
@@ -246,34 +230,36 @@ async def get_agent_health(
         )
     
     # Verify project ownership
-    project = await ProjectService.get_by_id(db, agent.project_id)
-    if not project or project.owner_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You don't have permission to view this agent's health"
-        )
+    await authorize_project(
+        db, current_user, agent.project_id,
+        "You don't have permission to view this agent's health",
+        missing_detail=None,
+    )
+    
+    # One primary-key read of the incrementally maintained counters
+    stats = await AgentStatsService.get(db, agent.id)
     
-    # TODO: Calculate real metrics from run history
-    # For now, return basic health info
-    from datetime import datetime, timezone
     uptime_seconds = None
-    if agent.last_heartbeat:
-        uptime_seconds = int((datetime.now(timezone.utc) - agent.last_heartbeat).total_seconds())
+    if stats and stats.last_heartbeat:
+        uptime_seconds = int((datetime.utcnow() - stats.last_heartbeat).total_seconds())
     
     return AgentHealthResponse(
-        health=agent.health,
-        last_heartbeat=agent.last_heartbeat,
+        health=derive_health(stats),
+        last_heartbeat=stats.last_heartbeat if stats else None,
         metrics={
-            "concurrency": agent.concurrency,
-            "autoscale": {
-                "min": agent.autoscale_min,
-                "max": agent.autoscale_max,
-                "targetCpu": agent.autoscale_target_cpu
-            }
+            "totalRuns": stats.total_runs if stats else 0,
+            "failedRuns": stats.failed_runs if stats else 0,
+            "totalSteps": stats.total_steps if stats else 0,
+            "failedSteps": stats.failed_steps if stats else 0,
+            "lastRunAt": stats.last_run_at.isoformat() if stats and stats.last_run_at else None,
         },
         uptime_seconds=uptime_seconds,
-        error_count=0,  # TODO: Calculate from run history
-        last_error=None
+        error_count=(stats.failed_runs + stats.failed_steps) if stats else 0,
+        error_rate=stats.error_rate_ewma if stats else None,
+        last_error=stats.last_error if stats else None,
+        last_error_at=stats.last_error_at if stats else None,
+        latency_ms=stats.latency_ewma_ms if stats else None,
+        in_flight_runs=stats.in_flight_runs if stats else 0,
     )
 
 
@@ -282,7 +268,7 @@ async def update_agent_heartbeat(
     agent_id: str,
     health_status: str = Query("healthy", pattern="^(healthy|degraded|unhealthy)$"),
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ) -> AgentResponse:
     """
     Update agent heartbeat timestamp and health status
@@ -0,0 +1,429 @@
+"""
+Analytics API Endpoints - Run statistics and costs over time from rollups
+"""
+from datetime import date, datetime, timedelta
+from typing import List, Optional, Union
+from uuid import UUID
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import get_db, get_current_user, authorize_project, get_current_superuser, route_timeout
+from app.core.config import settings
+from app.models.latency_sketch import SketchMetric, SketchScope
+from app.models.rollup import RollupGranularity, RollupScope
+from app.services.user_service import Principal
+from app.schemas.analytics import (
+    RunRollupBucket,
+    RunRollupSeriesResponse,
+    TimeseriesSeries,
+    TimeseriesResponse,
+    RollupRebuildRequest,
+    LatencyPercentile,
+    LatencyPercentilesResponse,
+    CostTotals,
+    DailyCost,
+    ModelCost,
+    CostSummaryResponse,
+    ArchiveQueryRequest,
+    ArchiveResultResponse,
+)
+from app.schemas.job import JobResponse
+from app.services.agent_service import AgentService
+from app.services.archive_service import ArchiveService, ArchiveUnavailable, ArchiveQueryError, REPORTS
+from app.services.cost_service import CostService, COUNTER_COLUMNS as COST_COLUMNS
+from app.services.rollup_service import RollupService, bucket_count, to_utc_naive, truncate
+from app.services.sketch_service import SketchService
+from app.services.timeseries_service import (
+    TimeseriesService,
+    TimeseriesMetric,
+    TimeseriesGroupBy,
+    auto_step,
+    parse_step,
+    point_count,
+)
+from app.services.tool_service import ToolService
+from app.services.workflow_service import WorkflowService
+
+router = APIRouter()
+
+
+@router.get(
+    "/runs",
+    response_model=RunRollupSeriesResponse,
+    dependencies=[Depends(route_timeout(settings.ANALYTICS_REQUEST_TIMEOUT_MS))],
+)
+async def get_run_series(
+    scope: RollupScope = Query(..., description="workflow, agent or project"),
+    scope_id: UUID = Query(..., alias="scopeId"),
+    granularity: RollupGranularity = Query(RollupGranularity.HOUR),
+    start: Optional[datetime] = Query(None, description="Range start (default: 24h before end)"),
+    end: Optional[datetime] = Query(None, description="Range end, exclusive (default: now)"),
+    env: Optional[str] = Query(None, pattern="^(dev|staging|prod)$"),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+) -> RunRollupSeriesResponse:
+    """
+    Throughput, success rate and average duration per time bucket
+
+    Reads pre-aggregated rollups, so cost depends on the number of buckets,
+    not the number of runs.
+    """
+    end = to_utc_naive(end) if end else datetime.utcnow()
+    start = to_utc_naive(start) if start else end - timedelta(days=1)
+    if start >= end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start must be before end"
+        )
+    if bucket_count(start, end, granularity) > settings.ANALYTICS_MAX_BUCKETS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Range spans more than {settings.ANALYTICS_MAX_BUCKETS} buckets; use a coarser granularity"
+        )
+
+    await _authorize_scope(db, scope, scope_id, current_user)
+
+    rows = await RollupService.get_series(db, scope, scope_id, granularity, start, end, env)
+    buckets = [
+        RunRollupBucket(
+            **{k: v for k, v in row.items() if k not in ('duration_sum_seconds', 'duration_count')},
+            success_rate=row['succeeded_runs'] / row['total_runs'] if row['total_runs'] else None,
+            avg_duration_ms=(
+                int(row['duration_sum_seconds'] * 1000 / row['duration_count']) if row['duration_count'] else None
+            ),
+        )
+        for row in rows
+    ]
+
+    return RunRollupSeriesResponse(
+        scope=scope,
+        scope_id=scope_id,
+        granularity=granularity,
+        env=env,
+        start=start,
+        end=end,
+        buckets=buckets,
+    )
+
+
+@router.get(
+    "/timeseries",
+    response_model=TimeseriesResponse,
+    dependencies=[Depends(route_timeout(settings.ANALYTICS_REQUEST_TIMEOUT_MS))],
+)
+async def get_timeseries(
+    metric: TimeseriesMetric = Query(..., description="runs, failures, failure_rate or avg_duration_ms"),
+    scope: RollupScope = Query(..., description="workflow, agent or project"),
+    scope_id: UUID = Query(..., alias="scopeId"),
+    group_by: Optional[TimeseriesGroupBy] = Query(None, alias="groupBy", description="workflow, agent, env or status"),
+    start: Optional[datetime] = Query(None, description="Range start (default: 24h before end)"),
+    end: Optional[datetime] = Query(None, description="Range end, exclusive (default: now)"),
+    step: Optional[str] = Query(None, description="Point width such as 1m, 5m, 1h or 1d (default: chosen from the range)"),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+) -> TimeseriesResponse:
+    """
+    Run metric per step, optionally split into one series per group
+
+    Points are summed from the coarsest rollup that fits the step, and
+    returned as a timestamps array plus one values array per series.
+    """
+    end = to_utc_naive(end) if end else datetime.utcnow()
+    start = to_utc_naive(start) if start else end - timedelta(days=1)
+    if start >= end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start must be before end"
+        )
+    if step is None:
+        step_delta = auto_step(start, end, settings.ANALYTICS_TIMESERIES_POINTS)
+    else:
+        try:
+            step_delta = parse_step(step)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+    if point_count(start, end, step_delta) > settings.ANALYTICS_MAX_BUCKETS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Range spans more than {settings.ANALYTICS_MAX_BUCKETS} points; use a larger step"
+        )
+    if group_by in (TimeseriesGroupBy.WORKFLOW, TimeseriesGroupBy.AGENT) and scope != RollupScope.PROJECT:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"groupBy={group_by.value} requires scope=project"
+        )
+    if group_by == TimeseriesGroupBy.STATUS and metric != TimeseriesMetric.RUNS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="groupBy=status requires metric=runs"
+        )
+
+    await _authorize_scope(db, scope, scope_id, current_user)
+
+    series = await TimeseriesService.get_series(db, metric, scope, scope_id, start, end, step_delta, group_by)
+    return TimeseriesResponse(
+        metric=metric,
+        group_by=group_by,
+        scope=scope,
+        scope_id=scope_id,
+        granularity=series["granularity"],
+        step_seconds=series["step_seconds"],
+        start=series["start"],
+        end=series["end"],
+        timestamps=series["timestamps"],
+        series=[TimeseriesSeries(**s) for s in series["series"]],
+    )
+
+
+@router.get(
+    "/latency",
+    response_model=LatencyPercentilesResponse,
+    dependencies=[Depends(route_timeout(settings.ANALYTICS_REQUEST_TIMEOUT_MS))],
+)
+async def get_latency_percentiles(
+    scope: SketchScope = Query(..., description="workflow, agent, project, tool or step_type"),
+    scope_id: str = Query(..., alias="scopeId", description="Object ID, or the step type name"),
+    metric: Optional[SketchMetric] = Query(None, description="Default: run_duration, step_duration for tools/step types"),
+    start: Optional[datetime] = Query(None, description="Range start (default: all time)"),
+    end: Optional[datetime] = Query(None, description="Range end, exclusive (default: now)"),
+    quantiles: List[float] = Query([0.5, 0.9, 0.95, 0.99], description="Quantiles between 0 and 1"),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+) -> LatencyPercentilesResponse:
+    """
+    Duration percentiles of completed runs or steps
+
+    Merges stored latency sketches for the fewest day/hour/minute buckets
+    covering the range; values are within 1% of the exact percentiles.
+    Step type percentiles span all projects and are limited to superusers.
+    """
+    if any(not 0 <= q <= 1 for q in quantiles):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="quantiles must be between 0 and 1"
+        )
+    if metric is None:
+        step_scoped = scope in (SketchScope.TOOL, SketchScope.STEP_TYPE)
+        metric = SketchMetric.STEP_DURATION if step_scoped else SketchMetric.RUN_DURATION
+
+    if start is not None:
+        start = to_utc_naive(start)
+        end = to_utc_naive(end) if end else datetime.utcnow()
+        if start >= end:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="start must be before end"
+            )
+    elif end is not None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="end requires start"
+        )
+
+    if scope == SketchScope.STEP_TYPE:
+        if not current_user.is_superuser:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Step type analytics require superuser access"
+            )
+    else:
+        try:
+            scope_uuid = UUID(scope_id)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid scopeId format"
+            )
+        await _authorize_scope(db, scope, scope_uuid, current_user)
+        scope_id = str(scope_uuid)
+
+    sketch = await SketchService.get_sketch(db, metric, scope, scope_id, start, end)
+
+    return LatencyPercentilesResponse(
+        metric=metric,
+        scope=scope,
+        scope_id=scope_id,
+        start=start,
+        end=end,
+        count=sketch.count,
+        percentiles=[LatencyPercentile(quantile=q, value_ms=sketch.quantile(q)) for q in quantiles],
+    )
+
+
+@router.get(
+    "/costs",
+    response_model=CostSummaryResponse,
+    dependencies=[Depends(route_timeout(settings.ANALYTICS_REQUEST_TIMEOUT_MS))],
+)
+async def get_costs(
+    scope: RollupScope = Query(..., description="workflow, agent or project"),
+    scope_id: UUID = Query(..., alias="scopeId"),
+    start: Optional[datetime] = Query(None, description="Range start (default: start of the current month)"),
+    end: Optional[datetime] = Query(None, description="Range end, exclusive (default: now)"),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+) -> CostSummaryResponse:
+    """
+    Token usage and cost per day and per model
+
+    Reads daily cost rollups, so the range is widened to whole days and a
+    month costs at most a few hundred rows regardless of step volume.
+    """
+    end = to_utc_naive(end) if end else datetime.utcnow()
+    start = to_utc_naive(start) if start else truncate(end, RollupGranularity.DAY).replace(day=1)
+    if start >= end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start must be before end"
+        )
+    if bucket_count(start, end, RollupGranularity.DAY) > settings.ANALYTICS_MAX_BUCKETS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Range spans more than {settings.ANALYTICS_MAX_BUCKETS} days"
+        )
+
+    await _authorize_scope(db, scope, scope_id, current_user)
+
+    rows = await CostService.get_costs(db, scope, scope_id, start, end)
+    totals = dict.fromkeys(COST_COLUMNS, 0)
+    days: dict = {}
+    models: dict = {}
+    for row in rows:
+        for key, group in ((row['bucket_start'], days), (row['model'], models)):
+            sums = group.setdefault(key, dict.fromkeys(COST_COLUMNS, 0))
+            for c in COST_COLUMNS:
+                sums[c] += row[c]
+        for c in COST_COLUMNS:
+            totals[c] += row[c]
+
+    return CostSummaryResponse(
+        scope=scope,
+        scope_id=scope_id,
+        start=start,
+        end=end,
+        totals=CostTotals(**totals),
+        days=[DailyCost(day=day, **sums) for day, sums in days.items()],
+        models=[
+            ModelCost(model=model, **sums)
+            for model, sums in sorted(models.items(), key=lambda item: item[1]['usd_cost'], reverse=True)
+        ],
+    )
+
+
+@router.get("/archive/reports/{report}", response_model=ArchiveResultResponse)
+async def get_archive_report(
+    report: str,
+    project_id: UUID = Query(..., alias="projectId"),
+    start: Optional[date] = Query(None, description="First day (default: 90 days before end)"),
+    end: Optional[date] = Query(None, description="Last day, inclusive (default: today)"),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+) -> ArchiveResultResponse:
+    """
+    Long-range report over a project's archived runs and steps
+
+    Reports: tool_failures, workflow_summary, model_usage, daily_runs.
+    Served from the Parquet archive, not Postgres; covers exported days only.
+    """
+    if report not in REPORTS:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Unknown report; available: {', '.join(REPORTS)}"
+        )
+    end = end or datetime.utcnow().date()
+    start = start or end - timedelta(days=90)
+    if start > end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start must not be after end"
+        )
+    if (end - start).days >= settings.ANALYTICS_MAX_BUCKETS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Range spans more than {settings.ANALYTICS_MAX_BUCKETS} days"
+        )
+
+    await _authorize_scope(db, RollupScope.PROJECT, project_id, current_user)
+
+    try:
+        result = await ArchiveService.run_report(report, project_id, start, end)
+    except ArchiveUnavailable as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+    except ArchiveQueryError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return ArchiveResultResponse(**result)
+
+
+@router.post("/archive/query", response_model=ArchiveResultResponse)
+async def query_archive(
+    query: ArchiveQueryRequest,
+    current_user: Principal = Depends(get_current_superuser),
+) -> ArchiveResultResponse:
+    """
+    Run a read-only SQL query over the whole run archive (superuser)
+
+    Tables ``runs`` and ``steps`` include the partition columns ``day`` and
+    ``project_id``; filtering on them skips files. Only a single SELECT is
+    accepted, file access is limited to ARCHIVE_PATH, and results are
+    capped at ARCHIVE_QUERY_MAX_ROWS.
+    """
+    try:
+        result = await ArchiveService.query(query.sql)
+    except ArchiveUnavailable as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+    except ArchiveQueryError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return ArchiveResultResponse(**result)
+
+
+@router.post("/rollups/rebuild", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def rebuild_rollups(
+    rebuild: RollupRebuildRequest,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_superuser),
+) -> JobResponse:
+    """
+    Re-aggregate run rollups for a time range from raw runs
+
+    Repairs buckets after late or out-of-band run updates. The range is
+    widened to whole days. Returns the job; poll /jobs/{id} for its status.
+    """
+    if rebuild.start >= rebuild.end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start must be before end"
+        )
+
+    job = await RollupService.request_rebuild(db, rebuild.start, rebuild.end, current_user.id)
+    background_tasks.add_task(RollupService.run, job.id)
+    return JobResponse.model_validate(job)
+
+
+# Helper functions
+async def _authorize_scope(
+    db: AsyncSession,
+    scope: Union[RollupScope, SketchScope],
+    scope_id: UUID,
+    user: Principal,
+) -> None:
+    """Ensure the user owns the project the scoped workflow, agent, tool or project belongs to"""
+    if scope.value == "project":
+        project_id = scope_id
+    else:
+        services = {"workflow": WorkflowService, "agent": AgentService, "tool": ToolService}
+        obj = await services[scope.value].get_by_id(db, scope_id)
+        if not obj:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"{scope.value.capitalize()} not found"
+            )
+        project_id = obj.project_id
+
+    await authorize_project(
+        db, user, project_id,
+        "You don't have permission to view these analytics",
+    )
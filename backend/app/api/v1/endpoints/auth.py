@@ -1,15 +1,17 @@
 """
 Authentication endpoints
 """
+from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.session import get_db
 from app.schemas.auth import LoginRequest, TokenResponse, TokenRefreshRequest
-from app.schemas.user import UserCreate, UserResponse, APIKeyCreate, APIKeyResponse
-from app.services.user_service import UserService
-from app.core.security import create_access_token, create_refresh_token, decode_token
-from app.api.deps import get_current_active_user
+from app.schemas.user import UserCreate, UserResponse, APIKeyCreate, APIKeyResponse, APIKeyInfo
+from app.services.user_service import UserService, Principal
+from app.core.security import create_access_token, create_refresh_token, decode_token, PasswordHashBusy
+from app.api.deps import get_current_user, get_current_active_user
 from app.models.user import User
 
 router = APIRouter()
@@ -37,7 +39,10 @@ async def register(
         )
     
     # Create user
-    user = await UserService.create(db, user_data)
+    try:
+        user = await UserService.create(db, user_data)
+    except PasswordHashBusy:
+        raise _hashing_busy()
     
     return user
 
@@ -56,7 +61,10 @@ async def login(
     - **password**: User's password
     """
     # Authenticate user
-    user = await UserService.authenticate(db, login_data.email, login_data.password)
+    try:
+        user = await UserService.authenticate(db, login_data.email, login_data.password)
+    except PasswordHashBusy:
+        raise _hashing_busy()
     
     if not user:
         raise HTTPException(
@@ -66,12 +74,10 @@ async def login(
         )
     
     # Create tokens
-    access_token = create_access_token(
-        data={"sub": str(user.id), "email": user.email}
-    )
-    refresh_token = create_refresh_token(
-        data={"sub": str(user.id), "email": user.email}
-    )
+    # Tokens carry the revocation epoch they were issued under
+    claims = {"sub": str(user.id), "email": user.email, "ep": user.token_epoch}
+    access_token = create_access_token(data=claims)
+    refresh_token = create_refresh_token(data=claims)
     
     return {
         "access_token": access_token,
@@ -108,6 +114,8 @@ async def refresh_token(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid token",
             )
+        
+        principal = await UserService.get_principal(db, UUID(user_id))
     
     except Exception:
         raise HTTPException(
@@ -115,13 +123,17 @@ async def refresh_token(
             detail="Invalid refresh token",
         )
     
+    # Revoked by logout, deactivation or a password change
+    if principal is None or not principal.is_active or payload.get("ep", 0) < principal.token_epoch:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token",
+        )
+    
     # Create new tokens
-    access_token = create_access_token(
-        data={"sub": user_id, "email": email}
-    )
-    new_refresh_token = create_refresh_token(
-        data={"sub": user_id, "email": email}
-    )
+    claims = {"sub": user_id, "email": email, "ep": principal.token_epoch}
+    access_token = create_access_token(data=claims)
+    new_refresh_token = create_refresh_token(data=claims)
     
     return {
         "access_token": access_token,
@@ -130,6 +142,21 @@ async def refresh_token(
     }
 
 
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+) -> None:
+    """
+    Log out everywhere
+    
+    Revokes every access and refresh token issued to the current user so
+    far. API keys are not affected.
+    """
+    await UserService.revoke_tokens(db, current_user.id)
+    return None
+
+
 @router.get("/me", response_model=UserResponse)
 async def get_current_user_info(
     current_user: User = Depends(get_current_active_user),
@@ -146,30 +173,81 @@ async def get_current_user_info(
 async def create_api_key(
     api_key_data: APIKeyCreate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_user),
 ) -> dict:
     """
-    Generate API key for programmatic access
+    Generate a named API key for programmatic access
+    
+    A user can hold several keys with different names.
     
     **⚠️ Warning:** The API key is only shown once. Store it securely!
     """
-    # Generate API key
-    api_key, updated_user = await UserService.create_api_key(db, current_user)
+    try:
+        api_key, record = await UserService.create_api_key(db, current_user.id, api_key_data.name)
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="An API key with this name already exists"
+        )
     
     return {
+        "id": record.id,
         "api_key": api_key,
-        "name": api_key_data.name,
-        "created_at": updated_user.updated_at,
+        "name": record.name,
+        "prefix": record.prefix,
+        "created_at": record.created_at,
     }
 
 
-@router.delete("/api-key", status_code=status.HTTP_204_NO_CONTENT)
+@router.get("/api-keys", response_model=list[APIKeyInfo])
+async def list_api_keys(
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+) -> list[APIKeyInfo]:
+    """
+    List current user's API keys (without the keys themselves)
+    """
+    keys = await UserService.get_api_keys(db, current_user.id)
+    return [APIKeyInfo.model_validate(k) for k in keys]
+
+
+@router.delete("/api-keys/{key_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def revoke_api_key(
+    key_id: UUID,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_user),
+) -> None:
+    """
+    Revoke one of current user's API keys
+    """
+    record = await UserService.get_api_key(db, current_user.id, key_id)
+    if not record:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="API key not found"
+        )
+    await UserService.revoke_api_key(db, record)
+    return None
+
+
+@router.delete("/api-key", status_code=status.HTTP_204_NO_CONTENT)
+async def revoke_api_keys(
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
 ) -> None:
     """
-    Revoke current user's API key
+    Revoke all of current user's API keys
     """
-    await UserService.revoke_api_key(db, current_user)
+    await UserService.revoke_api_keys(db, current_user.id)
     return None
+
+
+# Helper functions
+def _hashing_busy() -> HTTPException:
+    """Answer for logins and registrations while password hashing is saturated"""
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many logins in progress, retry shortly",
+        headers={"Retry-After": "1"},
+    )
@@ -0,0 +1,153 @@
+"""
+Budget API Endpoints - Spending limits for projects, agents and workflows
+"""
+from datetime import datetime
+from uuid import UUID
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import get_db, get_current_user, authorize_project
+from app.models.budget import Budget
+from app.models.rollup import RollupScope
+from app.services.user_service import Principal
+from app.schemas.budget import (
+    BudgetCreate,
+    BudgetUpdate,
+    BudgetResponse,
+    BudgetListResponse,
+    BudgetAlertResponse,
+)
+from app.services.agent_service import AgentService
+from app.services.budget_service import BudgetService, period_start
+from app.services.workflow_service import WorkflowService
+
+router = APIRouter()
+
+
+@router.post("/", response_model=BudgetResponse, status_code=status.HTTP_201_CREATED)
+async def create_budget(
+    budget_data: BudgetCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+) -> BudgetResponse:
+    """
+    Create a budget
+
+    One budget per scope and period. Spend counts costs reported by steps
+    from the start of the current day or month (UTC).
+    """
+    project_id = await _authorize_scope(db, budget_data.scope, budget_data.scope_id, current_user)
+    try:
+        budget = await BudgetService.create(db, budget_data, project_id)
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A budget for this scope and period already exists"
+        )
+    return await _to_response(budget)
+
+
+@router.get("/", response_model=BudgetListResponse)
+async def list_budgets(
+    project_id: UUID = Query(..., alias="projectId"),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+) -> BudgetListResponse:
+    """List the budgets of a project with their current spend"""
+    await _authorize_scope(db, RollupScope.PROJECT, project_id, current_user)
+    budgets = await BudgetService.get_by_project(db, project_id)
+    return BudgetListResponse(items=[await _to_response(b) for b in budgets])
+
+
+@router.get("/{budget_id}", response_model=BudgetResponse)
+async def get_budget(
+    budget_id: UUID,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+) -> BudgetResponse:
+    """Get a budget with its current spend"""
+    budget = await _get_owned_budget(db, budget_id, current_user)
+    return await _to_response(budget)
+
+
+@router.patch("/{budget_id}", response_model=BudgetResponse)
+async def update_budget(
+    budget_id: UUID,
+    budget_data: BudgetUpdate,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+) -> BudgetResponse:
+    """Change a budget's limit, alert threshold, action or active flag"""
+    budget = await _get_owned_budget(db, budget_id, current_user)
+    budget = await BudgetService.update(db, budget, budget_data)
+    return await _to_response(budget)
+
+
+@router.delete("/{budget_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_budget(
+    budget_id: UUID,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+) -> None:
+    """Delete a budget"""
+    budget = await _get_owned_budget(db, budget_id, current_user)
+    await BudgetService.delete(db, budget)
+
+
+@router.get("/{budget_id}/alerts", response_model=list[BudgetAlertResponse])
+async def list_budget_alerts(
+    budget_id: UUID,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+) -> list[BudgetAlertResponse]:
+    """Threshold and exhaustion alerts of a budget, newest first"""
+    await _get_owned_budget(db, budget_id, current_user)
+    alerts = await BudgetService.get_alerts(db, budget_id)
+    return [BudgetAlertResponse.model_validate(a) for a in alerts]
+
+
+# Helper functions
+async def _authorize_scope(db: AsyncSession, scope: RollupScope, scope_id: UUID, user: Principal) -> UUID:
+    """Ensure the user owns the project of the scope; returns the project's ID"""
+    if scope == RollupScope.PROJECT:
+        project_id = scope_id
+    else:
+        service = AgentService if scope == RollupScope.AGENT else WorkflowService
+        obj = await service.get_by_id(db, scope_id)
+        if not obj:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"{scope.value.capitalize()} not found"
+            )
+        project_id = obj.project_id
+
+    await authorize_project(
+        db, user, project_id,
+        "You don't have permission to manage budgets of this project",
+    )
+    return project_id
+
+
+async def _get_owned_budget(db: AsyncSession, budget_id: UUID, user: Principal) -> Budget:
+    """Load a budget the user may manage"""
+    budget = await BudgetService.get_by_id(db, budget_id)
+    if not budget:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Budget not found"
+        )
+    await _authorize_scope(db, RollupScope.PROJECT, budget.project_id, user)
+    return budget
+
+
+async def _to_response(budget: Budget) -> BudgetResponse:
+    """Budget with its spend in the current period"""
+    now = datetime.utcnow()
+    spent = await BudgetService.get_spent(budget, now)
+    response = BudgetResponse.model_validate(budget)
+    response.period_start = period_start(budget.period, now)
+    response.spent_usd = float(spent)
+    response.remaining_usd = max(float(budget.limit_usd - spent), 0.0)
+    return response
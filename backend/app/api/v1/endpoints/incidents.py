@@ -0,0 +1,89 @@
+"""
+Incident API Endpoints - Anomalies detected in run failure rates and latency
+"""
+from typing import Optional
+from uuid import UUID
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import get_db, get_current_user, authorize_project
+from app.models.incident import Incident, IncidentStatus
+from app.services.user_service import Principal
+from app.schemas.incident import IncidentUpdate, IncidentResponse, IncidentListResponse
+from app.services.incident_service import IncidentService
+
+router = APIRouter()
+
+
+@router.get("/", response_model=IncidentListResponse)
+async def list_incidents(
+    project_id: UUID = Query(..., alias="projectId"),
+    incident_status: Optional[IncidentStatus] = Query(None, alias="status", description="open, mitigated or resolved"),
+    page: int = Query(1, ge=1, description="Page number"),
+    page_size: int = Query(20, ge=1, le=100, alias="pageSize", description="Items per page"),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+) -> IncidentListResponse:
+    """List a project's incidents, newest first"""
+    await _authorize_project(db, project_id, current_user)
+
+    incidents, total = await IncidentService.get_by_project(
+        db, project_id, skip=(page - 1) * page_size, limit=page_size, status=incident_status
+    )
+    return IncidentListResponse(
+        items=[IncidentResponse.model_validate(i) for i in incidents],
+        total=total,
+        page=page,
+        page_size=page_size,
+        total_pages=(total + page_size - 1) // page_size,
+    )
+
+
+@router.get("/{incident_id}", response_model=IncidentResponse)
+async def get_incident(
+    incident_id: UUID,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+) -> IncidentResponse:
+    """Get an incident"""
+    incident = await _get_owned_incident(db, incident_id, current_user)
+    return IncidentResponse.model_validate(incident)
+
+
+@router.patch("/{incident_id}", response_model=IncidentResponse)
+async def update_incident(
+    incident_id: UUID,
+    incident_data: IncidentUpdate,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+) -> IncidentResponse:
+    """
+    Triage an incident: mitigate, resolve, reopen, re-rank or reassign
+
+    Incidents also resolve on their own once the detector sees the failure
+    rate or latency back near its baseline.
+    """
+    incident = await _get_owned_incident(db, incident_id, current_user)
+    incident = await IncidentService.update(db, incident, incident_data)
+    return IncidentResponse.model_validate(incident)
+
+
+# Helper functions
+async def _authorize_project(db: AsyncSession, project_id: UUID, user: Principal) -> None:
+    """Ensure the user owns the project"""
+    await authorize_project(
+        db, user, project_id,
+        "You don't have permission to view incidents of this project",
+    )
+
+
+async def _get_owned_incident(db: AsyncSession, incident_id: UUID, user: Principal) -> Incident:
+    """Load an incident of a project the user owns"""
+    incident = await IncidentService.get_by_id(db, incident_id)
+    if not incident:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Incident not found"
+        )
+    await _authorize_project(db, incident.project_id, user)
+    return incident
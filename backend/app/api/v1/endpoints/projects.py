@@ -3,18 +3,22 @@ Project API Endpoints
 """
 from typing import List
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.deps import get_db, get_current_user
-from app.models.user import User
+from app.api.deps import get_db, get_current_user, authorize_project
+from app.services.user_service import Principal
 from app.schemas.project import (
     ProjectCreate,
     ProjectUpdate,
     ProjectResponse,
     ProjectListResponse,
+    ProjectOverviewResponse,
 )
+from app.schemas.job import JobResponse
 from app.services.project_service import ProjectService
+from app.services.overview_service import OverviewService
+from app.services.deletion_service import DeletionService
 
 router = APIRouter()
 
@@ -23,7 +27,7 @@ router = APIRouter()
 async def create_project(
     project_data: ProjectCreate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ) -> ProjectResponse:
     """Create a new project"""
     project = await ProjectService.create(db, project_data, current_user.id)
@@ -35,7 +39,7 @@ async def list_projects(
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(20, ge=1, le=100, description="Items per page"),
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ) -> ProjectListResponse:
     """List all projects for current user"""
     skip = (page - 1) * page_size
@@ -58,7 +62,7 @@ async def search_projects(
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(20, ge=1, le=100, description="Items per page"),
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ) -> ProjectListResponse:
     """Search projects by name or description"""
     skip = (page - 1) * page_size
@@ -79,7 +83,7 @@ async def search_projects(
 async def get_project(
     project_id: UUID,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ) -> ProjectResponse:
     """Get a specific project"""
     project = await ProjectService.get_by_id(db, project_id)
@@ -100,53 +104,55 @@ async def get_project(
     return ProjectResponse.model_validate(project)
 
 
+@router.get("/{project_id}/overview", response_model=ProjectOverviewResponse)
+async def get_project_overview(
+    project_id: UUID,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+) -> ProjectOverviewResponse:
+    """
+    Get dashboard counts for a project
+
+    Agents, tools and workflows by status (agents also by health), runs in
+    flight, and runs finished in the last PROJECT_OVERVIEW_WINDOW_HOURS.
+    Served from a per-process cache that is refreshed in the background,
+    so counts may be a few seconds old.
+    """
+    await authorize_project(db, current_user, project_id, "Not authorized to access this project")
+    
+    overview = await OverviewService.get_project_overview(project_id)
+    return ProjectOverviewResponse.model_validate(overview)
+
+
 @router.put("/{project_id}", response_model=ProjectResponse)
 async def update_project(
     project_id: UUID,
     project_data: ProjectUpdate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ) -> ProjectResponse:
     """Update a project"""
-    project = await ProjectService.get_by_id(db, project_id)
-    
-    if not project:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Project not found",
-        )
-    
-    # Check ownership
-    if project.owner_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to modify this project",
-        )
+    await authorize_project(db, current_user, project_id, "Not authorized to modify this project")
     
     updated_project = await ProjectService.update(db, project_id, project_data)
     return ProjectResponse.model_validate(updated_project)
 
 
-@router.delete("/{project_id}", status_code=status.HTTP_204_NO_CONTENT)
+@router.delete("/{project_id}", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
 async def delete_project(
     project_id: UUID,
+    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-) -> None:
-    """Delete a project"""
-    project = await ProjectService.get_by_id(db, project_id)
+    current_user: Principal = Depends(get_current_user),
+) -> JobResponse:
+    """
+    Delete a project
     
-    if not project:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Project not found",
-        )
-    
-    # Check ownership
-    if project.owner_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to delete this project",
-        )
+    The project and everything in it are deleted by a background job in
+    bounded batches. Returns the job; poll /jobs/{id} for its status.
+    """
+    await authorize_project(db, current_user, project_id, "Not authorized to delete this project")
     
-    await ProjectService.delete(db, project_id)
+    job = await DeletionService.request_project_delete(db, project_id, current_user.id)
+    background_tasks.add_task(DeletionService.run, job.id)
+    return JobResponse.model_validate(job)
@@ -0,0 +1,59 @@
+"""
+Rate Limit API Endpoints - The rate limit policy, changeable at runtime
+"""
+from fastapi import APIRouter, Depends, HTTPException, status
+
+from app.api.deps import get_current_superuser
+from app.services.user_service import Principal
+from app.schemas.rate_limit import RateLimitPolicy
+from app.services.rate_limit_service import RateLimitService
+
+router = APIRouter()
+
+
+@router.get("/policy", response_model=RateLimitPolicy)
+async def get_rate_limit_policy(
+    current_user: Principal = Depends(get_current_superuser),
+) -> RateLimitPolicy:
+    """Get the rate limit policy in effect"""
+    try:
+        return await RateLimitService.get_policy()
+    except Exception:
+        raise _unavailable()
+
+
+@router.put("/policy", response_model=RateLimitPolicy)
+async def set_rate_limit_policy(
+    policy: RateLimitPolicy,
+    current_user: Principal = Depends(get_current_superuser),
+) -> RateLimitPolicy:
+    """
+    Replace the rate limit policy
+
+    Every process applies it within RATE_LIMIT_POLICY_REFRESH_SECONDS.
+    Route rules are tried in order; the first matching one sets the
+    request's cost and quota class.
+    """
+    try:
+        await RateLimitService.set_policy(policy)
+    except Exception:
+        raise _unavailable()
+    return policy
+
+
+@router.delete("/policy", status_code=status.HTTP_204_NO_CONTENT)
+async def reset_rate_limit_policy(
+    current_user: Principal = Depends(get_current_superuser),
+) -> None:
+    """Go back to the default policy (from settings)"""
+    try:
+        await RateLimitService.reset_policy()
+    except Exception:
+        raise _unavailable()
+
+
+def _unavailable() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Rate limit policy store (Redis) is unavailable",
+    )
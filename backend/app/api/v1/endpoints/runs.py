@@ -1,16 +1,30 @@
 """
 Runs API Endpoints - Workflow execution tracking
 """
-from typing import Optional
+import time
+from typing import AsyncIterator, Optional
 from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.session import get_db
-from app.api.deps import get_current_user
-from app.models.user import User
+from app.core.config import settings
+from app.db.session import get_db, AsyncSessionLocal, apply_deadline
+from app.api.deps import get_current_user, authorize_project
+from app.models.workflow_execution import WorkflowExecution
+from app.services.user_service import Principal
+from app.services.budget_service import BudgetExhausted, RunHeld
 from app.services.run_service import RunService
-from app.schemas.run import RunCreate, RunResponse, RunListResponse, RunStepResponse
+from app.services.workflow_service import WorkflowService
+from app.schemas.run import (
+    RunCreate,
+    RunUpdate,
+    RunResponse,
+    RunListResponse,
+    RunStepCreate,
+    RunStepUpdate,
+    RunStepResponse,
+)
 
 router = APIRouter(prefix="/runs", tags=["Runs"])
 
@@ -19,10 +33,32 @@ router = APIRouter(prefix="/runs", tags=["Runs"])
 async def create_run(
     run_data: RunCreate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ) -> RunResponse:
-    """Trigger new workflow execution"""
-    run = await RunService.create(db, run_data, current_user.id)
+    """
+    Trigger new workflow execution
+    
+    Refused with 402 when a budget of the project, workflow or agent is exhausted;
+    budgets set to queue accept the run but hold it (metadata ``budget_hold``).
+    Workflows of projects being deleted are not found.
+    """
+    try:
+        workflow_id = UUID(run_data.workflow_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid workflow ID format")
+    workflow = await WorkflowService.get_by_id(db, workflow_id)
+    if not workflow:
+        raise HTTPException(status_code=404, detail="Workflow not found")
+    await authorize_project(
+        db, current_user, workflow.project_id,
+        "You don't have permission to run workflows of this project",
+        missing_detail="Workflow not found",
+    )
+    
+    try:
+        run = await RunService.create(db, run_data, current_user.id)
+    except BudgetExhausted as e:
+        raise HTTPException(status_code=status.HTTP_402_PAYMENT_REQUIRED, detail=str(e))
     return RunResponse.model_validate(run)
 
 
@@ -33,31 +69,93 @@ async def list_runs(
     workflow_id: Optional[str] = Query(None, alias="workflowId"),
     page: int = Query(1, ge=1),
     limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Run ID to continue after (keyset pagination)"),
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ) -> RunListResponse:
-    """List runs with filters"""
+    """
+    List runs with filters
+    
+    Supports page-based pagination, or cursor-based pagination by passing the
+    previous response's ``nextCursor`` as ``cursor``. Runs are newest first by
+    id; cursor pages leave out ``total`` and ``totalPages``. Only runs of the
+    user's projects are listed.
+    """
+    cursor_uuid = None
+    if cursor:
+        try:
+            cursor_uuid = UUID(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor format")
+    
     skip = (page - 1) * limit
-    runs, total = await RunService.list_runs(db, skip, limit, status, agent_id, workflow_id)
-    total_pages = (total + limit - 1) // limit
+    runs, total = await RunService.list_runs(
+        db, skip, limit, status, agent_id, workflow_id, cursor=cursor_uuid, owner_id=current_user.id
+    )
+    total_pages = (total + limit - 1) // limit if total is not None else None
+    next_cursor = str(runs[-1].id) if len(runs) == limit else None
     
     return RunListResponse(
         runs=[RunResponse.model_validate(r) for r in runs],
         total=total,
         page=page,
         limit=limit,
-        total_pages=total_pages
+        total_pages=total_pages,
+        next_cursor=next_cursor
     )
 
 
+@router.get("/export")
+async def export_runs(
+    status: Optional[str] = Query(None),
+    agent_id: Optional[str] = Query(None, alias="agentId"),
+    workflow_id: Optional[str] = Query(None, alias="workflowId"),
+    current_user: Principal = Depends(get_current_user),
+) -> StreamingResponse:
+    """
+    Export all runs of the user's projects matching the filters as
+    newline-delimited JSON
+    
+    Rows are read through a server-side cursor and written out batch by
+    batch, so memory use doesn't depend on how many runs match.
+    """
+    async def generate() -> AsyncIterator[str]:
+        async with _export_session() as db:
+            async for batch in RunService.stream_runs(db, status, agent_id, workflow_id, current_user.id):
+                yield "".join(
+                    RunResponse.model_validate(r).model_dump_json(by_alias=True) + "\n"
+                    for r in batch
+                )
+    
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+
 @router.get("/{run_id}", response_model=RunResponse)
 async def get_run(
-    run_id: str,
+    run_id: UUID,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ) -> RunResponse:
     """Get run details"""
-    run = await RunService.get_by_id(db, UUID(run_id))
+    run = await _get_owned_run(db, run_id, current_user)
+    return RunResponse.model_validate(run)
+
+
+@router.patch("/{run_id}", response_model=RunResponse)
+async def update_run(
+    run_id: UUID,
+    run_data: RunUpdate,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+) -> RunResponse:
+    """Update run status and results (reported by the executor); a run held by a budget can't start (409)"""
+    await _get_owned_run(db, run_id, current_user)
+    try:
+        run = await RunService.update(db, run_id, run_data)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid run status")
+    except RunHeld as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
     if not run:
         raise HTTPException(status_code=404, detail="Run not found")
     return RunResponse.model_validate(run)
@@ -65,12 +163,13 @@ async def get_run(
 
 @router.patch("/{run_id}/cancel", response_model=RunResponse)
 async def cancel_run(
-    run_id: str,
+    run_id: UUID,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ) -> RunResponse:
     """Cancel running execution"""
-    run = await RunService.cancel(db, UUID(run_id))
+    await _get_owned_run(db, run_id, current_user)
+    run = await RunService.cancel(db, run_id)
     if not run:
         raise HTTPException(status_code=404, detail="Run not found or not running")
     return RunResponse.model_validate(run)
@@ -78,26 +177,112 @@ async def cancel_run(
 
 @router.get("/{run_id}/steps", response_model=list[RunStepResponse])
 async def get_run_steps(
-    run_id: str,
+    run_id: UUID,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ) -> list[RunStepResponse]:
     """Get all steps for a run"""
-    steps = await RunService.get_steps(db, UUID(run_id))
+    await _get_owned_run(db, run_id, current_user)
+    steps = await RunService.get_steps(db, run_id)
     return [RunStepResponse.model_validate(s) for s in steps]
 
 
+@router.post("/{run_id}/steps", response_model=RunStepResponse, status_code=status.HTTP_201_CREATED)
+async def create_run_step(
+    run_id: UUID,
+    step_data: RunStepCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+) -> RunStepResponse:
+    """Record the start of a step (reported by the executor); refused with 409 while a budget holds the run"""
+    await _get_owned_run(db, run_id, current_user)
+    try:
+        step = await RunService.create_step(db, run_id, step_data)
+    except RunHeld as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    if not step:
+        raise HTTPException(status_code=404, detail="Run not found")
+    return RunStepResponse.model_validate(step)
+
+
+@router.patch("/{run_id}/steps/{step_id}", response_model=RunStepResponse)
+async def update_run_step(
+    run_id: UUID,
+    step_id: UUID,
+    step_data: RunStepUpdate,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+) -> RunStepResponse:
+    """Update a step; ``success`` completes or fails it (reported by the executor)"""
+    await _get_owned_run(db, run_id, current_user)
+    step = await RunService.update_step(db, run_id, step_id, step_data)
+    if not step:
+        raise HTTPException(status_code=404, detail="Step not found")
+    return RunStepResponse.model_validate(step)
+
+
+@router.get("/{run_id}/steps/export")
+async def export_run_steps(
+    run_id: UUID,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+) -> StreamingResponse:
+    """Export all steps for a run as newline-delimited JSON"""
+    await _get_owned_run(db, run_id, current_user)
+    
+    async def generate() -> AsyncIterator[str]:
+        async with _export_session() as export_db:
+            async for batch in RunService.stream_steps(export_db, run_id):
+                yield "".join(
+                    RunStepResponse.model_validate(s).model_dump_json(by_alias=True) + "\n"
+                    for s in batch
+                )
+    
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+
 @router.post("/{run_id}/retry", response_model=RunResponse)
 async def retry_run(
-    run_id: str,
+    run_id: UUID,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ) -> RunResponse:
     """Retry a failed or cancelled run"""
-    run = await RunService.retry(db, UUID(run_id), current_user.id)
+    await _get_owned_run(db, run_id, current_user)
+    try:
+        run = await RunService.retry(db, run_id, current_user.id)
+    except BudgetExhausted as e:
+        raise HTTPException(status_code=status.HTTP_402_PAYMENT_REQUIRED, detail=str(e))
     if not run:
         raise HTTPException(
             status_code=404, 
             detail="Run not found or cannot be retried (only failed/cancelled runs can be retried)"
         )
     return RunResponse.model_validate(run)
+
+
+# Helper functions
+async def _get_owned_run(db: AsyncSession, run_id: UUID, user: Principal) -> WorkflowExecution:
+    """Load a run of a project the user owns"""
+    run = await RunService.get_by_id(db, run_id)
+    if not run or run.project_id is None:
+        raise HTTPException(status_code=404, detail="Run not found")
+    await authorize_project(
+        db, user, run.project_id,
+        "You don't have permission to access runs of this project",
+        missing_detail="Run not found",
+    )
+    return run
+
+
+def _export_session() -> AsyncSession:
+    """
+    Session for streaming an export
+    
+    The request-scoped session is closed before the body is streamed, so
+    exports get their own, bounded by EXPORT_TIMEOUT_MS instead of the
+    request's deadline.
+    """
+    db = AsyncSessionLocal()
+    apply_deadline(db, time.monotonic() + settings.EXPORT_TIMEOUT_MS / 1000)
+    return db
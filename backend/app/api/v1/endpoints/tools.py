@@ -8,11 +8,10 @@ from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.session import get_db
-from app.api.deps import get_current_user
-from app.models.user import User
+from app.api.deps import get_current_user, authorize_project
+from app.services.user_service import Principal
 from app.models.project import Project
 from app.services.tool_service import ToolService
-from app.services.project_service import ProjectService
 from app.schemas.tool import (
     ToolCreate,
     ToolUpdate,
@@ -28,7 +27,7 @@ router = APIRouter(prefix="/tools", tags=["Tools"])
 async def create_tool(
     tool_data: ToolCreate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ) -> ToolResponse:
     """
     Create a new tool
@@ -36,17 +35,10 @@ async def create_tool(
     Requires the user to own the project specified in project_id
     """
     # Verify project ownership
-    project = await ProjectService.get_by_id(db, UUID(tool_data.project_id))
-    if not project:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Project not found"
-        )
-    if project.owner_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You don't have permission to create tools in this project"
-        )
+    await authorize_project(
+        db, current_user, UUID(tool_data.project_id),
+        "You don't have permission to create tools in this project",
+    )
     
     tool = await ToolService.create(db, tool_data, current_user.id)
     return ToolResponse.model_validate(tool)
@@ -61,7 +53,7 @@ async def list_tools(
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(20, ge=1, le=100, description="Items per page"),
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ) -> ToolListResponse:
     """
     List all tools for a project
@@ -76,17 +68,10 @@ async def list_tools(
         )
     
     # Verify project access
-    project = await ProjectService.get_by_id(db, UUID(project_id))
-    if not project:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Project not found"
-        )
-    if project.owner_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You don't have permission to view tools in this project"
-        )
+    await authorize_project(
+        db, current_user, UUID(project_id),
+        "You don't have permission to view tools in this project",
+    )
     
     skip = (page - 1) * page_size
     tools, total = await ToolService.get_by_project(
@@ -114,7 +99,7 @@ async def list_tools(
 async def get_tool(
     tool_id: str,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ) -> ToolResponse:
     """
     Get a specific tool by ID
@@ -135,12 +120,11 @@ async def get_tool(
         )
     
     # Verify project ownership
-    project = await ProjectService.get_by_id(db, tool.project_id)
-    if not project or project.owner_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You don't have permission to view this tool"
-        )
+    await authorize_project(
+        db, current_user, tool.project_id,
+        "You don't have permission to view this tool",
+        missing_detail=None,
+    )
     
     return ToolResponse.model_validate(tool)
 
@@ -150,7 +134,7 @@ async def update_tool(
     tool_id: str,
     tool_data: ToolUpdate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ) -> ToolResponse:
     """
     Update an existing tool
@@ -172,12 +156,11 @@ async def update_tool(
         )
     
     # Verify project ownership
-    project = await ProjectService.get_by_id(db, existing_tool.project_id)
-    if not project or project.owner_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You don't have permission to update this tool"
-        )
+    await authorize_project(
+        db, current_user, existing_tool.project_id,
+        "You don't have permission to update this tool",
+        missing_detail=None,
+    )
     
     tool = await ToolService.update(db, tool_uuid, tool_data)
     return ToolResponse.model_validate(tool)
@@ -187,7 +170,7 @@ async def update_tool(
 async def delete_tool(
     tool_id: str,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ) -> None:
     """
     Delete a tool
@@ -209,12 +192,11 @@ async def delete_tool(
         )
     
     # Verify project ownership
-    project = await ProjectService.get_by_id(db, existing_tool.project_id)
-    if not project or project.owner_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You don't have permission to delete this tool"
-        )
+    await authorize_project(
+        db, current_user, existing_tool.project_id,
+        "You don't have permission to delete this tool",
+        missing_detail=None,
+    )
     
     await ToolService.delete(db, tool_uuid)
 
@@ -223,7 +205,7 @@ async def delete_tool(
 async def test_tool_connection(
     tool_id: str,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ) -> ToolTestResponse:
     """
     Test tool connection/configuration
@@ -246,12 +228,11 @@ async def test_tool_connection(
         )
     
     # Verify project ownership
-    project = await ProjectService.get_by_id(db, tool.project_id)
-    if not project or project.owner_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You don't have permission to test this tool"
-        )
+    await authorize_project(
+        db, current_user, tool.project_id,
+        "You don't have permission to test this tool",
+        missing_detail=None,
+    )
     
     # TODO: Implement actual tool testing logic based on kind
     # For now, return a success placeholder
@@ -4,16 +4,19 @@ RESTful API for workflow management
 """
 from typing import Optional, List
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, Query, status, Body
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, status, Body
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
 
 from app.db.session import get_db
-from app.api.deps import get_current_user
-from app.models.user import User
-from app.models.workflow_execution import WorkflowExecution, ExecutionStatus
+from app.api.deps import get_current_user, authorize_project, route_timeout
+from app.core.config import settings
+from app.services.user_service import Principal
+from app.models.latency_sketch import SketchMetric, SketchScope
+from app.services.analytics_service import AnalyticsService
+from app.services.sketch_service import SketchService
 from app.services.workflow_service import WorkflowService
-from app.services.project_service import ProjectService
+from app.services.deletion_service import DeletionService
+from app.schemas.job import JobResponse
 from app.schemas.workflow import (
     WorkflowCreate,
     WorkflowUpdate,
@@ -30,7 +33,7 @@ router = APIRouter(prefix="/workflows", tags=["Workflows"])
 async def create_workflow(
     workflow_data: WorkflowCreate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ) -> WorkflowResponse:
     """
     Create a new workflow
@@ -38,17 +41,10 @@ async def create_workflow(
     Requires the user to own the project specified in project_id
     """
     # Verify project ownership
-    project = await ProjectService.get_by_id(db, UUID(workflow_data.project_id))
-    if not project:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Project not found"
-        )
-    if project.owner_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You don't have permission to create workflows in this project"
-        )
+    await authorize_project(
+        db, current_user, UUID(workflow_data.project_id),
+        "You don't have permission to create workflows in this project",
+    )
     
     workflow = await WorkflowService.create(db, workflow_data, current_user.id)
     
@@ -67,7 +63,7 @@ async def list_workflows(
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(20, ge=1, le=100, description="Items per page"),
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ) -> WorkflowListResponse:
     """
     List all workflows for a project
@@ -82,17 +78,10 @@ async def list_workflows(
         )
     
     # Verify project access
-    project = await ProjectService.get_by_id(db, UUID(project_id))
-    if not project:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Project not found"
-        )
-    if project.owner_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You don't have permission to view workflows in this project"
-        )
+    await authorize_project(
+        db, current_user, UUID(project_id),
+        "You don't have permission to view workflows in this project",
+    )
     
     # Parse tags
     tag_list = tags.split(',') if tags else None
@@ -109,14 +98,16 @@ async def list_workflows(
     
     total_pages = (total + page_size - 1) // page_size
     
+    # Analytics for the whole page come from one grouped query
+    page_analytics = await AnalyticsService.get_workflows_stats(db, [wf.id for wf in workflows])
+    
     # Build responses with versions and analytics
     workflow_responses = []
     for wf in workflows:
         response = WorkflowResponse.model_validate(wf)
         response.versions = _build_version_list(wf)
         
-        # Calculate analytics from executions
-        analytics = await _calculate_workflow_analytics(db, wf.id)
+        analytics = page_analytics[wf.id]
         response.avg_duration_ms = analytics['avg_duration_ms']
         response.success_rate = analytics['success_rate']
         response.last_run_at = analytics['last_run_at']
@@ -136,7 +127,7 @@ async def list_workflows(
 async def get_workflow(
     workflow_id: str,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ) -> WorkflowResponse:
     """
     Get a specific workflow by ID
@@ -157,18 +148,17 @@ async def get_workflow(
         )
     
     # Verify project ownership
-    project = await ProjectService.get_by_id(db, workflow.project_id)
-    if not project or project.owner_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You don't have permission to view this workflow"
-        )
+    await authorize_project(
+        db, current_user, workflow.project_id,
+        "You don't have permission to view this workflow",
+        missing_detail=None,
+    )
     
     response = WorkflowResponse.model_validate(workflow)
     response.versions = _build_version_list(workflow)
     
     # Add analytics
-    analytics = await _calculate_workflow_analytics(db, workflow.id)
+    analytics = await AnalyticsService.get_workflow_stats(db, workflow.id)
     response.avg_duration_ms = analytics['avg_duration_ms']
     response.success_rate = analytics['success_rate']
     response.last_run_at = analytics['last_run_at']
@@ -181,7 +171,7 @@ async def update_workflow(
     workflow_id: str,
     workflow_data: WorkflowUpdate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ) -> WorkflowResponse:
     """
     Update an existing workflow
@@ -203,12 +193,11 @@ async def update_workflow(
         )
     
     # Verify project ownership
-    project = await ProjectService.get_by_id(db, existing_workflow.project_id)
-    if not project or project.owner_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You don't have permission to update this workflow"
-        )
+    await authorize_project(
+        db, current_user, existing_workflow.project_id,
+        "You don't have permission to update this workflow",
+        missing_detail=None,
+    )
     
     workflow = await WorkflowService.update(db, workflow_uuid, workflow_data, current_user.id)
     
@@ -218,14 +207,18 @@ async def update_workflow(
     return response
 
 
-@router.delete("/{workflow_id}", status_code=status.HTTP_204_NO_CONTENT)
+@router.delete("/{workflow_id}", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
 async def delete_workflow(
     workflow_id: str,
+    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-) -> None:
+    current_user: Principal = Depends(get_current_user),
+) -> JobResponse:
     """
     Delete a workflow
+    
+    The workflow and its run history are deleted by a background job in
+    bounded batches. Returns the job; poll /jobs/{id} for its status.
     """
     try:
         workflow_uuid = UUID(workflow_id)
@@ -244,14 +237,15 @@ async def delete_workflow(
         )
     
     # Verify project ownership
-    project = await ProjectService.get_by_id(db, existing_workflow.project_id)
-    if not project or project.owner_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You don't have permission to delete this workflow"
-        )
+    await authorize_project(
+        db, current_user, existing_workflow.project_id,
+        "You don't have permission to delete this workflow",
+        missing_detail=None,
+    )
     
-    await WorkflowService.delete(db, workflow_uuid)
+    job = await DeletionService.request_workflow_delete(db, workflow_uuid, current_user.id)
+    background_tasks.add_task(DeletionService.run, job.id)
+    return JobResponse.model_validate(job)
 
 
 @router.post("/{workflow_id}/versions", response_model=WorkflowResponse)
@@ -259,7 +253,7 @@ async def create_workflow_version(
     workflow_id: str,
     note: Optional[str] = Body(None, embed=True),
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ) -> WorkflowResponse:
     """
     Create a new version of the workflow
@@ -285,11 +279,15 @@ async def create_workflow_version(
     return response
 
 
-@router.get("/{workflow_id}/analytics", response_model=WorkflowAnalyticsResponse)
+@router.get(
+    "/{workflow_id}/analytics",
+    response_model=WorkflowAnalyticsResponse,
+    dependencies=[Depends(route_timeout(settings.ANALYTICS_REQUEST_TIMEOUT_MS))],
+)
 async def get_workflow_analytics(
     workflow_id: str,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ) -> WorkflowAnalyticsResponse:
     """
     Get workflow analytics and statistics
@@ -310,17 +308,22 @@ async def get_workflow_analytics(
         )
     
     # Verify project ownership
-    project = await ProjectService.get_by_id(db, workflow.project_id)
-    if not project or project.owner_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You don't have permission to view this workflow's analytics"
-        )
+    await authorize_project(
+        db, current_user, workflow.project_id,
+        "You don't have permission to view this workflow's analytics",
+        missing_detail=None,
+    )
     
-    analytics = await _calculate_workflow_analytics(db, workflow.id)
+    analytics = await AnalyticsService.get_workflow_stats(db, workflow.id)
+    durations = await SketchService.get_sketch(
+        db, SketchMetric.RUN_DURATION, SketchScope.WORKFLOW, str(workflow.id)
+    )
     
     return WorkflowAnalyticsResponse(
         avg_duration_ms=analytics['avg_duration_ms'],
+        p50_duration_ms=_round_ms(durations.quantile(0.5)),
+        p95_duration_ms=_round_ms(durations.quantile(0.95)),
+        p99_duration_ms=_round_ms(durations.quantile(0.99)),
         success_rate=analytics['success_rate'],
         total_runs=analytics['total_runs'],
         last_run_at=analytics['last_run_at'],
@@ -346,45 +349,6 @@ def _build_version_list(workflow) -> List[WorkflowVersion]:
     return versions
 
 
-async def _calculate_workflow_analytics(db: AsyncSession, workflow_id: UUID) -> dict:
-    """Calculate workflow analytics from executions"""
-    # Get all executions for this workflow
-    executions_query = select(WorkflowExecution).where(
-        WorkflowExecution.workflow_id == workflow_id
-    )
-    result = await db.execute(executions_query)
-    executions = list(result.scalars().all())
-    
-    if not executions:
-        return {
-            'avg_duration_ms': None,
-            'success_rate': None,
-            'total_runs': 0,
-            'last_run_at': None,
-            'failed_runs': 0,
-            'succeeded_runs': 0
-        }
-    
-    total_runs = len(executions)
-    succeeded = [e for e in executions if e.status == ExecutionStatus.COMPLETED]
-    failed = [e for e in executions if e.status == ExecutionStatus.FAILED]
-    
-    # Calculate average duration (only completed runs)
-    durations = [e.duration_ms for e in succeeded if e.duration_ms]
-    avg_duration = int(sum(durations) / len(durations)) if durations else None
-    
-    # Calculate success rate
-    success_rate = len(succeeded) / total_runs if total_runs > 0 else None
-    
-    # Get last run
-    sorted_executions = sorted(executions, key=lambda e: e.started_at, reverse=True)
-    last_run_at = sorted_executions[0].started_at if sorted_executions else None
-    
-    return {
-        'avg_duration_ms': avg_duration,
-        'success_rate': success_rate,
-        'total_runs': total_runs,
-        'last_run_at': last_run_at,
-        'failed_runs': len(failed),
-        'succeeded_runs': len(succeeded)
-    }
+def _round_ms(value: Optional[float]) -> Optional[int]:
+    """Round a sketch quantile to whole milliseconds"""
+    return round(value) if value is not None else None
@@ -4,7 +4,9 @@ Main API router for version 1
 from fastapi import APIRouter
 
 # Import endpoint routers
-from app.api.v1.endpoints import auth, projects, agents, tools, workflows, runs
+from app.api.v1.endpoints import (
+    auth, projects, agents, tools, workflows, runs, jobs, analytics, budgets, incidents, rate_limits,
+)
 
 api_router = APIRouter()
 
@@ -15,6 +17,11 @@ api_router.include_router(agents.router, prefix="/agents", tags=["Agents"])
 api_router.include_router(tools.router, prefix="/tools", tags=["Tools"])
 api_router.include_router(workflows.router, prefix="/workflows", tags=["Workflows"])
 api_router.include_router(runs.router, prefix="/runs", tags=["Runs"])
+api_router.include_router(jobs.router, prefix="/jobs", tags=["Jobs"])
+api_router.include_router(analytics.router, prefix="/analytics", tags=["Analytics"])
+api_router.include_router(budgets.router, prefix="/budgets", tags=["Budgets"])
+api_router.include_router(incidents.router, prefix="/incidents", tags=["Incidents"])
+api_router.include_router(rate_limits.router, prefix="/rate-limits", tags=["Rate Limits"])
 
 # TODO: Add more routers as they are created
 # api_router.include_router(projects.router, prefix="/projects", tags=["Projects"])
@@ -36,6 +43,11 @@ async def api_info():
             "workflows": "/workflows",
             "runs": "/runs",
             "tools": "/tools",
+            "jobs": "/jobs",
+            "analytics": "/analytics",
+            "budgets": "/budgets",
+            "incidents": "/incidents",
+            "rate_limits": "/rate-limits",
             "schedules": "/schedules",
             "policies": "/policies",
         },
@@ -0,0 +1,158 @@
+"""
+Streaming anomaly detection with EWMA baselines
+
+Each tracked series (e.g. the runs of one workflow) keeps a fixed handful
+of numbers: for the failure rate, a slow EWMA (the baseline) and a fast
+EWMA (recent behaviour); for latency, the same over log-durations plus the
+baseline's exponentially weighted variance. A signal is breached when the
+recent value leaves the baseline by more than its threshold and clears once
+it is back within half of it. The failure baseline stops learning while
+breached, and the latency baseline while the recent value is past half the
+threshold, so a developing problem neither drags the baseline along nor
+becomes the new normal; forget a series with ``reset`` to accept a lasting
+change.
+
+Series are kept in an LRU of bounded size, so memory is constant per series
+and bounded per process. Evicting a series drops its state without any
+transition: nothing recovered, so a breach stays open for its owner to
+close.
+"""
+import math
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Hashable, List, NamedTuple, Optional
+
+FAILURE_RATE = "failure_rate"
+LATENCY = "latency"
+
+# Floor for the log-latency standard deviation (about 5%), so perfectly
+# steady series don't alert on noise
+MIN_LOG_STDDEV = 0.05
+
+
+@dataclass(frozen=True)
+class DetectorConfig:
+    """Detector tuning"""
+    fast_alpha: float = 0.05  # Weight of the newest run in recent values
+    slow_alpha: float = 0.01  # Weight of the newest run in baselines
+    warmup: int = 30  # Runs seen before a series may alert
+    failure_rate_delta: float = 0.25  # Recent minus baseline failure rate that breaches
+    latency_z: float = 3.0  # Recent log-latency, in baseline standard deviations, that breaches
+
+
+class Transition(NamedTuple):
+    """A signal of a series became breached or cleared"""
+    key: Hashable
+    signal: str
+    breached: bool
+    baseline: float  # Failure rate, or typical duration
+    observed: float
+
+
+class SeriesState:
+    """Detector state of one series"""
+    __slots__ = (
+        "runs", "failure_fast", "failure_slow", "failure_breached",
+        "timed", "latency_fast", "latency_mean", "latency_var", "latency_breached",
+    )
+
+    def __init__(self) -> None:
+        self.runs = 0
+        self.failure_fast = 0.0
+        self.failure_slow = 0.0
+        self.failure_breached = False
+        self.timed = 0
+        self.latency_fast = 0.0
+        self.latency_mean = 0.0
+        self.latency_var = 0.0
+        self.latency_breached = False
+
+
+class AnomalyDetector:
+    """
+    Failure rate and latency anomaly detector over many series
+
+    Not thread-safe; meant to be fed from one task.
+    """
+
+    def __init__(self, config: DetectorConfig, max_series: int):
+        self.config = config
+        self.max_series = max_series
+        self._series: "OrderedDict[Hashable, SeriesState]" = OrderedDict()
+
+    def observe(self, key: Hashable, failed: bool, duration: Optional[float] = None) -> List[Transition]:
+        """
+        Add one finished run to a series; returns the signals that changed
+
+        ``duration`` (any positive unit) feeds the latency signal and is
+        only meaningful for successful runs. The series quiet for longest is
+        evicted to make room, silently.
+        """
+        state = self._series.get(key)
+        transitions: List[Transition] = []
+        if state is None:
+            state = self._series[key] = SeriesState()
+            while len(self._series) > self.max_series:
+                self._series.popitem(last=False)
+        else:
+            self._series.move_to_end(key)
+
+        transition = self._observe_failure(key, state, 1.0 if failed else 0.0)
+        if transition:
+            transitions.append(transition)
+        if duration is not None and duration > 0:
+            transition = self._observe_latency(key, state, math.log(duration))
+            if transition:
+                transitions.append(transition)
+        return transitions
+
+    def reset(self, key: Hashable) -> None:
+        """Forget a series (e.g. after its incident was resolved by hand)"""
+        self._series.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._series)
+
+    def _observe_failure(self, key: Hashable, state: SeriesState, x: float) -> Optional[Transition]:
+        cfg = self.config
+        state.runs += 1
+        # max(alpha, 1/n): plain means until there is enough history to weight
+        state.failure_fast += max(cfg.fast_alpha, 1 / state.runs) * (x - state.failure_fast)
+        if not state.failure_breached:
+            state.failure_slow += max(cfg.slow_alpha, 1 / state.runs) * (x - state.failure_slow)
+        if state.runs < cfg.warmup:
+            return None
+
+        excess = state.failure_fast - state.failure_slow
+        if not state.failure_breached and excess >= cfg.failure_rate_delta:
+            state.failure_breached = True
+        elif state.failure_breached and excess < cfg.failure_rate_delta / 2:
+            state.failure_breached = False
+        else:
+            return None
+        return Transition(key, FAILURE_RATE, state.failure_breached, state.failure_slow, state.failure_fast)
+
+    def _observe_latency(self, key: Hashable, state: SeriesState, y: float) -> Optional[Transition]:
+        cfg = self.config
+        state.timed += 1
+        state.latency_fast += max(cfg.fast_alpha, 1 / state.timed) * (y - state.latency_fast)
+        stddev = max(math.sqrt(state.latency_var), MIN_LOG_STDDEV)
+        z = (state.latency_fast - state.latency_mean) / stddev
+        diff = y - state.latency_mean
+        # Outliers are not learnt either, or a shift inflates the variance before it alerts
+        if state.timed <= cfg.warmup or (z < cfg.latency_z / 2 and abs(diff) <= cfg.latency_z * stddev):
+            alpha = max(cfg.slow_alpha, 1 / state.timed)
+            state.latency_mean += alpha * diff
+            state.latency_var = (1 - alpha) * (state.latency_var + alpha * diff * diff)
+        if state.timed < cfg.warmup:
+            return None
+
+        if not state.latency_breached and z >= cfg.latency_z:
+            state.latency_breached = True
+        elif state.latency_breached and z < cfg.latency_z / 2:
+            state.latency_breached = False
+        else:
+            return None
+        return Transition(
+            key, LATENCY, state.latency_breached, math.exp(state.latency_mean), math.exp(state.latency_fast)
+        )
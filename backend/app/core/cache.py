@@ -0,0 +1,121 @@
+"""
+In-process caching utilities
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Generic, Hashable, Optional, Tuple, TypeVar
+import structlog
+
+logger = structlog.get_logger()
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class TTLCache(Generic[K, V]):
+    """
+    Bounded LRU cache whose entries expire after a time-to-live
+
+    Not thread-safe; meant for per-process use from the event loop.
+    Expired entries are dropped lazily on access and evicted first by size.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[K, Tuple[float, V]]" = OrderedDict()
+
+    def get(self, key: K, default: Optional[V] = None) -> Optional[V]:
+        """Get a live entry (refreshing its LRU position) or ``default``"""
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: K, value: V, ttl: Optional[float] = None) -> None:
+        """Store an entry, evicting the least recently used ones beyond ``maxsize``"""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, key: K) -> None:
+        """Remove an entry if present"""
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """Remove all entries"""
+        self._data.clear()
+
+    def __contains__(self, key: object) -> bool:
+        return self.get(key) is not None  # type: ignore[arg-type]
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class StaleWhileRevalidateCache(Generic[K, V]):
+    """
+    Cache that keeps serving an entry after it goes stale while one
+    background task reloads it
+
+    Entries are fresh for ``fresh_ttl`` seconds and served (triggering a
+    refresh) until ``max_stale`` seconds old. Only misses wait for the
+    loader, and concurrent misses for a key share one load. Loaders run
+    outside the request that triggered them, so they must not use its
+    resources (e.g. open their own DB session).
+    """
+
+    def __init__(self, maxsize: int, fresh_ttl: float, max_stale: float):
+        self.fresh_ttl = fresh_ttl
+        self._entries: TTLCache[K, Tuple[float, V]] = TTLCache(maxsize, max_stale)
+        self._loading: Dict[K, "asyncio.Task[V]"] = {}
+
+    async def get(self, key: K, loader: Callable[[], Awaitable[V]]) -> V:
+        """Cached value for ``key``, loading it on a miss and refreshing it when stale"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            fresh_until, value = entry
+            if fresh_until <= time.monotonic():
+                self._load(key, loader)
+            return value
+        # Shielded so a cancelled request doesn't cancel a load others may be waiting on
+        return await asyncio.shield(self._load(key, loader))
+
+    def delete(self, key: K) -> None:
+        """Drop an entry so the next read loads it"""
+        self._entries.delete(key)
+
+    def clear(self) -> None:
+        """Drop all entries"""
+        self._entries.clear()
+
+    def _load(self, key: K, loader: Callable[[], Awaitable[V]]) -> "asyncio.Task[V]":
+        """Start loading ``key`` unless a load is already running"""
+        task = self._loading.get(key)
+        if task is None:
+            task = asyncio.create_task(self._run_loader(key, loader))
+            task.add_done_callback(self._log_failure)
+            self._loading[key] = task
+        return task
+
+    async def _run_loader(self, key: K, loader: Callable[[], Awaitable[V]]) -> V:
+        try:
+            value = await loader()
+            self._entries.set(key, (time.monotonic() + self.fresh_ttl, value))
+            return value
+        finally:
+            self._loading.pop(key, None)
+
+    @staticmethod
+    def _log_failure(task: "asyncio.Task") -> None:
+        # Background refreshes have no awaiter; the stale entry stays in place
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("cache_refresh_failed", error=str(task.exception()))
@@ -0,0 +1,107 @@
+"""
+Adaptive concurrency limiting (AIMD on latency)
+
+The limit on requests in flight is discovered rather than configured. It
+grows by about one per limit's worth of completions while requests are
+using most of it and latency stays near its baseline (additive increase),
+and is cut by ``backoff`` when recent latency rises past ``tolerance``
+times the baseline, or a request fails with a server error (multiplicative
+decrease). Cuts are at most once per limit's worth of completions, so one
+slow cohort doesn't collapse it.
+
+Recent latency is an EWMA of completed requests. The baseline estimates
+latency without queueing: it drops to the lowest recent latency at once,
+and creeps up towards it over ``baseline_seconds`` only while the limit
+isn't being used (or can't be cut further), so it follows lasting changes
+of the workload but not queueing building up.
+"""
+import time
+from typing import Optional
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    AIMD concurrency limit with priority shares
+
+    Not thread-safe; meant for use from the event loop.
+    """
+
+    def __init__(
+        self,
+        initial: int,
+        min_limit: int,
+        max_limit: int,
+        tolerance: float = 2.0,
+        backoff: float = 0.9,
+        alpha: float = 0.1,
+        baseline_seconds: float = 60.0,
+        warmup: int = 20,
+    ):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.limit = float(min(max(initial, min_limit), max_limit))
+        self.tolerance = tolerance
+        self.backoff = backoff
+        self.alpha = alpha
+        self.baseline_seconds = baseline_seconds
+        self.warmup = warmup
+        self.inflight = 0
+        self.recent: Optional[float] = None
+        self.baseline: Optional[float] = None
+        self._samples = 0
+        self._since_decrease = 0
+        self._baseline_at = 0.0
+
+    def try_acquire(self, share: float = 1.0, critical: bool = False) -> bool:
+        """
+        Admit a request if fewer than ``share`` of the limit are in flight
+
+        Critical requests are always admitted (and counted). Call
+        ``release`` for every admitted request.
+        """
+        if not critical and self.inflight >= self.limit * share:
+            return False
+        self.inflight += 1
+        return True
+
+    def release(self, latency: Optional[float], dropped: bool = False, now: Optional[float] = None) -> None:
+        """
+        Finish an admitted request and adapt the limit
+
+        ``latency`` is None for requests that shouldn't be measured;
+        ``dropped`` marks a failure caused by overload (e.g. a timeout).
+        """
+        utilized = self.inflight >= self.limit / 2
+        self.inflight -= 1
+        self._since_decrease += 1
+        if dropped:
+            self._decrease()
+            return
+        if latency is None:
+            return
+
+        now = time.monotonic() if now is None else now
+        self._samples += 1
+        if self.recent is None or self.baseline is None:
+            self.recent = self.baseline = latency
+            self._baseline_at = now
+            return
+        self.recent += max(self.alpha, 1 / self._samples) * (latency - self.recent)
+        elapsed, self._baseline_at = now - self._baseline_at, now
+        if self.recent < self.baseline:
+            self.baseline = self.recent
+        elif not utilized or self.limit <= self.min_limit:
+            self.baseline += min(elapsed / self.baseline_seconds, 1.0) * (self.recent - self.baseline)
+        if self._samples < self.warmup:
+            return
+
+        if self.recent > self.tolerance * self.baseline:
+            self._decrease()
+        elif utilized:
+            self.limit = min(self.limit + 1 / self.limit, float(self.max_limit))
+
+    def _decrease(self) -> None:
+        if self._since_decrease < self.limit:
+            return
+        self.limit = max(self.limit * self.backoff, float(self.min_limit))
+        self._since_decrease = 0
@@ -1,7 +1,7 @@
 """
 Application configuration using Pydantic Settings
 """
-from typing import List
+from typing import Dict, List
 from pydantic_settings import BaseSettings
 from pydantic import Field, field_validator
 
@@ -21,18 +21,68 @@ class Settings(BaseSettings):
     DATABASE_URL: str = Field(..., description="PostgreSQL connection URL")
     DATABASE_POOL_SIZE: int = 20
     DATABASE_MAX_OVERFLOW: int = 10
+    DATABASE_POOL_TIMEOUT: int = 30  # Seconds to wait for a pooled connection
+    DATABASE_POOL_RECYCLE: int = 1800  # Seconds before a pooled connection is replaced
+    # "queue": keep a per-process pool; "null": open/close per checkout and let
+    # an external pooler (PgBouncer) do the pooling
+    DATABASE_POOL_MODE: str = "queue"
+    # Set when connecting through a transaction-mode pooler such as PgBouncer
+    DATABASE_PGBOUNCER: bool = False
+
+    # Request Deadlines
+    DEFAULT_REQUEST_TIMEOUT_MS: int = 30000  # When neither header nor route sets one
+    MAX_REQUEST_TIMEOUT_MS: int = 120000  # Upper bound for X-Request-Timeout
+    LOCK_TIMEOUT_MS: int = 5000  # lock_timeout never exceeds this
+    ANALYTICS_REQUEST_TIMEOUT_MS: int = 10000  # Default for analytics routes
+    EXPORT_TIMEOUT_MS: int = 600000  # Streamed exports outlive their request's deadline
+    CANCEL_ON_DISCONNECT: bool = True
+    DISCONNECT_POLL_INTERVAL_MS: int = 500
+
+    # Analytics
+    ANALYTICS_CACHE_TTL_SECONDS: int = 30  # Max staleness of cached run statistics
+    ANALYTICS_CACHE_MAX_ENTRIES: int = 10000
+    ANALYTICS_MAX_BUCKETS: int = 1500  # Largest time series one request may read
+    ANALYTICS_TIMESERIES_POINTS: int = 300  # Target points when a timeseries request gives no step
+    PROJECT_OVERVIEW_FRESH_SECONDS: int = 5  # Served without refreshing while younger than this
+    PROJECT_OVERVIEW_MAX_STALE_SECONDS: int = 300  # Served while refreshing in the background up to this age
+    PROJECT_OVERVIEW_WINDOW_HOURS: int = 24  # "Recent" runs in the overview
+
+    # Agent Health
+    AGENT_STATS_EWMA_ALPHA: float = 0.1  # Weight of the newest run in recent error rate/latency
+    AGENT_DEGRADED_ERROR_RATE: float = 0.1
+    AGENT_UNHEALTHY_ERROR_RATE: float = 0.5
+    AGENT_HEARTBEAT_TIMEOUT_SECONDS: int = 300  # Reported health is ignored after this
+
+    # Incident Detection (per-process EWMA baselines per workflow and agent)
+    ANOMALY_FAST_ALPHA: float = 0.05  # Weight of the newest run in recent failure rate/latency
+    ANOMALY_SLOW_ALPHA: float = 0.01  # Weight of the newest run in baselines
+    ANOMALY_WARMUP_RUNS: int = 30  # Runs seen before a workflow or agent may alert
+    ANOMALY_FAILURE_RATE_DELTA: float = 0.25  # Recent minus baseline failure rate that opens an incident
+    ANOMALY_LATENCY_Z: float = 3.0  # Recent log-latency, in baseline standard deviations, that opens one
+    ANOMALY_MAX_SERIES: int = 50000  # Tracked workflows + agents per process (least recent evicted)
+    ANOMALY_QUEUE_SIZE: int = 10000  # Run events buffered for the detector; excess is dropped
 
     # Redis
     REDIS_URL: str = "redis://localhost:6379/0"
     REDIS_CACHE_DB: int = 1
     REDIS_QUEUE_DB: int = 2
+    REDIS_SOCKET_TIMEOUT_SECONDS: float = 0.5  # Callers fall back when Redis is slow or down
 
     # Security
     SECRET_KEY: str = Field(..., min_length=32, description="Secret key for JWT")
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    TOKEN_CACHE_MAX_ENTRIES: int = 10000  # Verified access tokens remembered per process
     API_KEY_SECRET: str = Field(..., description="Secret for API keys")
+    PASSWORD_HASH_WORKERS: int = 4  # bcrypt threads per process (each uses a core while hashing)
+    PASSWORD_HASH_MAX_WAITING: int = 64  # Logins/registrations queued for a thread before answering 503
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 10  # Per-process; bounds how long other processes see a role/status change late
+    PRINCIPAL_CACHE_REDIS_TTL_SECONDS: int = 300
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = 10000
+    PRINCIPAL_MAX_PROJECTS: int = 1000  # Owned project IDs a principal carries; beyond, checks query
+    API_KEY_CACHE_TTL_SECONDS: int = 30  # How long a revoked key may still work in other processes
+    API_KEY_CACHE_MAX_ENTRIES: int = 10000
 
     # CORS
     CORS_ORIGINS: List[str] = [
@@ -45,11 +95,30 @@ class Settings(BaseSettings):
     # Pagination
     DEFAULT_PAGE_SIZE: int = 20
     MAX_PAGE_SIZE: int = 100
+    STREAM_BATCH_SIZE: int = 500  # Rows per batch for server-side cursor streaming
 
     # Rate Limiting
     ENABLE_RATE_LIMITING: bool = True
-    RATE_LIMIT_PER_MINUTE: int = 60
-    RATE_LIMIT_BURST: int = 10
+    RATE_LIMIT_PER_MINUTE: int = 60  # Sustained requests per client
+    RATE_LIMIT_BURST: int = 10  # Requests a client may send at once (bucket capacity)
+    RATE_LIMIT_MACHINE_PER_MINUTE: int = 600  # Heartbeats and run step reports, in their own buckets
+    RATE_LIMIT_MACHINE_BURST: int = 100
+    RATE_LIMIT_POLICY_REFRESH_SECONDS: float = 10.0  # How soon processes pick up a stored policy
+    RATE_LIMIT_MAX_LEASE: int = 16  # Most requests a process takes from a busy client's bucket at once
+    RATE_LIMIT_LEASE_SECONDS: float = 1.0  # How long a process may spend them
+    RATE_LIMIT_PROCESSES: int = 1  # Processes sharing the limits; each enforces its share while Redis is down
+    RATE_LIMIT_REDIS_RETRY_SECONDS: float = 5.0  # Local-only limiting after a Redis failure
+    RATE_LIMIT_MAX_LOCAL_KEYS: int = 100000
+
+    # Adaptive concurrency limiting (load shedding)
+    ENABLE_CONCURRENCY_LIMITING: bool = True
+    CONCURRENCY_LIMIT_INITIAL: int = 50  # Requests in flight before the limit has adapted
+    CONCURRENCY_LIMIT_MIN: int = 5
+    CONCURRENCY_LIMIT_MAX: int = 1000
+    CONCURRENCY_LATENCY_TOLERANCE: float = 2.0  # Recent over unloaded latency that counts as overload
+    CONCURRENCY_BACKOFF: float = 0.9  # Factor the limit is cut by on overload
+    CONCURRENCY_LOW_PRIORITY_SHARE: float = 0.5  # Fraction of the limit analytics and exports may use
+    CONCURRENCY_RETRY_AFTER_SECONDS: int = 1
 
     # Celery
     CELERY_BROKER_URL: str = "redis://localhost:6379/2"
@@ -80,9 +149,25 @@ class Settings(BaseSettings):
     WORKFLOW_MAX_STEPS: int = 1000
     WORKFLOW_TIMEOUT_SECONDS: int = 3600
 
+    # Background Jobs
+    DELETE_BATCH_SIZE: int = 1000  # Rows removed per transaction by delete jobs
+    JOB_STALE_SECONDS: int = 600  # Active jobs not updated for this long are taken over
+    JOB_REAP_INTERVAL_SECONDS: int = 60
+
+    # Cost Accounting
+    # USD per million (prompt, completion) tokens by model id prefix, e.g.
+    # {"gpt-4o": [2.5, 10]}; merged over the built-in table in app.core.pricing
+    MODEL_PRICES: Dict[str, List[float]] = {}
+
     # Budget
-    BUDGET_CHECK_INTERVAL_SECONDS: int = 60
-    BUDGET_ALERT_THRESHOLD: float = 0.8
+    BUDGET_CHECK_INTERVAL_SECONDS: int = 60  # Reconciliation interval and budget cache TTL
+    BUDGET_ALERT_THRESHOLD: float = 0.8  # Default fraction of the limit that raises an alert
+
+    # Run Archive (Parquet, queried with DuckDB)
+    ARCHIVE_PATH: str = "./archive"  # Local directory of the partitioned Parquet files
+    ARCHIVE_QUERY_MAX_ROWS: int = 10000
+    ARCHIVE_QUERY_TIMEOUT_SECONDS: int = 60
+    ARCHIVE_QUERY_MEMORY_LIMIT: str = "1GB"  # Per query, DuckDB syntax
 
     # Email (Optional)
     SMTP_HOST: str = ""
@@ -104,6 +189,16 @@ class Settings(BaseSettings):
     ENABLE_SCHEDULES: bool = True
     ENABLE_POLICIES: bool = True
     ENABLE_BUDGETS: bool = True
+    ENABLE_INCIDENTS: bool = True
+
+    @field_validator("DATABASE_POOL_MODE")
+    @classmethod
+    def validate_pool_mode(cls, v: str) -> str:
+        """Only QueuePool ("queue") and NullPool ("null") are supported"""
+        v = v.lower()
+        if v not in ("queue", "null"):
+            raise ValueError('DATABASE_POOL_MODE must be "queue" or "null"')
+        return v
 
     @field_validator("CORS_ORIGINS", mode="before")
     @classmethod
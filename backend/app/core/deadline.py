@@ -0,0 +1,68 @@
+"""
+Per-request deadlines
+
+A request's deadline comes from the ``X-Request-Timeout`` header (milliseconds),
+else the route's default (see ``app.api.deps.route_timeout``), else
+``DEFAULT_REQUEST_TIMEOUT_MS``, and is capped at ``MAX_REQUEST_TIMEOUT_MS``.
+The database session turns the time left into transaction-local
+``statement_timeout`` / ``lock_timeout`` settings, so one slow query can't hold
+a pooled connection past the point where the client has given up.
+"""
+import time
+from typing import Optional
+
+from fastapi import Request
+
+from app.core.config import settings
+
+REQUEST_TIMEOUT_HEADER = "X-Request-Timeout"
+
+# Postgres SQLSTATEs raised when a timeout fires
+QUERY_CANCELED = "57014"  # statement_timeout or cancel request
+LOCK_NOT_AVAILABLE = "55P03"  # lock_timeout
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a request has no time left to start more database work"""
+
+
+def is_timeout_error(exc: BaseException) -> bool:
+    """Whether a database error was caused by statement_timeout or lock_timeout"""
+    sqlstate = getattr(getattr(exc, "orig", None), "sqlstate", None)
+    return sqlstate in (QUERY_CANCELED, LOCK_NOT_AVAILABLE)
+
+
+def resolve_timeout_ms(request: Request) -> int:
+    """Timeout budget for a request in milliseconds"""
+    timeout_ms: Optional[int] = None
+
+    header = request.headers.get(REQUEST_TIMEOUT_HEADER)
+    if header:
+        try:
+            timeout_ms = int(header)
+        except ValueError:
+            timeout_ms = None
+
+    if timeout_ms is None or timeout_ms <= 0:
+        timeout_ms = getattr(request.state, "default_timeout_ms", None) or settings.DEFAULT_REQUEST_TIMEOUT_MS
+
+    return min(timeout_ms, settings.MAX_REQUEST_TIMEOUT_MS)
+
+
+def get_deadline(request: Request) -> float:
+    """
+    Monotonic deadline for a request
+
+    Resolved once per request and stored on ``request.state`` so every
+    transaction in the request counts down from the same point.
+    """
+    deadline = getattr(request.state, "deadline", None)
+    if deadline is None:
+        deadline = time.monotonic() + resolve_timeout_ms(request) / 1000
+        request.state.deadline = deadline
+    return deadline
+
+
+def remaining_ms(deadline: float) -> int:
+    """Milliseconds left before ``deadline`` (may be negative)"""
+    return int((deadline - time.monotonic()) * 1000)
@@ -0,0 +1,90 @@
+"""
+Time-ordered identifier generation (UUIDv7, RFC 9562)
+
+UUIDv7 keeps the 128-bit UUID layout used everywhere else in the schema, so
+v7 and legacy v4 values live side by side in the same ``UUID`` columns. The
+leading 48 bits are a Unix millisecond timestamp, which makes new rows land
+at the right-hand edge of the primary key B-tree instead of at random pages.
+"""
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Optional
+
+_UNIX_TS_MASK = (1 << 48) - 1
+_COUNTER_MASK = (1 << 12) - 1
+_RAND_B_MASK = (1 << 62) - 1
+
+_lock = threading.Lock()
+_last_ms = 0
+_counter = 0
+
+
+def _build(unix_ms: int, counter: int, rand_b: int) -> uuid.UUID:
+    """Assemble a version 7 / variant 10 UUID from its fields"""
+    value = (unix_ms & _UNIX_TS_MASK) << 80
+    value |= 0x7 << 76
+    value |= (counter & _COUNTER_MASK) << 64
+    value |= 0b10 << 62
+    value |= rand_b & _RAND_B_MASK
+    return uuid.UUID(int=value)
+
+
+def uuid7() -> uuid.UUID:
+    """
+    Generate a UUIDv7
+
+    Values generated by one process are strictly increasing: ids created in
+    the same millisecond use the 12-bit ``rand_a`` field as a counter
+    (RFC 9562, method 1), seeded randomly on each new millisecond.
+    """
+    global _last_ms, _counter
+
+    with _lock:
+        now_ms = time.time_ns() // 1_000_000
+        if now_ms > _last_ms:
+            _last_ms = now_ms
+            # Seed in the lower half so the counter has room to grow
+            _counter = int.from_bytes(os.urandom(2), "big") & 0x7FF
+        else:
+            _counter += 1
+            if _counter > _COUNTER_MASK:
+                # Counter exhausted (or clock went backwards): borrow the next ms
+                _last_ms += 1
+                _counter = 0
+        unix_ms, counter = _last_ms, _counter
+
+    rand_b = int.from_bytes(os.urandom(8), "big")
+    return _build(unix_ms, counter, rand_b)
+
+
+def is_uuid7(value: uuid.UUID) -> bool:
+    """Check whether a UUID is a version 7 (time-ordered) UUID"""
+    return value.version == 7
+
+
+def uuid7_time(value: uuid.UUID) -> Optional[datetime]:
+    """
+    Extract the embedded creation time of a UUIDv7
+
+    Returns None for other UUID versions (e.g. legacy v4 ids).
+    """
+    if not is_uuid7(value):
+        return None
+    unix_ms = value.int >> 80
+    return datetime.fromtimestamp(unix_ms / 1000, tz=timezone.utc)
+
+
+def uuid7_lower_bound(moment: datetime) -> uuid.UUID:
+    """
+    Smallest UUIDv7 that can be generated at ``moment``
+
+    Useful for turning a time range into an id range, e.g.
+    ``WHERE id >= uuid7_lower_bound(start)``. Naive datetimes are treated as UTC.
+    """
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    unix_ms = int(moment.timestamp() * 1000)
+    return _build(unix_ms, 0, 0)
@@ -0,0 +1,63 @@
+"""
+Model pricing for token cost accounting
+
+Prices are USD per million prompt and completion tokens, looked up by the
+longest matching model id prefix, so dated variants such as
+"claude-3-opus-20240229" use the "claude-3-opus" price. Costs are computed
+when usage is recorded and stored, so price changes don't rewrite history.
+"""
+from decimal import Decimal
+from typing import Dict, Optional, Tuple
+
+from app.core.config import settings
+
+Price = Tuple[Decimal, Decimal]
+
+# List prices (prompt, completion); extend or override with MODEL_PRICES
+DEFAULT_PRICES: Dict[str, Tuple[str, str]] = {
+    "gpt-4o-mini": ("0.15", "0.60"),
+    "gpt-4o": ("2.50", "10.00"),
+    "gpt-4-turbo": ("10.00", "30.00"),
+    "gpt-4": ("30.00", "60.00"),
+    "gpt-3.5-turbo": ("0.50", "1.50"),
+    "claude-3-5-sonnet": ("3.00", "15.00"),
+    "claude-3-5-haiku": ("0.80", "4.00"),
+    "claude-3-opus": ("15.00", "75.00"),
+    "claude-3-sonnet": ("3.00", "15.00"),
+    "claude-3-haiku": ("0.25", "1.25"),
+}
+
+COST_QUANTUM = Decimal("0.000001")
+_PER_TOKEN = Decimal(1_000_000)
+
+
+def _load_prices() -> Dict[str, Price]:
+    prices = {model: (Decimal(p), Decimal(c)) for model, (p, c) in DEFAULT_PRICES.items()}
+    for model, (p, c) in settings.MODEL_PRICES.items():
+        prices[model.lower()] = (Decimal(str(p)), Decimal(str(c)))
+    return prices
+
+
+PRICES = _load_prices()
+
+
+def price_for(model: Optional[str]) -> Optional[Price]:
+    """Price of ``model`` by longest matching prefix, or None if unknown"""
+    if not model:
+        return None
+    model = model.lower().rsplit("/", 1)[-1]  # "openai/gpt-4o" -> "gpt-4o"
+    best = None
+    for prefix in PRICES:
+        if model.startswith(prefix) and (best is None or len(prefix) > len(best)):
+            best = prefix
+    return PRICES[best] if best else None
+
+
+def cost_usd(model: Optional[str], tokens_prompt: int, tokens_completion: int) -> Optional[Decimal]:
+    """Cost of a token usage, or None if the model has no price"""
+    price = price_for(model)
+    if price is None:
+        return None
+    prompt_price, completion_price = price
+    cost = (tokens_prompt * prompt_price + tokens_completion * completion_price) / _PER_TOKEN
+    return cost.quantize(COST_QUANTUM)
@@ -0,0 +1,245 @@
+"""
+Rate limiting with the generic cell rate algorithm (GCRA)
+
+A bucket of ``capacity`` requests refills at one request per ``interval``.
+GCRA keeps a single number per key, the theoretical arrival time (TAT): the
+time at which the bucket would be full again. A request costing ``cost`` is
+allowed when pushing the TAT by ``cost * interval`` keeps it within
+``capacity * interval`` of now.
+
+In Redis the check and the update are one Lua script call, so concurrent
+requests can't both take the last token, and the script reads the clock
+from Redis (TIME) so app servers' clocks don't matter. ``gcra`` is the same
+arithmetic in Python.
+
+HybridRateLimiter puts a per-process tier in front of Redis: keys that keep
+using up what they take are leased several requests at once, which are
+then spent without a round trip. While Redis is unreachable each process
+enforces its share of the limits on its own.
+"""
+import math
+import time
+from typing import NamedTuple, Optional, Tuple
+import structlog
+try:
+    from prometheus_client import Counter
+    PROMETHEUS_AVAILABLE = True
+except ImportError:
+    PROMETHEUS_AVAILABLE = False
+
+from app.core.cache import TTLCache
+from app.core.redis import get_redis
+
+logger = structlog.get_logger()
+
+if PROMETHEUS_AVAILABLE:
+    RATE_LIMIT_DECISIONS = Counter(
+        "rate_limit_decisions_total", "Rate limit decisions by where they were made", ["tier", "allowed"],
+    )
+
+# KEYS[1]: bucket; ARGV: interval (us), capacity, wanted, needed. Takes as
+# many of ``wanted`` requests as the bucket has, if at least ``needed``.
+# Returns granted (0 if denied), remaining, reset_after (ms) and
+# retry_after (ms).
+GCRA_SCRIPT = """
+local interval = tonumber(ARGV[1])
+local tolerance = interval * tonumber(ARGV[2])
+local wanted = tonumber(ARGV[3])
+local needed = tonumber(ARGV[4])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) * 1000000 + tonumber(clock[2])
+local tat = tonumber(redis.call('GET', KEYS[1])) or now
+if tat < now then
+    tat = now
+end
+local available = math.floor((tolerance - (tat - now)) / interval)
+if available < needed then
+    return {0, available, math.ceil((tat - now) / 1000),
+            math.ceil((tat + needed * interval - tolerance - now) / 1000)}
+end
+local granted = math.min(wanted, available)
+local new_tat = tat + granted * interval
+redis.call('SET', KEYS[1], string.format('%d', new_tat), 'PX', math.ceil((new_tat - now) / 1000))
+return {granted, available - granted, math.ceil((new_tat - now) / 1000), 0}
+"""
+
+
+class RateLimitResult(NamedTuple):
+    """Outcome of one rate limit check"""
+    allowed: bool
+    limit: int  # Bucket capacity
+    remaining: int  # Requests of cost 1 that would be allowed right now
+    reset_after: float  # Seconds until the bucket is full again
+    retry_after: float  # Seconds until this request would be allowed (0 if it was)
+
+
+def gcra(
+    tat: Optional[float],
+    now: float,
+    interval: float,
+    capacity: int,
+    cost: int = 1,
+) -> Tuple[RateLimitResult, float]:
+    """
+    One GCRA decision; returns the result and the bucket's new TAT
+
+    Times are in any one unit (the result's are in that unit too). A
+    denied request leaves the TAT unchanged.
+    """
+    tolerance = interval * capacity
+    tat = now if tat is None or tat < now else tat
+    new_tat = tat + interval * cost
+    if new_tat - now > tolerance:
+        remaining = math.floor((tolerance - (tat - now)) / interval)
+        return RateLimitResult(False, capacity, remaining, tat - now, new_tat - tolerance - now), tat
+    remaining = math.floor((tolerance - (new_tat - now)) / interval)
+    return RateLimitResult(True, capacity, remaining, new_tat - now, 0.0), new_tat
+
+
+class RedisRateLimiter:
+    """GCRA buckets in Redis, one round trip per check"""
+
+    def __init__(self, rate_per_minute: int, burst: int, prefix: str = "rate_limit"):
+        self.interval_us = 60_000_000 // max(rate_per_minute, 1)
+        self.capacity = max(burst, 1)
+        self.prefix = prefix
+        # Runs by EVALSHA, loading the script again if Redis lost it
+        self._script = get_redis().register_script(GCRA_SCRIPT)
+
+    async def check(self, key: str, cost: int = 1) -> RateLimitResult:
+        """Take ``cost`` requests from a key's bucket if it has them"""
+        granted, result = await self.acquire(key, cost, cost)
+        return result
+
+    async def acquire(self, key: str, wanted: int, needed: int) -> Tuple[int, RateLimitResult]:
+        """Take up to ``wanted`` requests from a key's bucket, and at least ``needed`` or none"""
+        granted, remaining, reset_after_ms, retry_after_ms = await self._script(
+            keys=[f"{self.prefix}:{key}"],
+            args=[self.interval_us, self.capacity, wanted, needed],
+            client=get_redis(),
+        )
+        return int(granted), RateLimitResult(
+            bool(granted), self.capacity, max(int(remaining), 0), reset_after_ms / 1000, retry_after_ms / 1000
+        )
+
+
+class Lease:
+    """Requests of a key's Redis bucket a process may spend without asking"""
+    __slots__ = ("tokens", "size", "expires_at", "remaining", "reset_at")
+
+    def __init__(self, tokens: int, size: int, expires_at: float, remaining: int, reset_at: float):
+        self.tokens = tokens
+        self.size = size  # Requests taken when it was granted
+        self.expires_at = expires_at
+        self.remaining = remaining  # Left in the Redis bucket at grant time
+        self.reset_at = reset_at
+
+
+class HybridRateLimiter:
+    """
+    Redis GCRA buckets behind per-process leases and fallback buckets
+
+    A key's first request takes one request from Redis. When a lease is
+    used up before it expires, the next one takes twice as many (up to
+    ``max_lease``); when one expires unused, the key starts over at one, so
+    only busy keys are leased ahead and little is lost to leases running
+    out. Leased requests are spent against the global limit already. A
+    denied key is denied locally until its retry time.
+
+    When Redis fails, it isn't tried again for ``retry_seconds``;
+    meanwhile each key gets a local bucket with 1/``processes`` of the
+    rate and burst. Requests are neither let through unchecked nor run
+    twice.
+    """
+
+    def __init__(
+        self,
+        rate_per_minute: int,
+        burst: int,
+        max_lease: int,
+        lease_seconds: float,
+        processes: int,
+        retry_seconds: float,
+        max_keys: int,
+        prefix: str = "rate_limit",
+    ):
+        self.redis = RedisRateLimiter(rate_per_minute, burst, prefix)
+        self.capacity = self.redis.capacity
+        # At most a quarter of a bucket, so one process can't starve the others
+        self.max_lease = max(1, min(max_lease, self.capacity // 4))
+        self.lease_seconds = lease_seconds
+        self.retry_seconds = retry_seconds
+
+        processes = max(processes, 1)
+        self.local_interval = 60 / max(rate_per_minute, 1) * processes
+        self.local_capacity = max(self.capacity // processes, 1)
+
+        self._leases: TTLCache[str, Lease] = TTLCache(maxsize=max_keys, ttl=lease_seconds * 2)
+        # Denied keys -> (result, cost, retry time), until they may retry
+        self._denied: TTLCache[str, Tuple[RateLimitResult, int, float]] = TTLCache(maxsize=max_keys, ttl=0)
+        # TATs of the local-only buckets, dropped once full again
+        self._local: TTLCache[str, float] = TTLCache(maxsize=max_keys, ttl=0)
+        self._redis_retry_at = 0.0
+
+    @property
+    def degraded(self) -> bool:
+        """Whether decisions are currently made without Redis"""
+        return time.monotonic() < self._redis_retry_at
+
+    async def check(self, key: str, cost: int = 1) -> RateLimitResult:
+        """Take ``cost`` requests from a key's limit if it has them"""
+        now = time.monotonic()
+        lease = self._leases.get(key)
+        if lease is not None and lease.expires_at > now and lease.tokens >= cost:
+            lease.tokens -= cost
+            return self._record("local", RateLimitResult(
+                True, self.capacity, min(lease.remaining + lease.tokens, self.capacity),
+                max(lease.reset_at - now, 0.0), 0.0,
+            ))
+
+        denied = self._denied.get(key)
+        if denied is not None and cost >= denied[1]:
+            result, _, retry_at = denied
+            return self._record("local", result._replace(retry_after=max(retry_at - now, 0.0)))
+
+        if now < self._redis_retry_at:
+            return self._check_local(key, cost, now)
+
+        # Grow leases of keys that use them up, start over for the others
+        used_up = lease is not None and lease.tokens < cost
+        size = min(lease.size * 2, self.max_lease) if used_up else 1
+        try:
+            granted, result = await self.redis.acquire(key, max(cost, size), cost)
+        except Exception as e:
+            self._redis_retry_at = now + self.retry_seconds
+            logger.warning("rate_limit_degraded", error=str(e), retry_seconds=self.retry_seconds)
+            return self._check_local(key, cost, now)
+
+        if self._redis_retry_at:
+            self._redis_retry_at = 0.0
+            logger.info("rate_limit_recovered")
+        now = time.monotonic()
+        if granted:
+            lease = self._leases.get(key)
+            tokens = granted - cost
+            if lease is not None and lease.expires_at > now:
+                # Another request of this key took a lease meanwhile
+                tokens += lease.tokens
+            self._leases.set(key, Lease(
+                tokens, granted, now + self.lease_seconds, result.remaining, now + result.reset_after,
+            ))
+        elif result.retry_after > 0:
+            self._denied.set(key, (result, cost, now + result.retry_after), ttl=result.retry_after)
+        return self._record("redis", result)
+
+    def _check_local(self, key: str, cost: int, now: float) -> RateLimitResult:
+        result, tat = gcra(self._local.get(key), now, self.local_interval, self.local_capacity, cost)
+        if result.allowed:
+            self._local.set(key, tat, ttl=tat - now)
+        return self._record("fallback", result)
+
+    @staticmethod
+    def _record(tier: str, result: RateLimitResult) -> RateLimitResult:
+        if PROMETHEUS_AVAILABLE:
+            RATE_LIMIT_DECISIONS.labels(tier=tier, allowed=str(result.allowed).lower()).inc()
+        return result
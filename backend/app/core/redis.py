@@ -0,0 +1,31 @@
+"""
+Shared Redis client
+"""
+from typing import Optional
+import redis.asyncio as redis
+
+from app.core.config import settings
+
+_client: Optional[redis.Redis] = None
+
+
+def get_redis() -> redis.Redis:
+    """Process-wide Redis client (connections are pooled and opened lazily)"""
+    global _client
+    if _client is None:
+        _client = redis.from_url(
+            settings.REDIS_URL,
+            encoding="utf-8",
+            decode_responses=True,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+            socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+        )
+    return _client
+
+
+async def close_redis() -> None:
+    """Close the shared client's connections (on shutdown)"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -1,17 +1,71 @@
 """
 Security utilities for authentication and authorization
+
+bcrypt costs 100-300 ms of CPU per call, so request handlers use the async
+password helpers: they run bcrypt on a dedicated pool of
+PASSWORD_HASH_WORKERS threads (bcrypt releases the GIL) and let at most
+PASSWORD_HASH_MAX_WAITING calls queue for it, keeping the event loop free
+for other requests during a login storm.
+
+Verified access-token claims are cached by token digest until the token
+expires, so a token is checked once per process rather than per request.
+Tokens carry their user's revocation epoch (``ep``); bumping the epoch
+invalidates every token issued before, cached or not.
 """
+import asyncio
+import hashlib
+import hmac
+import secrets
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+from typing import Callable, Optional, Dict, Any, Tuple, TypeVar
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, status
+try:
+    from prometheus_client import Counter, Histogram
+    PROMETHEUS_AVAILABLE = True
+except ImportError:
+    PROMETHEUS_AVAILABLE = False
 
+from app.core.cache import TTLCache
 from app.core.config import settings
 
+T = TypeVar("T")
+
 # Password hashing context
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+_hash_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+)
+_hash_slots = asyncio.Semaphore(settings.PASSWORD_HASH_WORKERS)
+_hash_waiting = 0
+
+if PROMETHEUS_AVAILABLE:
+    HASH_QUEUE_SECONDS = Histogram(
+        "password_hash_queue_seconds", "Time password hashing waited for a worker", ["op"],
+        buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+    )
+    HASH_SECONDS = Histogram(
+        "password_hash_seconds", "Time spent hashing a password", ["op"],
+        buckets=(0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 1),
+    )
+    HASH_REJECTED = Counter(
+        "password_hash_rejected_total", "Password hashing refused because too many calls were waiting", ["op"],
+    )
+
+
+# SHA-256 of a verified token -> its claims, each kept until the token expires
+_token_cache: TTLCache[bytes, Dict[str, Any]] = TTLCache(
+    maxsize=settings.TOKEN_CACHE_MAX_ENTRIES, ttl=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+)
+
+
+class PasswordHashBusy(Exception):
+    """Too many password hashing calls are already waiting for a worker"""
+
 
 def _truncate_password_for_bcrypt(password: str) -> str:
     """Truncate password to 72 bytes for bcrypt compatibility"""
@@ -44,6 +98,45 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(truncated_password)
 
 
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password against a hash on the hashing pool"""
+    return await _run_hashing("verify", verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password on the hashing pool"""
+    return await _run_hashing("hash", get_password_hash, password)
+
+
+async def _run_hashing(op: str, fn: Callable[..., T], *args: Any) -> T:
+    """
+    Run a bcrypt call on the hashing pool
+    
+    Raises PasswordHashBusy instead of queueing beyond PASSWORD_HASH_MAX_WAITING.
+    """
+    global _hash_waiting
+    if _hash_waiting >= settings.PASSWORD_HASH_MAX_WAITING:
+        if PROMETHEUS_AVAILABLE:
+            HASH_REJECTED.labels(op).inc()
+        raise PasswordHashBusy()
+    
+    queued_at = time.perf_counter()
+    _hash_waiting += 1
+    try:
+        await _hash_slots.acquire()
+    finally:
+        _hash_waiting -= 1
+    try:
+        started_at = time.perf_counter()
+        result = await asyncio.get_running_loop().run_in_executor(_hash_executor, fn, *args)
+        if PROMETHEUS_AVAILABLE:
+            HASH_QUEUE_SECONDS.labels(op).observe(started_at - queued_at)
+            HASH_SECONDS.labels(op).observe(time.perf_counter() - started_at)
+        return result
+    finally:
+        _hash_slots.release()
+
+
 def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token"""
     to_encode = data.copy()
@@ -80,17 +173,48 @@ def decode_token(token: str) -> Dict[str, Any]:
         )
 
 
-def generate_api_key() -> str:
-    """Generate a secure API key"""
-    import secrets
-    return f"sk_{secrets.token_urlsafe(32)}"
+def decode_token_cached(token: str) -> Dict[str, Any]:
+    """
+    Decode and verify a JWT token, reusing the claims of tokens seen before
+    
+    The returned claims are shared between requests; don't modify them.
+    """
+    key = hashlib.sha256(token.encode()).digest()
+    payload = _token_cache.get(key)
+    if payload is None:
+        payload = decode_token(token)
+        ttl = payload.get("exp", 0) - time.time()
+        if ttl > 0:
+            _token_cache.set(key, payload, ttl=ttl)
+    return payload
+
+
+def generate_api_key() -> Tuple[str, str]:
+    """
+    Generate a secure API key and its prefix
+    
+    Keys look like ``sk_<prefix>_<secret>``; the prefix is stored in clear
+    so a key can be recognised in listings.
+    """
+    prefix = secrets.token_hex(4)
+    return f"sk_{prefix}_{secrets.token_urlsafe(32)}", prefix
 
 
-def verify_api_key(api_key: str, stored_hash: str) -> bool:
-    """Verify an API key against its hash"""
-    return pwd_context.verify(api_key, stored_hash)
+def api_key_prefix(api_key: str) -> str:
+    """Displayable prefix of an API key"""
+    return api_key[3:11]
 
 
 def hash_api_key(api_key: str) -> str:
-    """Hash an API key for storage"""
-    return pwd_context.hash(api_key)
\ No newline at end of file
+    """
+    Digest of an API key for storage and lookup (HMAC-SHA256, hex)
+    
+    Keys are random, so a fast keyed hash is enough: unlike passwords they
+    can't be guessed from a dictionary.
+    """
+    return hmac.new(settings.API_KEY_SECRET.encode(), api_key.encode(), hashlib.sha256).hexdigest()
+
+
+def verify_api_key(api_key: str, stored_hash: str) -> bool:
+    """Verify an API key against its digest in constant time"""
+    return hmac.compare_digest(hash_api_key(api_key), stored_hash)
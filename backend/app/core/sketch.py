@@ -0,0 +1,71 @@
+"""
+Mergeable quantile sketch (DDSketch-style)
+
+Values are counted in logarithmically sized bins: bin ``i`` covers
+(gamma^(i-1), gamma^i] with gamma = (1 + a) / (1 - a), so any quantile is
+returned within relative error ``a`` of the true value. Sketches merge by
+adding bin counts, which lets stored per-bucket bins be combined for any
+time range with a SUM ... GROUP BY bin.
+
+Stored bins depend on RELATIVE_ACCURACY; changing it requires rebuilding them.
+"""
+import math
+from typing import Dict, Iterable, Optional, Tuple
+
+RELATIVE_ACCURACY = 0.01
+GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+_LOG_GAMMA = math.log(GAMMA)
+
+# Smallest distinguishable value; anything at or below lands in bin 0
+MIN_VALUE = 1.0
+
+
+def bin_index(value: float) -> int:
+    """Bin holding ``value``"""
+    return math.ceil(math.log(max(value, MIN_VALUE)) / _LOG_GAMMA)
+
+
+def bin_value(index: int) -> float:
+    """Representative value of a bin (within RELATIVE_ACCURACY of everything in it)"""
+    return 2 * GAMMA ** index / (GAMMA + 1)
+
+
+class LatencySketch:
+    """In-memory sketch built from values or stored bins"""
+
+    def __init__(self, bins: Optional[Dict[int, int]] = None):
+        self.bins: Dict[int, int] = dict(bins or {})
+        self.count = sum(self.bins.values())
+
+    @classmethod
+    def from_bins(cls, bins: Iterable[Tuple[int, int]]) -> "LatencySketch":
+        """Build from (bin index, count) pairs, merging duplicates"""
+        sketch = cls()
+        for index, count in bins:
+            sketch.bins[index] = sketch.bins.get(index, 0) + count
+            sketch.count += count
+        return sketch
+
+    def add(self, value: float, count: int = 1) -> None:
+        """Count ``value`` ``count`` times"""
+        index = bin_index(value)
+        self.bins[index] = self.bins.get(index, 0) + count
+        self.count += count
+
+    def merge(self, other: "LatencySketch") -> None:
+        """Add another sketch's counts into this one"""
+        for index, count in other.bins.items():
+            self.bins[index] = self.bins.get(index, 0) + count
+        self.count += other.count
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Value at quantile ``q`` (0..1), or None for an empty sketch"""
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        for index in sorted(self.bins):
+            seen += self.bins[index]
+            if seen > rank:
+                return bin_value(index)
+        return bin_value(max(self.bins))
@@ -18,13 +18,13 @@ async def init_db(db: AsyncSession) -> None:
     
     Creates a default superuser if none exists
     """
-    from sqlalchemy import select
+    from sqlalchemy import select, func
     
     # Check if any users exist
-    result = await db.execute(select(User))
-    existing_users = result.scalars().all()
+    result = await db.execute(select(func.count()).select_from(User))
+    user_count = result.scalar_one()
     
-    if not existing_users:
+    if not user_count:
         logger.info("Creating default superuser")
         
         # Create default superuser
@@ -47,4 +47,4 @@ async def init_db(db: AsyncSession) -> None:
             message="⚠️  Default password is 'changeme123' - CHANGE IT IMMEDIATELY!"
         )
     else:
-        logger.info("database_initialized", user_count=len(existing_users))
+        logger.info("database_initialized", user_count=user_count)
@@ -1,7 +1,30 @@
 """
 Database session configuration
+
+Two deployment shapes are supported:
+
+* Direct to Postgres (default): each process keeps a QueuePool of
+  ``DATABASE_POOL_SIZE`` + ``DATABASE_MAX_OVERFLOW`` connections.
+* Behind a transaction-mode pooler such as PgBouncer
+  (``DATABASE_PGBOUNCER=True``): server connections are handed to a
+  different client after every transaction, so nothing may outlive one.
+  Prepared statements are not cached and get unique names, and
+  per-request settings use ``SET LOCAL`` rather than ``SET``. Combine with
+  ``DATABASE_POOL_MODE=null`` to leave pooling to the pooler, or keep a
+  small queue pool to save client-side connect latency.
+
+Request sessions from ``get_db`` carry the request's deadline: every
+transaction they begin gets a transaction-local ``statement_timeout`` and
+``lock_timeout`` for the time left, and in-flight work is cancelled if the
+client disconnects.
 """
-from typing import AsyncGenerator
+import asyncio
+from typing import Any, AsyncGenerator, Dict, Optional
+from uuid import uuid4
+from fastapi import HTTPException, Request, status
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import DBAPIError, TimeoutError as PoolTimeout
 from sqlalchemy.ext.asyncio import (
     AsyncSession,
     create_async_engine,
@@ -10,15 +33,71 @@ from sqlalchemy.ext.asyncio import (
 from sqlalchemy.pool import NullPool
 
 from app.core.config import settings
+from app.core.deadline import DeadlineExceeded, get_deadline, is_timeout_error, remaining_ms
+
+# Non-standard status (nginx convention) for requests abandoned by the client
+HTTP_499_CLIENT_CLOSED_REQUEST = 499
+
+
+def _pgbouncer_connect_args(database_url: str) -> Dict[str, Any]:
+    """Driver arguments that keep prepared statements from outliving a transaction"""
+    driver = make_url(database_url).get_driver_name()
+    if driver == "asyncpg":
+        return {
+            # asyncpg's own statement cache and SQLAlchemy's adapter cache
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            # Unnamed statements could collide across pooled clients
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+        }
+    if driver == "psycopg":
+        # Never switch to server-side prepared statements
+        return {"prepare_threshold": None}
+    return {}
+
+
+def use_null_pool() -> bool:
+    """Whether the engine opens a fresh connection per checkout"""
+    return settings.ENVIRONMENT == "test" or settings.DATABASE_POOL_MODE == "null"
+
+
+def connections_per_process() -> Optional[int]:
+    """
+    Upper bound on connections one process opens against DATABASE_URL
+
+    Returns None with NullPool, where the bound is the process's DB concurrency.
+    """
+    if use_null_pool():
+        return None
+    return settings.DATABASE_POOL_SIZE + settings.DATABASE_MAX_OVERFLOW
+
+
+def engine_options() -> Dict[str, Any]:
+    """Keyword arguments for create_async_engine based on settings"""
+    options: Dict[str, Any] = {
+        "echo": settings.DEBUG,
+        "future": True,
+        "pool_pre_ping": True,
+    }
+
+    if use_null_pool():
+        options["poolclass"] = NullPool
+    else:
+        options.update(
+            pool_size=settings.DATABASE_POOL_SIZE,
+            max_overflow=settings.DATABASE_MAX_OVERFLOW,
+            pool_timeout=settings.DATABASE_POOL_TIMEOUT,
+            pool_recycle=settings.DATABASE_POOL_RECYCLE,
+        )
+
+    if settings.DATABASE_PGBOUNCER:
+        options["connect_args"] = _pgbouncer_connect_args(settings.DATABASE_URL)
+
+    return options
+
 
 # Create async engine
-engine = create_async_engine(
-    settings.DATABASE_URL,
-    echo=settings.DEBUG,
-    future=True,
-    pool_pre_ping=True,
-    poolclass=NullPool if settings.ENVIRONMENT == "test" else None,
-)
+engine = create_async_engine(settings.DATABASE_URL, **engine_options())
 
 # Create async session factory
 AsyncSessionLocal = async_sessionmaker(
@@ -30,21 +109,94 @@ AsyncSessionLocal = async_sessionmaker(
 )
 
 
-async def get_db() -> AsyncGenerator[AsyncSession, None]:
+_SET_TIMEOUTS = text(
+    "SELECT set_config('statement_timeout', :statement_timeout, true), "
+    "set_config('lock_timeout', :lock_timeout, true)"
+)
+
+
+def apply_deadline(session: AsyncSession, deadline: float) -> None:
+    """
+    Bound every transaction the session begins by the time left until ``deadline``
+
+    Uses transaction-local settings (``set_config(..., true)`` == ``SET LOCAL``)
+    in one round trip, so nothing leaks to the next user of the connection and
+    it is safe behind a transaction-mode pooler.
+    """
+    def set_timeouts(sync_session, transaction, connection) -> None:
+        left = remaining_ms(deadline)
+        if left <= 0:
+            raise DeadlineExceeded("Request deadline exceeded")
+        connection.execute(
+            _SET_TIMEOUTS,
+            {
+                "statement_timeout": f"{left}ms",
+                "lock_timeout": f"{min(left, settings.LOCK_TIMEOUT_MS)}ms",
+            },
+        )
+
+    event.listen(session.sync_session, "after_begin", set_timeouts)
+
+
+async def _cancel_on_disconnect(request: Request, task: asyncio.Task, disconnected: asyncio.Event) -> None:
+    """Cancel ``task`` (and with it any running query) once the client goes away"""
+    interval = settings.DISCONNECT_POLL_INTERVAL_MS / 1000
+    while True:
+        await asyncio.sleep(interval)
+        if await request.is_disconnected():
+            disconnected.set()
+            task.cancel()
+            return
+
+
+async def get_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
     """
     Dependency for getting async database session
-    
+
     Usage:
         @app.get("/items")
         async def read_items(db: AsyncSession = Depends(get_db)):
             ...
     """
     async with AsyncSessionLocal() as session:
+        apply_deadline(session, get_deadline(request))
+
+        task = asyncio.current_task()
+        disconnected = asyncio.Event()
+        watcher = None
+        if settings.CANCEL_ON_DISCONNECT and task is not None:
+            watcher = asyncio.create_task(_cancel_on_disconnect(request, task, disconnected))
+
         try:
             yield session
             await session.commit()
+        except asyncio.CancelledError:
+            if not disconnected.is_set():
+                raise
+            # We cancelled ourselves; report it as a normal (unsent) response
+            task.uncancel()
+            raise HTTPException(
+                status_code=HTTP_499_CLIENT_CLOSED_REQUEST,
+                detail="Client closed request",
+            )
+        except (DeadlineExceeded, DBAPIError) as e:
+            await session.rollback()
+            if isinstance(e, DBAPIError) and not is_timeout_error(e):
+                raise
+            raise HTTPException(
+                status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+                detail="Request deadline exceeded",
+            ) from e
+        except PoolTimeout as e:
+            await session.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+                detail="Timed out waiting for a database connection",
+            ) from e
         except Exception:
             await session.rollback()
             raise
         finally:
+            if watcher is not None:
+                watcher.cancel()
             await session.close()
@@ -0,0 +1,61 @@
+"""
+Streaming query helpers built on server-side cursors
+
+``result.scalars().all()`` materializes the whole result set in memory.
+These helpers run the statement through a server-side cursor and hand rows
+back in fixed-size batches, so memory stays flat regardless of row count.
+
+Usage:
+    async for batch in stream_scalars(db, select(WorkflowStep).where(...)):
+        for step in batch:
+            ...
+"""
+from typing import Any, AsyncIterator, List, Optional
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+
+
+async def stream_scalars(
+    db: AsyncSession,
+    stmt: Select,
+    batch_size: Optional[int] = None,
+) -> AsyncIterator[List[Any]]:
+    """
+    Stream the first column of each row in batches of ``batch_size``
+
+    ORM instances in a batch are expunged from the session once the caller
+    asks for the next batch, so the identity map doesn't grow with the
+    result set. Don't hold on to instances across batches.
+    """
+    batch_size = batch_size or settings.STREAM_BATCH_SIZE
+    result = await db.stream_scalars(stmt.execution_options(yield_per=batch_size))
+    try:
+        async for batch in result.partitions(batch_size):
+            yield batch
+            for obj in batch:
+                if obj in db:
+                    db.expunge(obj)
+    finally:
+        await result.close()
+
+
+async def stream_rows(
+    db: AsyncSession,
+    stmt: Select,
+    batch_size: Optional[int] = None,
+) -> AsyncIterator[List[Any]]:
+    """
+    Stream rows in batches of ``batch_size``
+
+    Prefer this with column-only selects (e.g. ``select(Model.status, Model.duration)``)
+    for aggregations that don't need full ORM objects.
+    """
+    batch_size = batch_size or settings.STREAM_BATCH_SIZE
+    result = await db.stream(stmt.execution_options(yield_per=batch_size))
+    try:
+        async for batch in result.partitions(batch_size):
+            yield batch
+    finally:
+        await result.close()
@@ -14,6 +14,11 @@ import structlog
 from app.api.v1.router import api_router
 from app.core.config import settings
 from app.core.logging import setup_logging
+from app.core.redis import close_redis
+from app.middleware.concurrency import ConcurrencyLimitMiddleware
+from app.services.budget_service import BudgetService
+from app.services.deletion_service import DeletionService
+from app.services.incident_service import IncidentService
 try:
     from app.middleware.rate_limit import RateLimitMiddleware
     RATE_LIMIT_AVAILABLE = True
@@ -34,7 +39,16 @@ app = FastAPI(
     openapi_url=f"/openapi.json",
 )
 
-# CORS Middleware
+# Load Shedding Middleware (inside rate limiting, so limited requests never take a slot)
+if settings.ENABLE_CONCURRENCY_LIMITING:
+    app.add_middleware(ConcurrencyLimitMiddleware)
+
+# Rate Limiting Middleware
+if settings.ENABLE_RATE_LIMITING and RATE_LIMIT_AVAILABLE:
+    app.add_middleware(RateLimitMiddleware)
+
+# CORS Middleware (added last, so it is outermost: shed 429/503 responses
+# carry CORS headers and browsers can see them as retryable)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.CORS_ORIGINS,
@@ -43,10 +57,6 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Rate Limiting Middleware
-if settings.ENABLE_RATE_LIMITING and RATE_LIMIT_AVAILABLE:
-    app.add_middleware(RateLimitMiddleware)
-
 # Include API router
 app.include_router(api_router, prefix=f"/api/{settings.API_VERSION}")
 
@@ -65,11 +75,18 @@ async def startup_event() -> None:
         environment=settings.ENVIRONMENT,
         version=settings.API_VERSION,
     )
+    BudgetService.start_reconciler()
+    IncidentService.start_detector()
+    DeletionService.start_reaper()
 
 
 @app.on_event("shutdown")
 async def shutdown_event() -> None:
     """Run on application shutdown"""
+    await BudgetService.stop_reconciler()
+    await IncidentService.stop_detector()
+    await DeletionService.stop_reaper()
+    await close_redis()
     logger.info("shutdown", app_name=settings.APP_NAME)
 
 
@@ -1 +1,10 @@
-"""Middleware modules"""
+"""
+Middleware modules
+
+Middleware here is plain ASGI: a class taking the wrapped app and called
+with (scope, receive, send). Starlette's BaseHTTPMiddleware runs every
+request through an extra task and re-streams the response body, which
+costs time per request and breaks streaming responses; don't use it. To
+change response headers, wrap ``send`` and edit the
+``http.response.start`` message (see rate_limit.py).
+"""
@@ -0,0 +1,132 @@
+"""
+Adaptive concurrency limiting and load shedding
+
+Requests in flight are capped by an AIMD limit that follows observed
+latency (see app.core.concurrency). Past the limit, requests are refused
+at once with 503 and Retry-After instead of queueing for a database
+connection until everything times out. By priority:
+
+- critical (run triggers and updates, step reports, heartbeats): always
+  admitted, and counted against the limit
+- low (analytics and exports): only admitted while less than
+  CONCURRENCY_LOW_PRIORITY_SHARE of the limit is in use, so they are shed
+  first
+- normal: everything else
+
+Latency is measured to the start of the response, so long streamed
+exports don't read as overload. Only 504s, which get_db answers for
+request and query deadlines and for waiting too long for a connection,
+count as overload; other errors don't, including the 503s the application
+answers for its own reasons (password hashing busy, Redis or the archive
+unavailable). The limit, requests in flight and shed requests are exported
+as ``concurrency_limit``, ``concurrency_inflight`` and
+``concurrency_shed_total``.
+"""
+import time
+from fnmatch import fnmatchcase
+from typing import Optional, Tuple
+import structlog
+from fastapi import status
+from fastapi.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+try:
+    from prometheus_client import Counter, Gauge
+    PROMETHEUS_AVAILABLE = True
+except ImportError:
+    PROMETHEUS_AVAILABLE = False
+
+from app.core.concurrency import AdaptiveConcurrencyLimiter
+from app.core.config import settings
+
+logger = structlog.get_logger()
+
+CRITICAL = "critical"
+NORMAL = "normal"
+LOW = "low"
+
+# (methods, path glob); first match wins
+PRIORITY_ROUTES: Tuple[Tuple[Tuple[str, ...], str, str], ...] = (
+    (("POST", "PATCH"), "/api/v1/runs*", CRITICAL),
+    (("POST",), "/api/v1/agents/*/heartbeat", CRITICAL),
+    (("GET",), "*/export", LOW),
+    (("GET", "POST"), "/api/v1/analytics/*", LOW),
+)
+
+# Never limited or measured
+EXEMPT_PATHS = ("/health", "/ready", "/metrics*")
+
+# Statuses that signal overload: database timeouts (app.db.session.get_db)
+OVERLOAD_STATUSES = frozenset([
+    status.HTTP_504_GATEWAY_TIMEOUT,
+])
+
+if PROMETHEUS_AVAILABLE:
+    CONCURRENCY_LIMIT = Gauge("concurrency_limit", "Adaptive limit on requests in flight")
+    CONCURRENCY_INFLIGHT = Gauge("concurrency_inflight", "Requests in flight")
+    CONCURRENCY_SHED = Counter("concurrency_shed_total", "Requests refused by the concurrency limit", ["priority"])
+
+
+def request_priority(method: str, path: str) -> str:
+    """Priority of a request for load shedding"""
+    for methods, pattern, priority in PRIORITY_ROUTES:
+        if method in methods and fnmatchcase(path, pattern):
+            return priority
+    return NORMAL
+
+
+class ConcurrencyLimitMiddleware:
+    """Adaptive concurrency limiting middleware"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.limiter = AdaptiveConcurrencyLimiter(
+            initial=settings.CONCURRENCY_LIMIT_INITIAL,
+            min_limit=settings.CONCURRENCY_LIMIT_MIN,
+            max_limit=settings.CONCURRENCY_LIMIT_MAX,
+            tolerance=settings.CONCURRENCY_LATENCY_TOLERANCE,
+            backoff=settings.CONCURRENCY_BACKOFF,
+        )
+        self.shares = {CRITICAL: 1.0, NORMAL: 1.0, LOW: settings.CONCURRENCY_LOW_PRIORITY_SHARE}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Process request within the concurrency limit"""
+        path = scope.get("path", "")
+        if scope["type"] != "http" or any(fnmatchcase(path, pattern) for pattern in EXEMPT_PATHS):
+            await self.app(scope, receive, send)
+            return
+
+        priority = request_priority(scope["method"], path)
+        if not self.limiter.try_acquire(self.shares[priority], critical=priority == CRITICAL):
+            if PROMETHEUS_AVAILABLE:
+                CONCURRENCY_SHED.labels(priority=priority).inc()
+            response = JSONResponse(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                content={"detail": "Server is overloaded. Please try again later."},
+                headers={"Retry-After": str(settings.CONCURRENCY_RETRY_AFTER_SECONDS)},
+            )
+            await response(scope, receive, send)
+            return
+
+        started = time.monotonic()
+        latency: Optional[float] = None
+        status_code: Optional[int] = None
+
+        async def send_timed(message: Message) -> None:
+            nonlocal latency, status_code
+            if message["type"] == "http.response.start":
+                latency = time.monotonic() - started
+                status_code = message["status"]
+            await send(message)
+
+        self._observe()
+        try:
+            await self.app(scope, receive, send_timed)
+        finally:
+            dropped = status_code in OVERLOAD_STATUSES
+            self.limiter.release(None if dropped else latency, dropped=dropped)
+            self._observe()
+
+    def _observe(self) -> None:
+        if PROMETHEUS_AVAILABLE:
+            CONCURRENCY_LIMIT.set(self.limiter.limit)
+            CONCURRENCY_INFLIGHT.set(self.limiter.inflight)
@@ -1,75 +1,183 @@
 """
 Rate limiting middleware using Redis
+
+Requests are limited per principal: the API key, else the user of a bearer
+token, else the client IP. Each request takes its route's cost from a GCRA
+bucket of its route's quota class (see app.schemas.rate_limit), so heavy
+queries cost more and machine traffic such as heartbeats doesn't share
+buckets with people. The policy is re-read from Redis every
+RATE_LIMIT_POLICY_REFRESH_SECONDS (app.services.rate_limit_service).
+
+Buckets live in Redis. Busy principals are served from requests each
+process leases from their bucket, and while Redis is unreachable each
+process enforces its share of the limits alone (see app.core.rate_limit).
 """
-from typing import Callable
-from fastapi import Request, Response, HTTPException, status
-from starlette.middleware.base import BaseHTTPMiddleware
-import redis.asyncio as redis
+import math
 import time
+from fnmatch import fnmatchcase
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs
+from uuid import UUID
+import structlog
+from fastapi import HTTPException, status
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from app.core.config import settings
+from app.core.rate_limit import HybridRateLimiter, RateLimitResult
+from app.core.security import api_key_prefix, decode_token_cached
+from app.core.redis import get_redis
+from app.schemas.rate_limit import QuotaClass, RateLimitPolicy, RouteRule
+from app.services.rate_limit_service import POLICY_KEY, RateLimitService
+from app.services.user_service import UserService
+
+logger = structlog.get_logger()
+
+# Requests no rule matches
+DEFAULT_RULE = RouteRule(pattern="*")
 
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
+class RateLimitMiddleware:
     """Rate limiting middleware"""
-    
-    def __init__(self, app):
-        super().__init__(app)
-        self.redis_client = redis.from_url(
-            settings.REDIS_URL,
-            encoding="utf-8",
-            decode_responses=True,
-        )
-        self.rate_limit = settings.RATE_LIMIT_PER_MINUTE
-        self.window = 60  # 1 minute in seconds
-    
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        # Quota class name -> its settings and limiter
+        self.limiters: Dict[str, Tuple[QuotaClass, HybridRateLimiter]] = {}
+        self._apply(RateLimitService.default_policy())
+        self._policy_json: Optional[str] = None
+        self._refresh_at = 0.0
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
         """Process request with rate limiting"""
-        
-        # Skip rate limiting for health checks and docs
-        if request.url.path in ["/health", "/ready", "/docs", "/redoc", "/openapi.json"]:
-            return await call_next(request)
-        
-        # Get client identifier (IP address or user ID from token)
-        client_id = request.client.host if request.client else "unknown"
-        
-        # Create Redis key
-        key = f"rate_limit:{client_id}"
-        
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        await self._refresh_policy()
+        path = scope["path"]
+        if any(fnmatchcase(path, pattern) for pattern in self.policy.exempt):
+            await self.app(scope, receive, send)
+            return
+
+        rule = self._match(scope["method"], path)
+        _, limiter = self.limiters[rule.quota]
+        result = await limiter.check(_bucket_key(scope, rule), rule.cost)
+        if not result.allowed:
+            response = JSONResponse(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                content={"detail": "Rate limit exceeded. Please try again later."},
+                headers={"Retry-After": str(max(math.ceil(result.retry_after), 1))},
+            )
+            _add_headers(response.headers, result)
+            await response(scope, receive, send)
+            return
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                _add_headers(MutableHeaders(scope=message), result)
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+    def _match(self, method: str, path: str) -> RouteRule:
+        for rule in self.policy.routes:
+            if (not rule.methods or method in rule.methods) and fnmatchcase(path, rule.pattern):
+                return rule
+        return DEFAULT_RULE
+
+    async def _refresh_policy(self) -> None:
+        """Pick up a changed policy; one request per process checks each period"""
+        now = time.monotonic()
+        if now < self._refresh_at:
+            return
+        self._refresh_at = now + settings.RATE_LIMIT_POLICY_REFRESH_SECONDS
         try:
-            # Get current count
-            current = await self.redis_client.get(key)
-            
-            if current is None:
-                # First request in window
-                await self.redis_client.setex(key, self.window, 1)
-            else:
-                current_count = int(current)
-                
-                if current_count >= self.rate_limit:
-                    raise HTTPException(
-                        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                        detail="Rate limit exceeded. Please try again later.",
-                        headers={"Retry-After": str(self.window)},
-                    )
-                
-                # Increment counter
-                await self.redis_client.incr(key)
-            
-            # Process request
-            response = await call_next(request)
-            
-            # Add rate limit headers
-            remaining = self.rate_limit - (int(await self.redis_client.get(key) or 0))
-            response.headers["X-RateLimit-Limit"] = str(self.rate_limit)
-            response.headers["X-RateLimit-Remaining"] = str(max(0, remaining))
-            response.headers["X-RateLimit-Reset"] = str(int(time.time()) + self.window)
-            
-            return response
-            
-        except HTTPException:
-            raise
+            raw = await get_redis().get(POLICY_KEY)
+            if raw == self._policy_json:
+                return
+            policy = RateLimitPolicy.model_validate_json(raw) if raw else RateLimitService.default_policy()
         except Exception as e:
-            # Log error but don't block request
-            print(f"Rate limit error: {e}")
-            return await call_next(request)
+            # Keep the current policy
+            logger.warning("rate_limit_policy_unavailable", error=str(e))
+            return
+        self._apply(policy)
+        self._policy_json = raw
+        logger.info("rate_limit_policy_loaded", stored=raw is not None)
+
+    def _apply(self, policy: RateLimitPolicy) -> None:
+        limiters = {}
+        for name, quota in policy.quotas.items():
+            current = self.limiters.get(name)
+            # Unchanged quota classes keep their limiter (and its leases)
+            limiters[name] = current if current and current[0] == quota else (quota, self._limiter(name, quota))
+        self.limiters = limiters
+        self.policy = policy
+
+    @staticmethod
+    def _limiter(name: str, quota: QuotaClass) -> HybridRateLimiter:
+        return HybridRateLimiter(
+            rate_per_minute=quota.rate_per_minute,
+            burst=quota.burst,
+            max_lease=settings.RATE_LIMIT_MAX_LEASE,
+            lease_seconds=settings.RATE_LIMIT_LEASE_SECONDS,
+            processes=settings.RATE_LIMIT_PROCESSES,
+            retry_seconds=settings.RATE_LIMIT_REDIS_RETRY_SECONDS,
+            max_keys=settings.RATE_LIMIT_MAX_LOCAL_KEYS,
+            prefix=f"rate_limit:{name}",
+        )
+
+
+def _bucket_key(scope: Scope, rule: RouteRule) -> str:
+    """
+    Whose bucket a request takes from
+
+    Only principals this process has already verified count (no I/O
+    here); until then a request is keyed by IP. A project is only used when
+    the principal is known to own it, so made-up IDs don't get fresh buckets.
+    """
+    client = scope.get("client")
+    ip_key = f"ip:{client[0] if client else 'unknown'}"
+    if rule.key_by == "ip":
+        return ip_key
+
+    headers = Headers(scope=scope)
+    user_id: Optional[UUID] = None
+    principal_key = ip_key
+    api_key = headers.get("x-api-key")
+    if api_key:
+        user_id = UserService.peek_api_key_user(api_key)
+        if user_id is not None:
+            principal_key = f"key:{user_id}:{api_key_prefix(api_key)}"
+    else:
+        authorization = headers.get("authorization", "")
+        scheme, _, token = authorization.partition(" ")
+        if scheme.lower() == "bearer" and token:
+            try:
+                user_id = UUID(decode_token_cached(token)["sub"])
+                principal_key = f"user:{user_id}"
+            except (HTTPException, KeyError, TypeError, ValueError):
+                user_id = None
+
+    if rule.key_by == "project" and user_id is not None:
+        project_id = _project_id(scope)
+        principal = UserService.peek_principal(user_id)
+        if project_id is not None and principal is not None and principal.owns(project_id):
+            return f"project:{project_id}"
+    return principal_key
+
+
+def _project_id(scope: Scope) -> Optional[UUID]:
+    query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+    value = (query.get("projectId") or query.get("project_id") or [None])[0]
+    try:
+        return UUID(value) if value else None
+    except ValueError:
+        return None
+
+
+def _add_headers(headers: MutableHeaders, result: RateLimitResult) -> None:
+    headers["X-RateLimit-Limit"] = str(result.limit)
+    headers["X-RateLimit-Remaining"] = str(result.remaining)
+    headers["X-RateLimit-Reset"] = str(math.ceil(time.time() + result.reset_after))
@@ -1,14 +1,22 @@
 """Database models"""
 from app.models.user import User, UserRole
+from app.models.api_key import ApiKey
 from app.models.project import Project, ProjectStatus
 from app.models.agent import Agent, AgentType, AgentStatus
 from app.models.tool import Tool, ToolType, ToolStatus
 from app.models.workflow import Workflow, WorkflowStatus, WorkflowTriggerType
 from app.models.workflow_execution import WorkflowExecution, WorkflowStep, ExecutionStatus
+from app.models.job import Job, JobType, JobStatus
+from app.models.rollup import RunRollup, CostRollup, RollupGranularity, RollupScope
+from app.models.latency_sketch import LatencySketchBin, SketchMetric, SketchScope
+from app.models.agent_stats import AgentStats
+from app.models.budget import Budget, BudgetAlert, BudgetPeriod, BudgetAction, BudgetAlertKind
+from app.models.incident import Incident, IncidentSeverity, IncidentStatus, IncidentSignal
 
 __all__ = [
     "User",
     "UserRole",
+    "ApiKey",
     "Project",
     "ProjectStatus",
     "Agent",
@@ -23,4 +31,24 @@ __all__ = [
     "WorkflowExecution",
     "WorkflowStep",
     "ExecutionStatus",
+    "Job",
+    "JobType",
+    "JobStatus",
+    "RunRollup",
+    "CostRollup",
+    "RollupGranularity",
+    "RollupScope",
+    "LatencySketchBin",
+    "SketchMetric",
+    "SketchScope",
+    "AgentStats",
+    "Budget",
+    "BudgetAlert",
+    "BudgetPeriod",
+    "BudgetAction",
+    "BudgetAlertKind",
+    "Incident",
+    "IncidentSeverity",
+    "IncidentStatus",
+    "IncidentSignal",
 ]
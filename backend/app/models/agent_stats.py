@@ -0,0 +1,41 @@
+"""
+Agent Stats Model - Incrementally maintained runtime counters per agent
+"""
+from sqlalchemy import Column, String, Text, BigInteger, Float, ForeignKey, DateTime
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.db.base import Base
+
+
+class AgentStats(Base):
+    """
+    Agent stats - one row per agent, updated by atomic upserts as its runs
+    and steps start and finish, so reading an agent's health is O(1)
+    """
+    __tablename__ = "agent_stats"
+
+    agent_id = Column(UUID(as_uuid=True), ForeignKey("agents.id", ondelete="CASCADE"), primary_key=True)
+
+    # Runs (lifetime)
+    total_runs = Column(BigInteger, default=0, nullable=False)
+    failed_runs = Column(BigInteger, default=0, nullable=False)  # failed or timed out
+    in_flight_runs = Column(BigInteger, default=0, nullable=False)  # pending or running
+    last_run_at = Column(DateTime, nullable=True)
+
+    # Steps executed by the agent (lifetime)
+    total_steps = Column(BigInteger, default=0, nullable=False)
+    failed_steps = Column(BigInteger, default=0, nullable=False)
+
+    # Recent behaviour: exponentially weighted moving averages over finished runs
+    error_rate_ewma = Column(Float, nullable=True)
+    latency_ewma_ms = Column(Float, nullable=True)
+
+    last_error = Column(Text, nullable=True)
+    last_error_at = Column(DateTime, nullable=True)
+
+    # Reported by the agent runtime
+    last_heartbeat = Column(DateTime, nullable=True)
+    reported_health = Column(String(20), nullable=True)
+
+    def __repr__(self):
+        return f"<AgentStats {self.agent_id} runs={self.total_runs} failed={self.failed_runs}>"
@@ -0,0 +1,30 @@
+"""
+API Key Model - Named keys for programmatic access
+"""
+import uuid
+from sqlalchemy import Column, String, ForeignKey, UniqueConstraint
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.db.base import Base, TimestampMixin
+
+
+class ApiKey(Base, TimestampMixin):
+    """
+    API key of a user
+
+    Only the key's HMAC digest is stored; the key itself is shown once, when
+    it is created.
+    """
+    __tablename__ = "api_keys"
+    __table_args__ = (
+        UniqueConstraint("user_id", "name", name="uq_api_keys_user_name"),
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    name = Column(String(100), nullable=False)
+    prefix = Column(String(16), nullable=False)  # Shown in listings to tell keys apart
+    key_hash = Column(String(64), nullable=False, unique=True, index=True)
+
+    def __repr__(self):
+        return f"<ApiKey {self.name} sk_{self.prefix}_… user={self.user_id}>"
@@ -0,0 +1,82 @@
+"""
+Budget Models - Spending limits for projects and agents, and their alerts
+"""
+import uuid
+import enum
+from sqlalchemy import (
+    Column, Boolean, Float, Numeric, ForeignKey, DateTime, Enum as SQLEnum, UniqueConstraint,
+)
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.db.base import Base, TimestampMixin
+from app.models.rollup import RollupScope
+
+
+class BudgetPeriod(str, enum.Enum):
+    """Window a budget's spend is counted over (UTC calendar)"""
+    DAILY = "daily"
+    MONTHLY = "monthly"
+
+
+class BudgetAction(str, enum.Enum):
+    """What happens to new runs once a budget is exhausted"""
+    REJECT = "reject"
+    QUEUE = "queue"  # Accepted but held until the budget has room again
+
+
+class BudgetAlertKind(str, enum.Enum):
+    """Budget alert type"""
+    THRESHOLD = "threshold"
+    EXHAUSTED = "exhausted"
+
+
+class Budget(Base, TimestampMixin):
+    """
+    Budget - a spending limit for a project, workflow or agent per period
+
+    Spend is counted in Redis as steps report costs; ``spent_usd`` is the
+    value last reconciled from cost rollups and is used when Redis is down.
+    """
+    __tablename__ = "budgets"
+    __table_args__ = (
+        UniqueConstraint("scope_type", "scope_id", "period", name="uq_budgets_scope_period"),
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    project_id = Column(UUID(as_uuid=True), ForeignKey("projects.id", ondelete="CASCADE"), nullable=False, index=True)
+    scope_type = Column(SQLEnum(RollupScope), nullable=False)
+    scope_id = Column(UUID(as_uuid=True), nullable=False)
+    period = Column(SQLEnum(BudgetPeriod), default=BudgetPeriod.MONTHLY, nullable=False)
+
+    limit_usd = Column(Numeric(14, 2), nullable=False)
+    alert_threshold = Column(Float, nullable=False)  # Fraction of the limit
+    action = Column(SQLEnum(BudgetAction), default=BudgetAction.REJECT, nullable=False)
+    is_active = Column(Boolean, default=True, nullable=False)
+
+    # Last reconciliation
+    spent_usd = Column(Numeric(18, 6), default=0, nullable=False)
+    reconciled_at = Column(DateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<Budget {self.scope_type}:{self.scope_id} {self.period} ${self.limit_usd}>"
+
+
+class BudgetAlert(Base):
+    """
+    Budget alert - raised once per budget, period and kind
+    """
+    __tablename__ = "budget_alerts"
+    __table_args__ = (
+        UniqueConstraint("budget_id", "period_start", "kind", name="uq_budget_alerts_budget_period_kind"),
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    budget_id = Column(UUID(as_uuid=True), ForeignKey("budgets.id", ondelete="CASCADE"), nullable=False, index=True)
+    kind = Column(SQLEnum(BudgetAlertKind), nullable=False)
+    period_start = Column(DateTime, nullable=False)
+    spent_usd = Column(Numeric(18, 6), nullable=False)
+    limit_usd = Column(Numeric(14, 2), nullable=False)
+    created_at = Column(DateTime, nullable=False)
+
+    def __repr__(self):
+        return f"<BudgetAlert {self.kind} budget={self.budget_id} @{self.period_start}>"
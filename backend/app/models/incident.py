@@ -0,0 +1,78 @@
+"""
+Incident Model - Anomalies in run failure rates and latency
+"""
+import uuid
+import enum
+from sqlalchemy import Column, String, Integer, Float, ForeignKey, DateTime, Index, Enum as SQLEnum, text
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+
+from app.db.base import Base, TimestampMixin
+from app.models.rollup import RollupScope
+
+
+class IncidentSeverity(str, enum.Enum):
+    """Incident severity (sev1 is the most severe)"""
+    SEV1 = "sev1"
+    SEV2 = "sev2"
+    SEV3 = "sev3"
+
+
+class IncidentStatus(str, enum.Enum):
+    """Incident lifecycle status"""
+    OPEN = "open"
+    MITIGATED = "mitigated"
+    RESOLVED = "resolved"
+
+
+class IncidentSignal(str, enum.Enum):
+    """What the detector saw"""
+    FAILURE_RATE = "failure_rate"
+    LATENCY = "latency"
+
+
+# Minutes to resolve an incident of each severity
+SLA_MINUTES = {
+    IncidentSeverity.SEV1: 60,
+    IncidentSeverity.SEV2: 240,
+    IncidentSeverity.SEV3: 1440,
+}
+
+
+class Incident(Base, TimestampMixin):
+    """
+    Incident - a breached failure rate or latency signal of a workflow or agent
+
+    At most one incident per scope and signal is unresolved at a time.
+    """
+    __tablename__ = "incidents"
+    __table_args__ = (
+        Index(
+            "uq_incidents_unresolved_signal",
+            "scope_type", "scope_id", "signal",
+            unique=True,
+            postgresql_where=text("status <> 'RESOLVED'"),
+        ),
+        Index("ix_incidents_project_status", "project_id", "status"),
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    project_id = Column(UUID(as_uuid=True), ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
+    owner_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+
+    title = Column(String(255), nullable=False)
+    severity = Column(SQLEnum(IncidentSeverity), nullable=False)
+    status = Column(SQLEnum(IncidentStatus), default=IncidentStatus.OPEN, nullable=False)
+    sla_minutes = Column(Integer, nullable=False)
+
+    # Source
+    scope_type = Column(SQLEnum(RollupScope), nullable=False)
+    scope_id = Column(UUID(as_uuid=True), nullable=False)
+    signal = Column(SQLEnum(IncidentSignal), nullable=False)
+    baseline = Column(Float, nullable=True)  # Failure rate, or typical duration in ms
+    observed = Column(Float, nullable=True)  # Value when the incident was opened
+    run_ids = Column(JSONB, default=list, nullable=False)  # Run that triggered it
+
+    resolved_at = Column(DateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<Incident {self.severity} {self.signal} {self.scope_type}:{self.scope_id} {self.status}>"
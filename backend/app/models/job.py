@@ -0,0 +1,56 @@
+"""
+Job Model - Tracking for long-running background operations
+"""
+import uuid
+import enum
+from sqlalchemy import Column, Text, ForeignKey, DateTime, Enum as SQLEnum
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy.orm import relationship
+
+from app.db.base import Base, TimestampMixin
+
+
+class JobType(str, enum.Enum):
+    """Job type enumeration"""
+    PROJECT_DELETE = "project_delete"
+    WORKFLOW_DELETE = "workflow_delete"
+    ROLLUP_REBUILD = "rollup_rebuild"
+
+
+class JobStatus(str, enum.Enum):
+    """Job status enumeration"""
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class Job(Base, TimestampMixin):
+    """
+    Job model - a background operation the API accepted (202) and runs out of band
+    """
+    __tablename__ = "jobs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    type = Column(SQLEnum(JobType), nullable=False)
+    status = Column(SQLEnum(JobStatus), default=JobStatus.PENDING, nullable=False, index=True)
+
+    # What the job operates on (project, workflow, ...)
+    target_id = Column(UUID(as_uuid=True), nullable=True, index=True)
+    requested_by_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=True)
+    # Job-specific arguments (e.g. the time range to re-aggregate)
+    params = Column(JSONB, default=dict, nullable=False)
+
+    # Execution tracking
+    started_at = Column(DateTime, nullable=True)
+    completed_at = Column(DateTime, nullable=True)
+
+    # Progress counters (e.g. rows deleted per table) and error info
+    progress = Column(JSONB, default=dict, nullable=False)
+    error_message = Column(Text, nullable=True)
+
+    # Relationships
+    requested_by = relationship("User")
+
+    def __repr__(self):
+        return f"<Job {self.type} ({self.status})>"
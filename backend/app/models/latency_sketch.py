@@ -0,0 +1,46 @@
+"""
+Latency Sketch Models - Mergeable duration distributions per time bucket
+"""
+import enum
+from sqlalchemy import Column, String, Integer, BigInteger, DateTime, Enum as SQLEnum
+
+from app.db.base import Base
+from app.models.rollup import RollupGranularity
+
+
+class SketchMetric(str, enum.Enum):
+    """Which duration a sketch describes"""
+    RUN_DURATION = "run_duration"
+    STEP_DURATION = "step_duration"
+
+
+class SketchScope(str, enum.Enum):
+    """What a sketch aggregates over"""
+    WORKFLOW = "workflow"
+    AGENT = "agent"
+    PROJECT = "project"
+    TOOL = "tool"
+    STEP_TYPE = "step_type"
+
+
+class LatencySketchBin(Base):
+    """
+    One bin of a latency sketch (see app.core.sketch)
+
+    A sketch for a (metric, scope, bucket) is the set of its bin rows;
+    sketches for any range are merged by summing counts per bin_index.
+    """
+    __tablename__ = "latency_sketch_bins"
+
+    metric = Column(SQLEnum(SketchMetric), primary_key=True)
+    granularity = Column(SQLEnum(RollupGranularity), primary_key=True)
+    scope_type = Column(SQLEnum(SketchScope), primary_key=True)
+    # Object id, or the step type name for STEP_TYPE
+    scope_key = Column(String(100), primary_key=True)
+    bucket_start = Column(DateTime, primary_key=True, index=True)
+    bin_index = Column(Integer, primary_key=True)
+
+    count = Column(BigInteger, default=0, nullable=False)
+
+    def __repr__(self):
+        return f"<LatencySketchBin {self.metric} {self.scope_type}:{self.scope_key} [{self.bin_index}]={self.count}>"
@@ -36,12 +36,15 @@ class Project(Base, TimestampMixin):
     # Feature flags
     is_public = Column(Boolean, default=False, nullable=False)
     is_template = Column(Boolean, default=False, nullable=False)
+    # Set while a delete job removes the project; it is hidden from then on
+    is_deleting = Column(Boolean, default=False, nullable=False)
     
     # Relationships
     owner = relationship("User", backref="projects")
-    agents = relationship("Agent", back_populates="project", cascade="all, delete-orphan")
-    workflows = relationship("Workflow", back_populates="project", cascade="all, delete-orphan")
-    tools = relationship("Tool", back_populates="project", cascade="all, delete-orphan")
+    # Children are removed by ON DELETE CASCADE, never loaded just to be deleted
+    agents = relationship("Agent", back_populates="project", cascade="all, delete-orphan", passive_deletes=True)
+    workflows = relationship("Workflow", back_populates="project", cascade="all, delete-orphan", passive_deletes=True)
+    tools = relationship("Tool", back_populates="project", cascade="all, delete-orphan", passive_deletes=True)
 
     def __repr__(self):
         return f"<Project {self.name}>"
@@ -0,0 +1,76 @@
+"""
+Rollup Models - Pre-aggregated run statistics and costs per time bucket
+"""
+import enum
+from sqlalchemy import Column, String, BigInteger, Numeric, DateTime, Enum as SQLEnum
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.db.base import Base
+
+
+class RollupGranularity(str, enum.Enum):
+    """Rollup bucket size"""
+    MINUTE = "minute"
+    HOUR = "hour"
+    DAY = "day"
+
+
+class RollupScope(str, enum.Enum):
+    """What a rollup row aggregates over"""
+    WORKFLOW = "workflow"
+    AGENT = "agent"
+    PROJECT = "project"
+
+
+class RunRollup(Base):
+    """
+    Run rollup - counters for the runs of one scope started in one time bucket
+
+    Rows are upsert-added when runs reach a terminal status and can be
+    rebuilt from workflow_executions for any range.
+    """
+    __tablename__ = "run_rollups"
+
+    granularity = Column(SQLEnum(RollupGranularity), primary_key=True)
+    scope_type = Column(SQLEnum(RollupScope), primary_key=True)
+    scope_id = Column(UUID(as_uuid=True), primary_key=True)
+    env = Column(String(20), primary_key=True)
+    bucket_start = Column(DateTime, primary_key=True, index=True)
+
+    # Counters by terminal status
+    total_runs = Column(BigInteger, default=0, nullable=False)
+    succeeded_runs = Column(BigInteger, default=0, nullable=False)
+    failed_runs = Column(BigInteger, default=0, nullable=False)
+    cancelled_runs = Column(BigInteger, default=0, nullable=False)
+    timeout_runs = Column(BigInteger, default=0, nullable=False)
+
+    # Duration of completed runs (sum / count = average)
+    duration_sum_seconds = Column(BigInteger, default=0, nullable=False)
+    duration_count = Column(BigInteger, default=0, nullable=False)
+
+    def __repr__(self):
+        return f"<RunRollup {self.scope_type}:{self.scope_id} {self.granularity}@{self.bucket_start}>"
+
+
+class CostRollup(Base):
+    """
+    Cost rollup - token usage and cost of one scope, day and model
+
+    Rows are upsert-added as steps report usage (bucketed by the day the
+    step finished, or the report day while it runs) and can be rebuilt
+    from workflow_steps for any range.
+    """
+    __tablename__ = "cost_rollups"
+
+    scope_type = Column(SQLEnum(RollupScope), primary_key=True)
+    scope_id = Column(UUID(as_uuid=True), primary_key=True)
+    bucket_start = Column(DateTime, primary_key=True, index=True)  # Start of the day (UTC)
+    model = Column(String(100), primary_key=True)  # "unknown" when the step named none
+
+    steps = Column(BigInteger, default=0, nullable=False)
+    tokens_prompt = Column(BigInteger, default=0, nullable=False)
+    tokens_completion = Column(BigInteger, default=0, nullable=False)
+    usd_cost = Column(Numeric(18, 6), default=0, nullable=False)
+
+    def __repr__(self):
+        return f"<CostRollup {self.scope_type}:{self.scope_id} {self.model}@{self.bucket_start}>"
@@ -35,7 +35,7 @@ class Tool(Base, TimestampMixin):
     __tablename__ = "tools"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    project_id = Column(UUID(as_uuid=True), ForeignKey("projects.id"), nullable=False, index=True)
+    project_id = Column(UUID(as_uuid=True), ForeignKey("projects.id", ondelete="CASCADE"), nullable=False, index=True)
     name = Column(String(255), nullable=False, index=True)
     description = Column(Text, nullable=True)
     type = Column(SQLEnum(ToolType), default=ToolType.FUNCTION, nullable=False)
@@ -2,7 +2,7 @@
 User model for authentication and authorization
 """
 from datetime import datetime
-from sqlalchemy import Column, String, Boolean, DateTime, Enum as SQLEnum
+from sqlalchemy import Column, String, Boolean, DateTime, Integer, Enum as SQLEnum
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 import uuid
 import enum
@@ -29,15 +29,17 @@ class User(Base, TimestampMixin):
     password_hash = Column(String(255), nullable=False)
     role = Column(SQLEnum(UserRole), nullable=False, default=UserRole.VIEWER)
     
-    # API Key for programmatic access
-    api_key = Column(String(255), unique=True, nullable=True, index=True)
-    api_key_hash = Column(String(255), nullable=True)
-    
     # User status
     is_active = Column(Boolean, default=True, nullable=False)
     is_superuser = Column(Boolean, default=False, nullable=False)
     is_verified = Column(Boolean, default=False, nullable=False)
     
+    # Revocation epoch: tokens issued under an older epoch are rejected
+    token_epoch = Column(Integer, default=0, server_default="0", nullable=False)
+    # Bumped whenever cached principals of the user go stale (role, status,
+    # tokens or owned projects changed)
+    auth_version = Column(Integer, default=0, server_default="0", nullable=False)
+    
     # Tracking
     last_login_at = Column(DateTime, nullable=True)
     
@@ -34,7 +34,7 @@ class Workflow(Base, TimestampMixin):
     __tablename__ = "workflows"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    project_id = Column(UUID(as_uuid=True), ForeignKey("projects.id"), nullable=False, index=True)
+    project_id = Column(UUID(as_uuid=True), ForeignKey("projects.id", ondelete="CASCADE"), nullable=False, index=True)
     name = Column(String(255), nullable=False, index=True)
     description = Column(Text, nullable=True)
     status = Column(SQLEnum(WorkflowStatus), default=WorkflowStatus.DRAFT, nullable=False)
@@ -63,7 +63,7 @@ class Workflow(Base, TimestampMixin):
     
     # Relationships
     project = relationship("Project", back_populates="workflows")
-    executions = relationship("WorkflowExecution", back_populates="workflow", cascade="all, delete-orphan")
+    executions = relationship("WorkflowExecution", back_populates="workflow", cascade="all, delete-orphan", passive_deletes=True)
 
     def __repr__(self):
         return f"<Workflow {self.name} ({self.status})>"
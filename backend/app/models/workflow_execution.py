@@ -1,14 +1,14 @@
 """
 Workflow Execution Models - Runtime tracking for workflow executions
 """
-import uuid
 import enum
 from datetime import datetime
-from sqlalchemy import Column, String, Text, Integer, ForeignKey, DateTime, Enum as SQLEnum
+from sqlalchemy import Column, String, Text, Integer, BigInteger, Numeric, ForeignKey, DateTime, Index, func, Enum as SQLEnum
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 
 from app.db.base import Base, TimestampMixin
+from app.core.ids import uuid7
 
 
 class ExecutionStatus(str, enum.Enum):
@@ -21,14 +21,27 @@ class ExecutionStatus(str, enum.Enum):
     TIMEOUT = "timeout"
 
 
+# Statuses a run or step never leaves
+TERMINAL_STATUSES = frozenset({
+    ExecutionStatus.COMPLETED,
+    ExecutionStatus.FAILED,
+    ExecutionStatus.CANCELLED,
+    ExecutionStatus.TIMEOUT,
+})
+
+
 class WorkflowExecution(Base, TimestampMixin):
     """
     Workflow Execution model - tracks individual workflow runs
+
+    Ids are time-ordered UUIDv7 so inserts append to the primary key index
+    and the id doubles as a pagination cursor. Rows created before the switch
+    keep their v4 ids.
     """
     __tablename__ = "workflow_executions"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    workflow_id = Column(UUID(as_uuid=True), ForeignKey("workflows.id"), nullable=False, index=True)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
+    workflow_id = Column(UUID(as_uuid=True), ForeignKey("workflows.id", ondelete="CASCADE"), nullable=False, index=True)
     triggered_by_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=True)
     
     # Additional runtime context (stored in metadata for now, can be migrated to columns later)
@@ -37,7 +50,7 @@ class WorkflowExecution(Base, TimestampMixin):
     status = Column(SQLEnum(ExecutionStatus), default=ExecutionStatus.PENDING, nullable=False, index=True)
     
     # Execution tracking
-    started_at = Column(DateTime, nullable=True)
+    started_at = Column(DateTime, nullable=True, index=True)  # Rollups bucket runs by start time
     completed_at = Column(DateTime, nullable=True)  # Maps to ended_at in API
     duration_seconds = Column(Integer, nullable=True)  # Maps to duration_ms in API (converted)
     
@@ -49,13 +62,18 @@ class WorkflowExecution(Base, TimestampMixin):
     error_message = Column(Text, nullable=True)
     error_details = Column(JSONB, default=dict, nullable=False)
     
+    # Token usage and cost, summed from the run's steps as they report usage
+    tokens_prompt = Column(BigInteger, default=0, nullable=False)
+    tokens_completion = Column(BigInteger, default=0, nullable=False)
+    usd_cost = Column(Numeric(14, 6), default=0, nullable=False)
+    
     # Metadata (stores agent_id, project_id, env, etc.)
     metadata_ = Column("metadata", JSONB, default=dict, nullable=False)
     
     # Relationships
     workflow = relationship("Workflow", back_populates="executions")
     triggered_by = relationship("User")
-    steps = relationship("WorkflowStep", back_populates="execution", cascade="all, delete-orphan")
+    steps = relationship("WorkflowStep", back_populates="execution", cascade="all, delete-orphan", passive_deletes=True)
     
     # Properties for API compatibility
     @property
@@ -95,8 +113,8 @@ class WorkflowStep(Base, TimestampMixin):
     """
     __tablename__ = "workflow_steps"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    execution_id = Column(UUID(as_uuid=True), ForeignKey("workflow_executions.id"), nullable=False, index=True)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
+    execution_id = Column(UUID(as_uuid=True), ForeignKey("workflow_executions.id", ondelete="CASCADE"), nullable=False, index=True)
     
     # Step identification
     step_id = Column(String(100), nullable=False)  # ID from workflow definition
@@ -123,11 +141,22 @@ class WorkflowStep(Base, TimestampMixin):
     agent_id = Column(UUID(as_uuid=True), nullable=True)
     tool_id = Column(UUID(as_uuid=True), nullable=True)
     
+    # Token usage (model steps only); usd_cost is NULL when the model has no price
+    model = Column(String(100), nullable=True)
+    tokens_prompt = Column(Integer, nullable=True)
+    tokens_completion = Column(Integer, nullable=True)
+    usd_cost = Column(Numeric(14, 6), nullable=True)
+    
     # Metadata
     metadata_ = Column("metadata", JSONB, default=dict, nullable=False)
     
     # Relationships
     execution = relationship("WorkflowExecution", back_populates="steps")
 
+    __table_args__ = (
+        # Cost rollup rebuilds select steps by the day their usage was recorded
+        Index("ix_workflow_steps_usage_at", func.coalesce(completed_at, started_at)),
+    )
+
     def __repr__(self):
         return f"<WorkflowStep {self.step_name} ({self.status})>"
@@ -160,4 +160,8 @@ class AgentHealthResponse(BaseModel):
     metrics: Dict[str, Any] = Field(default_factory=dict)
     uptime_seconds: Optional[int] = Field(None, serialization_alias="uptimeSeconds")
     error_count: Optional[int] = Field(None, serialization_alias="errorCount")
+    error_rate: Optional[float] = Field(None, serialization_alias="errorRate")
     last_error: Optional[str] = Field(None, serialization_alias="lastError")
+    last_error_at: Optional[datetime] = Field(None, serialization_alias="lastErrorAt")
+    latency_ms: Optional[float] = Field(None, serialization_alias="latencyMs")
+    in_flight_runs: int = Field(0, serialization_alias="inFlightRuns")
@@ -0,0 +1,120 @@
+"""
+Analytics Pydantic Schemas
+Serialization for rollup-backed analytics
+"""
+from datetime import datetime
+from typing import Any, Optional, List, Union
+from uuid import UUID
+from pydantic import BaseModel, Field
+
+from app.models.latency_sketch import SketchMetric, SketchScope
+from app.models.rollup import RollupGranularity, RollupScope
+from app.services.timeseries_service import TimeseriesMetric, TimeseriesGroupBy
+
+
+class RunRollupBucket(BaseModel):
+    """Run statistics for one time bucket"""
+    bucket_start: datetime = Field(serialization_alias="bucketStart")
+    total_runs: int = Field(serialization_alias="totalRuns")
+    succeeded_runs: int = Field(serialization_alias="succeededRuns")
+    failed_runs: int = Field(serialization_alias="failedRuns")
+    cancelled_runs: int = Field(serialization_alias="cancelledRuns")
+    timeout_runs: int = Field(serialization_alias="timeoutRuns")
+    success_rate: Optional[float] = Field(None, serialization_alias="successRate")
+    avg_duration_ms: Optional[int] = Field(None, serialization_alias="avgDurationMs")
+
+
+class RunRollupSeriesResponse(BaseModel):
+    """Run statistics over time for a workflow, agent or project"""
+    scope: RollupScope
+    scope_id: UUID = Field(serialization_alias="scopeId")
+    granularity: RollupGranularity
+    env: Optional[str] = None
+    start: datetime
+    end: datetime
+    buckets: List[RunRollupBucket] = Field(default_factory=list)
+
+
+class TimeseriesSeries(BaseModel):
+    """Values of one group, aligned with the response's timestamps"""
+    key: Optional[str] = None  # Group value (ID, env or status); None when ungrouped
+    label: Optional[str] = None  # Workflow or agent name
+    values: List[Optional[Union[int, float]]] = Field(default_factory=list)
+
+
+class TimeseriesResponse(BaseModel):
+    """Column-oriented run metric series"""
+    metric: TimeseriesMetric
+    group_by: Optional[TimeseriesGroupBy] = Field(None, serialization_alias="groupBy")
+    scope: RollupScope
+    scope_id: UUID = Field(serialization_alias="scopeId")
+    granularity: RollupGranularity  # Rollup the points were summed from
+    step_seconds: int = Field(serialization_alias="stepSeconds")
+    start: datetime
+    end: datetime
+    timestamps: List[datetime] = Field(default_factory=list)
+    series: List[TimeseriesSeries] = Field(default_factory=list)
+
+
+class RollupRebuildRequest(BaseModel):
+    """Time range to re-aggregate from raw runs"""
+    start: datetime
+    end: datetime
+
+
+class LatencyPercentile(BaseModel):
+    """One quantile of a duration distribution"""
+    quantile: float
+    value_ms: Optional[float] = Field(None, serialization_alias="valueMs")
+
+
+class LatencyPercentilesResponse(BaseModel):
+    """Duration percentiles for a workflow, agent, project, tool or step type"""
+    metric: SketchMetric
+    scope: SketchScope
+    scope_id: str = Field(serialization_alias="scopeId")
+    start: Optional[datetime] = None
+    end: Optional[datetime] = None
+    count: int
+    percentiles: List[LatencyPercentile] = Field(default_factory=list)
+
+
+class CostTotals(BaseModel):
+    """Token usage and cost of model steps"""
+    steps: int = 0
+    tokens_prompt: int = Field(0, serialization_alias="tokensPrompt")
+    tokens_completion: int = Field(0, serialization_alias="tokensCompletion")
+    usd_cost: float = Field(0.0, serialization_alias="usdCost")
+
+
+class DailyCost(CostTotals):
+    """Usage and cost for one day"""
+    day: datetime
+
+
+class ModelCost(CostTotals):
+    """Usage and cost for one model"""
+    model: str
+
+
+class CostSummaryResponse(BaseModel):
+    """Token usage and cost of a workflow, agent or project"""
+    scope: RollupScope
+    scope_id: UUID = Field(serialization_alias="scopeId")
+    start: datetime
+    end: datetime
+    totals: CostTotals
+    days: List[DailyCost] = Field(default_factory=list)
+    models: List[ModelCost] = Field(default_factory=list)
+
+
+class ArchiveQueryRequest(BaseModel):
+    """Read-only SQL over the run archive (tables: runs, steps)"""
+    sql: str = Field(..., min_length=1, max_length=20000)
+
+
+class ArchiveResultResponse(BaseModel):
+    """Tabular result of an archive report or query"""
+    columns: List[str] = Field(default_factory=list)
+    rows: List[List[Any]] = Field(default_factory=list)
+    truncated: bool = False  # More rows than ARCHIVE_QUERY_MAX_ROWS
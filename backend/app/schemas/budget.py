@@ -0,0 +1,74 @@
+"""
+Budget Pydantic Schemas
+Validation and serialization for budgets and budget alerts
+"""
+from datetime import datetime
+from decimal import Decimal
+from typing import Optional, List
+from uuid import UUID
+from pydantic import BaseModel, Field, ConfigDict
+
+from app.models.budget import BudgetPeriod, BudgetAction, BudgetAlertKind
+from app.models.rollup import RollupScope
+
+
+class BudgetCreate(BaseModel):
+    """Schema for creating a budget"""
+    scope: RollupScope = Field(..., description="project, agent or workflow")
+    scope_id: UUID = Field(..., alias="scopeId")
+    period: BudgetPeriod = BudgetPeriod.MONTHLY
+    limit_usd: Decimal = Field(..., gt=0, max_digits=14, decimal_places=2, alias="limitUsd")
+    alert_threshold: Optional[float] = Field(
+        None, gt=0, le=1, alias="alertThreshold", description="Fraction of the limit (default BUDGET_ALERT_THRESHOLD)"
+    )
+    action: BudgetAction = BudgetAction.REJECT
+
+    model_config = ConfigDict(populate_by_name=True)
+
+
+class BudgetUpdate(BaseModel):
+    """Schema for updating a budget"""
+    limit_usd: Optional[Decimal] = Field(None, gt=0, max_digits=14, decimal_places=2, alias="limitUsd")
+    alert_threshold: Optional[float] = Field(None, gt=0, le=1, alias="alertThreshold")
+    action: Optional[BudgetAction] = None
+    is_active: Optional[bool] = Field(None, alias="isActive")
+
+    model_config = ConfigDict(populate_by_name=True)
+
+
+class BudgetResponse(BaseModel):
+    """Schema for budget response, with spend in the current period"""
+    model_config = ConfigDict(from_attributes=True)
+
+    id: UUID
+    project_id: UUID = Field(serialization_alias="projectId")
+    scope_type: RollupScope = Field(serialization_alias="scope")
+    scope_id: UUID = Field(serialization_alias="scopeId")
+    period: BudgetPeriod
+    limit_usd: float = Field(serialization_alias="limitUsd")
+    alert_threshold: float = Field(serialization_alias="alertThreshold")
+    action: BudgetAction
+    is_active: bool = Field(serialization_alias="isActive")
+    period_start: Optional[datetime] = Field(None, serialization_alias="periodStart")
+    spent_usd: float = Field(0.0, serialization_alias="spentUsd")
+    remaining_usd: Optional[float] = Field(None, serialization_alias="remainingUsd")
+    reconciled_at: Optional[datetime] = Field(None, serialization_alias="reconciledAt")
+    created_at: datetime = Field(serialization_alias="createdAt")
+
+
+class BudgetListResponse(BaseModel):
+    """Budgets of a project"""
+    items: List[BudgetResponse]
+
+
+class BudgetAlertResponse(BaseModel):
+    """Schema for budget alert response"""
+    model_config = ConfigDict(from_attributes=True)
+
+    id: UUID
+    budget_id: UUID = Field(serialization_alias="budgetId")
+    kind: BudgetAlertKind
+    period_start: datetime = Field(serialization_alias="periodStart")
+    spent_usd: float = Field(serialization_alias="spentUsd")
+    limit_usd: float = Field(serialization_alias="limitUsd")
+    created_at: datetime = Field(serialization_alias="createdAt")
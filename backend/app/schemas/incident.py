@@ -0,0 +1,49 @@
+"""
+Incident Pydantic Schemas
+"""
+from datetime import datetime
+from typing import List, Optional
+from uuid import UUID
+from pydantic import BaseModel, ConfigDict, Field
+
+from app.models.incident import IncidentSeverity, IncidentSignal, IncidentStatus
+from app.models.rollup import RollupScope
+
+
+class IncidentUpdate(BaseModel):
+    """Schema for triaging an incident"""
+    status: Optional[IncidentStatus] = None
+    severity: Optional[IncidentSeverity] = None
+    owner_id: Optional[UUID] = Field(None, alias="ownerUserId")
+
+    model_config = ConfigDict(populate_by_name=True)
+
+
+class IncidentResponse(BaseModel):
+    """Schema for incident response"""
+    model_config = ConfigDict(from_attributes=True)
+
+    id: UUID
+    project_id: UUID = Field(serialization_alias="projectId")
+    severity: IncidentSeverity
+    title: str
+    status: IncidentStatus
+    run_ids: List[str] = Field(default_factory=list, serialization_alias="runIds")
+    owner_id: Optional[UUID] = Field(None, serialization_alias="ownerUserId")
+    sla_minutes: int = Field(serialization_alias="slaMinutes")
+    scope_type: RollupScope = Field(serialization_alias="scope")
+    scope_id: UUID = Field(serialization_alias="scopeId")
+    signal: IncidentSignal
+    baseline: Optional[float] = None
+    observed: Optional[float] = None
+    created_at: datetime = Field(serialization_alias="createdAt")
+    resolved_at: Optional[datetime] = Field(None, serialization_alias="resolvedAt")
+
+
+class IncidentListResponse(BaseModel):
+    """Paginated response for incident list"""
+    items: List[IncidentResponse]
+    total: int
+    page: int
+    page_size: int = Field(serialization_alias="pageSize")
+    total_pages: int = Field(serialization_alias="totalPages")
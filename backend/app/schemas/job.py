@@ -0,0 +1,26 @@
+"""
+Job Pydantic Schemas
+Serialization for background job status resources
+"""
+from datetime import datetime
+from typing import Optional, Dict, Any
+from uuid import UUID
+from pydantic import BaseModel, Field, ConfigDict
+
+from app.models.job import JobType, JobStatus
+
+
+class JobResponse(BaseModel):
+    """Status of a background job"""
+    model_config = ConfigDict(from_attributes=True, populate_by_name=True)
+
+    id: UUID
+    type: JobType
+    status: JobStatus
+    target_id: Optional[UUID] = Field(None, serialization_alias="targetId")
+    params: Dict[str, Any] = Field(default_factory=dict)
+    progress: Dict[str, Any] = Field(default_factory=dict)
+    error_message: Optional[str] = Field(None, serialization_alias="errorMessage")
+    created_at: datetime = Field(serialization_alias="createdAt")
+    started_at: Optional[datetime] = Field(None, serialization_alias="startedAt")
+    completed_at: Optional[datetime] = Field(None, serialization_alias="completedAt")
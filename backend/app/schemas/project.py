@@ -2,7 +2,7 @@
 Project Schemas - Pydantic models for validation
 """
 from datetime import datetime
-from typing import Optional
+from typing import Dict, Optional
 from uuid import UUID
 from pydantic import BaseModel, Field, ConfigDict
 
@@ -53,3 +53,43 @@ class ProjectListResponse(BaseModel):
     page: int
     page_size: int
     total_pages: int
+
+
+class ResourceCounts(BaseModel):
+    """Number of resources of one type, by status (and health for agents)"""
+    total: int = 0
+    by_status: Dict[str, int] = Field(default_factory=dict, serialization_alias="byStatus")
+    by_health: Optional[Dict[str, int]] = Field(None, serialization_alias="byHealth")
+
+
+class EnvRunCounts(BaseModel):
+    """Finished runs in one environment"""
+    total_runs: int = Field(serialization_alias="totalRuns")
+    succeeded_runs: int = Field(serialization_alias="succeededRuns")
+    failed_runs: int = Field(serialization_alias="failedRuns")
+
+
+class RecentRunStats(BaseModel):
+    """Runs that finished in the recent window, plus runs still in flight"""
+    window_start: datetime = Field(serialization_alias="windowStart")
+    window_end: datetime = Field(serialization_alias="windowEnd")
+    total_runs: int = Field(serialization_alias="totalRuns")
+    succeeded_runs: int = Field(serialization_alias="succeededRuns")
+    failed_runs: int = Field(serialization_alias="failedRuns")
+    cancelled_runs: int = Field(serialization_alias="cancelledRuns")
+    timeout_runs: int = Field(serialization_alias="timeoutRuns")
+    success_rate: Optional[float] = Field(None, serialization_alias="successRate")
+    avg_duration_ms: Optional[int] = Field(None, serialization_alias="avgDurationMs")
+    p95_duration_ms: Optional[int] = Field(None, serialization_alias="p95DurationMs")
+    by_env: Dict[str, EnvRunCounts] = Field(default_factory=dict, serialization_alias="byEnv")
+    in_flight: Dict[str, int] = Field(default_factory=dict, serialization_alias="inFlight")
+
+
+class ProjectOverviewResponse(BaseModel):
+    """Dashboard counts for a project; may be a few seconds old (see generatedAt)"""
+    project_id: UUID = Field(serialization_alias="projectId")
+    generated_at: datetime = Field(serialization_alias="generatedAt")
+    agents: ResourceCounts
+    tools: ResourceCounts
+    workflows: ResourceCounts
+    runs: RecentRunStats
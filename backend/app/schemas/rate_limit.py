@@ -0,0 +1,58 @@
+"""
+Rate Limit Pydantic Schemas
+Validation and serialization for the rate limit policy
+"""
+from typing import Dict, List, Literal, Optional
+from pydantic import BaseModel, Field, ConfigDict, model_validator
+
+DEFAULT_QUOTA = "default"
+
+
+class QuotaClass(BaseModel):
+    """A kind of bucket: every key gets one per quota class it uses"""
+    rate_per_minute: int = Field(..., ge=1, alias="ratePerMinute")
+    burst: int = Field(..., ge=1, description="Requests (of cost 1) that may be sent at once")
+
+    model_config = ConfigDict(populate_by_name=True)
+
+
+class RouteRule(BaseModel):
+    """Cost and bucket of the requests matching a path pattern"""
+    pattern: str = Field(..., min_length=1, description="Path glob, e.g. /api/v1/analytics/*")
+    methods: Optional[List[str]] = Field(None, description="HTTP methods; all if omitted")
+    cost: int = Field(1, ge=1, description="Requests taken from the bucket")
+    quota: str = Field(DEFAULT_QUOTA, description="Quota class of the bucket")
+    key_by: Literal["principal", "project", "ip"] = Field(
+        "principal", alias="keyBy",
+        description="principal: API key, else user, else client IP; project: the projectId query parameter",
+    )
+
+    model_config = ConfigDict(populate_by_name=True)
+
+
+class RateLimitPolicy(BaseModel):
+    """
+    Quota classes and route rules
+
+    A request uses the first rule matching its method and path, or cost 1
+    in the default quota class, keyed by principal.
+    """
+    quotas: Dict[str, QuotaClass]
+    routes: List[RouteRule] = Field(default_factory=list)
+    exempt: List[str] = Field(default_factory=list, description="Path globs that are never limited")
+
+    model_config = ConfigDict(populate_by_name=True)
+
+    @model_validator(mode="after")
+    def check_rules(self) -> "RateLimitPolicy":
+        if DEFAULT_QUOTA not in self.quotas:
+            raise ValueError(f"quotas must include '{DEFAULT_QUOTA}'")
+        for rule in self.routes:
+            quota = self.quotas.get(rule.quota)
+            if quota is None:
+                raise ValueError(f"rule {rule.pattern!r} uses unknown quota class {rule.quota!r}")
+            if rule.cost > quota.burst:
+                raise ValueError(f"rule {rule.pattern!r} costs more than the burst of {rule.quota!r}")
+            if rule.methods:
+                rule.methods = [m.upper() for m in rule.methods]
+        return self
@@ -47,6 +47,10 @@ class RunStepResponse(BaseModel):
     error_message: Optional[str] = Field(None, serialization_alias="errorMessage")
     input_data: Optional[Dict[str, Any]] = Field(None, serialization_alias="request", validation_alias="input_data")  # Maps input_data to request
     output_data: Optional[Dict[str, Any]] = Field(None, serialization_alias="response", validation_alias="output_data")  # Maps output_data to response
+    model: Optional[str] = None
+    tokens_prompt: Optional[int] = Field(None, serialization_alias="tokensPrompt")
+    tokens_completion: Optional[int] = Field(None, serialization_alias="tokensCompletion")
+    usd_cost: Optional[float] = Field(None, serialization_alias="usdCost")
     
     @property
     def duration_ms(self) -> Optional[int]:
@@ -95,15 +99,16 @@ class RunResponse(BaseModel):
 class RunListResponse(BaseModel):
     """Paginated response for run list"""
     items: List[RunResponse] = Field(default_factory=list, alias="runs")
-    total: int
+    total: Optional[int] = None  # Not counted on cursor pages
     page: int
     page_size: int = Field(serialization_alias="pageSize", alias="limit")
-    total_pages: int = Field(serialization_alias="totalPages")
+    total_pages: Optional[int] = Field(None, serialization_alias="totalPages")
+    next_cursor: Optional[str] = Field(None, serialization_alias="nextCursor")
 
 
 class RunStepCreate(BaseModel):
     """Schema for creating a run step"""
-    run_id: str
+    run_id: Optional[str] = None  # Taken from the URL when posted to /runs/{run_id}/steps
     step_index: int
     step_type: str  # Changed from StepType enum
     name: str
@@ -119,3 +124,8 @@ class RunStepUpdate(BaseModel):
     success: Optional[bool] = None
     output_data: Optional[Dict[str, Any]] = None
     error_message: Optional[str] = None
+    
+    # Cumulative token usage of the step so far (model steps only)
+    model: Optional[str] = Field(None, max_length=100, description="Defaults to the step agent's model")
+    tokens_prompt: Optional[int] = Field(None, ge=0)
+    tokens_completion: Optional[int] = Field(None, ge=0)
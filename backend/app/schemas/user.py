@@ -80,7 +80,6 @@ class UserResponse(UserBase):
 class UserInDB(UserResponse):
     """User in database (includes password hash)"""
     password_hash: str
-    api_key_hash: Optional[str] = None
 
 
 # API Key schemas
@@ -89,8 +88,16 @@ class APIKeyCreate(BaseModel):
     name: str = Field(..., min_length=3, max_length=100, description="Name for the API key")
 
 
-class APIKeyResponse(BaseModel):
-    """Schema for API key response"""
-    api_key: str = Field(..., description="API key (only shown once)")
+class APIKeyInfo(BaseModel):
+    """Schema for a stored API key (without the key)"""
+    id: UUID
     name: str
-    created_at: datetime
\ No newline at end of file
+    prefix: str = Field(..., description="Start of the key, sk_<prefix>_…")
+    created_at: datetime
+    
+    model_config = ConfigDict(from_attributes=True)
+
+
+class APIKeyResponse(APIKeyInfo):
+    """Schema for API key response"""
+    api_key: str = Field(..., description="API key (only shown once)")
\ No newline at end of file
@@ -111,8 +111,11 @@ class WorkflowListResponse(BaseModel):
 
 class WorkflowAnalyticsResponse(BaseModel):
     """Analytics for a specific workflow"""
-    avg_duration_ms: int = Field(serialization_alias="avgDurationMs")
-    success_rate: float = Field(serialization_alias="successRate")
+    avg_duration_ms: Optional[int] = Field(None, serialization_alias="avgDurationMs")
+    p50_duration_ms: Optional[int] = Field(None, serialization_alias="p50DurationMs")
+    p95_duration_ms: Optional[int] = Field(None, serialization_alias="p95DurationMs")
+    p99_duration_ms: Optional[int] = Field(None, serialization_alias="p99DurationMs")
+    success_rate: Optional[float] = Field(None, serialization_alias="successRate")
     total_runs: int = Field(serialization_alias="totalRuns")
     last_run_at: Optional[datetime] = Field(None, serialization_alias="lastRunAt")
     failed_runs: int = Field(serialization_alias="failedRuns")
@@ -9,6 +9,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.agent import Agent, AgentStatus
 from app.schemas.agent import AgentCreate, AgentUpdate
+from app.services.agent_stats_service import AgentStatsService
 
 
 class AgentService:
@@ -203,9 +204,7 @@ class AgentService:
         if not agent:
             return None
         
-        from datetime import datetime, timezone
-        agent.last_heartbeat = datetime.now(timezone.utc)
-        agent.health = health_status
+        await AgentStatsService.heartbeat(db, agent_id, health_status)
         
         await db.commit()
         await db.refresh(agent)
@@ -0,0 +1,283 @@
+"""
+Agent Stats Service - Incremental health counters per agent
+
+Each event (run started, run finished, step finished, heartbeat) is one
+INSERT ... SELECT ... ON CONFLICT DO UPDATE against the agent's row, so
+counters stay correct under concurrent writers without read-modify-write.
+Recent error rate and latency are exponentially weighted moving averages
+(weight ``AGENT_STATS_EWMA_ALPHA`` for the newest run), which need no history.
+"""
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional
+from uuid import UUID
+from sqlalchemy import select, func, literal, case, and_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.agent import Agent
+from app.models.agent_stats import AgentStats
+from app.models.workflow_execution import WorkflowExecution, WorkflowStep, ExecutionStatus, TERMINAL_STATUSES
+from app.services.rollup_service import parse_id
+from app.services.sketch_service import elapsed_ms
+
+HEALTH_LEVELS = ("healthy", "degraded", "unhealthy")
+
+FAILED_STATUSES = (ExecutionStatus.FAILED, ExecutionStatus.TIMEOUT)
+
+
+def derive_health(stats: Optional[AgentStats], now: Optional[datetime] = None) -> str:
+    """
+    Health from recent error rate, or the runtime's own report if that is worse
+
+    A reported health only counts while the heartbeat is fresh.
+    """
+    if stats is None:
+        return "healthy"
+
+    level = 0
+    error_rate = stats.error_rate_ewma or 0.0
+    if error_rate >= settings.AGENT_UNHEALTHY_ERROR_RATE:
+        level = 2
+    elif error_rate >= settings.AGENT_DEGRADED_ERROR_RATE:
+        level = 1
+
+    now = now or datetime.utcnow()
+    if (
+        stats.reported_health in HEALTH_LEVELS
+        and stats.last_heartbeat is not None
+        and (now - stats.last_heartbeat).total_seconds() <= settings.AGENT_HEARTBEAT_TIMEOUT_SECONDS
+    ):
+        level = max(level, HEALTH_LEVELS.index(stats.reported_health))
+
+    return HEALTH_LEVELS[level]
+
+
+def health_expr(now: Optional[datetime] = None):
+    """
+    SQL equivalent of derive_health over AgentStats columns
+
+    Agents without a stats row (outer-joined NULLs) are healthy.
+    """
+    error_rate = func.coalesce(AgentStats.error_rate_ewma, 0.0)
+    from_errors = case(
+        (error_rate >= settings.AGENT_UNHEALTHY_ERROR_RATE, 2),
+        (error_rate >= settings.AGENT_DEGRADED_ERROR_RATE, 1),
+        else_=0,
+    )
+    now = now or datetime.utcnow()
+    fresh = AgentStats.last_heartbeat >= now - timedelta(seconds=settings.AGENT_HEARTBEAT_TIMEOUT_SECONDS)
+    reported = case(
+        *((and_(fresh, AgentStats.reported_health == name), level) for level, name in enumerate(HEALTH_LEVELS) if level),
+        else_=0,
+    )
+    level = func.greatest(from_errors, reported)
+    return case(*((level == i, name) for i, name in enumerate(HEALTH_LEVELS)), else_=HEALTH_LEVELS[0])
+
+
+def _ewma(current, new):
+    """SQL for folding ``new`` into the average ``current``; NULL on either side keeps the other"""
+    alpha = settings.AGENT_STATS_EWMA_ALPHA
+    return func.coalesce(current + alpha * (new - current), new, current)
+
+
+class AgentStatsService:
+    """Service for agent health counters"""
+
+    @staticmethod
+    async def get(db: AsyncSession, agent_id: UUID) -> Optional[AgentStats]:
+        """Get an agent's counters (None if nothing was recorded yet)"""
+        return await db.get(AgentStats, agent_id)
+
+    @staticmethod
+    async def run_started(db: AsyncSession, run: WorkflowExecution) -> None:
+        """Count a new run as in flight (no commit)"""
+        agent_id = parse_id((run.metadata_ or {}).get('agent_id'))
+        if not agent_id:
+            return
+        await AgentStatsService._upsert(
+            db,
+            agent_id,
+            {"in_flight_runs": 1},
+            lambda t, x: {"in_flight_runs": t.in_flight_runs + 1},
+        )
+
+    @staticmethod
+    async def run_finished(db: AsyncSession, run: WorkflowExecution) -> None:
+        """Fold a run that reached a terminal status into its agent's counters (no commit)"""
+        agent_id = parse_id((run.metadata_ or {}).get('agent_id'))
+        if not agent_id or run.status not in TERMINAL_STATUSES:
+            return
+
+        failed = run.status in FAILED_STATUSES
+        duration = None
+        if run.status == ExecutionStatus.COMPLETED:
+            duration = elapsed_ms(run.started_at, run.completed_at, run.duration_seconds)
+
+        values = {
+            "total_runs": 1,
+            "failed_runs": int(failed),
+            "last_run_at": run.started_at,
+            # Cancellations say nothing about the agent's error rate
+            "error_rate_ewma": None if run.status == ExecutionStatus.CANCELLED else float(failed),
+            "latency_ewma_ms": duration,
+        }
+        if failed:
+            values["last_error"] = run.error_message or f"Run {run.status.value}"
+            values["last_error_at"] = run.completed_at or datetime.utcnow()
+
+        await AgentStatsService._upsert(
+            db,
+            agent_id,
+            values,
+            lambda t, x: {
+                "total_runs": t.total_runs + 1,
+                "failed_runs": t.failed_runs + x.failed_runs,
+                "in_flight_runs": func.greatest(t.in_flight_runs - 1, 0),
+                "last_run_at": func.greatest(t.last_run_at, x.last_run_at),
+                "error_rate_ewma": _ewma(t.error_rate_ewma, x.error_rate_ewma),
+                "latency_ewma_ms": _ewma(t.latency_ewma_ms, x.latency_ewma_ms),
+                "last_error": func.coalesce(x.last_error, t.last_error),
+                "last_error_at": func.coalesce(x.last_error_at, t.last_error_at),
+            },
+        )
+
+    @staticmethod
+    async def step_finished(db: AsyncSession, step: WorkflowStep) -> None:
+        """Count a finished step executed by an agent (no commit)"""
+        if not step.agent_id or step.status not in TERMINAL_STATUSES:
+            return
+
+        failed = step.status in FAILED_STATUSES
+        values: Dict[str, Any] = {"total_steps": 1, "failed_steps": int(failed)}
+        if failed:
+            values["last_error"] = step.error_message or f"Step {step.step_name} {step.status.value}"
+            values["last_error_at"] = step.completed_at or datetime.utcnow()
+
+        await AgentStatsService._upsert(
+            db,
+            step.agent_id,
+            values,
+            lambda t, x: {
+                "total_steps": t.total_steps + 1,
+                "failed_steps": t.failed_steps + x.failed_steps,
+                "last_error": func.coalesce(x.last_error, t.last_error),
+                "last_error_at": func.coalesce(x.last_error_at, t.last_error_at),
+            },
+        )
+
+    @staticmethod
+    async def heartbeat(db: AsyncSession, agent_id: UUID, health_status: str) -> None:
+        """Record a heartbeat reported by the agent runtime (no commit)"""
+        await AgentStatsService._upsert(
+            db,
+            agent_id,
+            {"last_heartbeat": datetime.utcnow(), "reported_health": health_status},
+            lambda t, x: {"last_heartbeat": x.last_heartbeat, "reported_health": x.reported_health},
+        )
+
+    @staticmethod
+    async def rebuild(db: AsyncSession, agent_id: UUID) -> None:
+        """
+        Recompute an agent's counters from run and step history (no commit)
+
+        For repairs only: scans the agent's runs and steps. The moving
+        averages restart from the mean of the agent's most recent runs.
+        """
+        run = WorkflowExecution
+        agent_runs = run.metadata_['agent_id'].astext == str(agent_id)
+        failed = run.status.in_(FAILED_STATUSES)
+        finished = run.status.in_(TERMINAL_STATUSES)
+
+        totals = (await db.execute(
+            select(
+                func.count().filter(finished),
+                func.count().filter(failed),
+                func.count().filter(run.status.in_([ExecutionStatus.PENDING, ExecutionStatus.RUNNING])),
+                func.max(run.started_at),
+            ).where(agent_runs)
+        )).one()
+
+        recent = (
+            select(run.status, run.duration_seconds)
+            .where(agent_runs, finished, run.status != ExecutionStatus.CANCELLED)
+            .order_by(run.started_at.desc())
+            .limit(round(1 / settings.AGENT_STATS_EWMA_ALPHA))
+            .subquery()
+        )
+        averages = (await db.execute(
+            select(
+                func.avg(case((recent.c.status.in_(FAILED_STATUSES), 1.0), else_=0.0)),
+                func.avg(recent.c.duration_seconds * 1000.0).filter(recent.c.status == ExecutionStatus.COMPLETED),
+            )
+        )).one()
+
+        last_failure = (await db.execute(
+            select(run.error_message, run.status, run.completed_at)
+            .where(agent_runs, failed)
+            .order_by(run.started_at.desc())
+            .limit(1)
+        )).first()
+
+        steps = (await db.execute(
+            select(
+                func.count().filter(WorkflowStep.status.in_(TERMINAL_STATUSES)),
+                func.count().filter(WorkflowStep.status.in_(FAILED_STATUSES)),
+            ).where(WorkflowStep.agent_id == agent_id)
+        )).one()
+
+        values = {
+            "total_runs": totals[0],
+            "failed_runs": totals[1],
+            "in_flight_runs": totals[2],
+            "last_run_at": totals[3],
+            "total_steps": steps[0],
+            "failed_steps": steps[1],
+            "error_rate_ewma": float(averages[0]) if averages[0] is not None else None,
+            "latency_ewma_ms": float(averages[1]) if averages[1] is not None else None,
+            "last_error": (last_failure[0] or f"Run {last_failure[1].value}") if last_failure else None,
+            "last_error_at": last_failure[2] if last_failure else None,
+        }
+        await AgentStatsService._upsert(
+            db,
+            agent_id,
+            values,
+            lambda t, x: {column: getattr(x, column) for column in values},
+        )
+
+    # Internal helpers
+
+    @staticmethod
+    async def _upsert(
+        db: AsyncSession,
+        agent_id: UUID,
+        values: Dict[str, Any],
+        updates: Callable[[Any, Any], Dict[str, Any]],
+    ) -> None:
+        """
+        Insert the agent's row with ``values`` or apply ``updates(table, excluded)``
+
+        Inserted through a SELECT on agents, so events for agents that don't
+        exist (e.g. a stale id in run metadata) are ignored instead of failing
+        the caller's transaction.
+        """
+        table = AgentStats.__table__
+        row = {
+            "total_runs": 0,
+            "failed_runs": 0,
+            "in_flight_runs": 0,
+            "total_steps": 0,
+            "failed_steps": 0,
+            **values,
+        }
+        source = select(
+            Agent.id,
+            *(literal(value, table.c[column].type) for column, value in row.items()),
+        ).where(Agent.id == agent_id)
+
+        stmt = pg_insert(AgentStats).from_select(["agent_id", *row], source)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["agent_id"],
+            set_=updates(table.c, stmt.excluded),
+        )
+        await db.execute(stmt)
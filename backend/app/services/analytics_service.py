@@ -0,0 +1,112 @@
+"""
+Analytics Service Layer - Aggregated run statistics
+"""
+from datetime import datetime
+from typing import Dict, Iterable, Optional, TypedDict
+from uuid import UUID
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models.workflow_execution import WorkflowExecution, ExecutionStatus
+
+
+class WorkflowStats(TypedDict):
+    """Run statistics for one workflow"""
+    avg_duration_ms: Optional[int]
+    success_rate: Optional[float]
+    total_runs: int
+    last_run_at: Optional[datetime]
+    failed_runs: int
+    succeeded_runs: int
+
+
+EMPTY_WORKFLOW_STATS: WorkflowStats = {
+    'avg_duration_ms': None,
+    'success_rate': None,
+    'total_runs': 0,
+    'last_run_at': None,
+    'failed_runs': 0,
+    'succeeded_runs': 0,
+}
+
+# Per-process; entries are dropped when a run of the workflow finishes here,
+# and the short TTL bounds staleness for runs finished by other processes.
+_workflow_stats_cache: TTLCache[UUID, WorkflowStats] = TTLCache(
+    maxsize=settings.ANALYTICS_CACHE_MAX_ENTRIES,
+    ttl=settings.ANALYTICS_CACHE_TTL_SECONDS,
+)
+
+
+class AnalyticsService:
+    """Service for aggregated analytics"""
+
+    @staticmethod
+    async def get_workflow_stats(db: AsyncSession, workflow_id: UUID) -> WorkflowStats:
+        """Get run statistics for a workflow"""
+        stats = await AnalyticsService.get_workflows_stats(db, [workflow_id])
+        return stats[workflow_id]
+
+    @staticmethod
+    async def get_workflows_stats(db: AsyncSession, workflow_ids: Iterable[UUID]) -> Dict[UUID, WorkflowStats]:
+        """
+        Get run statistics for several workflows
+
+        Cache misses are computed together by one grouped query, so a page of
+        workflows costs a single round trip however many runs they have.
+        """
+        result: Dict[UUID, WorkflowStats] = {}
+        missing = []
+        for workflow_id in workflow_ids:
+            cached = _workflow_stats_cache.get(workflow_id)
+            if cached is not None:
+                result[workflow_id] = cached
+            else:
+                missing.append(workflow_id)
+
+        if not missing:
+            return result
+
+        completed = WorkflowExecution.status == ExecutionStatus.COMPLETED
+        query = (
+            select(
+                WorkflowExecution.workflow_id,
+                func.count().label('total_runs'),
+                func.count().filter(completed).label('succeeded_runs'),
+                func.count().filter(WorkflowExecution.status == ExecutionStatus.FAILED).label('failed_runs'),
+                # Average duration covers completed runs with a recorded duration
+                func.avg(WorkflowExecution.duration_seconds).filter(
+                    completed, WorkflowExecution.duration_seconds > 0
+                ).label('avg_duration_seconds'),
+                func.max(WorkflowExecution.started_at).label('last_run_at'),
+            )
+            .where(WorkflowExecution.workflow_id.in_(missing))
+            .group_by(WorkflowExecution.workflow_id)
+        )
+        rows = {row.workflow_id: row for row in (await db.execute(query)).all()}
+
+        for workflow_id in missing:
+            row = rows.get(workflow_id)
+            if row is None:
+                stats = dict(EMPTY_WORKFLOW_STATS)
+            else:
+                stats = {
+                    'avg_duration_ms': (
+                        int(row.avg_duration_seconds * 1000) if row.avg_duration_seconds is not None else None
+                    ),
+                    'success_rate': row.succeeded_runs / row.total_runs,
+                    'total_runs': row.total_runs,
+                    'last_run_at': row.last_run_at,
+                    'failed_runs': row.failed_runs,
+                    'succeeded_runs': row.succeeded_runs,
+                }
+            _workflow_stats_cache.set(workflow_id, stats)
+            result[workflow_id] = stats
+
+        return result
+
+    @staticmethod
+    def invalidate_workflow(workflow_id: UUID) -> None:
+        """Drop cached statistics for a workflow"""
+        _workflow_stats_cache.delete(workflow_id)
@@ -0,0 +1,331 @@
+"""
+Archive Service - Columnar run history for offline analytics
+
+Runs and steps are exported per UTC day (by run start) to Parquet files
+under ARCHIVE_PATH, hive-partitioned by day and project:
+
+    runs/day=2026-05-01/project_id=<uuid>/data_0.parquet
+    steps/day=2026-05-01/project_id=<uuid>/data_0.parquet
+
+Long-range reports and ad-hoc queries run in an embedded DuckDB over those
+files and never touch Postgres. Reports list only the partitions of the
+requested project and days, so their cost depends on the range, not on the
+size of the archive.
+
+DuckDB is optional: without it exports and queries raise ArchiveUnavailable.
+"""
+import asyncio
+import json
+import shutil
+import tempfile
+import threading
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+import structlog
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+try:
+    import duckdb
+    DUCKDB_AVAILABLE = True
+except ImportError:
+    DUCKDB_AVAILABLE = False
+
+from app.core.config import settings
+from app.db.streaming import stream_rows
+from app.models.workflow import Workflow
+from app.models.workflow_execution import WorkflowExecution, WorkflowStep
+
+logger = structlog.get_logger()
+
+TABLES = ("runs", "steps")
+
+# Archived columns and their DuckDB types; day and project_id come from the partition path
+COLUMNS: Dict[str, Dict[str, str]] = {
+    "runs": {
+        "run_id": "VARCHAR",
+        "workflow_id": "VARCHAR",
+        "agent_id": "VARCHAR",
+        "env": "VARCHAR",
+        "status": "VARCHAR",
+        "started_at": "TIMESTAMP",
+        "completed_at": "TIMESTAMP",
+        "duration_seconds": "INTEGER",
+        "error_message": "VARCHAR",
+        "tokens_prompt": "BIGINT",
+        "tokens_completion": "BIGINT",
+        "usd_cost": "DECIMAL(14,6)",
+    },
+    "steps": {
+        "step_pk": "VARCHAR",
+        "run_id": "VARCHAR",
+        "workflow_id": "VARCHAR",
+        "step_id": "VARCHAR",
+        "step_name": "VARCHAR",
+        "step_type": "VARCHAR",
+        "status": "VARCHAR",
+        "agent_id": "VARCHAR",
+        "tool_id": "VARCHAR",
+        "model": "VARCHAR",
+        "started_at": "TIMESTAMP",
+        "completed_at": "TIMESTAMP",
+        "duration_seconds": "INTEGER",
+        "error_message": "VARCHAR",
+        "tokens_prompt": "INTEGER",
+        "tokens_completion": "INTEGER",
+        "usd_cost": "DECIMAL(14,6)",
+    },
+}
+
+HIVE_TYPES = "{'day': 'DATE', 'project_id': 'VARCHAR'}"
+
+# Canned reports over one project's partitions; {runs}/{steps} are the scans
+REPORTS: Dict[str, str] = {
+    "tool_failures": """
+        SELECT tool_id,
+               count(*) AS steps,
+               count(*) FILTER (WHERE status IN ('failed', 'timeout')) AS failed_steps,
+               count(DISTINCT run_id) FILTER (WHERE status IN ('failed', 'timeout')) AS failed_runs,
+               round(count(*) FILTER (WHERE status IN ('failed', 'timeout')) / count(*), 4) AS failure_rate
+        FROM {steps}
+        WHERE tool_id IS NOT NULL
+        GROUP BY tool_id
+        ORDER BY failed_steps DESC, steps DESC
+        LIMIT 50
+    """,
+    "workflow_summary": """
+        SELECT workflow_id,
+               count(*) AS runs,
+               count(*) FILTER (WHERE status = 'failed') AS failed_runs,
+               round(count(*) FILTER (WHERE status = 'failed') / count(*), 4) AS failure_rate,
+               round(avg(duration_seconds) FILTER (WHERE status = 'completed'), 1) AS avg_duration_seconds,
+               quantile_cont(duration_seconds, 0.95) FILTER (WHERE status = 'completed') AS p95_duration_seconds,
+               CAST(sum(usd_cost) AS DOUBLE) AS usd_cost
+        FROM {runs}
+        GROUP BY workflow_id
+        ORDER BY runs DESC
+    """,
+    "model_usage": """
+        SELECT coalesce(model, 'unknown') AS model,
+               count(*) AS steps,
+               sum(tokens_prompt) AS tokens_prompt,
+               sum(tokens_completion) AS tokens_completion,
+               CAST(sum(usd_cost) AS DOUBLE) AS usd_cost
+        FROM {steps}
+        WHERE tokens_prompt IS NOT NULL OR tokens_completion IS NOT NULL
+        GROUP BY 1
+        ORDER BY usd_cost DESC NULLS LAST
+    """,
+    "daily_runs": """
+        SELECT day,
+               count(*) AS runs,
+               count(*) FILTER (WHERE status = 'completed') AS succeeded_runs,
+               count(*) FILTER (WHERE status = 'failed') AS failed_runs,
+               CAST(sum(usd_cost) AS DOUBLE) AS usd_cost
+        FROM {runs}
+        GROUP BY day
+        ORDER BY day
+    """,
+}
+
+
+class ArchiveUnavailable(Exception):
+    """DuckDB is not installed"""
+
+
+class ArchiveQueryError(Exception):
+    """An archive query was rejected or failed"""
+
+
+def partition_dir(root: Path, table: str, day: date, project_id: Optional[UUID] = None) -> Path:
+    """Directory of one day's (and optionally one project's) files"""
+    path = root / table / f"day={day.isoformat()}"
+    return path / f"project_id={project_id}" if project_id else path
+
+
+def to_jsonable(value: Any) -> Any:
+    """DuckDB result value as something JSON can carry"""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, UUID):
+        return str(value)
+    return value
+
+
+class ArchiveService:
+    """Service for the Parquet run archive"""
+
+    @staticmethod
+    async def export_day(db: AsyncSession, day: date, root: Optional[Path] = None) -> Dict[str, int]:
+        """
+        Write the runs started on ``day`` (UTC), and their steps, to the archive
+
+        Replaces the day's partitions, so re-exporting picks up late updates.
+        Returns the number of rows written per table.
+        """
+        ArchiveService._require_duckdb()
+        root = Path(root or settings.ARCHIVE_PATH)
+        start = datetime.combine(day, datetime.min.time())
+        end = start + timedelta(days=1)
+
+        counts = {}
+        with tempfile.TemporaryDirectory(prefix="archive-") as tmp:
+            for table in TABLES:
+                source = Path(tmp) / f"{table}.ndjson"
+                with open(source, "w") as f:
+                    counts[table] = 0
+                    async for batch in stream_rows(db, ArchiveService._export_query(table, start, end)):
+                        for row in batch:
+                            f.write(json.dumps(ArchiveService._to_record(row), default=str))
+                            f.write("\n")
+                        counts[table] += len(batch)
+                await asyncio.to_thread(ArchiveService._write_partitions, root, table, day, source, counts[table])
+
+        logger.info("archive_exported", day=day.isoformat(), **counts)
+        return counts
+
+    @staticmethod
+    async def run_report(report: str, project_id: UUID, start: date, end: date) -> Dict[str, Any]:
+        """Run a canned report over one project's archive for days in [start, end]"""
+        ArchiveService._require_duckdb()
+        if report not in REPORTS:
+            raise ArchiveQueryError(f"Unknown report {report!r}")
+
+        root = Path(settings.ARCHIVE_PATH)
+        scans = {}
+        for table in (t for t in TABLES if f"{{{t}}}" in REPORTS[report]):
+            files = [
+                str(directory / "*.parquet")
+                for offset in range((end - start).days + 1)
+                if (directory := partition_dir(root, table, start + timedelta(days=offset), project_id)).is_dir()
+            ]
+            if not files:
+                return {"columns": [], "rows": [], "truncated": False}
+            scans[table] = ArchiveService._scan(table, files)
+        return await asyncio.to_thread(ArchiveService._execute, REPORTS[report].format(**scans))
+
+    @staticmethod
+    async def query(sql: str) -> Dict[str, Any]:
+        """
+        Run one read-only SQL statement over the whole archive
+
+        ``runs`` and ``steps`` are views over every partition; filters on
+        ``day`` and ``project_id`` prune files. Results are capped at
+        ARCHIVE_QUERY_MAX_ROWS.
+        """
+        ArchiveService._require_duckdb()
+        root = Path(settings.ARCHIVE_PATH)
+        views = {
+            table: ArchiveService._scan(table, [str(root / table / "*" / "*" / "*.parquet")])
+            for table in TABLES
+            if (root / table).is_dir()
+        }
+        return await asyncio.to_thread(ArchiveService._execute, sql, views)
+
+    # Internal helpers
+
+    @staticmethod
+    def _require_duckdb() -> None:
+        if not DUCKDB_AVAILABLE:
+            raise ArchiveUnavailable("The run archive requires the duckdb package")
+
+    @staticmethod
+    def _export_query(table: str, start: datetime, end: datetime):
+        """Archive columns of one table for runs started in [start, end), with the run's project"""
+        run = WorkflowExecution
+        run_day = func.coalesce(run.started_at, run.created_at)
+        if table == "runs":
+            source = run
+            extra = [
+                run.id.label("run_id"),
+                run.metadata_['agent_id'].astext.label("agent_id"),
+                func.coalesce(run.metadata_['env'].astext, 'dev').label("env"),
+            ]
+        else:
+            source = WorkflowStep
+            extra = [WorkflowStep.id.label("step_pk"), WorkflowStep.execution_id.label("run_id"), run.workflow_id]
+        named = {column.key for column in extra}
+        columns = [getattr(source, name) for name in COLUMNS[table] if name not in named]
+        query = select(Workflow.project_id, *extra, *columns).select_from(source)
+        if table == "steps":
+            query = query.join(run, run.id == WorkflowStep.execution_id)
+        return (
+            query.join(Workflow, Workflow.id == run.workflow_id)
+            .where(run_day >= start, run_day < end)
+            .order_by(source.id)
+        )
+
+    @staticmethod
+    def _to_record(row) -> Dict[str, Any]:
+        """One archive record (JSON-ready) from an export row"""
+        record = dict(row._mapping)
+        record["status"] = record["status"].value
+        return record
+
+    @staticmethod
+    def _write_partitions(root: Path, table: str, day: date, source: Path, rows: int) -> None:
+        """Replace a day's partitions with the records in ``source`` (blocking)"""
+        target = partition_dir(root, table, day)
+        staging = target.with_name(f".{target.name}.tmp")
+        shutil.rmtree(staging, ignore_errors=True)
+        if rows:
+            staging.parent.mkdir(parents=True, exist_ok=True)
+            columns = {"project_id": "VARCHAR", **COLUMNS[table]}
+            column_spec = "{" + ", ".join(f"'{name}': '{kind}'" for name, kind in columns.items()) + "}"
+            con = duckdb.connect()
+            try:
+                con.execute(
+                    f"COPY (SELECT * FROM read_json('{source}', format = 'newline_delimited', columns = {column_spec})) "
+                    f"TO '{staging}' (FORMAT PARQUET, PARTITION_BY (project_id), COMPRESSION ZSTD)"
+                )
+            finally:
+                con.close()
+        shutil.rmtree(target, ignore_errors=True)
+        if rows:
+            staging.rename(target)
+
+    @staticmethod
+    def _scan(table: str, files: List[str]) -> str:
+        """read_parquet over ``files`` with the partition columns"""
+        paths = ", ".join(f"'{path}'" for path in files)
+        return f"read_parquet([{paths}], hive_partitioning = true, hive_types = {HIVE_TYPES}, union_by_name = true)"
+
+    @staticmethod
+    def _execute(sql: str, views: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """Run one SELECT in a fresh in-memory DuckDB (blocking)"""
+        con = duckdb.connect(config={
+            "memory_limit": settings.ARCHIVE_QUERY_MEMORY_LIMIT,
+            "autoinstall_known_extensions": False,
+            "autoload_known_extensions": False,
+        })
+        # Queries may read the archive and nothing else on this host
+        con.execute("SET allowed_directories = [?]", [str(Path(settings.ARCHIVE_PATH).resolve())])
+        con.execute("SET enable_external_access = false")
+        timer = threading.Timer(settings.ARCHIVE_QUERY_TIMEOUT_SECONDS, con.interrupt)
+        try:
+            for name, scan in (views or {}).items():
+                con.execute(f"CREATE VIEW {name} AS SELECT * FROM {scan}")
+            statements = con.extract_statements(sql)
+            if len(statements) != 1 or statements[0].type != duckdb.StatementType.SELECT:
+                raise ArchiveQueryError("Only a single SELECT statement is allowed")
+            con.execute("SET lock_configuration = true")
+
+            timer.start()
+            result = con.execute(sql)
+            columns = [description[0] for description in result.description]
+            rows = result.fetchmany(settings.ARCHIVE_QUERY_MAX_ROWS + 1)
+        except duckdb.Error as e:
+            raise ArchiveQueryError(str(e)) from e
+        finally:
+            timer.cancel()
+            con.close()
+
+        truncated = len(rows) > settings.ARCHIVE_QUERY_MAX_ROWS
+        return {
+            "columns": columns,
+            "rows": [[to_jsonable(value) for value in row] for row in rows[:settings.ARCHIVE_QUERY_MAX_ROWS]],
+            "truncated": truncated,
+        }
@@ -0,0 +1,484 @@
+"""
+Budget Service - Spending limits enforced from incremental counters
+
+Spend per (scope, period) is an integer Redis counter in micro-dollars,
+incremented with INCRBY after each step's cost is committed. Checking a run
+against its project's, workflow's and agent's budgets is one cached budget
+lookup plus one MGET. A periodic reconciliation recomputes spend from the
+daily cost rollups (at most a month of rows per budget), overwrites the
+counters and stores the result on the budget, which is what checks use when
+Redis is unavailable. Crossing the alert threshold or the limit records an
+alert.
+"""
+import asyncio
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+from uuid import UUID
+import structlog
+from sqlalchemy import select, update, func, and_, or_, case, literal, bindparam, String
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.redis import get_redis
+from app.db.session import AsyncSessionLocal
+from app.models.budget import Budget, BudgetAlert, BudgetAlertKind, BudgetAction, BudgetPeriod
+from app.models.rollup import CostRollup, RollupScope
+from app.models.workflow_execution import WorkflowExecution, ExecutionStatus
+from app.schemas.budget import BudgetCreate, BudgetUpdate
+
+logger = structlog.get_logger()
+
+MICROS = Decimal(1_000_000)
+RECONCILE_LOCK_KEY = "budget:reconcile:lock"
+
+Scope = Tuple[RollupScope, UUID]
+
+
+class BudgetLimit(NamedTuple):
+    """What checks need to know about an active budget"""
+    id: UUID
+    scope_type: RollupScope
+    scope_id: UUID
+    period: BudgetPeriod
+    limit_micros: int
+    threshold_micros: int
+    action: BudgetAction
+    spent_micros: int  # As of the last reconciliation (fallback when Redis is down)
+
+
+class BudgetExhausted(Exception):
+    """A new run was refused because a budget with the REJECT action is used up"""
+
+    def __init__(self, budget: BudgetLimit):
+        self.budget = budget
+        super().__init__(
+            f"{budget.period.value.capitalize()} budget of {budget.scope_type.value} "
+            f"{budget.scope_id} is exhausted"
+        )
+
+
+class RunHeld(Exception):
+    """A run held for a QUEUE budget was asked to start or record steps"""
+
+    def __init__(self, budget_id: str):
+        self.budget_id = budget_id
+        super().__init__(f"Run is held until budget {budget_id} has room again")
+
+
+def period_start(period: BudgetPeriod, now: datetime) -> datetime:
+    """Start of the budget period containing ``now`` (naive UTC)"""
+    day = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    return day if period == BudgetPeriod.DAILY else day.replace(day=1)
+
+
+def period_end(period: BudgetPeriod, start: datetime) -> datetime:
+    """Start of the period after the one starting at ``start``"""
+    if period == BudgetPeriod.DAILY:
+        return start + timedelta(days=1)
+    return (start + timedelta(days=32)).replace(day=1)
+
+
+def spend_key(scope_type: RollupScope, scope_id: UUID, period: BudgetPeriod, start: datetime) -> str:
+    """Redis counter for one scope's spend in one period"""
+    return f"budget:spend:{scope_type.value}:{scope_id}:{period.value}:{start:%Y%m%d}"
+
+
+def to_micros(usd: Decimal) -> int:
+    """USD to integer micro-dollars (costs are stored with 6 decimals)"""
+    return int(Decimal(usd) * MICROS)
+
+
+def crossed(limit: BudgetLimit, before: int, after: int) -> List[BudgetAlertKind]:
+    """Alerts due when spend moves from ``before`` to ``after``"""
+    kinds = []
+    if before < limit.threshold_micros <= after:
+        kinds.append(BudgetAlertKind.THRESHOLD)
+    if before < limit.limit_micros <= after:
+        kinds.append(BudgetAlertKind.EXHAUSTED)
+    return kinds
+
+
+# Active budgets per scope; changes elsewhere are picked up within one interval
+_limits_cache: TTLCache[Scope, List[BudgetLimit]] = TTLCache(
+    maxsize=settings.ANALYTICS_CACHE_MAX_ENTRIES,
+    ttl=settings.BUDGET_CHECK_INTERVAL_SECONDS,
+)
+
+_reconciler: Optional["asyncio.Task[None]"] = None
+
+
+class BudgetService:
+    """Service for budgets"""
+
+    @staticmethod
+    async def create(db: AsyncSession, budget_data: BudgetCreate, project_id: UUID) -> Budget:
+        """Create a budget for a project, agent or workflow of ``project_id``"""
+        budget = Budget(
+            project_id=project_id,
+            scope_type=budget_data.scope,
+            scope_id=budget_data.scope_id,
+            period=budget_data.period,
+            limit_usd=budget_data.limit_usd,
+            alert_threshold=(
+                budget_data.alert_threshold
+                if budget_data.alert_threshold is not None else settings.BUDGET_ALERT_THRESHOLD
+            ),
+            action=budget_data.action,
+        )
+        db.add(budget)
+        await db.commit()
+        await db.refresh(budget)
+        _limits_cache.delete((budget.scope_type, budget.scope_id))
+        return budget
+
+    @staticmethod
+    async def get_by_id(db: AsyncSession, budget_id: UUID) -> Optional[Budget]:
+        """Get budget by ID"""
+        return await db.get(Budget, budget_id)
+
+    @staticmethod
+    async def get_by_project(db: AsyncSession, project_id: UUID) -> List[Budget]:
+        """All budgets of a project"""
+        result = await db.execute(
+            select(Budget).where(Budget.project_id == project_id).order_by(Budget.created_at)
+        )
+        return list(result.scalars().all())
+
+    @staticmethod
+    async def update(db: AsyncSession, budget: Budget, budget_data: BudgetUpdate) -> Budget:
+        """Update a budget's limit, threshold, action or active flag"""
+        for field, value in budget_data.model_dump(exclude_unset=True).items():
+            setattr(budget, field, value)
+        await db.commit()
+        await db.refresh(budget)
+        _limits_cache.delete((budget.scope_type, budget.scope_id))
+        return budget
+
+    @staticmethod
+    async def delete(db: AsyncSession, budget: Budget) -> None:
+        """Delete a budget and its alerts"""
+        await db.delete(budget)
+        await db.commit()
+        _limits_cache.delete((budget.scope_type, budget.scope_id))
+
+    @staticmethod
+    async def get_alerts(db: AsyncSession, budget_id: UUID, limit: int = 100) -> List[BudgetAlert]:
+        """Most recent alerts of a budget"""
+        result = await db.execute(
+            select(BudgetAlert)
+            .where(BudgetAlert.budget_id == budget_id)
+            .order_by(BudgetAlert.created_at.desc())
+            .limit(limit)
+        )
+        return list(result.scalars().all())
+
+    @staticmethod
+    async def get_spent(budget: Budget, now: Optional[datetime] = None) -> Decimal:
+        """Spend of a budget in the current period (last reconciled value if Redis is down)"""
+        now = now or datetime.utcnow()
+        key = spend_key(budget.scope_type, budget.scope_id, budget.period, period_start(budget.period, now))
+        try:
+            value = await get_redis().get(key)
+        except Exception as e:
+            logger.warning("budget_counter_unavailable", error=str(e))
+            return budget.spent_usd
+        return Decimal(int(value or 0)) / MICROS
+
+    @staticmethod
+    async def check_run(
+        db: AsyncSession,
+        project_id: Optional[UUID],
+        agent_id: Optional[UUID],
+        workflow_id: Optional[UUID] = None,
+        now: Optional[datetime] = None,
+    ) -> Optional[BudgetLimit]:
+        """
+        Budget that stops a new run, if any
+
+        Raises BudgetExhausted for a REJECT budget; returns a QUEUE budget
+        the run should be held for. Costs one cached lookup and one MGET.
+        """
+        if not settings.ENABLE_BUDGETS:
+            return None
+        scopes = [
+            (t, i)
+            for t, i in (
+                (RollupScope.PROJECT, project_id),
+                (RollupScope.WORKFLOW, workflow_id),
+                (RollupScope.AGENT, agent_id),
+            )
+            if i
+        ]
+        limits = await BudgetService._limits_for(db, scopes)
+        if not limits:
+            return None
+
+        spent = await BudgetService._current_spend(limits, now or datetime.utcnow())
+        exhausted = [limit for limit, micros in zip(limits, spent) if micros >= limit.limit_micros]
+        for limit in exhausted:
+            if limit.action == BudgetAction.REJECT:
+                raise BudgetExhausted(limit)
+        return exhausted[0] if exhausted else None
+
+    @staticmethod
+    async def record_spend(
+        db: AsyncSession,
+        scopes: Sequence[Scope],
+        usd: Optional[Decimal],
+        now: Optional[datetime] = None,
+    ) -> None:
+        """
+        Add committed spend to the counters of ``scopes`` and raise due alerts
+
+        Call after the cost is committed. Counter failures are logged and
+        left to the next reconciliation.
+        """
+        if not settings.ENABLE_BUDGETS or not usd or not scopes:
+            return
+        now = now or datetime.utcnow()
+        micros = to_micros(usd)
+
+        keys = {}
+        for scope_type, scope_id in scopes:
+            for period in BudgetPeriod:
+                start = period_start(period, now)
+                keys[(scope_type, scope_id, period)] = (spend_key(scope_type, scope_id, period, start), start)
+        try:
+            async with get_redis().pipeline(transaction=False) as pipe:
+                for (_, _, period), (key, start) in keys.items():
+                    pipe.incrby(key, micros)
+                    pipe.expireat(key, period_end(period, start) + timedelta(days=1))
+                results = await pipe.execute()
+        except Exception as e:
+            logger.warning("budget_counter_unavailable", error=str(e))
+            return
+        totals = {scope: results[2 * i] for i, scope in enumerate(keys)}
+
+        for limit in await BudgetService._limits_for(db, scopes):
+            after = totals[(limit.scope_type, limit.scope_id, limit.period)]
+            for kind in crossed(limit, after - micros, after):
+                await BudgetService._raise_alert(db, limit, kind, keys[(limit.scope_type, limit.scope_id, limit.period)][1], after)
+
+    @staticmethod
+    async def reconcile(db: AsyncSession, now: Optional[datetime] = None) -> int:
+        """
+        Recompute every active budget's spend from cost rollups
+
+        Stores it on the budget, overwrites the Redis counter, raises alerts
+        that were missed and releases runs held for budgets that have room
+        again. Commits. Returns the number of budgets reconciled.
+        """
+        now = now or datetime.utcnow()
+        starts = {period: period_start(period, now) for period in BudgetPeriod}
+        start_expr = case(
+            *((Budget.period == period, literal(start)) for period, start in starts.items())
+        )
+        result = await db.execute(
+            select(Budget, func.coalesce(func.sum(CostRollup.usd_cost), 0))
+            .outerjoin(
+                CostRollup,
+                and_(
+                    CostRollup.scope_type == Budget.scope_type,
+                    CostRollup.scope_id == Budget.scope_id,
+                    CostRollup.bucket_start >= start_expr,
+                ),
+            )
+            .where(Budget.is_active.is_(True))
+            .group_by(Budget.id)
+        )
+        rows = result.all()
+        if not rows:
+            await BudgetService._release_held_runs(db, [])
+            await db.commit()
+            return 0
+
+        await db.execute(
+            update(Budget.__table__)
+            .where(Budget.__table__.c.id == bindparam("budget_id"))
+            .values(spent_usd=bindparam("spent"), reconciled_at=now),
+            [{"budget_id": budget.id, "spent": spent} for budget, spent in rows],
+        )
+
+        exhausted = []
+        for budget, spent in rows:
+            limit = BudgetService._to_limit(budget)
+            micros = to_micros(spent)
+            for kind in crossed(limit, -1, micros):
+                await BudgetService._raise_alert(db, limit, kind, starts[budget.period], micros, commit=False)
+            if micros >= limit.limit_micros:
+                exhausted.append(budget.id)
+
+        await BudgetService._release_held_runs(db, exhausted)
+        await db.commit()
+
+        try:
+            async with get_redis().pipeline(transaction=False) as pipe:
+                for budget, spent in rows:
+                    start = starts[budget.period]
+                    pipe.set(
+                        spend_key(budget.scope_type, budget.scope_id, budget.period, start),
+                        to_micros(spent),
+                        exat=period_end(budget.period, start) + timedelta(days=1),
+                    )
+                await pipe.execute()
+        except Exception as e:
+            logger.warning("budget_counter_unavailable", error=str(e))
+        return len(rows)
+
+    @staticmethod
+    def start_reconciler() -> None:
+        """Start the periodic reconciliation task (on startup)"""
+        global _reconciler
+        if settings.ENABLE_BUDGETS and _reconciler is None:
+            _reconciler = asyncio.create_task(BudgetService._reconcile_forever())
+
+    @staticmethod
+    async def stop_reconciler() -> None:
+        """Stop the reconciliation task (on shutdown)"""
+        global _reconciler
+        if _reconciler is not None:
+            _reconciler.cancel()
+            try:
+                await _reconciler
+            except asyncio.CancelledError:
+                pass
+            _reconciler = None
+
+    # Internal helpers
+
+    @staticmethod
+    def _to_limit(budget: Budget) -> BudgetLimit:
+        limit = to_micros(budget.limit_usd)
+        # A reconciliation from an earlier period says nothing about this one
+        current = (
+            budget.reconciled_at is not None
+            and budget.reconciled_at >= period_start(budget.period, datetime.utcnow())
+        )
+        return BudgetLimit(
+            id=budget.id,
+            scope_type=budget.scope_type,
+            scope_id=budget.scope_id,
+            period=budget.period,
+            limit_micros=limit,
+            threshold_micros=int(limit * budget.alert_threshold),
+            action=budget.action,
+            spent_micros=to_micros(budget.spent_usd) if current else 0,
+        )
+
+    @staticmethod
+    async def _limits_for(db: AsyncSession, scopes: Iterable[Scope]) -> List[BudgetLimit]:
+        """Active budgets of ``scopes``, from the cache or one query for the misses"""
+        limits: List[BudgetLimit] = []
+        missing = []
+        for scope in scopes:
+            cached = _limits_cache.get(scope)
+            if cached is None:
+                missing.append(scope)
+            else:
+                limits.extend(cached)
+        if not missing:
+            return limits
+
+        result = await db.execute(
+            select(Budget).where(
+                Budget.is_active.is_(True),
+                or_(*(and_(Budget.scope_type == t, Budget.scope_id == i) for t, i in missing)),
+            )
+        )
+        loaded: Dict[Scope, List[BudgetLimit]] = {scope: [] for scope in missing}
+        for budget in result.scalars().all():
+            loaded[(budget.scope_type, budget.scope_id)].append(BudgetService._to_limit(budget))
+        for scope, scope_limits in loaded.items():
+            _limits_cache.set(scope, scope_limits)
+            limits.extend(scope_limits)
+        return limits
+
+    @staticmethod
+    async def _current_spend(limits: Sequence[BudgetLimit], now: datetime) -> List[int]:
+        """Current-period spend per budget in micro-dollars"""
+        keys = [
+            spend_key(limit.scope_type, limit.scope_id, limit.period, period_start(limit.period, now))
+            for limit in limits
+        ]
+        try:
+            values = await get_redis().mget(keys)
+        except Exception as e:
+            logger.warning("budget_counter_unavailable", error=str(e))
+            return [limit.spent_micros for limit in limits]
+        return [int(value or 0) for value in values]
+
+    @staticmethod
+    async def _raise_alert(
+        db: AsyncSession,
+        limit: BudgetLimit,
+        kind: BudgetAlertKind,
+        start: datetime,
+        spent_micros: int,
+        commit: bool = True,
+    ) -> None:
+        """Record an alert unless one of the kind exists for the period"""
+        stmt = (
+            pg_insert(BudgetAlert)
+            .values(
+                budget_id=limit.id,
+                kind=kind,
+                period_start=start,
+                spent_usd=Decimal(spent_micros) / MICROS,
+                limit_usd=Decimal(limit.limit_micros) / MICROS,
+                created_at=datetime.utcnow(),
+            )
+            .on_conflict_do_nothing(index_elements=["budget_id", "period_start", "kind"])
+            .returning(BudgetAlert.id)
+        )
+        inserted = (await db.execute(stmt)).scalar_one_or_none()
+        if commit:
+            await db.commit()
+        if inserted:
+            logger.warning(
+                "budget_alert",
+                budget_id=str(limit.id),
+                kind=kind.value,
+                scope=limit.scope_type.value,
+                scope_id=str(limit.scope_id),
+                spent_usd=float(Decimal(spent_micros) / MICROS),
+                limit_usd=float(Decimal(limit.limit_micros) / MICROS),
+            )
+
+    @staticmethod
+    async def _release_held_runs(db: AsyncSession, exhausted: Sequence[UUID]) -> None:
+        """Clear the hold on pending runs whose budget is no longer exhausted"""
+        hold = WorkflowExecution.metadata_['budget_hold'].astext
+        query = (
+            update(WorkflowExecution)
+            .where(
+                WorkflowExecution.status == ExecutionStatus.PENDING,
+                WorkflowExecution.metadata_.has_key('budget_hold'),
+            )
+            .values(metadata_=WorkflowExecution.metadata_.op('-')(literal('budget_hold', String)))
+            .execution_options(synchronize_session=False)
+        )
+        if exhausted:
+            query = query.where(hold.notin_([str(budget_id) for budget_id in exhausted]))
+        await db.execute(query)
+
+    @staticmethod
+    async def _reconcile_forever() -> None:
+        """Reconcile every BUDGET_CHECK_INTERVAL_SECONDS in one process of the deployment"""
+        interval = settings.BUDGET_CHECK_INTERVAL_SECONDS
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                # Whoever takes the lock reconciles for this interval
+                if not await get_redis().set(RECONCILE_LOCK_KEY, "1", nx=True, ex=max(interval - 1, 1)):
+                    continue
+            except Exception as e:
+                logger.warning("budget_counter_unavailable", error=str(e))
+            try:
+                async with AsyncSessionLocal() as db:
+                    count = await BudgetService.reconcile(db)
+                logger.info("budgets_reconciled", budgets=count)
+            except Exception:
+                logger.exception("budget_reconcile_failed")
@@ -0,0 +1,222 @@
+"""
+Cost Service - Token usage and cost accounting
+
+Steps report token usage (possibly several times, e.g. while streaming).
+Each report is priced with app.core.pricing and its increment is added, in
+the same transaction, to the step's run and to per-day cost rollups for the
+run's workflow, the step's agent and the project. Cost queries read one row
+per scope, day and model instead of scanning steps.
+"""
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+import structlog
+from sqlalchemy import select, update, delete, func, literal, cast, case, and_
+from sqlalchemy.dialects.postgresql import insert as pg_insert, UUID as PG_UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.pricing import cost_usd
+from app.models.agent import Agent
+from app.models.rollup import CostRollup, RollupGranularity, RollupScope
+from app.models.workflow_execution import WorkflowExecution, WorkflowStep
+from app.services.rollup_service import PLACEHOLDER_ID, UUID_PATTERN, lock_days, run_scopes, truncate
+
+logger = structlog.get_logger()
+
+KEY_COLUMNS = ["scope_type", "scope_id", "bucket_start", "model"]
+COUNTER_COLUMNS = ["steps", "tokens_prompt", "tokens_completion", "usd_cost"]
+
+UNKNOWN_MODEL = "unknown"
+
+
+def step_cost_scopes(run: WorkflowExecution, step: WorkflowStep) -> List[Tuple[RollupScope, UUID]]:
+    """Scopes a step's cost is rolled up into: the step's agent, else the run's"""
+    scopes = [(scope_type, scope_id) for scope_type, scope_id in run_scopes(run)
+              if not (scope_type == RollupScope.AGENT and step.agent_id)]
+    if step.agent_id:
+        scopes.append((RollupScope.AGENT, step.agent_id))
+    return scopes
+
+
+class CostService:
+    """Service for token and cost accounting"""
+
+    @staticmethod
+    async def record_usage(
+        db: AsyncSession,
+        run: WorkflowExecution,
+        step: WorkflowStep,
+        tokens_prompt: Optional[int] = None,
+        tokens_completion: Optional[int] = None,
+        model: Optional[str] = None,
+    ) -> Optional[Decimal]:
+        """
+        Set a step's cumulative token usage and account for the increase (no commit)
+
+        Counts are totals for the step so far, so repeated reports are
+        idempotent. The model is fixed by the first report; when none is
+        given, the step's agent's model is used. Returns the cost added.
+        """
+        if tokens_prompt is None and tokens_completion is None:
+            return None
+
+        first_report = step.tokens_prompt is None and step.tokens_completion is None
+        if step.model is None:
+            step.model = model or await CostService._agent_model(db, step.agent_id)
+
+        old_prompt, old_completion = step.tokens_prompt or 0, step.tokens_completion or 0
+        old_cost = step.usd_cost or Decimal(0)
+        if tokens_prompt is not None:
+            step.tokens_prompt = tokens_prompt
+        if tokens_completion is not None:
+            step.tokens_completion = tokens_completion
+        step.usd_cost = cost_usd(step.model, step.tokens_prompt or 0, step.tokens_completion or 0)
+        if step.usd_cost is None and step.model:
+            logger.warning("model_price_missing", model=step.model, step_id=str(step.id))
+
+        delta = {
+            "steps": int(first_report),
+            "tokens_prompt": (step.tokens_prompt or 0) - old_prompt,
+            "tokens_completion": (step.tokens_completion or 0) - old_completion,
+            "usd_cost": (step.usd_cost or Decimal(0)) - old_cost,
+        }
+        if not any(delta.values()):
+            return None
+
+        await db.execute(
+            update(WorkflowExecution)
+            .where(WorkflowExecution.id == run.id)
+            .values(
+                tokens_prompt=WorkflowExecution.tokens_prompt + delta["tokens_prompt"],
+                tokens_completion=WorkflowExecution.tokens_completion + delta["tokens_completion"],
+                usd_cost=WorkflowExecution.usd_cost + delta["usd_cost"],
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+        # The step's start day, which later reports can't move (rebuild buckets the same way)
+        day = truncate(step.started_at or datetime.utcnow(), RollupGranularity.DAY)
+        await lock_days(db, [day])
+        rows = [
+            {
+                "scope_type": scope_type,
+                "scope_id": scope_id,
+                "bucket_start": day,
+                "model": step.model or UNKNOWN_MODEL,
+                **delta,
+            }
+            for scope_type, scope_id in step_cost_scopes(run, step)
+        ]
+        stmt = pg_insert(CostRollup).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=KEY_COLUMNS,
+            set_={c: getattr(CostRollup, c) + getattr(stmt.excluded, c) for c in COUNTER_COLUMNS},
+        )
+        await db.execute(stmt)
+        return delta["usd_cost"]
+
+    @staticmethod
+    async def get_costs(
+        db: AsyncSession,
+        scope_type: RollupScope,
+        scope_id: UUID,
+        start: datetime,
+        end: datetime,
+    ) -> List[Dict[str, Any]]:
+        """Cost rollup rows (per day and model) for the days overlapping [start, end)"""
+        result = await db.execute(
+            select(CostRollup.bucket_start, CostRollup.model, *(getattr(CostRollup, c) for c in COUNTER_COLUMNS))
+            .where(
+                CostRollup.scope_type == scope_type,
+                CostRollup.scope_id == scope_id,
+                CostRollup.bucket_start >= truncate(start, RollupGranularity.DAY),
+                CostRollup.bucket_start < end,
+            )
+            .order_by(CostRollup.bucket_start, CostRollup.model)
+        )
+        return [dict(row._mapping) for row in result.all()]
+
+    @staticmethod
+    async def rebuild(db: AsyncSession, start: datetime, end: datetime) -> int:
+        """
+        Recompute cost rollups for whole-day buckets in [start, end) from step usage
+
+        Uses the costs stored on steps (priced when reported). ``start``/``end``
+        must be day boundaries (see RollupService.rebuild). Does not commit.
+        Returns the number of rows written.
+        """
+        await db.execute(
+            delete(CostRollup)
+            .where(CostRollup.bucket_start >= start, CostRollup.bucket_start < end)
+            .execution_options(synchronize_session=False)
+        )
+
+        written = 0
+        for scope_type in RollupScope:
+            stmt = pg_insert(CostRollup).from_select(
+                KEY_COLUMNS + COUNTER_COLUMNS, CostService._aggregate_query(scope_type, start, end)
+            )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=KEY_COLUMNS,
+                set_={c: getattr(stmt.excluded, c) for c in COUNTER_COLUMNS},
+            )
+            result = await db.execute(stmt)
+            written += result.rowcount or 0
+        return written
+
+    # Internal helpers
+
+    @staticmethod
+    async def _agent_model(db: AsyncSession, agent_id: Optional[UUID]) -> Optional[str]:
+        """Configured model of an agent, if any"""
+        if not agent_id:
+            return None
+        agent = await db.get(Agent, agent_id)
+        return agent.model if agent else None
+
+    @staticmethod
+    def _aggregate_query(scope_type: RollupScope, start: datetime, end: datetime):
+        """SELECT producing cost rollup rows for one scope from step usage"""
+        run = WorkflowExecution
+        step = WorkflowStep
+
+        def metadata_id(key, *exclude):
+            # CASE so the cast only sees valid UUIDs
+            text = run.metadata_[key].astext
+            return case(
+                (and_(text.op("~")(UUID_PATTERN), *(text != str(e) for e in exclude)),
+                 cast(text, PG_UUID(as_uuid=True))),
+            )
+
+        if scope_type == RollupScope.WORKFLOW:
+            scope_id = run.workflow_id
+        elif scope_type == RollupScope.AGENT:
+            scope_id = func.coalesce(step.agent_id, metadata_id('agent_id'))
+        else:
+            scope_id = metadata_id('project_id', PLACEHOLDER_ID)
+
+        # Usage is recorded on the day the step started, as record_usage does
+        bucket = func.date_trunc('day', step.started_at)
+        model = func.coalesce(step.model, UNKNOWN_MODEL)
+        return (
+            select(
+                literal(scope_type, CostRollup.__table__.c.scope_type.type),
+                scope_id,
+                bucket,
+                model,
+                func.count(),
+                func.coalesce(func.sum(step.tokens_prompt), 0),
+                func.coalesce(func.sum(step.tokens_completion), 0),
+                func.coalesce(func.sum(step.usd_cost), 0),
+            )
+            .select_from(step)
+            .join(run, run.id == step.execution_id)
+            .where(
+                step.started_at >= start,
+                step.started_at < end,
+                (step.tokens_prompt.isnot(None)) | (step.tokens_completion.isnot(None)),
+                scope_id.isnot(None),
+            )
+            .group_by(scope_id, bucket, model)
+        )
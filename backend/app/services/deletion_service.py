@@ -0,0 +1,236 @@
+"""
+Deletion Service - Bounded, batched deletes of large object graphs
+
+Deleting a project through the ORM makes SQLAlchemy load every agent, tool,
+workflow, execution and step so it can cascade in Python. Instead, delete
+requests create a Job and the rows are removed here with bulk DELETE
+statements, one bounded batch per transaction, leaves first. The foreign
+keys are ON DELETE CASCADE, so the final parent delete also sweeps up any
+rows inserted while the job was running. A project is flagged ``is_deleting``
+when its deletion is requested, which hides it (and keeps new runs out)
+until it is gone, or visible again if the job fails.
+
+Jobs run in the process that accepted them. One that process left behind
+(not updated for JOB_STALE_SECONDS) is taken over by the reaper of any
+process and started over; deleting is idempotent.
+"""
+import asyncio
+from datetime import datetime, timedelta
+from typing import Optional
+from uuid import UUID
+import structlog
+from sqlalchemy import select, delete, update, Select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.agent import Agent
+from app.models.job import Job, JobType, JobStatus
+from app.models.project import Project
+from app.models.tool import Tool
+from app.models.workflow import Workflow
+from app.models.workflow_execution import WorkflowExecution, WorkflowStep
+from app.services.job_service import JobService
+from app.services.user_service import UserService
+
+logger = structlog.get_logger()
+
+DELETE_JOB_TYPES = (JobType.PROJECT_DELETE, JobType.WORKFLOW_DELETE)
+
+_reaper: Optional["asyncio.Task[None]"] = None
+
+
+class DeletionService:
+    """Service for background cascading deletes"""
+
+    @staticmethod
+    async def request_project_delete(db: AsyncSession, project_id: UUID, user_id: UUID) -> Job:
+        """Create (or return the already active) delete job for a project, and hide the project"""
+        job = await DeletionService._request(db, JobType.PROJECT_DELETE, project_id, user_id)
+        await DeletionService._set_deleting(db, project_id, True)
+        return job
+
+    @staticmethod
+    async def request_workflow_delete(db: AsyncSession, workflow_id: UUID, user_id: UUID) -> Job:
+        """Create (or return the already active) delete job for a workflow"""
+        return await DeletionService._request(db, JobType.WORKFLOW_DELETE, workflow_id, user_id)
+
+    @staticmethod
+    async def run(job_id: UUID) -> None:
+        """
+        Execute a delete job
+
+        Runs outside the request that created the job, so it opens its own session.
+        """
+        async with AsyncSessionLocal() as db:
+            job = await JobService.get_by_id(db, job_id)
+            if not job or job.status != JobStatus.PENDING:
+                return
+
+            await JobService.mark_running(db, job)
+            logger.info("delete_job_started", job_id=str(job.id), type=job.type.value)
+
+            try:
+                if job.type == JobType.PROJECT_DELETE:
+                    await DeletionService._delete_project(db, job, job.target_id)
+                elif job.type == JobType.WORKFLOW_DELETE:
+                    await DeletionService._delete_workflow(db, job, job.target_id)
+                await JobService.mark_completed(db, job)
+                logger.info("delete_job_completed", job_id=str(job.id), progress=job.progress)
+            except Exception as e:
+                await db.rollback()
+                logger.exception("delete_job_failed", job_id=str(job_id))
+                job = await JobService.get_by_id(db, job_id)
+                if job:
+                    await JobService.mark_failed(db, job, str(e))
+                    if job.type == JobType.PROJECT_DELETE:
+                        # Visible again, so the owner can retry
+                        await DeletionService._set_deleting(db, job.target_id, False)
+
+    @staticmethod
+    async def resume_stale() -> int:
+        """Run delete jobs left behind by stopped processes; returns how many"""
+        stale_before = datetime.utcnow() - timedelta(seconds=settings.JOB_STALE_SECONDS)
+        async with AsyncSessionLocal() as db:
+            job_ids = await JobService.claim_stale(db, DELETE_JOB_TYPES, stale_before)
+        for job_id in job_ids:
+            logger.warning("delete_job_resumed", job_id=str(job_id))
+            await DeletionService.run(job_id)
+        return len(job_ids)
+
+    @staticmethod
+    def start_reaper() -> None:
+        """Start resuming stale delete jobs periodically (on startup)"""
+        global _reaper
+        if _reaper is None:
+            _reaper = asyncio.create_task(DeletionService._reap_forever())
+
+    @staticmethod
+    async def stop_reaper() -> None:
+        """Stop the reaper task (on shutdown)"""
+        global _reaper
+        if _reaper is not None:
+            _reaper.cancel()
+            try:
+                await _reaper
+            except asyncio.CancelledError:
+                pass
+            _reaper = None
+
+    # Internal helpers
+
+    @staticmethod
+    async def _request(
+        db: AsyncSession,
+        job_type: JobType,
+        target_id: UUID,
+        user_id: UUID,
+    ) -> Job:
+        """Create a job unless one is already pending/running for the same target"""
+        existing: Optional[Job] = await JobService.get_active(db, job_type, target_id)
+        if existing:
+            return existing
+        return await JobService.create(db, job_type, target_id, user_id)
+
+    @staticmethod
+    async def _set_deleting(db: AsyncSession, project_id: UUID, deleting: bool) -> None:
+        """Flag a project as being deleted or not (updates its owner's principal). Commits."""
+        result = await db.execute(
+            update(Project)
+            .where(Project.id == project_id)
+            .values(is_deleting=deleting)
+            .returning(Project.owner_id)
+        )
+        owner_id = result.scalar_one_or_none()
+        if owner_id is None:
+            await db.commit()
+            return
+        version = await UserService.bump_auth_version(db, owner_id)
+        await db.commit()
+        await UserService.invalidate_principal(owner_id, version)
+
+    @staticmethod
+    async def _reap_forever() -> None:
+        """Resume stale delete jobs now and every JOB_REAP_INTERVAL_SECONDS"""
+        while True:
+            try:
+                await DeletionService.resume_stale()
+            except Exception:
+                logger.exception("delete_job_reap_failed")
+            await asyncio.sleep(settings.JOB_REAP_INTERVAL_SECONDS)
+
+    @staticmethod
+    async def _delete_in_batches(
+        db: AsyncSession,
+        job: Job,
+        label: str,
+        model,
+        id_query: Select,
+    ) -> None:
+        """Delete rows of ``model`` whose ids ``id_query`` selects, one batch per transaction"""
+        batch_size = settings.DELETE_BATCH_SIZE
+        while True:
+            batch_ids = id_query.limit(batch_size).scalar_subquery()
+            result = await db.execute(
+                delete(model)
+                .where(model.id.in_(batch_ids))
+                .execution_options(synchronize_session=False)
+            )
+            deleted = result.rowcount or 0
+            if deleted:
+                await JobService.add_progress(db, job, label, deleted)
+            await db.commit()
+            if deleted < batch_size:
+                break
+
+    @staticmethod
+    async def _delete_workflow(db: AsyncSession, job: Job, workflow_id: UUID) -> None:
+        """Delete a workflow's steps, then executions, then the workflow itself"""
+        await DeletionService._delete_in_batches(
+            db, job, "workflow_steps", WorkflowStep,
+            select(WorkflowStep.id)
+            .join(WorkflowExecution, WorkflowStep.execution_id == WorkflowExecution.id)
+            .where(WorkflowExecution.workflow_id == workflow_id),
+        )
+        await DeletionService._delete_in_batches(
+            db, job, "workflow_executions", WorkflowExecution,
+            select(WorkflowExecution.id).where(WorkflowExecution.workflow_id == workflow_id),
+        )
+        result = await db.execute(delete(Workflow).where(Workflow.id == workflow_id))
+        if result.rowcount:
+            await JobService.add_progress(db, job, "workflows", result.rowcount)
+        await db.commit()
+
+    @staticmethod
+    async def _delete_project(db: AsyncSession, job: Job, project_id: UUID) -> None:
+        """Delete every workflow (with its runs), agent and tool of a project, then the project"""
+        batch_size = settings.DELETE_BATCH_SIZE
+        while True:
+            result = await db.execute(
+                select(Workflow.id).where(Workflow.project_id == project_id).limit(batch_size)
+            )
+            workflow_ids = list(result.scalars().all())
+            for workflow_id in workflow_ids:
+                await DeletionService._delete_workflow(db, job, workflow_id)
+            if len(workflow_ids) < batch_size:
+                break
+
+        await DeletionService._delete_in_batches(
+            db, job, "agents", Agent,
+            select(Agent.id).where(Agent.project_id == project_id),
+        )
+        await DeletionService._delete_in_batches(
+            db, job, "tools", Tool,
+            select(Tool.id).where(Tool.project_id == project_id),
+        )
+        result = await db.execute(
+            delete(Project).where(Project.id == project_id).returning(Project.owner_id)
+        )
+        owner_id = result.scalar_one_or_none()
+        if owner_id is None:
+            await db.commit()
+            return
+        await JobService.add_progress(db, job, "projects", 1)
+        version = await UserService.bump_auth_version(db, owner_id)
+        await db.commit()
+        await UserService.invalidate_principal(owner_id, version)
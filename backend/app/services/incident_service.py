@@ -0,0 +1,281 @@
+"""
+Incident Service - Incidents opened by streaming anomaly detection
+
+RunService reports every run that reaches a terminal status. The event is
+queued without blocking the request, and one background task per process
+feeds it to an in-memory AnomalyDetector with a series per workflow and per
+agent. Only transitions touch the database: a breach opens an incident and
+clearing resolves it. At most one incident per scope and signal is
+unresolved (a partial unique index), so processes that detect the same
+breach don't duplicate it.
+
+Each process learns from the runs it finished; with runs spread across
+processes, their baselines converge to the same rates. Only the process
+whose breach opened an incident resolves it automatically, since only its
+baseline saw the breach; incidents left open by a restarted process are
+resolved by hand.
+"""
+import asyncio
+from datetime import datetime
+from typing import Dict, Hashable, List, NamedTuple, Optional, Tuple
+from uuid import UUID
+import structlog
+from sqlalchemy import select, update, func, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.anomaly import AnomalyDetector, DetectorConfig, Transition, FAILURE_RATE
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.agent import Agent
+from app.models.incident import Incident, IncidentSeverity, IncidentSignal, IncidentStatus, SLA_MINUTES
+from app.models.project import Project
+from app.models.rollup import RollupScope
+from app.models.workflow import Workflow
+from app.models.workflow_execution import WorkflowExecution, ExecutionStatus, TERMINAL_STATUSES
+from app.schemas.incident import IncidentUpdate
+from app.services.rollup_service import parse_id
+
+logger = structlog.get_logger()
+
+FAILED_STATUSES = frozenset({ExecutionStatus.FAILED, ExecutionStatus.TIMEOUT})
+
+
+class RunEvent(NamedTuple):
+    """A run that reached a terminal status"""
+    run_id: UUID
+    workflow_id: UUID
+    agent_id: Optional[UUID]
+    failed: bool
+    duration_seconds: Optional[int]
+
+
+_detector = AnomalyDetector(
+    DetectorConfig(
+        fast_alpha=settings.ANOMALY_FAST_ALPHA,
+        slow_alpha=settings.ANOMALY_SLOW_ALPHA,
+        warmup=settings.ANOMALY_WARMUP_RUNS,
+        failure_rate_delta=settings.ANOMALY_FAILURE_RATE_DELTA,
+        latency_z=settings.ANOMALY_LATENCY_Z,
+    ),
+    max_series=settings.ANOMALY_MAX_SERIES,
+)
+_events: "asyncio.Queue[RunEvent]" = asyncio.Queue(maxsize=settings.ANOMALY_QUEUE_SIZE)
+_consumer: Optional[asyncio.Task] = None
+# Unresolved incidents this process opened, by (detector key, signal)
+_opened: Dict[Tuple[Hashable, str], UUID] = {}
+
+
+def severity_for(transition: Transition) -> IncidentSeverity:
+    """Severity of a breach: half the runs failing, or latency tripled, is worse"""
+    if transition.signal == FAILURE_RATE:
+        return IncidentSeverity.SEV1 if transition.observed >= 0.5 else IncidentSeverity.SEV2
+    return IncidentSeverity.SEV2 if transition.observed >= 3 * transition.baseline else IncidentSeverity.SEV3
+
+
+class IncidentService:
+    """Service for incidents"""
+
+    @staticmethod
+    async def get_by_id(db: AsyncSession, incident_id: UUID) -> Optional[Incident]:
+        """Get an incident by ID"""
+        return await db.get(Incident, incident_id)
+
+    @staticmethod
+    async def get_by_project(
+        db: AsyncSession,
+        project_id: UUID,
+        skip: int = 0,
+        limit: int = 20,
+        status: Optional[IncidentStatus] = None,
+    ) -> Tuple[List[Incident], int]:
+        """A project's incidents, newest first, with the total count"""
+        query = select(Incident).where(Incident.project_id == project_id)
+        if status:
+            query = query.where(Incident.status == status)
+
+        total = (await db.execute(select(func.count()).select_from(query.subquery()))).scalar_one()
+        result = await db.execute(query.order_by(Incident.created_at.desc()).offset(skip).limit(limit))
+        return list(result.scalars().all()), total
+
+    @staticmethod
+    async def update(db: AsyncSession, incident: Incident, incident_data: IncidentUpdate) -> Incident:
+        """
+        Change an incident's status, severity or owner
+
+        Resolving by hand also forgets the detector's state for the scope in
+        this process, so a lasting change is learnt as the new baseline.
+        """
+        update_data = incident_data.model_dump(exclude_unset=True)
+        for field, value in update_data.items():
+            setattr(incident, field, value)
+        if incident_data.status == IncidentStatus.RESOLVED and incident.resolved_at is None:
+            incident.resolved_at = datetime.utcnow()
+            key = (incident.scope_type, incident.scope_id)
+            _detector.reset(key)
+            _opened.pop((key, incident.signal.value), None)
+        elif incident_data.status in (IncidentStatus.OPEN, IncidentStatus.MITIGATED):
+            incident.resolved_at = None
+
+        await db.commit()
+        await db.refresh(incident)
+        return incident
+
+    @staticmethod
+    def run_finished(run: WorkflowExecution) -> None:
+        """Queue a finished run for the detector (never blocks; drops when full)"""
+        if not settings.ENABLE_INCIDENTS or run.status not in TERMINAL_STATUSES:
+            return
+        if run.status == ExecutionStatus.CANCELLED:
+            return
+        event = RunEvent(
+            run_id=run.id,
+            workflow_id=run.workflow_id,
+            agent_id=parse_id((run.metadata_ or {}).get('agent_id')),
+            failed=run.status in FAILED_STATUSES,
+            duration_seconds=run.duration_seconds if run.status == ExecutionStatus.COMPLETED else None,
+        )
+        try:
+            _events.put_nowait(event)
+        except asyncio.QueueFull:
+            logger.warning("incident_event_dropped", run_id=str(run.id))
+
+    @staticmethod
+    def start_detector() -> None:
+        """Start consuming run events (on startup)"""
+        global _consumer
+        if settings.ENABLE_INCIDENTS and _consumer is None:
+            _consumer = asyncio.create_task(IncidentService._consume_forever())
+
+    @staticmethod
+    async def stop_detector() -> None:
+        """Stop consuming run events (on shutdown)"""
+        global _consumer
+        if _consumer is not None:
+            _consumer.cancel()
+            try:
+                await _consumer
+            except asyncio.CancelledError:
+                pass
+            _consumer = None
+
+    # Internal helpers
+
+    @staticmethod
+    async def _consume_forever() -> None:
+        """Feed queued run events to the detector, one at a time; a failing event is logged and skipped"""
+        while True:
+            event = await _events.get()
+            try:
+                await IncidentService._consume(event)
+            except Exception:
+                logger.exception("incident_update_failed", run_id=str(event.run_id))
+
+    @staticmethod
+    async def _consume(event: RunEvent) -> None:
+        """Feed one run event to the detector and persist its transitions"""
+        keys = [(RollupScope.WORKFLOW, event.workflow_id)]
+        if event.agent_id:
+            keys.append((RollupScope.AGENT, event.agent_id))
+        transitions = [
+            transition
+            for key in keys
+            for transition in _detector.observe(key, event.failed, event.duration_seconds)
+        ]
+        if not transitions:
+            return
+
+        opened: Dict[Tuple[Hashable, str], UUID] = {}
+        resolved: List[Tuple[Hashable, str]] = []
+        async with AsyncSessionLocal() as db:
+            for transition in transitions:
+                slot = (transition.key, transition.signal)
+                if transition.breached:
+                    incident_id = await IncidentService._open(db, transition, event.run_id)
+                    if incident_id:
+                        opened[slot] = incident_id
+                elif slot in _opened:
+                    await IncidentService._resolve(db, _opened[slot], transition)
+                    resolved.append(slot)
+            await db.commit()
+        for slot in resolved:
+            _opened.pop(slot, None)
+        _opened.update(opened)
+
+    @staticmethod
+    async def _open(db: AsyncSession, transition: Transition, run_id: UUID) -> Optional[UUID]:
+        """Open an incident for a breach unless one is already unresolved; returns its ID if opened"""
+        scope_type, scope_id = transition.key
+        model = Workflow if scope_type == RollupScope.WORKFLOW else Agent
+        row = (await db.execute(
+            select(model.name, model.project_id, Project.owner_id)
+            .join(Project, Project.id == model.project_id)
+            .where(model.id == scope_id)
+        )).one_or_none()
+        if row is None:
+            return None
+        name, project_id, owner_id = row
+
+        signal = IncidentSignal(transition.signal)
+        severity = severity_for(transition)
+        if signal == IncidentSignal.FAILURE_RATE:
+            baseline, observed = transition.baseline, transition.observed
+            title = (
+                f"Failure rate of {scope_type.value} {name} at {observed:.0%} (baseline {baseline:.0%})"
+            )
+        else:
+            # Run durations are in seconds; incidents report milliseconds
+            baseline, observed = transition.baseline * 1000, transition.observed * 1000
+            title = (
+                f"Latency of {scope_type.value} {name} at {observed / 1000:.1f}s "
+                f"(baseline {baseline / 1000:.1f}s)"
+            )
+
+        stmt = (
+            pg_insert(Incident)
+            .values(
+                project_id=project_id,
+                owner_id=owner_id,
+                title=title[:255],
+                severity=severity,
+                status=IncidentStatus.OPEN,
+                sla_minutes=SLA_MINUTES[severity],
+                scope_type=scope_type,
+                scope_id=scope_id,
+                signal=signal,
+                baseline=baseline,
+                observed=observed,
+                run_ids=[str(run_id)],
+            )
+            .on_conflict_do_nothing(
+                index_elements=["scope_type", "scope_id", "signal"],
+                index_where=text("status <> 'RESOLVED'"),
+            )
+            .returning(Incident.id)
+        )
+        incident_id = (await db.execute(stmt)).scalar_one_or_none()
+        if incident_id:
+            logger.warning(
+                "incident_opened",
+                incident_id=str(incident_id),
+                severity=severity.value,
+                scope=scope_type.value,
+                scope_id=str(scope_id),
+                signal=signal.value,
+                baseline=baseline,
+                observed=observed,
+            )
+        return incident_id
+
+    @staticmethod
+    async def _resolve(db: AsyncSession, incident_id: UUID, transition: Transition) -> None:
+        """Resolve an incident this process opened once its signal cleared (unless already resolved)"""
+        scope_type, scope_id = transition.key
+        result = await db.execute(
+            update(Incident)
+            .where(Incident.id == incident_id, Incident.status != IncidentStatus.RESOLVED)
+            .values(status=IncidentStatus.RESOLVED, resolved_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount:
+            logger.info("incident_resolved", scope=scope_type.value, scope_id=str(scope_id), signal=transition.signal)
@@ -0,0 +1,121 @@
+"""
+Job Service - Bookkeeping for background jobs
+"""
+from datetime import datetime
+from typing import Optional, Dict, Any, Iterable, List
+from uuid import UUID
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.job import Job, JobType, JobStatus
+
+ACTIVE_STATUSES = (JobStatus.PENDING, JobStatus.RUNNING)
+
+
+class JobService:
+    """Service for job operations"""
+
+    @staticmethod
+    async def create(
+        db: AsyncSession,
+        job_type: JobType,
+        target_id: Optional[UUID],
+        requested_by_id: Optional[UUID],
+        params: Optional[Dict[str, Any]] = None,
+    ) -> Job:
+        """Create a pending job"""
+        job = Job(
+            type=job_type,
+            status=JobStatus.PENDING,
+            target_id=target_id,
+            requested_by_id=requested_by_id,
+            params=params or {},
+            progress={},
+        )
+        db.add(job)
+        await db.commit()
+        await db.refresh(job)
+        return job
+
+    @staticmethod
+    async def get_by_id(db: AsyncSession, job_id: UUID) -> Optional[Job]:
+        """Get job by ID"""
+        result = await db.execute(select(Job).where(Job.id == job_id))
+        return result.scalar_one_or_none()
+
+    @staticmethod
+    async def get_active(db: AsyncSession, job_type: JobType, target_id: UUID) -> Optional[Job]:
+        """Get a pending or running job of the given type for a target, if any"""
+        result = await db.execute(
+            select(Job)
+            .where(
+                Job.type == job_type,
+                Job.target_id == target_id,
+                Job.status.in_(ACTIVE_STATUSES),
+            )
+            .order_by(Job.created_at.desc())
+            .limit(1)
+        )
+        return result.scalar_one_or_none()
+
+    @staticmethod
+    async def claim_stale(db: AsyncSession, job_types: Iterable[JobType], stale_before: datetime) -> List[UUID]:
+        """
+        Take over active jobs not updated since ``stale_before``
+
+        Jobs run in the process that accepted them and touch their row as
+        they make progress, so a stale one was left behind by a process that
+        stopped. Claimed jobs are reset to pending for the caller to run;
+        SKIP LOCKED keeps two processes from claiming the same job. Commits.
+        """
+        stale = (
+            select(Job.id)
+            .where(
+                Job.type.in_(list(job_types)),
+                Job.status.in_(ACTIVE_STATUSES),
+                Job.updated_at < stale_before,
+            )
+            .with_for_update(skip_locked=True)
+        )
+        result = await db.execute(
+            update(Job)
+            .where(Job.id.in_(stale.scalar_subquery()))
+            .values(status=JobStatus.PENDING, updated_at=datetime.utcnow())
+            .returning(Job.id)
+            .execution_options(synchronize_session=False)
+        )
+        job_ids = list(result.scalars().all())
+        await db.commit()
+        return job_ids
+
+    @staticmethod
+    async def mark_running(db: AsyncSession, job: Job) -> Job:
+        """Mark a job as started"""
+        job.status = JobStatus.RUNNING
+        job.started_at = datetime.utcnow()
+        await db.commit()
+        return job
+
+    @staticmethod
+    async def add_progress(db: AsyncSession, job: Job, key: str, amount: int) -> None:
+        """Add to a progress counter (flushed with the caller's next commit)"""
+        progress: Dict[str, Any] = dict(job.progress or {})
+        progress[key] = progress.get(key, 0) + amount
+        job.progress = progress  # Reassign so SQLAlchemy sees the JSONB change
+
+    @staticmethod
+    async def mark_completed(db: AsyncSession, job: Job) -> Job:
+        """Mark a job as successfully finished"""
+        job.status = JobStatus.COMPLETED
+        job.completed_at = datetime.utcnow()
+        await db.commit()
+        return job
+
+    @staticmethod
+    async def mark_failed(db: AsyncSession, job: Job, error_message: str) -> Job:
+        """Mark a job as failed"""
+        job.status = JobStatus.FAILED
+        job.completed_at = datetime.utcnow()
+        job.error_message = error_message
+        await db.commit()
+        return job
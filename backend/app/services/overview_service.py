@@ -0,0 +1,185 @@
+"""
+Overview Service - Per-project dashboard counts
+
+An overview is one grouped UNION ALL over the project's agents, tools,
+workflows and in-flight runs, plus the project's run rollups and latency
+sketch for the recent window, so it reads O(statuses + buckets) rows.
+Results are cached per process with stale-while-revalidate: requests are
+answered from memory and a stale entry is reloaded by one background task.
+Writes don't invalidate entries (a busy project finishes runs far more often
+than its overview is read); freshness comes from the TTL alone.
+"""
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+from uuid import UUID
+from sqlalchemy import select, func, literal, cast, or_, and_, union_all, String
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import StaleWhileRevalidateCache
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.agent import Agent, AgentStatus
+from app.models.agent_stats import AgentStats
+from app.models.latency_sketch import SketchMetric, SketchScope
+from app.models.rollup import RunRollup, RollupScope
+from app.models.tool import Tool, ToolStatus
+from app.models.workflow import Workflow, WorkflowStatus
+from app.models.workflow_execution import WorkflowExecution, ExecutionStatus, TERMINAL_STATUSES
+from app.services.agent_stats_service import HEALTH_LEVELS, health_expr
+from app.services.rollup_service import COUNTER_COLUMNS, cover
+from app.services.sketch_service import SketchService
+
+STATUS_ENUMS = {
+    "agents": AgentStatus,
+    "tools": ToolStatus,
+    "workflows": WorkflowStatus,
+    "runs": ExecutionStatus,
+}
+
+_overview_cache: StaleWhileRevalidateCache[UUID, Dict[str, Any]] = StaleWhileRevalidateCache(
+    maxsize=settings.ANALYTICS_CACHE_MAX_ENTRIES,
+    fresh_ttl=settings.PROJECT_OVERVIEW_FRESH_SECONDS,
+    max_stale=settings.PROJECT_OVERVIEW_MAX_STALE_SECONDS,
+)
+
+
+class OverviewService:
+    """Service for project overviews"""
+
+    @staticmethod
+    async def get_project_overview(project_id: UUID) -> Dict[str, Any]:
+        """
+        Cached overview of a project
+
+        Loads use their own session: a refresh may outlive the request
+        that triggered it.
+        """
+        async def load() -> Dict[str, Any]:
+            async with AsyncSessionLocal() as db:
+                return await OverviewService.compute(db, project_id)
+
+        return await _overview_cache.get(project_id, load)
+
+    @staticmethod
+    async def compute(db: AsyncSession, project_id: UUID, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """Overview of a project straight from the database"""
+        now = now or datetime.utcnow()
+        window_start = now - timedelta(hours=settings.PROJECT_OVERVIEW_WINDOW_HOURS)
+
+        overview: Dict[str, Any] = {
+            "project_id": project_id,
+            "generated_at": now,
+            "agents": {"total": 0, "by_status": {}, "by_health": {level: 0 for level in HEALTH_LEVELS}},
+            "tools": {"total": 0, "by_status": {}},
+            "workflows": {"total": 0, "by_status": {}},
+        }
+        in_flight: Dict[str, int] = {}
+
+        result = await db.execute(OverviewService._counts_query(project_id, now))
+        for resource, dimension, key, count in result.all():
+            if resource == "runs":
+                in_flight[ExecutionStatus[key].value] = count
+            elif dimension == "health":
+                overview[resource]["by_health"][key] = count
+            else:
+                overview[resource]["by_status"][STATUS_ENUMS[resource][key].value] = count
+                overview[resource]["total"] += count
+
+        overview["runs"] = await OverviewService._recent_runs(db, project_id, window_start, now)
+        overview["runs"]["in_flight"] = in_flight
+        return overview
+
+    # Internal helpers
+
+    @staticmethod
+    def _counts_query(project_id: UUID, now: datetime):
+        """(resource, dimension, key, count) rows for every breakdown, in one statement"""
+        def by_status(resource, model, *joins):
+            # Enum columns hold member names; compute() maps them back to values
+            query = select(
+                literal(resource).label("resource"),
+                literal("status").label("dimension"),
+                cast(model.status, String).label("key"),
+                func.count().label("count"),
+            )
+            for target, onclause in joins:
+                query = query.join(target, onclause)
+            return query.group_by(model.status)
+
+        agent_health = (
+            select(health_expr(now).label("health"))
+            .select_from(Agent)
+            .outerjoin(AgentStats, AgentStats.agent_id == Agent.id)
+            .where(Agent.project_id == project_id)
+            .subquery()
+        )
+        agents_by_health = (
+            select(literal("agents"), literal("health"), agent_health.c.health, func.count())
+            .group_by(agent_health.c.health)
+        )
+        runs_in_flight = (
+            by_status("runs", WorkflowExecution, (Workflow, Workflow.id == WorkflowExecution.workflow_id))
+            .where(
+                Workflow.project_id == project_id,
+                WorkflowExecution.status.notin_(TERMINAL_STATUSES),
+            )
+        )
+        return union_all(
+            by_status("agents", Agent).where(Agent.project_id == project_id),
+            by_status("tools", Tool).where(Tool.project_id == project_id),
+            by_status("workflows", Workflow).where(Workflow.project_id == project_id),
+            agents_by_health,
+            runs_in_flight,
+        )
+
+    @staticmethod
+    async def _recent_runs(db: AsyncSession, project_id: UUID, start: datetime, end: datetime) -> Dict[str, Any]:
+        """Finished-run counters for [start, end) from the project's rollups, total and per env"""
+        segments = [
+            and_(
+                RunRollup.granularity == granularity,
+                RunRollup.bucket_start >= lo,
+                RunRollup.bucket_start < hi,
+            )
+            for granularity, lo, hi in cover(start, end)
+        ]
+        result = await db.execute(
+            select(
+                RunRollup.env,
+                *(func.sum(getattr(RunRollup, c)).label(c) for c in COUNTER_COLUMNS),
+            )
+            .where(
+                RunRollup.scope_type == RollupScope.PROJECT,
+                RunRollup.scope_id == project_id,
+                or_(*segments),
+            )
+            .group_by(RunRollup.env)
+        )
+
+        totals = dict.fromkeys(COUNTER_COLUMNS, 0)
+        by_env: Dict[str, Dict[str, int]] = {}
+        for row in result.all():
+            counters = {c: int(getattr(row, c)) for c in COUNTER_COLUMNS}
+            by_env[row.env] = {c: counters[c] for c in ("total_runs", "succeeded_runs", "failed_runs")}
+            for c in COUNTER_COLUMNS:
+                totals[c] += counters[c]
+
+        sketch = await SketchService.get_sketch(
+            db, SketchMetric.RUN_DURATION, SketchScope.PROJECT, str(project_id), start, end
+        )
+        return {
+            "window_start": start,
+            "window_end": end,
+            "total_runs": totals["total_runs"],
+            "succeeded_runs": totals["succeeded_runs"],
+            "failed_runs": totals["failed_runs"],
+            "cancelled_runs": totals["cancelled_runs"],
+            "timeout_runs": totals["timeout_runs"],
+            "success_rate": totals["succeeded_runs"] / totals["total_runs"] if totals["total_runs"] else None,
+            "avg_duration_ms": (
+                int(totals["duration_sum_seconds"] * 1000 / totals["duration_count"])
+                if totals["duration_count"] else None
+            ),
+            "p95_duration_ms": round(p95) if (p95 := sketch.quantile(0.95)) is not None else None,
+            "by_env": by_env,
+        }
@@ -9,20 +9,27 @@ from sqlalchemy.orm import selectinload
 
 from app.models.project import Project
 from app.schemas.project import ProjectCreate, ProjectUpdate
+from app.services.user_service import UserService
 
 
 class ProjectService:
-    """Service for project operations"""
+    """
+    Service for project operations
+
+    Projects being deleted (``is_deleting``) are treated as gone.
+    """
 
     @staticmethod
     async def create(db: AsyncSession, project_data: ProjectCreate, owner_id: UUID) -> Project:
-        """Create a new project"""
+        """Create a new project (added to its owner's principal)"""
         project = Project(
             **project_data.model_dump(exclude_unset=True),
             owner_id=owner_id
         )
         db.add(project)
+        version = await UserService.bump_auth_version(db, owner_id)
         await db.commit()
+        await UserService.invalidate_principal(owner_id, version)
         await db.refresh(project)
         return project
 
@@ -32,7 +39,15 @@ class ProjectService:
         result = await db.execute(
             select(Project)
             .options(selectinload(Project.owner))
-            .where(Project.id == project_id)
+            .where(Project.id == project_id, Project.is_deleting.is_(False))
+        )
+        return result.scalar_one_or_none()
+
+    @staticmethod
+    async def get_owner_id(db: AsyncSession, project_id: UUID) -> Optional[UUID]:
+        """Owner of a project, or None if it doesn't exist (or is being deleted)"""
+        result = await db.execute(
+            select(Project.owner_id).where(Project.id == project_id, Project.is_deleting.is_(False))
         )
         return result.scalar_one_or_none()
 
@@ -45,7 +60,11 @@ class ProjectService:
     ) -> tuple[List[Project], int]:
         """Get projects owned by user with pagination"""
         # Get total count
-        count_query = select(func.count()).select_from(Project).where(Project.owner_id == user_id)
+        count_query = (
+            select(func.count())
+            .select_from(Project)
+            .where(Project.owner_id == user_id, Project.is_deleting.is_(False))
+        )
         total_result = await db.execute(count_query)
         total = total_result.scalar()
 
@@ -53,7 +72,7 @@ class ProjectService:
         query = (
             select(Project)
             .options(selectinload(Project.owner))
-            .where(Project.owner_id == user_id)
+            .where(Project.owner_id == user_id, Project.is_deleting.is_(False))
             .order_by(Project.created_at.desc())
             .offset(skip)
             .limit(limit)
@@ -82,17 +101,6 @@ class ProjectService:
         await db.refresh(project)
         return project
 
-    @staticmethod
-    async def delete(db: AsyncSession, project_id: UUID) -> bool:
-        """Delete a project"""
-        project = await ProjectService.get_by_id(db, project_id)
-        if not project:
-            return False
-
-        await db.delete(project)
-        await db.commit()
-        return True
-
     @staticmethod
     async def search(
         db: AsyncSession,
@@ -108,6 +116,7 @@ class ProjectService:
             .select_from(Project)
             .where(
                 Project.owner_id == user_id,
+                Project.is_deleting.is_(False),
                 (Project.name.ilike(f"%{query}%")) | (Project.description.ilike(f"%{query}%"))
             )
         )
@@ -120,6 +129,7 @@ class ProjectService:
             .options(selectinload(Project.owner))
             .where(
                 Project.owner_id == user_id,
+                Project.is_deleting.is_(False),
                 (Project.name.ilike(f"%{query}%")) | (Project.description.ilike(f"%{query}%"))
             )
             .order_by(Project.created_at.desc())
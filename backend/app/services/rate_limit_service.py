@@ -0,0 +1,72 @@
+"""
+Rate Limit Service - The runtime-configurable rate limit policy
+
+The policy (quota classes, route costs and buckets, exempt paths) is kept
+in Redis so it can be changed without a deploy; every process re-reads it
+within RATE_LIMIT_POLICY_REFRESH_SECONDS. Without a stored policy, the
+default built from settings applies.
+"""
+from typing import Optional
+import structlog
+
+from app.core.config import settings
+from app.core.redis import get_redis
+from app.schemas.rate_limit import DEFAULT_QUOTA, QuotaClass, RateLimitPolicy, RouteRule
+
+logger = structlog.get_logger()
+
+POLICY_KEY = "rate_limit:policy"
+
+MACHINE_QUOTA = "machine"
+
+
+class RateLimitService:
+    """Service for the rate limit policy"""
+
+    @staticmethod
+    def default_policy() -> RateLimitPolicy:
+        """
+        Policy used until one is stored
+
+        Agent heartbeats and run step reports are machine traffic with
+        their own buckets; analytics and exports cost more than plain reads.
+        """
+        burst = settings.RATE_LIMIT_BURST
+        return RateLimitPolicy(
+            quotas={
+                DEFAULT_QUOTA: QuotaClass(rate_per_minute=settings.RATE_LIMIT_PER_MINUTE, burst=burst),
+                MACHINE_QUOTA: QuotaClass(
+                    rate_per_minute=settings.RATE_LIMIT_MACHINE_PER_MINUTE, burst=settings.RATE_LIMIT_MACHINE_BURST
+                ),
+            },
+            routes=[
+                RouteRule(pattern="/api/v1/agents/*/heartbeat", methods=["POST"], quota=MACHINE_QUOTA),
+                RouteRule(pattern="/api/v1/runs/*/steps*", methods=["POST", "PATCH"], quota=MACHINE_QUOTA),
+                RouteRule(pattern="*/export", cost=min(10, burst)),
+                RouteRule(pattern="/api/v1/analytics/*", cost=min(5, burst)),
+            ],
+            exempt=["/health", "/ready", "/docs", "/redoc", "/openapi.json", "/metrics*"],
+        )
+
+    @staticmethod
+    async def get_stored_policy() -> Optional[RateLimitPolicy]:
+        """The stored policy, or None if the default applies"""
+        raw = await get_redis().get(POLICY_KEY)
+        return RateLimitPolicy.model_validate_json(raw) if raw else None
+
+    @staticmethod
+    async def get_policy() -> RateLimitPolicy:
+        """The policy in effect"""
+        return await RateLimitService.get_stored_policy() or RateLimitService.default_policy()
+
+    @staticmethod
+    async def set_policy(policy: RateLimitPolicy) -> None:
+        """Store a policy for every process to pick up"""
+        await get_redis().set(POLICY_KEY, policy.model_dump_json(by_alias=True))
+        logger.info("rate_limit_policy_updated", quotas=sorted(policy.quotas), routes=len(policy.routes))
+
+    @staticmethod
+    async def reset_policy() -> None:
+        """Go back to the default policy"""
+        await get_redis().delete(POLICY_KEY)
+        logger.info("rate_limit_policy_reset")
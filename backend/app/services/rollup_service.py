@@ -0,0 +1,371 @@
+"""
+Rollup Service - Incrementally maintained run statistics
+
+Every run that reaches a terminal status adds itself to one row per
+(granularity, scope, env, bucket) with INSERT ... ON CONFLICT DO UPDATE, in
+the same transaction that finishes the run. Dashboards then read
+O(buckets) rows instead of scanning workflow_executions.
+
+Runs that finish without going through RunService (imports, manual fixes,
+crashed writers) are repaired by ``rebuild``, which recomputes a range of
+buckets (and the latency sketches and cost rollups built on them) from
+workflow_executions. Writers and rebuilds serialize per day through
+transaction-level advisory locks (see ``lock_days``).
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+import structlog
+from sqlalchemy import select, delete, func, literal, cast, and_
+from sqlalchemy.dialects.postgresql import insert as pg_insert, UUID as PG_UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.session import AsyncSessionLocal
+from app.models.job import Job, JobType, JobStatus
+from app.models.rollup import RunRollup, RollupGranularity, RollupScope
+from app.models.workflow_execution import WorkflowExecution, ExecutionStatus, TERMINAL_STATUSES
+from app.services.job_service import JobService
+
+logger = structlog.get_logger()
+
+BUCKET_SPANS = {
+    RollupGranularity.MINUTE: timedelta(minutes=1),
+    RollupGranularity.HOUR: timedelta(hours=1),
+    RollupGranularity.DAY: timedelta(days=1),
+}
+
+# project_id stored on runs created before it was filled in from the workflow
+PLACEHOLDER_ID = UUID(int=0)
+
+KEY_COLUMNS = ["granularity", "scope_type", "scope_id", "env", "bucket_start"]
+COUNTER_COLUMNS = [
+    "total_runs",
+    "succeeded_runs",
+    "failed_runs",
+    "cancelled_runs",
+    "timeout_runs",
+    "duration_sum_seconds",
+    "duration_count",
+]
+
+# First key of the advisory locks on rollup days; the second is the day number
+DAY_LOCK_CLASS = 7301
+EPOCH = datetime(1970, 1, 1)
+
+UUID_PATTERN = "^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$"
+
+
+def to_utc_naive(ts: datetime) -> datetime:
+    """Normalize a timestamp to naive UTC, as stored in DateTime columns"""
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return ts
+
+
+def truncate(ts: datetime, granularity: RollupGranularity) -> datetime:
+    """Start of the bucket containing ``ts`` (same as Postgres date_trunc)"""
+    ts = to_utc_naive(ts)
+    if granularity == RollupGranularity.MINUTE:
+        return ts.replace(second=0, microsecond=0)
+    if granularity == RollupGranularity.HOUR:
+        return ts.replace(minute=0, second=0, microsecond=0)
+    return ts.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def ceil_bucket(ts: datetime, granularity: RollupGranularity) -> datetime:
+    """First bucket boundary at or after ``ts``"""
+    start = truncate(ts, granularity)
+    return start if start == to_utc_naive(ts) else start + BUCKET_SPANS[granularity]
+
+
+def cover(
+    start: datetime,
+    end: datetime,
+    granularities: Tuple[RollupGranularity, ...] = (
+        RollupGranularity.DAY, RollupGranularity.HOUR, RollupGranularity.MINUTE,
+    ),
+) -> List[Tuple[RollupGranularity, datetime, datetime]]:
+    """
+    Fewest buckets that tile [start, end)
+
+    Returns (granularity, first bucket start, end) segments: whole days in
+    the middle, hours and then minutes towards the edges. The edges are
+    rounded outwards to the finest granularity.
+    """
+    if to_utc_naive(start) >= to_utc_naive(end):
+        return []
+    granularity, finer = granularities[0], granularities[1:]
+    if not finer:
+        return [(granularity, truncate(start, granularity), ceil_bucket(end, granularity))]
+    lo, hi = ceil_bucket(start, granularity), truncate(end, granularity)
+    if lo >= hi:
+        return cover(start, end, finer)
+    return cover(start, lo, finer) + [(granularity, lo, hi)] + cover(hi, end, finer)
+
+
+def bucket_count(start: datetime, end: datetime, granularity: RollupGranularity) -> int:
+    """Number of buckets of ``granularity`` overlapping [start, end)"""
+    first = truncate(start, granularity)
+    end = to_utc_naive(end)
+    if end <= first:
+        return 0
+    span = BUCKET_SPANS[granularity]
+    return -(-(end - first) // span)
+
+
+async def lock_days(db: AsyncSession, timestamps: Iterable[datetime], exclusive: bool = False) -> None:
+    """
+    Lock the rollup days of ``timestamps`` until the transaction ends
+
+    Writers adding to a day's rollups, sketches or cost rollups lock it
+    shared, so they don't wait for each other; ``rebuild`` locks it
+    exclusively, so nothing is added to a day while it is recomputed.
+    Days are locked in order.
+    """
+    lock = func.pg_advisory_xact_lock if exclusive else func.pg_advisory_xact_lock_shared
+    for day in sorted({(truncate(ts, RollupGranularity.DAY) - EPOCH).days for ts in timestamps}):
+        await db.execute(select(lock(DAY_LOCK_CLASS, day)))
+
+
+def parse_id(value: Any) -> Optional[UUID]:
+    """UUID from a metadata value, or None if missing/invalid"""
+    if not value:
+        return None
+    try:
+        return UUID(str(value))
+    except ValueError:
+        return None
+
+
+def run_scopes(run: WorkflowExecution) -> List[Tuple[RollupScope, UUID]]:
+    """Scopes a run's statistics are rolled up into"""
+    metadata = run.metadata_ or {}
+    scopes = [(RollupScope.WORKFLOW, run.workflow_id)]
+    agent_id = parse_id(metadata.get('agent_id'))
+    if agent_id:
+        scopes.append((RollupScope.AGENT, agent_id))
+    project_id = parse_id(metadata.get('project_id'))
+    if project_id and project_id != PLACEHOLDER_ID:
+        scopes.append((RollupScope.PROJECT, project_id))
+    return scopes
+
+
+def run_counters(run: WorkflowExecution) -> Dict[str, int]:
+    """Counter increments contributed by one finished run"""
+    completed = run.status == ExecutionStatus.COMPLETED
+    has_duration = completed and bool(run.duration_seconds) and run.duration_seconds > 0
+    return {
+        "total_runs": 1,
+        "succeeded_runs": int(completed),
+        "failed_runs": int(run.status == ExecutionStatus.FAILED),
+        "cancelled_runs": int(run.status == ExecutionStatus.CANCELLED),
+        "timeout_runs": int(run.status == ExecutionStatus.TIMEOUT),
+        "duration_sum_seconds": run.duration_seconds if has_duration else 0,
+        "duration_count": int(has_duration),
+    }
+
+
+class RollupService:
+    """Service for run rollups"""
+
+    @staticmethod
+    async def record_run(db: AsyncSession, run: WorkflowExecution) -> None:
+        """
+        Add a finished run to its rollup buckets
+
+        Does not commit; call inside the transaction that finishes the run so
+        the run and its rollup increments land together.
+        """
+        # Bucketed by start time, like rebuild
+        ts = run.started_at
+        if ts is None or run.status not in TERMINAL_STATUSES:
+            return
+
+        await lock_days(db, [ts])
+        counters = run_counters(run)
+        env = (run.metadata_ or {}).get('env') or 'dev'
+        rows = [
+            {
+                "granularity": granularity,
+                "scope_type": scope_type,
+                "scope_id": scope_id,
+                "env": env,
+                "bucket_start": truncate(ts, granularity),
+                **counters,
+            }
+            for granularity in RollupGranularity
+            for scope_type, scope_id in run_scopes(run)
+        ]
+
+        stmt = pg_insert(RunRollup).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=KEY_COLUMNS,
+            set_={c: getattr(RunRollup, c) + getattr(stmt.excluded, c) for c in COUNTER_COLUMNS},
+        )
+        await db.execute(stmt)
+
+    @staticmethod
+    async def get_series(
+        db: AsyncSession,
+        scope_type: RollupScope,
+        scope_id: UUID,
+        granularity: RollupGranularity,
+        start: datetime,
+        end: datetime,
+        env: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Counters per bucket in [start, end), summed over environments unless ``env`` is given"""
+        query = (
+            select(
+                RunRollup.bucket_start,
+                *(func.sum(getattr(RunRollup, c)).label(c) for c in COUNTER_COLUMNS),
+            )
+            .where(
+                RunRollup.granularity == granularity,
+                RunRollup.scope_type == scope_type,
+                RunRollup.scope_id == scope_id,
+                RunRollup.bucket_start >= truncate(start, granularity),
+                RunRollup.bucket_start < to_utc_naive(end),
+            )
+            .group_by(RunRollup.bucket_start)
+            .order_by(RunRollup.bucket_start)
+        )
+        if env:
+            query = query.where(RunRollup.env == env)
+
+        result = await db.execute(query)
+        return [
+            {"bucket_start": row.bucket_start, **{c: int(getattr(row, c)) for c in COUNTER_COLUMNS}}
+            for row in result.all()
+        ]
+
+    @staticmethod
+    async def request_rebuild(db: AsyncSession, start: datetime, end: datetime, user_id: UUID) -> Job:
+        """Create a job that re-aggregates rollups for [start, end)"""
+        return await JobService.create(
+            db,
+            JobType.ROLLUP_REBUILD,
+            None,
+            user_id,
+            params={"start": to_utc_naive(start).isoformat(), "end": to_utc_naive(end).isoformat()},
+        )
+
+    @staticmethod
+    async def run(job_id: UUID) -> None:
+        """
+        Execute a rebuild job, one day per transaction
+
+        Runs outside the request that created the job, so it opens its own session.
+        """
+        async with AsyncSessionLocal() as db:
+            job = await JobService.get_by_id(db, job_id)
+            if not job or job.status != JobStatus.PENDING:
+                return
+
+            await JobService.mark_running(db, job)
+            logger.info("rollup_rebuild_started", job_id=str(job.id), params=job.params)
+
+            try:
+                day = truncate(datetime.fromisoformat(job.params["start"]), RollupGranularity.DAY)
+                end = datetime.fromisoformat(job.params["end"])
+                while day < end:
+                    rows = await RollupService.rebuild(db, day, day + BUCKET_SPANS[RollupGranularity.DAY])
+                    await db.commit()
+                    await JobService.add_progress(db, job, "days", 1)
+                    await JobService.add_progress(db, job, "rows", rows)
+                    day += BUCKET_SPANS[RollupGranularity.DAY]
+                await JobService.mark_completed(db, job)
+                logger.info("rollup_rebuild_completed", job_id=str(job.id), progress=job.progress)
+            except Exception as e:
+                await db.rollback()
+                logger.exception("rollup_rebuild_failed", job_id=str(job_id))
+                job = await JobService.get_by_id(db, job_id)
+                if job:
+                    await JobService.mark_failed(db, job, str(e))
+
+    @staticmethod
+    async def rebuild(db: AsyncSession, start: datetime, end: datetime) -> int:
+        """
+        Recompute every rollup bucket, latency sketch and cost rollup in [start, end) from raw runs
+
+        The range is widened to whole days so all granularities are rebuilt
+        completely. The days stay locked against writers until the caller
+        commits. Does not commit. Returns the number of rollup rows written.
+        """
+        start = truncate(start, RollupGranularity.DAY)
+        end = to_utc_naive(end)
+        if end > truncate(end, RollupGranularity.DAY):
+            end = truncate(end, RollupGranularity.DAY) + BUCKET_SPANS[RollupGranularity.DAY]
+        days = (end - start) // BUCKET_SPANS[RollupGranularity.DAY]
+        await lock_days(db, (start + timedelta(days=i) for i in range(days)), exclusive=True)
+
+        await db.execute(
+            delete(RunRollup)
+            .where(RunRollup.bucket_start >= start, RunRollup.bucket_start < end)
+            .execution_options(synchronize_session=False)
+        )
+
+        written = 0
+        for granularity in RollupGranularity:
+            for scope_type in RollupScope:
+                query = RollupService._aggregate_query(granularity, scope_type, start, end)
+                stmt = pg_insert(RunRollup).from_select(KEY_COLUMNS + COUNTER_COLUMNS, query)
+                # Runs finished concurrently may already have re-created a row
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=KEY_COLUMNS,
+                    set_={c: getattr(stmt.excluded, c) for c in COUNTER_COLUMNS},
+                )
+                result = await db.execute(stmt)
+                written += result.rowcount or 0
+
+        # Latency sketches and cost rollups share the day buckets
+        # (imported here: both services build on this module)
+        from app.services.sketch_service import SketchService
+        from app.services.cost_service import CostService
+        written += await SketchService.rebuild(db, start, end)
+        written += await CostService.rebuild(db, start, end)
+        return written
+
+    @staticmethod
+    def _aggregate_query(granularity: RollupGranularity, scope_type: RollupScope, start: datetime, end: datetime):
+        """SELECT producing rollup rows for one granularity and scope from raw runs"""
+        run = WorkflowExecution
+        metadata_id = None
+        if scope_type == RollupScope.WORKFLOW:
+            scope_id = run.workflow_id
+        else:
+            metadata_id = run.metadata_['agent_id' if scope_type == RollupScope.AGENT else 'project_id'].astext
+            scope_id = cast(metadata_id, PG_UUID(as_uuid=True))
+
+        completed = run.status == ExecutionStatus.COMPLETED
+        timed = and_(completed, run.duration_seconds > 0)
+        bucket = func.date_trunc(granularity.value, run.started_at)
+        env = func.coalesce(run.metadata_['env'].astext, 'dev')
+
+        query = (
+            select(
+                literal(granularity, RunRollup.__table__.c.granularity.type),
+                literal(scope_type, RunRollup.__table__.c.scope_type.type),
+                scope_id,
+                env,
+                bucket,
+                func.count(),
+                func.count().filter(completed),
+                func.count().filter(run.status == ExecutionStatus.FAILED),
+                func.count().filter(run.status == ExecutionStatus.CANCELLED),
+                func.count().filter(run.status == ExecutionStatus.TIMEOUT),
+                func.coalesce(func.sum(run.duration_seconds).filter(timed), 0),
+                func.count().filter(timed),
+            )
+            .where(
+                run.status.in_(TERMINAL_STATUSES),
+                run.started_at >= start,
+                run.started_at < end,
+            )
+            .group_by(scope_id, env, bucket)
+        )
+        if metadata_id is not None:
+            query = query.where(metadata_id.op("~")(UUID_PATTERN))
+            if scope_type == RollupScope.PROJECT:
+                query = query.where(metadata_id != str(PLACEHOLDER_ID))
+        return query
@@ -1,13 +1,24 @@
 """
 Run Service Layer - Workflow execution management
 """
-from typing import List, Tuple, Optional
+from typing import AsyncIterator, List, Tuple, Optional
 from uuid import UUID
-from datetime import datetime, timezone
+from datetime import datetime
 from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.workflow_execution import WorkflowExecution, WorkflowStep, ExecutionStatus
+from app.core.config import settings
+from app.db.streaming import stream_scalars
+from app.models.project import Project
+from app.models.workflow import Workflow
+from app.models.workflow_execution import WorkflowExecution, WorkflowStep, ExecutionStatus, TERMINAL_STATUSES
+from app.services.agent_stats_service import AgentStatsService
+from app.services.analytics_service import AnalyticsService
+from app.services.budget_service import BudgetService, RunHeld
+from app.services.cost_service import CostService, step_cost_scopes
+from app.services.incident_service import IncidentService
+from app.services.rollup_service import RollupService, parse_id, to_utc_naive
+from app.services.sketch_service import SketchService
 from app.schemas.run import RunCreate, RunUpdate, RunStepCreate, RunStepUpdate
 
 
@@ -16,31 +27,49 @@ class RunService:
     
     @staticmethod
     async def create(db: AsyncSession, run_data: RunCreate, user_id: UUID) -> WorkflowExecution:
-        """Create new run"""
+        """
+        Create new run
+        
+        Raises BudgetExhausted if a rejecting budget of the project, workflow or agent
+        is used up; a queueing budget holds the run instead.
+        """
+        workflow_id = UUID(run_data.workflow_id)
+        workflow = await db.get(Workflow, workflow_id)
+        
         run = WorkflowExecution(
-            workflow_id=UUID(run_data.workflow_id),
+            workflow_id=workflow_id,
             status=ExecutionStatus.PENDING,
-            started_at=datetime.now(timezone.utc),
+            started_at=datetime.utcnow(),
             input_data=run_data.input_data,
             metadata_={
                 "triggered_by": str(user_id),
                 "trigger": run_data.trigger,
                 "agent_id": run_data.agent_id,
-                "project_id": "00000000-0000-0000-0000-000000000000",  # Will be set from workflow
+                "project_id": str(workflow.project_id) if workflow else None,
                 "env": run_data.env,
                 "config": run_data.config or {}
             }
         )
         
+        await RunService._apply_budgets(db, run)
         db.add(run)
+        await AgentStatsService.run_started(db, run)
         await db.commit()
         await db.refresh(run)
         return run
     
     @staticmethod
-    async def get_by_id(db: AsyncSession, run_id: UUID) -> Optional[WorkflowExecution]:
-        """Get run by ID"""
-        result = await db.execute(select(WorkflowExecution).where(WorkflowExecution.id == run_id))
+    async def get_by_id(db: AsyncSession, run_id: UUID, for_update: bool = False) -> Optional[WorkflowExecution]:
+        """
+        Get run by ID
+        
+        With ``for_update`` the row is locked until commit and re-read even if
+        the session already holds the run.
+        """
+        query = select(WorkflowExecution).where(WorkflowExecution.id == run_id)
+        if for_update:
+            query = query.with_for_update().execution_options(populate_existing=True)
+        result = await db.execute(query)
         return result.scalar_one_or_none()
     
     @staticmethod
@@ -50,11 +79,66 @@ class RunService:
         limit: int = 20,
         status: Optional[str] = None,
         agent_id: Optional[str] = None,
-        workflow_id: Optional[str] = None
-    ) -> Tuple[List[WorkflowExecution], int]:
-        """List runs with filters"""
+        workflow_id: Optional[str] = None,
+        cursor: Optional[UUID] = None,
+        owner_id: Optional[UUID] = None
+    ) -> Tuple[List[WorkflowExecution], Optional[int]]:
+        """
+        List runs with filters
+        
+        Runs are ordered by id (UUIDv7, so newest first) on every page, so a
+        page's last id can continue any listing. When ``cursor`` is given,
+        keyset pagination is used instead of OFFSET: only runs with an id
+        below the cursor are returned, and the total isn't counted (None).
+        Legacy v4 ids still paginate consistently, they just don't sort by
+        creation time.
+        """
+        query = RunService._filtered_query(status, agent_id, workflow_id, owner_id)
+        
+        total = None
+        if cursor:
+            query = query.where(WorkflowExecution.id < cursor)
+        else:
+            count_query = select(func.count()).select_from(query.subquery())
+            total = (await db.execute(count_query)).scalar_one()
+            query = query.offset(skip)
+        
+        query = query.order_by(WorkflowExecution.id.desc()).limit(limit)
+        runs = list((await db.execute(query)).scalars().all())
+        
+        return runs, total
+    
+    @staticmethod
+    async def stream_runs(
+        db: AsyncSession,
+        status: Optional[str] = None,
+        agent_id: Optional[str] = None,
+        workflow_id: Optional[str] = None,
+        owner_id: Optional[UUID] = None
+    ) -> AsyncIterator[List[WorkflowExecution]]:
+        """Stream all runs matching the filters in fixed-size batches (for exports)"""
+        query = RunService._filtered_query(status, agent_id, workflow_id, owner_id)
+        async for batch in stream_scalars(db, query.order_by(WorkflowExecution.id)):
+            yield batch
+    
+    @staticmethod
+    def _filtered_query(
+        status: Optional[str] = None,
+        agent_id: Optional[str] = None,
+        workflow_id: Optional[str] = None,
+        owner_id: Optional[UUID] = None
+    ):
+        """Build the base run query with list filters applied (``owner_id``: runs of that user's projects only)"""
         query = select(WorkflowExecution)
         
+        if owner_id:
+            owned_workflows = (
+                select(Workflow.id)
+                .join(Project, Project.id == Workflow.project_id)
+                .where(Project.owner_id == owner_id, Project.is_deleting.is_(False))
+            )
+            query = query.where(WorkflowExecution.workflow_id.in_(owned_workflows))
+        
         if status:
             query = query.where(WorkflowExecution.status == ExecutionStatus(status))
         if agent_id:
@@ -63,57 +147,213 @@ class RunService:
         if workflow_id:
             query = query.where(WorkflowExecution.workflow_id == UUID(workflow_id))
         
-        count_query = select(func.count()).select_from(query.subquery())
-        total = (await db.execute(count_query)).scalar_one()
-        
-        query = query.offset(skip).limit(limit).order_by(WorkflowExecution.started_at.desc())
-        runs = list((await db.execute(query)).scalars().all())
-        
-        return runs, total
+        return query
     
     @staticmethod
     async def update(db: AsyncSession, run_id: UUID, run_data: RunUpdate) -> Optional[WorkflowExecution]:
-        """Update run"""
-        run = await RunService.get_by_id(db, run_id)
+        """
+        Update run
+        
+        API fields are mapped onto their columns (``ended_at`` -> ``completed_at``,
+        ``duration_ms`` -> ``duration_seconds``). Moving the run into a terminal
+        status fills in the end time and duration if not given and finalizes it.
+        The run is locked first, so of concurrent updates finishing it only
+        one finalizes it. Raises RunHeld for starting or completing a run held
+        by a budget.
+        """
+        run = await RunService.get_by_id(db, run_id, for_update=True)
         if not run:
             return None
         
-        for field, value in run_data.model_dump(exclude_unset=True).items():
-            setattr(run, field, value)
+        was_finished = run.status in TERMINAL_STATUSES
+        data = run_data.model_dump(exclude_unset=True)
         
-        await db.commit()
-        await db.refresh(run)
+        if data.get('status') is not None:
+            new_status = ExecutionStatus(data['status'].lower())
+            hold = RunService._budget_hold(run)
+            if hold and new_status in (ExecutionStatus.RUNNING, ExecutionStatus.COMPLETED):
+                raise RunHeld(hold)
+            run.status = new_status
+        if 'ended_at' in data:
+            run.completed_at = to_utc_naive(data['ended_at']) if data['ended_at'] else None
+        if 'duration_ms' in data:
+            run.duration_seconds = data['duration_ms'] // 1000 if data['duration_ms'] is not None else None
+        for field in ('output_data', 'error_message'):
+            if field in data:
+                setattr(run, field, data[field])
+        
+        finished = not was_finished and run.status in TERMINAL_STATUSES
+        if finished:
+            if run.completed_at is None:
+                run.completed_at = datetime.utcnow()
+            if run.duration_seconds is None and run.started_at:
+                run.duration_seconds = int((run.completed_at - run.started_at).total_seconds())
+        
+        if finished:
+            await RunService._commit_finished(db, run)
+        else:
+            await db.commit()
+            await db.refresh(run)
         return run
     
     @staticmethod
     async def cancel(db: AsyncSession, run_id: UUID) -> Optional[WorkflowExecution]:
-        """Cancel running run"""
-        run = await RunService.get_by_id(db, run_id)
+        """Cancel running run (locked, so it is finalized once)"""
+        run = await RunService.get_by_id(db, run_id, for_update=True)
         if not run or run.status != ExecutionStatus.RUNNING:
             return None
         
         run.status = ExecutionStatus.CANCELLED
-        run.completed_at = datetime.now(timezone.utc)
+        run.completed_at = datetime.utcnow()
         if run.started_at:
             run.duration_seconds = int((run.completed_at - run.started_at).total_seconds())
         
+        await RunService._commit_finished(db, run)
+        return run
+    
+    @staticmethod
+    async def _apply_budgets(db: AsyncSession, run: WorkflowExecution) -> None:
+        """Check a new run against its project's, workflow's and agent's budgets"""
+        metadata = run.metadata_
+        held_by = await BudgetService.check_run(
+            db, parse_id(metadata.get('project_id')), parse_id(metadata.get('agent_id')), run.workflow_id
+        )
+        if held_by:
+            # Pending until reconciliation finds the budget has room again
+            run.metadata_ = {**metadata, "budget_hold": str(held_by.id)}
+    
+    @staticmethod
+    def _budget_hold(run: WorkflowExecution) -> Optional[str]:
+        """Budget a pending run is held for, if any"""
+        if run.status != ExecutionStatus.PENDING:
+            return None
+        return (run.metadata_ or {}).get('budget_hold')
+    
+    @staticmethod
+    async def _commit_finished(db: AsyncSession, run: WorkflowExecution) -> None:
+        """
+        Commit a run that just reached a terminal status
+        
+        Derived statistics are written in the same transaction, so they are
+        never ahead of or behind the run itself.
+        """
+        await RollupService.record_run(db, run)
+        await SketchService.record_run(db, run)
+        await AgentStatsService.run_finished(db, run)
         await db.commit()
         await db.refresh(run)
-        return run
+        AnalyticsService.invalidate_workflow(run.workflow_id)
+        IncidentService.run_finished(run)
     
     @staticmethod
     async def get_steps(db: AsyncSession, run_id: UUID) -> List[WorkflowStep]:
-        """Get all steps for a run"""
+        """Get the steps of a run in creation order (bounded by WORKFLOW_MAX_STEPS)"""
         result = await db.execute(
             select(WorkflowStep)
             .where(WorkflowStep.execution_id == run_id)
-            .order_by(WorkflowStep.created_at)  # Use created_at instead of step_index
+            .order_by(WorkflowStep.id)  # UUIDv7: creation order
+            .limit(settings.WORKFLOW_MAX_STEPS)
         )
         return list(result.scalars().all())
     
+    @staticmethod
+    async def create_step(db: AsyncSession, run_id: UUID, step_data: RunStepCreate) -> Optional[WorkflowStep]:
+        """Record the start of a step in a run (raises RunHeld while a budget holds the run)"""
+        run = await RunService.get_by_id(db, run_id)
+        if not run:
+            return None
+        hold = RunService._budget_hold(run)
+        if hold:
+            raise RunHeld(hold)
+        
+        step = WorkflowStep(
+            execution_id=run_id,
+            step_id=str(step_data.step_index),
+            step_name=step_data.name,
+            step_type=step_data.step_type,
+            status=ExecutionStatus.RUNNING,
+            started_at=datetime.utcnow(),
+            input_data=step_data.input_data,
+            agent_id=UUID(step_data.agent_id) if step_data.agent_id else None,
+            tool_id=UUID(step_data.tool_id) if step_data.tool_id else None,
+        )
+        
+        db.add(step)
+        await db.commit()
+        await db.refresh(step)
+        return step
+    
+    @staticmethod
+    async def update_step(
+        db: AsyncSession,
+        run_id: UUID,
+        step_id: UUID,
+        step_data: RunStepUpdate
+    ) -> Optional[WorkflowStep]:
+        """
+        Update a step; setting ``success`` completes or fails it
+        
+        A completed step's duration is added to the latency sketches, and
+        reported token usage to the run's totals and the cost rollups, in the
+        same transaction. The step is locked first, so concurrent reports
+        account for each increase once.
+        """
+        result = await db.execute(
+            select(WorkflowStep)
+            .where(WorkflowStep.id == step_id, WorkflowStep.execution_id == run_id)
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        )
+        step = result.scalar_one_or_none()
+        if not step:
+            return None
+        
+        was_finished = step.status in TERMINAL_STATUSES
+        data = step_data.model_dump(exclude_unset=True)
+        
+        if data.get('success') is not None:
+            step.status = ExecutionStatus.COMPLETED if data['success'] else ExecutionStatus.FAILED
+        if 'ended_at' in data:
+            step.completed_at = to_utc_naive(data['ended_at']) if data['ended_at'] else None
+        if 'duration_ms' in data:
+            step.duration_seconds = data['duration_ms'] // 1000 if data['duration_ms'] is not None else None
+        for field in ('output_data', 'error_message'):
+            if field in data:
+                setattr(step, field, data[field])
+        
+        if not was_finished and step.status in TERMINAL_STATUSES:
+            if step.completed_at is None:
+                step.completed_at = datetime.utcnow()
+            if step.duration_seconds is None and step.started_at:
+                step.duration_seconds = int((step.completed_at - step.started_at).total_seconds())
+            await SketchService.record_step(db, step)
+            await AgentStatsService.step_finished(db, step)
+        
+        run = await db.get(WorkflowExecution, run_id)
+        cost = await CostService.record_usage(
+            db, run, step, data.get('tokens_prompt'), data.get('tokens_completion'), data.get('model')
+        )
+        scopes = step_cost_scopes(run, step) if cost else []
+        
+        await db.commit()
+        await db.refresh(step)
+        await BudgetService.record_spend(db, scopes, cost)
+        return step
+    
+    @staticmethod
+    async def stream_steps(db: AsyncSession, run_id: UUID) -> AsyncIterator[List[WorkflowStep]]:
+        """Stream the steps of a run in fixed-size batches (for exports)"""
+        query = (
+            select(WorkflowStep)
+            .where(WorkflowStep.execution_id == run_id)
+            .order_by(WorkflowStep.id)
+        )
+        async for batch in stream_scalars(db, query):
+            yield batch
+    
     @staticmethod
     async def retry(db: AsyncSession, run_id: UUID, user_id: UUID) -> Optional[WorkflowExecution]:
-        """Retry a failed/cancelled run by creating a new run with same parameters"""
+        """Retry a failed/cancelled run by creating a new run with same parameters (budgets apply as in create)"""
         original_run = await RunService.get_by_id(db, run_id)
         if not original_run or original_run.status not in [ExecutionStatus.FAILED, ExecutionStatus.CANCELLED]:
             return None
@@ -122,7 +362,7 @@ class RunService:
         new_run = WorkflowExecution(
             workflow_id=original_run.workflow_id,
             status=ExecutionStatus.PENDING,
-            started_at=datetime.now(timezone.utc),
+            started_at=datetime.utcnow(),
             input_data=original_run.input_data,
             metadata_={
                 "triggered_by": str(user_id),
@@ -135,7 +375,9 @@ class RunService:
             }
         )
         
+        await RunService._apply_budgets(db, new_run)
         db.add(new_run)
+        await AgentStatsService.run_started(db, new_run)
         await db.commit()
         await db.refresh(new_run)
         return new_run
@@ -0,0 +1,228 @@
+"""
+Sketch Service - Latency percentiles from mergeable sketches
+
+Durations of completed runs and steps are added to per-bucket sketches
+(one row per non-empty bin, see app.core.sketch) at minute, hour and day
+granularity as they finish, in the same transaction. Percentiles for any
+range merge the fewest covering buckets with one SUM ... GROUP BY bin_index.
+"""
+import math
+from datetime import datetime
+from typing import List, Optional, Sequence, Tuple
+from sqlalchemy import select, delete, func, literal, cast, or_, and_, Float, Integer, String
+from sqlalchemy.dialects.postgresql import insert as pg_insert, UUID as PG_UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.sketch import LatencySketch, bin_index, MIN_VALUE, GAMMA
+from app.models.latency_sketch import LatencySketchBin, SketchMetric, SketchScope
+from app.models.rollup import RollupGranularity
+from app.models.workflow_execution import WorkflowExecution, WorkflowStep, ExecutionStatus
+from app.services.rollup_service import (
+    PLACEHOLDER_ID,
+    UUID_PATTERN,
+    cover,
+    lock_days,
+    run_scopes,
+    to_utc_naive,
+    truncate,
+)
+
+KEY_COLUMNS = ["metric", "granularity", "scope_type", "scope_key", "bucket_start", "bin_index"]
+
+
+def elapsed_ms(started_at: Optional[datetime], completed_at: Optional[datetime], duration_seconds: Optional[int]) -> Optional[float]:
+    """Duration in ms from timestamps when both are known, else from the stored seconds"""
+    if started_at and completed_at:
+        return max((to_utc_naive(completed_at) - to_utc_naive(started_at)).total_seconds() * 1000, 0.0)
+    if duration_seconds is not None:
+        return duration_seconds * 1000.0
+    return None
+
+
+def step_scopes(step: WorkflowStep) -> List[Tuple[SketchScope, str]]:
+    """Scopes a step's duration is sketched under"""
+    scopes = [(SketchScope.STEP_TYPE, step.step_type)]
+    if step.tool_id:
+        scopes.append((SketchScope.TOOL, str(step.tool_id)))
+    return scopes
+
+
+class SketchService:
+    """Service for latency sketches"""
+
+    @staticmethod
+    async def record_run(db: AsyncSession, run: WorkflowExecution) -> None:
+        """Add a completed run's duration to its workflow, agent and project sketches (no commit)"""
+        if run.status != ExecutionStatus.COMPLETED or run.started_at is None:
+            return
+        duration = elapsed_ms(run.started_at, run.completed_at, run.duration_seconds)
+        if duration is None:
+            return
+        scopes = [(SketchScope(scope_type.value), str(scope_id)) for scope_type, scope_id in run_scopes(run)]
+        await SketchService._add(db, SketchMetric.RUN_DURATION, scopes, run.started_at, duration)
+
+    @staticmethod
+    async def record_step(db: AsyncSession, step: WorkflowStep) -> None:
+        """Add a completed step's duration to its step type and tool sketches (no commit)"""
+        if step.status != ExecutionStatus.COMPLETED or step.started_at is None:
+            return
+        duration = elapsed_ms(step.started_at, step.completed_at, step.duration_seconds)
+        if duration is None:
+            return
+        await SketchService._add(db, SketchMetric.STEP_DURATION, step_scopes(step), step.started_at, duration)
+
+    @staticmethod
+    async def get_sketch(
+        db: AsyncSession,
+        metric: SketchMetric,
+        scope_type: SketchScope,
+        scope_key: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> LatencySketch:
+        """
+        Merged sketch for [start, end)
+
+        Without a range, all day buckets are merged (the current day's bucket
+        is kept up to date, so this covers everything recorded).
+        """
+        if start is None or end is None:
+            segments = [LatencySketchBin.granularity == RollupGranularity.DAY]
+        else:
+            segments = [
+                and_(
+                    LatencySketchBin.granularity == granularity,
+                    LatencySketchBin.bucket_start >= lo,
+                    LatencySketchBin.bucket_start < hi,
+                )
+                for granularity, lo, hi in cover(start, end)
+            ]
+            if not segments:
+                return LatencySketch()
+
+        query = (
+            select(LatencySketchBin.bin_index, func.sum(LatencySketchBin.count))
+            .where(
+                LatencySketchBin.metric == metric,
+                LatencySketchBin.scope_type == scope_type,
+                LatencySketchBin.scope_key == scope_key,
+                or_(*segments),
+            )
+            .group_by(LatencySketchBin.bin_index)
+        )
+        result = await db.execute(query)
+        return LatencySketch.from_bins((index, int(count)) for index, count in result.all())
+
+    @staticmethod
+    async def rebuild(db: AsyncSession, start: datetime, end: datetime) -> int:
+        """
+        Recompute sketch bins for whole-day buckets in [start, end) from raw runs and steps
+
+        ``start``/``end`` must be day boundaries (see RollupService.rebuild).
+        Does not commit. Returns the number of bin rows written.
+        """
+        await db.execute(
+            delete(LatencySketchBin)
+            .where(LatencySketchBin.bucket_start >= start, LatencySketchBin.bucket_start < end)
+            .execution_options(synchronize_session=False)
+        )
+
+        written = 0
+        for query in SketchService._rebuild_queries(start, end):
+            stmt = pg_insert(LatencySketchBin).from_select(KEY_COLUMNS + ["count"], query)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=KEY_COLUMNS,
+                set_={"count": stmt.excluded.count},
+            )
+            result = await db.execute(stmt)
+            written += result.rowcount or 0
+        return written
+
+    # Internal helpers
+
+    @staticmethod
+    async def _add(
+        db: AsyncSession,
+        metric: SketchMetric,
+        scopes: Sequence[Tuple[SketchScope, str]],
+        started_at: datetime,
+        duration_ms: float,
+    ) -> None:
+        """Upsert-add one value into every granularity's bucket for each scope"""
+        await lock_days(db, [started_at])
+        index = bin_index(duration_ms)
+        rows = [
+            {
+                "metric": metric,
+                "granularity": granularity,
+                "scope_type": scope_type,
+                "scope_key": scope_key,
+                "bucket_start": truncate(started_at, granularity),
+                "bin_index": index,
+                "count": 1,
+            }
+            for granularity in RollupGranularity
+            for scope_type, scope_key in scopes
+        ]
+        stmt = pg_insert(LatencySketchBin).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=KEY_COLUMNS,
+            set_={"count": LatencySketchBin.count + stmt.excluded.count},
+        )
+        await db.execute(stmt)
+
+    @staticmethod
+    def _rebuild_queries(start: datetime, end: datetime):
+        """SELECTs producing sketch bin rows from raw runs and steps"""
+        def bin_expr(model):
+            # Same as app.core.sketch.bin_index / elapsed_ms, in SQL
+            ms = func.coalesce(
+                func.extract("epoch", model.completed_at - model.started_at) * 1000,
+                model.duration_seconds * 1000,
+            )
+            return cast(func.ceil(func.ln(func.greatest(cast(ms, Float), MIN_VALUE)) / math.log(GAMMA)), Integer)
+
+        def select_bins(model, metric, scope_type, scope_key, granularity, *filters):
+            bucket = func.date_trunc(granularity.value, model.started_at)
+            index = bin_expr(model)
+            return (
+                select(
+                    literal(metric, LatencySketchBin.__table__.c.metric.type),
+                    literal(granularity, LatencySketchBin.__table__.c.granularity.type),
+                    literal(scope_type, LatencySketchBin.__table__.c.scope_type.type),
+                    scope_key,
+                    bucket,
+                    index,
+                    func.count(),
+                )
+                .where(
+                    model.status == ExecutionStatus.COMPLETED,
+                    model.started_at >= start,
+                    model.started_at < end,
+                    or_(model.completed_at.isnot(None), model.duration_seconds.isnot(None)),
+                    *filters,
+                )
+                .group_by(scope_key, bucket, index)
+            )
+
+        def metadata_id(key):
+            # Normalized like the UUIDs parsed in rollup_service.run_scopes
+            text = run.metadata_[key].astext
+            return text, cast(cast(text, PG_UUID(as_uuid=True)), String), text.op("~")(UUID_PATTERN)
+
+        run = WorkflowExecution
+        step = WorkflowStep
+        _, agent_key, agent_valid = metadata_id('agent_id')
+        project_text, project_key, project_valid = metadata_id('project_id')
+        for granularity in RollupGranularity:
+            yield select_bins(run, SketchMetric.RUN_DURATION, SketchScope.WORKFLOW,
+                              cast(run.workflow_id, String), granularity)
+            yield select_bins(run, SketchMetric.RUN_DURATION, SketchScope.AGENT,
+                              agent_key, granularity, agent_valid)
+            yield select_bins(run, SketchMetric.RUN_DURATION, SketchScope.PROJECT,
+                              project_key, granularity, project_valid,
+                              project_text != str(PLACEHOLDER_ID))
+            yield select_bins(step, SketchMetric.STEP_DURATION, SketchScope.STEP_TYPE,
+                              step.step_type, granularity)
+            yield select_bins(step, SketchMetric.STEP_DURATION, SketchScope.TOOL,
+                              cast(step.tool_id, String), granularity, step.tool_id.isnot(None))
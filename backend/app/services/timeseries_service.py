@@ -0,0 +1,223 @@
+"""
+Timeseries Service - Chartable run metrics from rollups
+
+A series is read from the coarsest rollup granularity whose buckets tile
+the requested step (days for 1d steps, hours for 6h, minutes for 5m), and
+folded into steps in SQL with date_bin, so a request reads at most
+points x groups rows however many runs the range holds.
+"""
+import enum
+import re
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+from sqlalchemy import select, func, literal_column
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.agent import Agent
+from app.models.rollup import RunRollup, RollupGranularity, RollupScope
+from app.models.workflow import Workflow
+from app.services.rollup_service import BUCKET_SPANS, to_utc_naive
+
+# Steps are aligned to multiples of themselves since the epoch (UTC)
+EPOCH = datetime(1970, 1, 1)
+
+STEP_UNITS = {"m": timedelta(minutes=1), "h": timedelta(hours=1), "d": timedelta(days=1)}
+STEP_PATTERN = re.compile(r"^([1-9][0-9]*)([mhd])$")
+
+# Candidates for an automatic step, finest first
+AUTO_STEPS = [
+    timedelta(minutes=1),
+    timedelta(minutes=5),
+    timedelta(minutes=15),
+    timedelta(hours=1),
+    timedelta(hours=6),
+    timedelta(days=1),
+    timedelta(days=7),
+]
+
+STATUS_COLUMNS = {
+    "succeeded": "succeeded_runs",
+    "failed": "failed_runs",
+    "cancelled": "cancelled_runs",
+    "timeout": "timeout_runs",
+}
+
+
+class TimeseriesMetric(str, enum.Enum):
+    """Value plotted per step"""
+    RUNS = "runs"  # Finished runs
+    FAILURES = "failures"  # Failed runs
+    FAILURE_RATE = "failure_rate"  # Failed / finished runs
+    AVG_DURATION = "avg_duration_ms"  # Mean duration of completed runs
+
+
+class TimeseriesGroupBy(str, enum.Enum):
+    """Dimension a series is split by"""
+    WORKFLOW = "workflow"
+    AGENT = "agent"
+    ENV = "env"
+    STATUS = "status"
+
+
+# Rollup counters each metric is computed from
+METRIC_COLUMNS = {
+    TimeseriesMetric.RUNS: ["total_runs"],
+    TimeseriesMetric.FAILURES: ["failed_runs"],
+    TimeseriesMetric.FAILURE_RATE: ["failed_runs", "total_runs"],
+    TimeseriesMetric.AVG_DURATION: ["duration_sum_seconds", "duration_count"],
+}
+
+
+def parse_step(value: str) -> timedelta:
+    """Step such as ``5m``, ``1h`` or ``7d``; raises ValueError otherwise"""
+    match = STEP_PATTERN.match(value)
+    if not match:
+        raise ValueError(f"Invalid step {value!r}; use a number of minutes, hours or days such as 5m, 1h or 1d")
+    return int(match.group(1)) * STEP_UNITS[match.group(2)]
+
+
+def auto_step(start: datetime, end: datetime, max_points: int) -> timedelta:
+    """Finest candidate step giving at most ``max_points`` points over [start, end)"""
+    for step in AUTO_STEPS:
+        if point_count(start, end, step) <= max_points:
+            return step
+    return AUTO_STEPS[-1]
+
+
+def source_granularity(step: timedelta) -> RollupGranularity:
+    """Coarsest rollup granularity whose buckets tile ``step``"""
+    for granularity in (RollupGranularity.DAY, RollupGranularity.HOUR):
+        if step % BUCKET_SPANS[granularity] == timedelta(0):
+            return granularity
+    return RollupGranularity.MINUTE
+
+
+def align(start: datetime, end: datetime, step: timedelta) -> Tuple[datetime, datetime]:
+    """[start, end) widened outwards to step boundaries"""
+    start, end = to_utc_naive(start), to_utc_naive(end)
+    lo = EPOCH + (start - EPOCH) // step * step
+    hi = EPOCH + -(-(end - EPOCH) // step) * step
+    return lo, hi
+
+
+def point_count(start: datetime, end: datetime, step: timedelta) -> int:
+    """Number of steps in [start, end) once aligned"""
+    lo, hi = align(start, end, step)
+    return (hi - lo) // step
+
+
+def metric_value(metric: TimeseriesMetric, sums: Dict[str, int]) -> Optional[float]:
+    """A metric from its counters, None where it is undefined"""
+    if metric == TimeseriesMetric.FAILURE_RATE:
+        return sums["failed_runs"] / sums["total_runs"] if sums["total_runs"] else None
+    if metric == TimeseriesMetric.AVG_DURATION:
+        return round(sums["duration_sum_seconds"] * 1000 / sums["duration_count"]) if sums["duration_count"] else None
+    return sums[METRIC_COLUMNS[metric][0]]
+
+
+class TimeseriesService:
+    """Service for run metric time series"""
+
+    @staticmethod
+    async def get_series(
+        db: AsyncSession,
+        metric: TimeseriesMetric,
+        scope_type: RollupScope,
+        scope_id: UUID,
+        start: datetime,
+        end: datetime,
+        step: timedelta,
+        group_by: Optional[TimeseriesGroupBy] = None,
+    ) -> Dict[str, Any]:
+        """
+        Column-oriented series of ``metric`` per step over [start, end)
+
+        The range is widened to step boundaries. Returns the point starts as
+        ``timestamps`` and one ``values`` array per group, aligned with them;
+        missing points are 0 for counts and None for rates and averages.
+        Grouping by workflow or agent requires a project scope; grouping by
+        status only applies to the runs metric.
+        """
+        lo, hi = align(start, end, step)
+        granularity = source_granularity(step)
+        timestamps = [lo + i * step for i in range((hi - lo) // step)]
+
+        columns = list(STATUS_COLUMNS.values()) if group_by == TimeseriesGroupBy.STATUS else METRIC_COLUMNS[metric]
+        # Inline literals: with bind parameters the GROUP BY copy would not match the SELECT
+        point = func.date_bin(
+            literal_column(f"interval '{int(step.total_seconds())} seconds'"),
+            RunRollup.bucket_start,
+            literal_column(f"timestamp '{EPOCH:%Y-%m-%d}'"),
+        ).label("point")
+        group_cols, label_col = TimeseriesService._group_columns(group_by)
+        query = (
+            select(point, *group_cols, *(func.sum(getattr(RunRollup, c)).label(c) for c in columns))
+            .where(
+                RunRollup.granularity == granularity,
+                RunRollup.bucket_start >= lo,
+                RunRollup.bucket_start < hi,
+            )
+            .group_by(point, *group_cols)
+        )
+        if group_by in (TimeseriesGroupBy.WORKFLOW, TimeseriesGroupBy.AGENT):
+            model = Workflow if group_by == TimeseriesGroupBy.WORKFLOW else Agent
+            query = query.join(model, model.id == RunRollup.scope_id).where(
+                RunRollup.scope_type == RollupScope(group_by.value),
+                model.project_id == scope_id,
+            )
+        else:
+            query = query.where(RunRollup.scope_type == scope_type, RunRollup.scope_id == scope_id)
+
+        result = await db.execute(query)
+        index = {ts: i for i, ts in enumerate(timestamps)}
+        sums: Dict[Any, List[Dict[str, int]]] = {}
+        labels: Dict[Any, Optional[str]] = {}
+        for row in result.all():
+            key = row.key if group_cols else None
+            if key not in sums:
+                sums[key] = [dict.fromkeys(columns, 0) for _ in timestamps]
+                labels[key] = getattr(row, label_col) if label_col else None
+            point_sums = sums[key][index[row.point]]
+            for c in columns:
+                point_sums[c] += int(getattr(row, c))
+
+        if group_by == TimeseriesGroupBy.STATUS:
+            totals = sums.get(None) or [dict.fromkeys(columns, 0) for _ in timestamps]
+            series = [
+                {"key": name, "label": None, "values": [point_sums[column] for point_sums in totals]}
+                for name, column in STATUS_COLUMNS.items()
+            ]
+        else:
+            if not sums and group_by is None:
+                sums[None], labels[None] = [dict.fromkeys(columns, 0) for _ in timestamps], None
+            series = [
+                {
+                    "key": None if key is None else str(key),
+                    "label": labels[key],
+                    "values": [metric_value(metric, point_sums) for point_sums in points],
+                }
+                for key, points in sorted(sums.items(), key=lambda item: str(item[0]))
+            ]
+
+        return {
+            "granularity": granularity,
+            "start": lo,
+            "end": hi,
+            "step_seconds": int(step.total_seconds()),
+            "timestamps": timestamps,
+            "series": series,
+        }
+
+    # Internal helpers
+
+    @staticmethod
+    def _group_columns(group_by: Optional[TimeseriesGroupBy]) -> Tuple[list, Optional[str]]:
+        """GROUP BY columns (the first labelled ``key``) and the name of the label column"""
+        if group_by == TimeseriesGroupBy.ENV:
+            return [RunRollup.env.label("key")], None
+        if group_by == TimeseriesGroupBy.WORKFLOW:
+            return [RunRollup.scope_id.label("key"), Workflow.name.label("name")], "name"
+        if group_by == TimeseriesGroupBy.AGENT:
+            return [RunRollup.scope_id.label("key"), Agent.name.label("name")], "name"
+        return [], None
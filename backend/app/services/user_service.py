@@ -1,20 +1,191 @@
 """
 User service for user-related business logic
+
+Authenticated requests resolve their user to a Principal (the fields
+authorization needs, including the IDs of the projects they own) through
+two cache tiers: a per-process TTL LRU and a shared Redis entry. Changes
+bump users.auth_version and replace the Redis entry with a marker of the new
+version, which older loads can't overwrite; other processes' local copies
+expire within PRINCIPAL_CACHE_TTL_SECONDS.
+
+API keys are looked up by their HMAC digest (a unique index), and verified
+digests are remembered per process for API_KEY_CACHE_TTL_SECONDS.
 """
-from typing import Optional
+import hmac
+import json
+from typing import FrozenSet, List, NamedTuple, Optional
 from datetime import datetime
-from sqlalchemy import select
+import structlog
+from sqlalchemy import select, update, delete
 from sqlalchemy.ext.asyncio import AsyncSession
 from uuid import UUID
 
+from app.models.api_key import ApiKey
+from app.models.project import Project
 from app.models.user import User, UserRole
 from app.schemas.user import UserCreate, UserUpdate
-from app.core.security import get_password_hash, verify_password, generate_api_key, hash_api_key
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.redis import get_redis
+from app.core.security import (
+    get_password_hash_async,
+    verify_password_async,
+    generate_api_key,
+    hash_api_key,
+)
+
+logger = structlog.get_logger()
+
+
+class Principal(NamedTuple):
+    """What authorization needs to know about the current user"""
+    id: UUID
+    role: UserRole
+    is_active: bool
+    is_superuser: bool
+    token_epoch: int  # Tokens carrying an older epoch are revoked
+    version: int  # users.auth_version this was read at
+    project_ids: Optional[FrozenSet[UUID]]  # Owned projects; None if too many to carry
+
+    @property
+    def is_admin_or_owner(self) -> bool:
+        """Check if user is admin or owner"""
+        return self.role in [UserRole.ADMIN, UserRole.OWNER]
+
+    def owns(self, project_id: UUID) -> bool:
+        """
+        Whether the user is known to own a project
+
+        False only means "not known": a project created moments ago in
+        another process may be missing until the principal is reloaded.
+        """
+        return self.project_ids is not None and project_id in self.project_ids
+
+
+_principal_cache: TTLCache[UUID, Principal] = TTLCache(
+    maxsize=settings.PRINCIPAL_CACHE_MAX_ENTRIES,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
+
+# Digest of a verified API key -> its user's ID
+_api_key_cache: TTLCache[str, UUID] = TTLCache(
+    maxsize=settings.API_KEY_CACHE_MAX_ENTRIES,
+    ttl=settings.API_KEY_CACHE_TTL_SECONDS,
+)
+
+# Store a principal (or an invalidation marker) unless Redis holds a newer
+# version, so a load that raced with an invalidation can't resurrect old data
+STORE_PRINCIPAL_SCRIPT = """
+local current = redis.call('GET', KEYS[1])
+if current then
+    local ok, data = pcall(cjson.decode, current)
+    if ok and data['v'] and tonumber(data['v']) > tonumber(ARGV[2]) then
+        return 0
+    end
+end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[3])
+return 1
+"""
+
+
+def principal_key(user_id: UUID) -> str:
+    """Redis key of a user's cached principal"""
+    return f"principal:{user_id}"
+
+
+def dump_principal(principal: Principal) -> str:
+    """Principal as stored in Redis"""
+    return json.dumps({
+        "v": principal.version,
+        "role": principal.role.value,
+        "is_active": principal.is_active,
+        "is_superuser": principal.is_superuser,
+        "token_epoch": principal.token_epoch,
+        "projects": None if principal.project_ids is None else sorted(str(p) for p in principal.project_ids),
+    })
+
+
+def load_principal(user_id: UUID, value: str) -> Optional[Principal]:
+    """Principal stored in Redis, or None for an invalidation marker"""
+    data = json.loads(value)
+    if "role" not in data:
+        return None
+    projects = data.get("projects")
+    return Principal(
+        id=user_id,
+        role=UserRole(data["role"]),
+        is_active=data["is_active"],
+        is_superuser=data["is_superuser"],
+        token_epoch=data.get("token_epoch", 0),
+        version=data.get("v", 0),
+        project_ids=None if projects is None else frozenset(UUID(p) for p in projects),
+    )
 
 
 class UserService:
     """Service for user operations"""
     
+    @staticmethod
+    async def get_principal(db: AsyncSession, user_id: UUID) -> Optional[Principal]:
+        """
+        Principal of a user, from the process cache, then Redis, then the database
+
+        Unknown users are not cached. Redis being unavailable only costs the
+        database reads.
+        """
+        principal = _principal_cache.get(user_id)
+        if principal is not None:
+            return principal
+
+        key = principal_key(user_id)
+        try:
+            cached = await get_redis().get(key)
+        except Exception as e:
+            logger.warning("principal_cache_unavailable", error=str(e))
+            cached = None
+        principal = load_principal(user_id, cached) if cached is not None else None
+        if principal is None:
+            principal = await UserService._load_principal(db, user_id)
+            if principal is None:
+                return None
+            await UserService._store_principal(key, dump_principal(principal), principal.version)
+
+        _principal_cache.set(user_id, principal)
+        return principal
+    
+    @staticmethod
+    def peek_principal(user_id: UUID) -> Optional[Principal]:
+        """A user's principal if this process has it cached (no I/O)"""
+        return _principal_cache.get(user_id)
+    
+    @staticmethod
+    def peek_api_key_user(api_key: str) -> Optional[UUID]:
+        """User of an API key this process has verified recently (no I/O)"""
+        return _api_key_cache.get(hash_api_key(api_key))
+    
+    @staticmethod
+    async def bump_auth_version(db: AsyncSession, user_id: UUID) -> int:
+        """
+        Mark a user's cached principal outdated, in the caller's transaction
+
+        Call when the user's role, status, tokens or owned projects change,
+        and pass the returned version to invalidate_principal after commit.
+        """
+        result = await db.execute(
+            update(User)
+            .where(User.id == user_id)
+            .values(auth_version=User.auth_version + 1)
+            .returning(User.auth_version)
+        )
+        return result.scalar_one()
+    
+    @staticmethod
+    async def invalidate_principal(user_id: UUID, version: int) -> None:
+        """Drop a user's cached principal once ``version`` is committed"""
+        _principal_cache.delete(user_id)
+        # A marker rather than a delete, so older versions can't be stored again
+        await UserService._store_principal(principal_key(user_id), json.dumps({"v": version}), version)
+    
     @staticmethod
     async def get_by_id(db: AsyncSession, user_id: UUID) -> Optional[User]:
         """Get user by ID"""
@@ -28,17 +199,25 @@ class UserService:
         return result.scalar_one_or_none()
     
     @staticmethod
-    async def get_by_api_key(db: AsyncSession, api_key: str) -> Optional[User]:
-        """Get user by API key"""
-        # Hash the provided API key and compare with stored hash
-        result = await db.execute(select(User).where(User.api_key == api_key))
-        return result.scalar_one_or_none()
+    async def get_principal_by_api_key(db: AsyncSession, api_key: str) -> Optional[Principal]:
+        """Principal of an API key's user, or None for unknown keys"""
+        key_hash = hash_api_key(api_key)
+        user_id = _api_key_cache.get(key_hash)
+        if user_id is None:
+            row = (await db.execute(
+                select(ApiKey.key_hash, ApiKey.user_id).where(ApiKey.key_hash == key_hash)
+            )).one_or_none()
+            if row is None or not hmac.compare_digest(row.key_hash, key_hash):
+                return None
+            user_id = row.user_id
+            _api_key_cache.set(key_hash, user_id)
+        return await UserService.get_principal(db, user_id)
     
     @staticmethod
     async def create(db: AsyncSession, user_data: UserCreate) -> User:
         """Create a new user"""
         # Hash password
-        password_hash = get_password_hash(user_data.password)
+        password_hash = await get_password_hash_async(user_data.password)
         
         # Create user
         user = User(
@@ -61,20 +240,62 @@ class UserService:
         user: User,
         user_data: UserUpdate,
     ) -> User:
-        """Update user"""
+        """Update user (and drop its cached principal); a new password revokes its tokens"""
         update_data = user_data.model_dump(exclude_unset=True)
         
         # Hash password if being updated
         if "password" in update_data:
-            update_data["password_hash"] = get_password_hash(update_data.pop("password"))
+            update_data["password_hash"] = await get_password_hash_async(update_data.pop("password"))
+            update_data["token_epoch"] = User.token_epoch + 1
         
         for field, value in update_data.items():
             setattr(user, field, value)
+        version = await UserService.bump_auth_version(db, user.id)
+        
+        await db.commit()
+        await UserService.invalidate_principal(user.id, version)
+        await db.refresh(user)
+        return user
+    
+    @staticmethod
+    async def set_access(
+        db: AsyncSession,
+        user: User,
+        role: Optional[UserRole] = None,
+        is_active: Optional[bool] = None,
+        is_superuser: Optional[bool] = None,
+    ) -> User:
+        """
+        Change a user's role or status, effective from their next request
+        
+        Deactivating also revokes the user's tokens, so reactivating doesn't
+        bring them back.
+        """
+        if role is not None:
+            user.role = role
+        if is_active is not None:
+            user.is_active = is_active
+            if not is_active:
+                user.token_epoch = User.token_epoch + 1
+        if is_superuser is not None:
+            user.is_superuser = is_superuser
+        version = await UserService.bump_auth_version(db, user.id)
         
         await db.commit()
+        await UserService.invalidate_principal(user.id, version)
         await db.refresh(user)
         return user
     
+    @staticmethod
+    async def revoke_tokens(db: AsyncSession, user_id: UUID) -> None:
+        """Revoke every token issued to a user so far (log out everywhere)"""
+        await db.execute(
+            update(User).where(User.id == user_id).values(token_epoch=User.token_epoch + 1)
+        )
+        version = await UserService.bump_auth_version(db, user_id)
+        await db.commit()
+        await UserService.invalidate_principal(user_id, version)
+    
     @staticmethod
     async def authenticate(
         db: AsyncSession,
@@ -85,7 +306,7 @@ class UserService:
         user = await UserService.get_by_email(db, email)
         if not user:
             return None
-        if not verify_password(password, user.password_hash):
+        if not await verify_password_async(password, user.password_hash):
             return None
         if not user.is_active:
             return None
@@ -97,27 +318,82 @@ class UserService:
         return user
     
     @staticmethod
-    async def create_api_key(db: AsyncSession, user: User) -> tuple[str, User]:
-        """Generate API key for user"""
-        # Generate new API key
-        api_key = generate_api_key()
-        
-        # Store API key and its hash
-        user.api_key = api_key
-        user.api_key_hash = hash_api_key(api_key)
+    async def get_api_keys(db: AsyncSession, user_id: UUID) -> List[ApiKey]:
+        """A user's API keys, oldest first"""
+        result = await db.execute(
+            select(ApiKey).where(ApiKey.user_id == user_id).order_by(ApiKey.created_at)
+        )
+        return list(result.scalars().all())
+    
+    @staticmethod
+    async def get_api_key(db: AsyncSession, user_id: UUID, key_id: UUID) -> Optional[ApiKey]:
+        """One of a user's API keys"""
+        result = await db.execute(
+            select(ApiKey).where(ApiKey.id == key_id, ApiKey.user_id == user_id)
+        )
+        return result.scalar_one_or_none()
+    
+    @staticmethod
+    async def create_api_key(db: AsyncSession, user_id: UUID, name: str) -> tuple[str, ApiKey]:
+        """Generate a named API key for a user; returns the key (never stored) and its record"""
+        api_key, prefix = generate_api_key()
+        record = ApiKey(user_id=user_id, name=name, prefix=prefix, key_hash=hash_api_key(api_key))
         
+        db.add(record)
         await db.commit()
-        await db.refresh(user)
+        await db.refresh(record)
         
-        return api_key, user
+        return api_key, record
     
     @staticmethod
-    async def revoke_api_key(db: AsyncSession, user: User) -> User:
-        """Revoke user's API key"""
-        user.api_key = None
-        user.api_key_hash = None
-        
+    async def revoke_api_key(db: AsyncSession, record: ApiKey) -> None:
+        """Revoke an API key (other processes may accept it for up to API_KEY_CACHE_TTL_SECONDS)"""
+        _api_key_cache.delete(record.key_hash)
+        await db.delete(record)
         await db.commit()
-        await db.refresh(user)
-        
-        return user
+    
+    @staticmethod
+    async def revoke_api_keys(db: AsyncSession, user_id: UUID) -> None:
+        """Revoke all of a user's API keys"""
+        result = await db.execute(
+            delete(ApiKey).where(ApiKey.user_id == user_id).returning(ApiKey.key_hash)
+        )
+        for key_hash in result.scalars().all():
+            _api_key_cache.delete(key_hash)
+        await db.commit()
+    
+    # Internal helpers
+    
+    @staticmethod
+    async def _load_principal(db: AsyncSession, user_id: UUID) -> Optional[Principal]:
+        """Principal of a user from the database"""
+        user = await UserService.get_by_id(db, user_id)
+        if user is None:
+            return None
+        limit = settings.PRINCIPAL_MAX_PROJECTS
+        result = await db.execute(
+            select(Project.id)
+            .where(Project.owner_id == user_id, Project.is_deleting.is_(False))
+            .limit(limit + 1)
+        )
+        project_ids = frozenset(result.scalars().all())
+        return Principal(
+            id=user.id,
+            role=user.role,
+            is_active=user.is_active,
+            is_superuser=user.is_superuser,
+            token_epoch=user.token_epoch,
+            version=user.auth_version,
+            project_ids=project_ids if len(project_ids) <= limit else None,
+        )
+    
+    @staticmethod
+    async def _store_principal(key: str, value: str, version: int) -> None:
+        """Write a principal or marker to Redis unless a newer version is there"""
+        try:
+            await get_redis().eval(
+                STORE_PRINCIPAL_SCRIPT, 1, key, value, version, settings.PRINCIPAL_CACHE_REDIS_TTL_SECONDS
+            )
+        except Exception as e:
+            # Stale entries still expire after PRINCIPAL_CACHE_REDIS_TTL_SECONDS
+            logger.warning("principal_cache_unavailable", error=str(e))
@@ -185,26 +185,6 @@ class WorkflowService:
         await db.refresh(workflow)
         return workflow
     
-    @staticmethod
-    async def delete(db: AsyncSession, workflow_id: UUID) -> bool:
-        """
-        Delete a workflow
-        
-        Args:
-            db: Database session
-            workflow_id: ID of workflow to delete
-            
-        Returns:
-            True if deleted, False if not found
-        """
-        workflow = await WorkflowService.get_by_id(db, workflow_id)
-        if not workflow:
-            return False
-        
-        await db.delete(workflow)
-        await db.commit()
-        return True
-    
     @staticmethod
     async def create_version(
         db: AsyncSession,
@@ -0,0 +1,45 @@
+"""
+Export runs and steps to the Parquet archive
+
+Meant to run daily (e.g. from cron after midnight UTC). Each day is
+rewritten as a whole, so re-running it picks up late updates:
+
+    python scripts/archive_runs.py --days 2
+    python scripts/archive_runs.py --date 2026-05-01
+
+Requires the duckdb package. Files go to ARCHIVE_PATH.
+"""
+import argparse
+import asyncio
+import sys
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.db.session import AsyncSessionLocal
+from app.services.archive_service import ArchiveService
+
+
+async def archive(days: list[date]) -> None:
+    """Export each day in turn"""
+    async with AsyncSessionLocal() as db:
+        for day in days:
+            counts = await ArchiveService.export_day(db, day)
+            print(f"{day}: {counts['runs']} runs, {counts['steps']} steps")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=1, help="Days before today to export")
+    parser.add_argument("--date", type=date.fromisoformat, help="Export only this day (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    today = datetime.utcnow().date()
+    days = [args.date] if args.date else [today - timedelta(days=n) for n in range(args.days, 0, -1)]
+    asyncio.run(archive(days))
+
+
+if __name__ == "__main__":
+    main()
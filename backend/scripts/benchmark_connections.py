@@ -0,0 +1,138 @@
+"""
+Connection-count benchmark: how many API workers fit under max_connections
+
+Capacity mode (no database needed) prints the worker budget for direct
+connections vs. a transaction-mode pooler:
+
+    python scripts/benchmark_connections.py --max-connections 100
+
+Measure mode simulates N API workers (one engine each, configured exactly
+like app.db.session), drives concurrent transactions through them and
+samples pg_stat_activity for the peak number of server connections:
+
+    python scripts/benchmark_connections.py --measure --workers 8 --concurrency 20
+
+Run measure mode once with DATABASE_URL pointing at Postgres and once at
+PgBouncer (DATABASE_PGBOUNCER=True, DATABASE_POOL_MODE=null) to compare.
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core.config import settings
+from app.db.session import connections_per_process, engine_options
+
+
+def print_capacity(args: argparse.Namespace) -> None:
+    """Print how many workers fit for the configured pool"""
+    per_process = connections_per_process() or args.concurrency
+    budget = args.max_connections - args.reserved
+
+    print("=== Connection budget ===")
+    print(f"max_connections:            {args.max_connections}")
+    print(f"reserved (admin/replicas):  {args.reserved}")
+    print(f"pool mode:                  {settings.DATABASE_POOL_MODE}")
+    print(f"connections per worker:     {per_process}")
+    print()
+
+    direct_workers = budget // per_process if per_process else 0
+    print(f"Direct to Postgres:         {direct_workers} workers "
+          f"({direct_workers * per_process}/{budget} server connections)")
+
+    # Behind a transaction pooler the server side is fixed at the pooler's pool
+    # size; workers are only limited by how many clients the pooler accepts.
+    pooler_workers = args.pooler_max_client_conn // per_process if per_process else 0
+    print(f"Behind transaction pooler:  {pooler_workers} workers "
+          f"({args.pooler_pool_size}/{budget} server connections, "
+          f"{pooler_workers * per_process}/{args.pooler_max_client_conn} client connections)")
+    if args.pooler_pool_size > budget:
+        print("⚠  pooler pool size exceeds the server connection budget")
+
+
+async def _worker_load(engine, concurrency: int, iterations: int, hold_ms: int) -> int:
+    """Run `concurrency` loops of short transactions against one engine"""
+    async def loop() -> int:
+        done = 0
+        for _ in range(iterations):
+            async with engine.begin() as conn:
+                await conn.execute(text("SELECT pg_sleep(:s)"), {"s": hold_ms / 1000})
+            done += 1
+        return done
+
+    results = await asyncio.gather(*(loop() for _ in range(concurrency)))
+    return sum(results)
+
+
+async def measure(args: argparse.Namespace) -> None:
+    """Drive load through N simulated workers and sample server connections"""
+    options = engine_options()
+    options["echo"] = False
+    engines = [create_async_engine(settings.DATABASE_URL, **options) for _ in range(args.workers)]
+    monitor = create_async_engine(args.monitor_url or settings.DATABASE_URL, **options)
+
+    peak = 0
+    stop = asyncio.Event()
+
+    async def sample() -> None:
+        nonlocal peak
+        while not stop.is_set():
+            async with monitor.connect() as conn:
+                count = (await conn.execute(text(
+                    "SELECT count(*) FROM pg_stat_activity WHERE datname = current_database()"
+                ))).scalar_one()
+            peak = max(peak, count)
+            await asyncio.sleep(0.05)
+
+    sampler = asyncio.create_task(sample())
+    started = time.perf_counter()
+    try:
+        totals = await asyncio.gather(*(
+            _worker_load(e, args.concurrency, args.iterations, args.hold_ms) for e in engines
+        ))
+    finally:
+        stop.set()
+        await sampler
+        for e in engines:
+            await e.dispose()
+        await monitor.dispose()
+    elapsed = time.perf_counter() - started
+
+    print("=== Measured ===")
+    print(f"workers x concurrency:      {args.workers} x {args.concurrency}")
+    print(f"pool mode / pgbouncer:      {settings.DATABASE_POOL_MODE} / {settings.DATABASE_PGBOUNCER}")
+    print(f"transactions:               {sum(totals)} in {elapsed:.2f}s "
+          f"({sum(totals) / elapsed:.0f} tx/s)")
+    print(f"peak server connections:    {peak}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--max-connections", type=int, default=100, help="Postgres max_connections")
+    parser.add_argument("--reserved", type=int, default=10, help="Connections kept for admin/replication")
+    parser.add_argument("--concurrency", type=int, default=20,
+                        help="Concurrent DB operations per worker (bounds NullPool connections)")
+    parser.add_argument("--pooler-pool-size", type=int, default=40, help="PgBouncer default_pool_size")
+    parser.add_argument("--pooler-max-client-conn", type=int, default=5000, help="PgBouncer max_client_conn")
+    parser.add_argument("--measure", action="store_true", help="Run live load and sample pg_stat_activity")
+    parser.add_argument("--workers", type=int, default=4, help="Simulated API workers (measure mode)")
+    parser.add_argument("--iterations", type=int, default=50, help="Transactions per loop (measure mode)")
+    parser.add_argument("--hold-ms", type=int, default=20, help="Time each transaction holds a connection")
+    parser.add_argument("--monitor-url", default="", help="Direct Postgres URL for sampling (default: DATABASE_URL)")
+    args = parser.parse_args()
+
+    print_capacity(args)
+    if args.measure:
+        print()
+        asyncio.run(measure(args))
+
+
+if __name__ == "__main__":
+    main()
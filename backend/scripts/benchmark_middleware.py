@@ -0,0 +1,128 @@
+"""
+Microbenchmark: per-request cost of middleware
+
+Serves a small app in-process (no database or Redis needed) with a health
+route and a list route returning ``--items`` validated records, wrapped in
+``--layers`` pass-through middlewares that each set one response header,
+written either as BaseHTTPMiddleware (how RateLimitMiddleware used to be)
+or as plain ASGI (how app.middleware is written now):
+
+    python scripts/benchmark_middleware.py --requests 5000 --layers 2
+
+Requests are fed straight to the ASGI app, so the numbers are the app's own
+cost without any client or network overhead.
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from fastapi import FastAPI
+from pydantic import BaseModel
+from starlette.datastructures import MutableHeaders
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class Item(BaseModel):
+    id: int
+    name: str
+    status: str
+
+
+class BaseHTTPHeader(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        response = await call_next(request)
+        response.headers["X-Bench"] = "1"
+        return response
+
+
+class ASGIHeader:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_header(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)["X-Bench"] = "1"
+            await send(message)
+
+        await self.app(scope, receive, send_with_header)
+
+
+def build_app(middleware, layers: int, items: int) -> FastAPI:
+    app = FastAPI()
+    records = [Item(id=i, name=f"item-{i}", status="active") for i in range(items)]
+
+    @app.get("/health")
+    async def health() -> dict:
+        return {"status": "healthy"}
+
+    @app.get("/items", response_model=List[Item])
+    async def list_items() -> List[Item]:
+        return records
+
+    for _ in range(layers if middleware else 0):
+        app.add_middleware(middleware)
+    return app
+
+
+async def request(app: ASGIApp, path: str) -> int:
+    """One GET through the ASGI interface; returns the status"""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"",
+        "root_path": "", "headers": [(b"host", b"bench")], "client": ("127.0.0.1", 1234),
+        "server": ("bench", 80),
+    }
+    status = 0
+
+    async def receive() -> Message:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: Message) -> None:
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
+
+async def requests_per_second(app: ASGIApp, path: str, requests: int) -> float:
+    for _ in range(min(requests // 10, 200)):
+        assert await request(app, path) == 200
+    started = time.perf_counter()
+    for _ in range(requests):
+        await request(app, path)
+    return requests / (time.perf_counter() - started)
+
+
+async def main(args: argparse.Namespace) -> None:
+    variants = [("none", None), ("BaseHTTPMiddleware", BaseHTTPHeader), ("ASGI", ASGIHeader)]
+    print(f"{args.layers} middleware layers, {args.items} items per list response")
+    print(f"{'path':<8} {'middleware':<20} {'req/s':>9} {'us/req':>8} {'overhead us':>12}")
+    for path in ("/health", "/items"):
+        baseline = None
+        for name, middleware in variants:
+            rps = await requests_per_second(build_app(middleware, args.layers, args.items), path, args.requests)
+            us = 1e6 / rps
+            baseline = us if baseline is None else baseline
+            print(f"{path:<8} {name:<20} {rps:>9.0f} {us:>8.1f} {us - baseline:>12.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000, help="Requests per measurement")
+    parser.add_argument("--layers", type=int, default=2, help="Middlewares stacked on the app")
+    parser.add_argument("--items", type=int, default=50, help="Records in the list response")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,114 @@
+"""
+Login-storm benchmark: latency of other endpoints while passwords are hashed
+
+Serves a two-route app in-process (no database needed): ``/login`` verifies
+a bcrypt password and ``/ping`` does nothing. While ``--logins`` concurrent
+clients hammer /login, one client measures /ping. It runs twice: with
+bcrypt called inline on the event loop (how logins used to work) and on the
+hashing pool (``verify_password_async``):
+
+    python scripts/benchmark_password_hashing.py --logins 32 --seconds 5
+
+With the pool, /ping latency should stay close to the idle baseline; inline,
+every ping waits behind whole bcrypt calls.
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import httpx
+from fastapi import FastAPI, HTTPException
+
+from app.core.config import settings
+from app.core.security import PasswordHashBusy, get_password_hash, verify_password, verify_password_async
+
+PASSWORD = "benchmark-password"
+
+
+def build_app(inline: bool) -> FastAPI:
+    """App with a login route hashing inline or on the pool"""
+    app = FastAPI()
+    password_hash = get_password_hash(PASSWORD)
+
+    @app.post("/login")
+    async def login() -> dict:
+        if inline:
+            ok = verify_password(PASSWORD, password_hash)
+        else:
+            try:
+                ok = await verify_password_async(PASSWORD, password_hash)
+            except PasswordHashBusy:
+                raise HTTPException(status_code=503)
+        return {"ok": ok}
+
+    @app.get("/ping")
+    async def ping() -> dict:
+        return {}
+
+    return app
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+async def run(inline: bool, logins: int, seconds: float) -> Dict[str, float]:
+    """Storm /login for ``seconds`` while sampling /ping latency"""
+    transport = httpx.ASGITransport(app=build_app(inline))
+    stop = time.perf_counter() + seconds
+    counts = {"ok": 0, "busy": 0}
+    pings: List[float] = []
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def storm() -> None:
+            while time.perf_counter() < stop:
+                response = await client.post("/login")
+                counts["ok" if response.status_code == 200 else "busy"] += 1
+
+        async def probe() -> None:
+            # Latency counts from when each ping was due, so event loop stalls show
+            due = time.perf_counter()
+            while due < stop:
+                await asyncio.sleep(max(due - time.perf_counter(), 0))
+                await client.get("/ping")
+                pings.append((time.perf_counter() - due) * 1000)
+                due = max(due + 0.01, time.perf_counter())
+
+        await asyncio.gather(probe(), *(storm() for _ in range(logins)))
+
+    return {
+        "logins_per_s": counts["ok"] / seconds,
+        "busy": counts["busy"],
+        "ping_p50": statistics.median(pings),
+        "ping_p99": percentile(pings, 0.99),
+        "ping_max": max(pings),
+        "pings": len(pings),
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    print(f"hashing pool: {settings.PASSWORD_HASH_WORKERS} workers, "
+          f"{settings.PASSWORD_HASH_MAX_WAITING} waiting max; {args.logins} concurrent logins")
+    idle = await run(inline=False, logins=0, seconds=1)
+    print(f"{'mode':<8} {'logins/s':>9} {'503s':>6} {'pings':>6} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    print(f"{'idle':<8} {'-':>9} {'-':>6} {idle['pings']:>6} "
+          f"{idle['ping_p50']:>8.1f} {idle['ping_p99']:>8.1f} {idle['ping_max']:>8.1f}")
+    for name, inline in (("inline", True), ("pool", False)):
+        r = await run(inline, args.logins, args.seconds)
+        print(f"{name:<8} {r['logins_per_s']:>9.1f} {r['busy']:>6} {r['pings']:>6} "
+              f"{r['ping_p50']:>8.1f} {r['ping_p99']:>8.1f} {r['ping_max']:>8.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=32, help="Concurrent clients calling /login")
+    parser.add_argument("--seconds", type=float, default=5, help="Duration of each run")
+    asyncio.run(main(parser.parse_args()))
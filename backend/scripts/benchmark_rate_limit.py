@@ -0,0 +1,84 @@
+"""
+Rate limiter check under concurrent load (needs Redis at REDIS_URL)
+
+Many concurrent clients hit one bucket for a few seconds; the number of
+allowed requests must be exactly what GCRA permits: the burst plus one per
+interval elapsed (give or take the last one). The same load is run through
+the previous GET / SETEX / INCR counter, which admits more than its limit
+because concurrent requests all read the count before any increments it:
+
+    python scripts/benchmark_rate_limit.py --clients 50 --seconds 5 --rate 600 --burst 20
+"""
+import argparse
+import asyncio
+import sys
+import time
+import uuid
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.rate_limit import RedisRateLimiter
+from app.core.redis import close_redis, get_redis
+
+
+async def hammer(check, clients: int, seconds: float) -> tuple[int, int, float]:
+    """Call ``check`` from ``clients`` tasks; returns allowed, total calls and elapsed seconds"""
+    counts = {"allowed": 0, "total": 0}
+    started = time.perf_counter()
+    stop = started + seconds
+
+    async def client() -> None:
+        while time.perf_counter() < stop:
+            counts["allowed"] += await check()
+            counts["total"] += 1
+
+    await asyncio.gather(*(client() for _ in range(clients)))
+    return counts["allowed"], counts["total"], time.perf_counter() - started
+
+
+async def main(args: argparse.Namespace) -> None:
+    redis = get_redis()
+    key = f"bench:{uuid.uuid4()}"
+
+    limiter = RedisRateLimiter(args.rate, args.burst, prefix="bench_rate_limit")
+
+    async def gcra() -> bool:
+        return (await limiter.check(key)).allowed
+
+    allowed, total, elapsed = await hammer(gcra, args.clients, args.seconds)
+    expected = args.burst + int(elapsed * args.rate / 60)
+    print(f"{'limiter':<10} {'checks/s':>9} {'allowed':>8} {'expected':>9}")
+    print(f"{'gcra':<10} {total / elapsed:>9.0f} {allowed:>8} {expected:>9}")
+    ok = expected - 1 <= allowed <= expected + 1
+
+    # The middleware before GCRA: a fixed one-minute window of ``rate`` requests
+    window_limit = args.rate
+
+    async def counter() -> bool:
+        current = await redis.get(key)
+        if current is None:
+            await redis.setex(key, 60, 1)
+            return True
+        if int(current) >= window_limit:
+            return False
+        await redis.incr(key)
+        return True
+
+    allowed, total, elapsed = await hammer(counter, args.clients, args.seconds)
+    print(f"{'counter':<10} {total / elapsed:>9.0f} {allowed:>8} {window_limit:>9}")
+
+    await redis.delete(key, f"bench_rate_limit:{key}")
+    await close_redis()
+    if not ok:
+        sys.exit("gcra admitted a different number of requests than its rate allows")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=50, help="Concurrent clients")
+    parser.add_argument("--seconds", type=float, default=5, help="Duration of each run")
+    parser.add_argument("--rate", type=int, default=600, help="Requests per minute")
+    parser.add_argument("--burst", type=int, default=20, help="Bucket capacity")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,62 @@
+"""
+Re-aggregate run rollups from raw runs
+
+Meant to run periodically (e.g. hourly from cron) to fold late or
+out-of-band run updates into the rollups:
+
+    python scripts/rebuild_rollups.py --days 2
+
+With --agent-stats, every agent's health counters are recomputed from its
+run and step history as well (a full scan; for repairs only).
+"""
+import argparse
+import asyncio
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import select
+
+from app.db.session import AsyncSessionLocal
+from app.models.agent import Agent
+from app.services.agent_stats_service import AgentStatsService
+from app.services.rollup_service import RollupService
+
+
+async def rebuild(days: int) -> None:
+    """Rebuild the last `days` days (plus today), one day per transaction"""
+    end = datetime.utcnow()
+    day = (end - timedelta(days=days)).replace(hour=0, minute=0, second=0, microsecond=0)
+    async with AsyncSessionLocal() as db:
+        while day < end:
+            rows = await RollupService.rebuild(db, day, day + timedelta(days=1))
+            await db.commit()
+            print(f"{day.date()}: {rows} rollup rows")
+            day += timedelta(days=1)
+
+
+async def rebuild_agent_stats() -> None:
+    """Recompute health counters for every agent, one agent per transaction"""
+    async with AsyncSessionLocal() as db:
+        agent_ids = (await db.execute(select(Agent.id))).scalars().all()
+        for agent_id in agent_ids:
+            await AgentStatsService.rebuild(db, agent_id)
+            await db.commit()
+        print(f"agent stats: {len(agent_ids)} agents")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=1, help="Days before today to rebuild")
+    parser.add_argument("--agent-stats", action="store_true", help="Also recompute agent health counters")
+    args = parser.parse_args()
+    asyncio.run(rebuild(args.days))
+    if args.agent_stats:
+        asyncio.run(rebuild_agent_stats())
+
+
+if __name__ == "__main__":
+    main()
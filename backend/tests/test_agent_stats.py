@@ -0,0 +1,30 @@
+"""
+Tests for agent health derivation
+"""
+from datetime import datetime, timedelta
+
+from app.core.config import settings
+from app.models.agent_stats import AgentStats
+from app.services.agent_stats_service import derive_health
+
+
+def test_health_from_error_rate():
+    """Recent error rate maps onto healthy / degraded / unhealthy"""
+    assert derive_health(None) == "healthy"
+    assert derive_health(AgentStats(error_rate_ewma=0.0)) == "healthy"
+    assert derive_health(AgentStats(error_rate_ewma=settings.AGENT_DEGRADED_ERROR_RATE)) == "degraded"
+    assert derive_health(AgentStats(error_rate_ewma=settings.AGENT_UNHEALTHY_ERROR_RATE)) == "unhealthy"
+
+
+def test_reported_health_only_while_fresh():
+    """A worse reported health wins until the heartbeat goes stale"""
+    now = datetime(2026, 10, 18, 12)
+    stats = AgentStats(error_rate_ewma=0.0, reported_health="unhealthy", last_heartbeat=now)
+    assert derive_health(stats, now) == "unhealthy"
+
+    stale = now + timedelta(seconds=settings.AGENT_HEARTBEAT_TIMEOUT_SECONDS + 1)
+    assert derive_health(stats, stale) == "healthy"
+
+    stats.error_rate_ewma = settings.AGENT_UNHEALTHY_ERROR_RATE
+    stats.reported_health = "healthy"
+    assert derive_health(stats, now) == "unhealthy"
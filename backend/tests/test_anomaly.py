@@ -0,0 +1,48 @@
+"""
+Tests for the EWMA anomaly detector
+"""
+import math
+import random
+
+from app.core.anomaly import FAILURE_RATE, LATENCY, AnomalyDetector, DetectorConfig
+
+
+def test_failure_spike_opens_and_clears():
+    """A sustained jump in failures breaches once and clears after recovery"""
+    rng = random.Random(7)
+    detector = AnomalyDetector(DetectorConfig(), max_series=10)
+    transitions = []
+    for i in range(1500):
+        failure_rate = 0.6 if 500 <= i < 700 else 0.05
+        transitions += [(i, t.signal, t.breached) for t in detector.observe("wf", rng.random() < failure_rate)]
+    assert [(signal, breached) for _, signal, breached in transitions] == [(FAILURE_RATE, True), (FAILURE_RATE, False)]
+    assert 500 <= transitions[0][0] < 550
+    assert transitions[1][0] >= 700
+
+
+def test_latency_shift_breaches_and_steady_noise_does_not():
+    """Quadrupled durations breach; lognormal noise around the baseline never does"""
+    rng = random.Random(3)
+    detector = AnomalyDetector(DetectorConfig(), max_series=10)
+    shifted = []
+    for i in range(1000):
+        duration = rng.lognormvariate(math.log(10), 0.3) * (4 if i >= 800 else 1)
+        for t in detector.observe("slow", False, duration):
+            shifted.append((i, t.signal, t.breached))
+    assert shifted and shifted[0][1:] == (LATENCY, True) and shifted[0][0] >= 800
+
+    for i in range(5000):
+        assert not detector.observe("steady", rng.random() < 0.1, rng.lognormvariate(2, 0.5))
+
+
+def test_series_are_bounded_and_eviction_clears_nothing():
+    """The least recently seen series is dropped without reporting its breach as cleared"""
+    detector = AnomalyDetector(DetectorConfig(warmup=5), max_series=2)
+    for _ in range(100):
+        detector.observe("a", False)
+    for _ in range(20):
+        detector.observe("a", True)
+    detector.observe("b", False)
+    evicted = detector.observe("c", False)
+    assert len(detector) == 2
+    assert evicted == []
@@ -0,0 +1,21 @@
+"""
+Tests for API key format and digests
+"""
+from app.core.security import api_key_prefix, generate_api_key, hash_api_key, verify_api_key
+
+
+def test_keys_carry_their_prefix():
+    """Keys are sk_<prefix>_<secret> and distinct"""
+    api_key, prefix = generate_api_key()
+    assert api_key.startswith(f"sk_{prefix}_")
+    assert api_key_prefix(api_key) == prefix
+    assert generate_api_key()[0] != api_key
+
+
+def test_digest_verifies_only_its_key():
+    """Digests are deterministic SHA-256 hex, and verify only the key they came from"""
+    api_key, _ = generate_api_key()
+    digest = hash_api_key(api_key)
+    assert digest == hash_api_key(api_key) and len(digest) == 64
+    assert verify_api_key(api_key, digest)
+    assert not verify_api_key(api_key + "x", digest)
@@ -0,0 +1,21 @@
+"""
+Tests for the run archive layout
+"""
+from datetime import date
+from decimal import Decimal
+from pathlib import Path
+from uuid import UUID
+
+from app.services.archive_service import partition_dir, to_jsonable
+
+
+def test_partitions_are_hive_style_by_day_then_project():
+    """Day directories hold one directory per project"""
+    project_id = UUID("00000000-0000-0000-0000-000000000001")
+    root = Path("/archive")
+    assert partition_dir(root, "runs", date(2026, 5, 1)) == Path("/archive/runs/day=2026-05-01")
+    assert partition_dir(root, "steps", date(2026, 5, 1), project_id) == Path(
+        f"/archive/steps/day=2026-05-01/project_id={project_id}"
+    )
+    assert to_jsonable(Decimal("1.500000")) == 1.5
+    assert to_jsonable(project_id) == str(project_id)
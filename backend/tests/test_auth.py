@@ -176,3 +176,39 @@ async def test_create_api_key(client: AsyncClient):
     data = response.json()
     assert "api_key" in data
     assert data["api_key"].startswith("sk_")
+
+
+@pytest.mark.asyncio
+async def test_deactivation_applies_to_cached_principal(client: AsyncClient, db_session: AsyncSession):
+    """Deactivating a user revokes its tokens despite the cached principal, even once reactivated"""
+    from app.services.user_service import UserService
+    
+    await client.post(
+        "/api/v1/auth/register",
+        json={
+            "email": "cached@example.com",
+            "name": "Cached User",
+            "password": "cachedpass123",
+            "role": "viewer",
+        },
+    )
+    login_response = await client.post(
+        "/api/v1/auth/login",
+        json={"email": "cached@example.com", "password": "cachedpass123"},
+    )
+    headers = {"Authorization": f"Bearer {login_response.json()['access_token']}"}
+    
+    # Resolves and caches the principal
+    response = await client.get("/api/v1/projects/", headers=headers)
+    assert response.status_code == 200
+    
+    user = await UserService.get_by_email(db_session, "cached@example.com")
+    await UserService.set_access(db_session, user, is_active=False)
+    
+    response = await client.get("/api/v1/projects/", headers=headers)
+    assert response.status_code == 401
+    
+    await UserService.set_access(db_session, user, is_active=True)
+    
+    response = await client.get("/api/v1/projects/", headers=headers)
+    assert response.status_code == 401
@@ -0,0 +1,31 @@
+"""
+Tests for budget periods and alert crossings
+"""
+from datetime import datetime
+from uuid import uuid4
+
+from app.models.budget import BudgetAction, BudgetAlertKind, BudgetPeriod
+from app.models.rollup import RollupScope
+from app.services.budget_service import BudgetLimit, crossed, period_end, period_start
+
+
+def test_periods_follow_utc_calendar():
+    """Daily periods start at midnight, monthly ones on the 1st"""
+    now = datetime(2026, 12, 31, 17, 45)
+    assert period_start(BudgetPeriod.DAILY, now) == datetime(2026, 12, 31)
+    assert period_end(BudgetPeriod.DAILY, datetime(2026, 12, 31)) == datetime(2027, 1, 1)
+    assert period_start(BudgetPeriod.MONTHLY, now) == datetime(2026, 12, 1)
+    assert period_end(BudgetPeriod.MONTHLY, datetime(2026, 1, 1)) == datetime(2026, 2, 1)
+    assert period_end(BudgetPeriod.MONTHLY, datetime(2026, 12, 1)) == datetime(2027, 1, 1)
+
+
+def test_alerts_fire_once_when_crossed():
+    """Threshold and exhaustion alerts fire only on the increment that crosses them"""
+    limit = BudgetLimit(
+        id=uuid4(), scope_type=RollupScope.PROJECT, scope_id=uuid4(), period=BudgetPeriod.MONTHLY,
+        limit_micros=10_000_000, threshold_micros=8_000_000, action=BudgetAction.REJECT, spent_micros=0,
+    )
+    assert crossed(limit, 0, 7_999_999) == []
+    assert crossed(limit, 7_999_999, 8_000_000) == [BudgetAlertKind.THRESHOLD]
+    assert crossed(limit, 8_000_000, 9_000_000) == []
+    assert crossed(limit, 7_000_000, 12_000_000) == [BudgetAlertKind.THRESHOLD, BudgetAlertKind.EXHAUSTED]
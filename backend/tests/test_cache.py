@@ -0,0 +1,62 @@
+"""
+Tests for the in-process TTL cache
+"""
+import asyncio
+import time
+import pytest
+
+from app.core.cache import TTLCache, StaleWhileRevalidateCache
+
+
+def test_get_and_set():
+    """Stored values are returned until deleted"""
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    assert "a" in cache
+    cache.delete("a")
+    assert cache.get("a") is None
+    assert cache.get("a", 0) == 0
+
+
+def test_entries_expire():
+    """Entries disappear once their TTL has passed"""
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set("a", 1, ttl=0.01)
+    cache.set("b", 2)
+    time.sleep(0.02)
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+    assert len(cache) == 1
+
+
+def test_least_recently_used_is_evicted():
+    """Beyond maxsize the least recently used entry goes first"""
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+@pytest.mark.asyncio
+async def test_stale_entries_are_served_while_refreshing():
+    """A stale entry is returned at once and replaced by one background load"""
+    cache = StaleWhileRevalidateCache(maxsize=10, fresh_ttl=0.01, max_stale=60)
+    loads = []
+
+    async def loader():
+        loads.append(1)
+        await asyncio.sleep(0)
+        return len(loads)
+
+    assert await cache.get("a", loader) == 1
+    time.sleep(0.02)
+    results = [await cache.get("a", loader) for _ in range(3)]
+    assert results == [1, 1, 1]
+    await asyncio.sleep(0.01)
+    assert len(loads) == 2
+    assert await cache.get("a", loader) == 2
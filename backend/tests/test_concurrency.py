@@ -0,0 +1,100 @@
+"""
+Tests for adaptive concurrency limiting
+"""
+import pytest
+
+from app.core.concurrency import AdaptiveConcurrencyLimiter
+from app.middleware.concurrency import CRITICAL, LOW, NORMAL, ConcurrencyLimitMiddleware, request_priority
+
+
+def limiter(**kwargs):
+    options = dict(initial=10, min_limit=2, max_limit=100, warmup=1)
+    options.update(kwargs)
+    return AdaptiveConcurrencyLimiter(**options)
+
+
+def cycle(lim, latency, now, inflight=None):
+    """Fill the limit (or ``inflight``), then complete every request"""
+    admitted = 0
+    while (inflight is None or admitted < inflight) and lim.try_acquire():
+        admitted += 1
+    for _ in range(admitted):
+        lim.release(latency, now=now)
+    return admitted
+
+
+def test_limit_grows_while_used_and_healthy():
+    lim = limiter()
+    for i in range(20):
+        cycle(lim, 0.01, now=float(i))
+    assert lim.limit > 20
+    assert lim.inflight == 0
+
+
+def test_limit_holds_while_unused():
+    lim = limiter()
+    for i in range(20):
+        cycle(lim, 0.01, now=float(i), inflight=2)
+    assert lim.limit == 10
+
+
+def test_latency_spike_cuts_limit_once_per_window():
+    lim = limiter(initial=20)
+    for i in range(5):
+        cycle(lim, 0.01, now=float(i))
+    before = lim.limit
+    # Slow requests cut the limit once per limit's worth of completions
+    cycle(lim, 0.1, now=5.0, inflight=15)
+    assert lim.limit == pytest.approx(before * 0.9, abs=0.1)
+    cycle(lim, 0.1, now=6.0, inflight=15)
+    assert lim.limit == pytest.approx(before * 0.9 * 0.9, abs=0.1)
+
+
+def test_failures_cut_limit_down_to_min():
+    lim = limiter()
+    for _ in range(200):
+        assert lim.try_acquire()
+        lim.release(None, dropped=True)
+    assert lim.limit == 2
+
+
+def test_critical_requests_bypass_limit_and_low_priority_is_shed_first():
+    lim = limiter()
+    admitted = sum(lim.try_acquire(0.5) for _ in range(10))
+    assert admitted == 5
+    assert sum(lim.try_acquire() for _ in range(10)) == 5
+    assert not lim.try_acquire()
+    assert lim.try_acquire(critical=True)
+    assert lim.inflight == 11
+
+
+def test_request_priority():
+    assert request_priority("POST", "/api/v1/runs/runs") == CRITICAL
+    assert request_priority("PATCH", "/api/v1/runs/runs/abc/steps/def") == CRITICAL
+    assert request_priority("POST", "/api/v1/agents/agents/abc/heartbeat") == CRITICAL
+    assert request_priority("GET", "/api/v1/runs/runs") == NORMAL
+    assert request_priority("GET", "/api/v1/analytics/analytics/usage") == LOW
+    assert request_priority("GET", "/api/v1/runs/runs/export") == LOW
+    assert request_priority("GET", "/api/v1/projects/projects") == NORMAL
+
+
+@pytest.mark.asyncio
+async def test_only_database_timeouts_cut_the_limit():
+    """The application's own 503s (e.g. password hashing busy) are not overload"""
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        pass
+
+    scope = {"type": "http", "method": "POST", "path": "/api/v1/auth/login", "headers": []}
+    for status_code, cut in ((503, False), (504, True)):
+        async def app(scope, receive, send):
+            await send({"type": "http.response.start", "status": status_code, "headers": []})
+            await send({"type": "http.response.body", "body": b""})
+
+        middleware = ConcurrencyLimitMiddleware(app)
+        before = middleware.limiter.limit
+        for _ in range(int(before) * 2):
+            await middleware(scope, receive, send)
+        assert (middleware.limiter.limit < before) == cut
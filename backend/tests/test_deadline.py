@@ -0,0 +1,50 @@
+"""
+Tests for per-request deadline resolution
+"""
+import time
+
+from starlette.requests import Request
+
+from app.core.config import settings
+from app.core.deadline import REQUEST_TIMEOUT_HEADER, get_deadline, remaining_ms, resolve_timeout_ms
+
+
+def make_request(headers: dict | None = None) -> Request:
+    """Build a bare request with the given headers"""
+    raw_headers = [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw_headers})
+
+
+def test_default_timeout():
+    """Without header or route default, the global default applies"""
+    assert resolve_timeout_ms(make_request()) == settings.DEFAULT_REQUEST_TIMEOUT_MS
+
+
+def test_header_timeout_overrides_route_default():
+    """The client's header wins over the route default"""
+    request = make_request({REQUEST_TIMEOUT_HEADER: "250"})
+    request.state.default_timeout_ms = 10_000
+    assert resolve_timeout_ms(request) == 250
+
+
+def test_route_default_and_invalid_header():
+    """Invalid or non-positive headers fall back to the route default"""
+    for value in ("abc", "0", "-5"):
+        request = make_request({REQUEST_TIMEOUT_HEADER: value})
+        request.state.default_timeout_ms = 1234
+        assert resolve_timeout_ms(request) == 1234
+
+
+def test_timeout_is_capped():
+    """Clients can't ask for more than the configured maximum"""
+    request = make_request({REQUEST_TIMEOUT_HEADER: str(settings.MAX_REQUEST_TIMEOUT_MS * 10)})
+    assert resolve_timeout_ms(request) == settings.MAX_REQUEST_TIMEOUT_MS
+
+
+def test_deadline_is_resolved_once():
+    """All transactions in a request count down from the same deadline"""
+    request = make_request({REQUEST_TIMEOUT_HEADER: "1000"})
+    deadline = get_deadline(request)
+    time.sleep(0.01)
+    assert get_deadline(request) == deadline
+    assert 0 < remaining_ms(deadline) <= 1000
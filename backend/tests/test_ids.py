@@ -0,0 +1,45 @@
+"""
+Tests for time-ordered UUIDv7 generation
+"""
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from app.core.ids import is_uuid7, uuid7, uuid7_lower_bound, uuid7_time
+
+
+def test_uuid7_version_and_variant():
+    """Generated ids are RFC 9562 version 7 UUIDs"""
+    value = uuid7()
+    assert value.version == 7
+    assert value.variant == uuid.RFC_4122
+    assert is_uuid7(value)
+    assert not is_uuid7(uuid.uuid4())
+
+
+def test_uuid7_is_monotonic():
+    """Ids generated in sequence sort in generation order"""
+    ids = [uuid7() for _ in range(10_000)]
+    assert ids == sorted(ids)
+    assert len(set(ids)) == len(ids)
+
+
+def test_uuid7_time_roundtrip():
+    """The embedded timestamp matches the generation time"""
+    before = datetime.now(timezone.utc) - timedelta(milliseconds=1)
+    value = uuid7()
+    after = datetime.now(timezone.utc) + timedelta(milliseconds=1)
+
+    created = uuid7_time(value)
+    assert created is not None
+    assert before <= created <= after
+    assert uuid7_time(uuid.uuid4()) is None
+
+
+def test_uuid7_lower_bound():
+    """Lower bound ids bracket ids generated after a given time"""
+    start = datetime.now(timezone.utc) - timedelta(seconds=1)
+    value = uuid7()
+    assert uuid7_lower_bound(start) < value
+    assert uuid7_lower_bound(start + timedelta(days=1)) > value
+    # Naive datetimes are interpreted as UTC
+    assert uuid7_lower_bound(start.replace(tzinfo=None)) == uuid7_lower_bound(start)
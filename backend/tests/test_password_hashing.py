@@ -0,0 +1,23 @@
+"""
+Tests for password hashing on the hashing pool
+"""
+import pytest
+
+from app.core import security
+from app.core.security import PasswordHashBusy, get_password_hash_async, verify_password_async
+
+
+@pytest.mark.asyncio
+async def test_pool_hashes_and_verifies():
+    """Hashes made on the pool verify only their password"""
+    password_hash = await get_password_hash_async("correct horse")
+    assert await verify_password_async("correct horse", password_hash)
+    assert not await verify_password_async("wrong horse", password_hash)
+
+
+@pytest.mark.asyncio
+async def test_refuses_when_too_many_are_waiting(monkeypatch):
+    """Calls beyond PASSWORD_HASH_MAX_WAITING fail fast instead of queueing"""
+    monkeypatch.setattr(security.settings, "PASSWORD_HASH_MAX_WAITING", 0)
+    with pytest.raises(PasswordHashBusy):
+        await get_password_hash_async("correct horse")
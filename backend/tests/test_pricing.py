@@ -0,0 +1,22 @@
+"""
+Tests for model pricing
+"""
+from decimal import Decimal
+
+from app.core.pricing import cost_usd, price_for
+
+
+def test_longest_prefix_wins():
+    """Dated and provider-qualified model ids use the most specific price"""
+    assert price_for("gpt-4o-mini-2024-07-18") == price_for("gpt-4o-mini")
+    assert price_for("openai/gpt-4o") == price_for("gpt-4o")
+    assert price_for("gpt-4o") != price_for("gpt-4")
+    assert price_for("claude-3-opus-20240229") == (Decimal("15.00"), Decimal("75.00"))
+
+
+def test_cost():
+    """Costs are per million tokens, rounded to micro-dollars; unknown models have none"""
+    assert cost_usd("gpt-4", 1000, 500) == Decimal("0.060000")
+    assert cost_usd("claude-3-haiku", 1, 1) == Decimal("0.000002")
+    assert cost_usd("my-local-model", 1000, 1000) is None
+    assert cost_usd(None, 1000, 1000) is None
@@ -0,0 +1,42 @@
+"""
+Tests for the cached principal record
+"""
+import json
+import uuid
+
+from app.models.user import UserRole
+from app.services.user_service import Principal, dump_principal, load_principal
+
+
+def make_principal(project_ids):
+    return Principal(
+        id=uuid.uuid4(),
+        role=UserRole.DEVELOPER,
+        is_active=True,
+        is_superuser=False,
+        token_epoch=2,
+        version=7,
+        project_ids=project_ids,
+    )
+
+
+def test_round_trip():
+    """A principal stored in Redis loads back unchanged"""
+    principal = make_principal(frozenset({uuid.uuid4(), uuid.uuid4()}))
+    assert load_principal(principal.id, dump_principal(principal)) == principal
+
+    truncated = make_principal(None)
+    assert load_principal(truncated.id, dump_principal(truncated)) == truncated
+
+
+def test_invalidation_marker_is_a_miss():
+    """A version marker left by an invalidation loads as no principal"""
+    assert load_principal(uuid.uuid4(), json.dumps({"v": 8})) is None
+
+
+def test_owns_only_listed_projects():
+    """Unlisted projects, or any project when the list was cut, are unknown"""
+    project_id = uuid.uuid4()
+    assert make_principal(frozenset({project_id})).owns(project_id)
+    assert not make_principal(frozenset()).owns(project_id)
+    assert not make_principal(None).owns(project_id)
@@ -0,0 +1,124 @@
+"""
+Tests for GCRA rate limiting
+"""
+import pytest
+
+from app.core.rate_limit import HybridRateLimiter, RateLimitResult, gcra
+
+INTERVAL = 1.0  # One request per second
+CAPACITY = 5
+
+
+def run(times, cost=1, tat=None):
+    """Decisions for requests arriving at ``times``"""
+    results = []
+    for now in times:
+        result, tat = gcra(tat, now, INTERVAL, CAPACITY, cost)
+        results.append(result)
+    return results, tat
+
+
+def test_burst_then_sustained_rate():
+    """A full bucket allows CAPACITY at once, then one per interval"""
+    results, _ = run([0.0] * (CAPACITY + 3))
+    assert [r.allowed for r in results] == [True] * CAPACITY + [False] * 3
+    assert [r.remaining for r in results[:CAPACITY]] == [4, 3, 2, 1, 0]
+
+    results, _ = run([0.0] * CAPACITY + [0.5, 1.0, 1.5, 2.0, 2.0])
+    assert [r.allowed for r in results[CAPACITY:]] == [False, True, False, True, False]
+
+
+def test_denied_requests_do_not_consume():
+    """Retrying while limited doesn't push the next allowed time back"""
+    _, tat = run([0.0] * CAPACITY)
+    for now in (0.1, 0.2, 0.9):
+        result, tat = gcra(tat, now, INTERVAL, CAPACITY)
+        assert not result.allowed
+        assert result.retry_after == pytest.approx(1.0 - now)
+    result, _ = gcra(tat, 1.0, INTERVAL, CAPACITY)
+    assert result.allowed
+
+
+def test_idle_bucket_refills_to_capacity_only():
+    """Long idle periods don't bank more than CAPACITY requests"""
+    _, tat = run([0.0] * CAPACITY)
+    results, _ = run([100.0] * (CAPACITY + 1), tat=tat)
+    assert sum(r.allowed for r in results) == CAPACITY
+    assert results[0].reset_after == pytest.approx(INTERVAL)
+
+
+def test_weighted_requests():
+    """A request costing n takes n slots, and is denied whole if they aren't there"""
+    results, tat = run([0.0, 0.0], cost=2)
+    assert [r.remaining for r in results] == [3, 1]
+    result, _ = gcra(tat, 0.0, INTERVAL, CAPACITY, cost=2)
+    assert not result.allowed and result.remaining == 1
+    assert result.retry_after == pytest.approx(1.0)
+
+
+def test_interleaved_clients_never_exceed_the_rate():
+    """Across any window, admitted requests stay within capacity plus refill"""
+    times = sorted([t / 10 for t in range(200)] * 8)  # 8 clients every 100 ms for 20 s
+    results, _ = run(times)
+    admitted = [now for now, r in zip(times, results) if r.allowed]
+    for start in range(0, 20):
+        in_window = [t for t in admitted if start <= t < start + 5]
+        assert len(in_window) <= CAPACITY + 5 / INTERVAL
+    assert len(admitted) == CAPACITY + 19
+
+
+class SharedBucket:
+    """Stands in for the Redis bucket: a fixed pool of requests, counting calls"""
+
+    def __init__(self, available, fail=False):
+        self.available = available
+        self.fail = fail
+        self.calls = 0
+
+    async def acquire(self, key, wanted, needed):
+        self.calls += 1
+        if self.fail:
+            raise ConnectionError("redis down")
+        if self.available < needed:
+            return 0, RateLimitResult(False, 40, self.available, 60.0, 30.0)
+        granted = min(wanted, self.available)
+        self.available -= granted
+        return granted, RateLimitResult(True, 40, self.available, 60.0, 0.0)
+
+
+def make_limiter(bucket, processes=1):
+    limiter = HybridRateLimiter(
+        rate_per_minute=60, burst=40, max_lease=16, lease_seconds=60,
+        processes=processes, retry_seconds=60, max_keys=100,
+    )
+    limiter.redis = bucket
+    return limiter
+
+
+async def test_busy_keys_are_served_from_leases():
+    """Leases double while used up (to a quarter of the burst), saving round trips"""
+    bucket = SharedBucket(available=40)
+    limiter = make_limiter(bucket)
+    results = [await limiter.check("client") for _ in range(25)]
+    assert all(r.allowed for r in results)
+    assert bucket.calls == 5  # Leases of 1, 2, 4, 8 and 10
+    assert (await limiter.check("other")).allowed and bucket.calls == 6
+
+
+async def test_denied_keys_wait_locally():
+    """After a denial the key is refused without asking Redis until it may retry"""
+    bucket = SharedBucket(available=0)
+    limiter = make_limiter(bucket)
+    for _ in range(3):
+        result = await limiter.check("client")
+        assert not result.allowed and 0 < result.retry_after <= 30
+    assert bucket.calls == 1
+
+
+async def test_degrades_to_local_limits_without_redis():
+    """With Redis down each process enforces its share, without retrying Redis"""
+    bucket = SharedBucket(available=40, fail=True)
+    limiter = make_limiter(bucket, processes=4)
+    results = [await limiter.check("client") for _ in range(12)]
+    assert [r.allowed for r in results] == [True] * 10 + [False] * 2
+    assert limiter.degraded and bucket.calls == 1
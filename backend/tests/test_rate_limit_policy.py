@@ -0,0 +1,76 @@
+"""
+Tests for rate limit quotas: policy validation, route rules and bucket keys
+"""
+import uuid
+
+import pytest
+from pydantic import ValidationError
+
+from app.core.security import create_access_token
+from app.middleware.rate_limit import RateLimitMiddleware, _bucket_key
+from app.models.user import UserRole
+from app.schemas.rate_limit import RateLimitPolicy, RouteRule
+from app.services.rate_limit_service import RateLimitService
+from app.services.user_service import Principal, _principal_cache
+
+
+def make_scope(path="/api/v1/agents/", method="GET", headers=(), query=b""):
+    return {
+        "type": "http", "method": method, "path": path, "query_string": query,
+        "headers": [(k.lower().encode(), v.encode()) for k, v in headers],
+        "client": ("10.0.0.1", 1234),
+    }
+
+
+def test_policy_rules_must_fit_their_quota():
+    """Rules may only use known quota classes and costs within their burst"""
+    quotas = {"default": {"ratePerMinute": 60, "burst": 10}}
+    with pytest.raises(ValidationError):
+        RateLimitPolicy(quotas=quotas, routes=[{"pattern": "/x", "quota": "machine"}])
+    with pytest.raises(ValidationError):
+        RateLimitPolicy(quotas=quotas, routes=[{"pattern": "/x", "cost": 11}])
+    with pytest.raises(ValidationError):
+        RateLimitPolicy(quotas={"machine": {"ratePerMinute": 60, "burst": 10}})
+
+
+def test_default_policy_survives_storage():
+    """The policy stored in Redis reads back the same"""
+    policy = RateLimitService.default_policy()
+    assert RateLimitPolicy.model_validate_json(policy.model_dump_json(by_alias=True)) == policy
+
+
+def test_first_matching_rule_sets_cost_and_quota():
+    """Heartbeats go to machine buckets, analytics costs more, the rest costs 1"""
+    middleware = RateLimitMiddleware(app=None)
+    heartbeat = middleware._match("POST", f"/api/v1/agents/agents/{uuid.uuid4()}/heartbeat")
+    assert heartbeat.quota == "machine"
+    assert middleware._match("GET", f"/api/v1/agents/agents/{uuid.uuid4()}/heartbeat").quota == "default"
+    assert middleware._match("GET", "/api/v1/analytics/runs").cost > 1
+    assert middleware._match("GET", "/api/v1/agents/").cost == 1
+
+
+def test_bucket_keys():
+    """Verified users get their own bucket; unknown credentials share the IP's"""
+    rule = RouteRule(pattern="*")
+    assert _bucket_key(make_scope(), rule) == "ip:10.0.0.1"
+    assert _bucket_key(make_scope(headers=[("X-API-Key", "sk_unknown")]), rule) == "ip:10.0.0.1"
+    assert _bucket_key(make_scope(headers=[("Authorization", "Bearer forged")]), rule) == "ip:10.0.0.1"
+
+    user_id = uuid.uuid4()
+    token = create_access_token({"sub": str(user_id)})
+    bearer = [("Authorization", f"Bearer {token}")]
+    assert _bucket_key(make_scope(headers=bearer), rule) == f"user:{user_id}"
+    assert _bucket_key(make_scope(headers=bearer), RouteRule(pattern="*", key_by="ip")) == "ip:10.0.0.1"
+
+
+def test_project_keys_need_known_ownership():
+    """Project buckets are used only for projects the user is known to own"""
+    user_id, owned = uuid.uuid4(), uuid.uuid4()
+    token = create_access_token({"sub": str(user_id)})
+    bearer = [("Authorization", f"Bearer {token}")]
+    rule = RouteRule(pattern="*", key_by="project")
+    _principal_cache.set(user_id, Principal(user_id, UserRole.DEVELOPER, True, False, 0, 0, frozenset({owned})))
+
+    assert _bucket_key(make_scope(headers=bearer, query=f"projectId={owned}".encode()), rule) == f"project:{owned}"
+    other = make_scope(headers=bearer, query=f"projectId={uuid.uuid4()}".encode())
+    assert _bucket_key(other, rule) == f"user:{user_id}"
@@ -0,0 +1,47 @@
+"""
+Tests for rollup bucketing
+"""
+import uuid
+from datetime import datetime, timezone, timedelta
+
+from app.models.rollup import RollupGranularity, RollupScope
+from app.models.workflow_execution import WorkflowExecution, ExecutionStatus
+from app.services.rollup_service import bucket_count, run_counters, run_scopes, truncate
+
+
+def test_truncate_matches_date_trunc():
+    """Buckets start on minute, hour and day boundaries in UTC"""
+    ts = datetime(2026, 10, 18, 13, 45, 30, 123, tzinfo=timezone(timedelta(hours=2)))
+    assert truncate(ts, RollupGranularity.MINUTE) == datetime(2026, 10, 18, 11, 45)
+    assert truncate(ts, RollupGranularity.HOUR) == datetime(2026, 10, 18, 11)
+    assert truncate(ts, RollupGranularity.DAY) == datetime(2026, 10, 18)
+
+
+def test_bucket_count():
+    """Partial buckets at either end of the range are counted"""
+    start = datetime(2026, 10, 18, 0, 30)
+    assert bucket_count(start, start + timedelta(hours=24), RollupGranularity.HOUR) == 25
+    assert bucket_count(start, start + timedelta(hours=24), RollupGranularity.DAY) == 2
+    assert bucket_count(start, start, RollupGranularity.MINUTE) == 0
+
+
+def test_run_counters_and_scopes():
+    """A completed run counts once per scope; placeholder project ids are skipped"""
+    agent_id = uuid.uuid4()
+    run = WorkflowExecution(
+        workflow_id=uuid.uuid4(),
+        status=ExecutionStatus.COMPLETED,
+        duration_seconds=12,
+        metadata_={"agent_id": str(agent_id), "project_id": str(uuid.UUID(int=0))},
+    )
+    assert run_scopes(run) == [(RollupScope.WORKFLOW, run.workflow_id), (RollupScope.AGENT, agent_id)]
+
+    counters = run_counters(run)
+    assert counters["total_runs"] == counters["succeeded_runs"] == 1
+    assert counters["failed_runs"] == 0
+    assert (counters["duration_sum_seconds"], counters["duration_count"]) == (12, 1)
+
+    run.status = ExecutionStatus.FAILED
+    counters = run_counters(run)
+    assert counters["failed_runs"] == 1
+    assert counters["duration_count"] == 0
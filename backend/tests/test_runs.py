@@ -0,0 +1,236 @@
+"""
+Tests for run endpoints: authorization and what finishing runs and steps writes
+"""
+from typing import Dict, Tuple
+from uuid import UUID
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.ids import uuid7
+from app.core.security import create_access_token
+from app.models.agent_stats import AgentStats
+from app.models.latency_sketch import LatencySketchBin, SketchMetric, SketchScope
+from app.models.rollup import CostRollup, RunRollup, RollupGranularity, RollupScope
+from app.schemas.user import UserCreate
+from app.services.budget_service import BudgetService
+from app.services.user_service import UserService
+
+RUNS = "/api/v1/runs/runs"
+
+
+async def auth_headers(db: AsyncSession, email: str) -> Dict[str, str]:
+    """Create a user and return headers with an access token for it"""
+    user = await UserService.create(
+        db, UserCreate(email=email, name="Run User", password="runpass123", role="viewer")
+    )
+    token = create_access_token({"sub": str(user.id), "email": user.email, "ep": user.token_epoch})
+    return {"Authorization": f"Bearer {token}"}
+
+
+async def start_run(client: AsyncClient, headers: Dict[str, str]) -> Tuple[str, str, str, str]:
+    """Create a project with an agent and a workflow, trigger a run; returns (project, workflow, agent, run) IDs"""
+    response = await client.post("/api/v1/projects/", json={"name": "Runs"}, headers=headers)
+    assert response.status_code == 201
+    project_id = response.json()["id"]
+
+    response = await client.post(
+        "/api/v1/agents/agents/",
+        json={
+            "name": "Worker",
+            "project_id": project_id,
+            "model": "gpt-4o",
+            "provider": "openai",
+            "runtime": "python",
+            "env": "dev",
+        },
+        headers=headers,
+    )
+    assert response.status_code == 201
+    agent_id = response.json()["id"]
+
+    response = await client.post(
+        "/api/v1/workflows/workflows/",
+        json={"name": "Pipeline", "project_id": project_id},
+        headers=headers,
+    )
+    assert response.status_code == 201
+    workflow_id = response.json()["id"]
+
+    response = await client.post(
+        f"{RUNS}/",
+        json={"workflow_id": workflow_id, "agent_id": agent_id, "env": "dev"},
+        headers=headers,
+    )
+    assert response.status_code == 201
+    return project_id, workflow_id, agent_id, response.json()["id"]
+
+
+async def exhaust_workflow_budget(
+    client: AsyncClient, db: AsyncSession, headers: Dict[str, str], action: str
+) -> Tuple[str, str]:
+    """Give a new workflow a $1 budget its first run's usage has used up; returns (workflow, agent) IDs"""
+    _, workflow_id, agent_id, run_id = await start_run(client, headers)
+    response = await client.post(
+        f"{RUNS}/{run_id}/steps",
+        json={"step_index": 0, "step_type": "llm", "name": "call", "agent_id": agent_id},
+        headers=headers,
+    )
+    step_id = response.json()["id"]
+    response = await client.patch(
+        f"{RUNS}/{run_id}/steps/{step_id}",
+        json={"model": "gpt-4o", "tokens_prompt": 1_000_000, "tokens_completion": 1_000_000, "success": True},
+        headers=headers,
+    )
+    assert response.status_code == 200
+
+    response = await client.post(
+        "/api/v1/budgets/",
+        json={"scope": "workflow", "scopeId": workflow_id, "limitUsd": "1.00", "action": action},
+        headers=headers,
+    )
+    assert response.status_code == 201
+    await BudgetService.reconcile(db)
+    return workflow_id, agent_id
+
+
+@pytest.mark.asyncio
+async def test_run_writes_require_access_to_the_project(client: AsyncClient, db_session: AsyncSession):
+    """Other users can't update a run or write its steps"""
+    owner = await auth_headers(db_session, "owner@example.com")
+    other = await auth_headers(db_session, "other@example.com")
+    _, _, _, run_id = await start_run(client, owner)
+
+    response = await client.patch(f"{RUNS}/{run_id}", json={"status": "failed"}, headers=other)
+    assert response.status_code == 403
+    response = await client.post(
+        f"{RUNS}/{run_id}/steps",
+        json={"step_index": 0, "step_type": "llm", "name": "call"},
+        headers=other,
+    )
+    assert response.status_code == 403
+
+    response = await client.get(f"{RUNS}/{uuid7()}", headers=owner)
+    assert response.status_code == 404
+    response = await client.patch(f"{RUNS}/not-a-run", json={"status": "failed"}, headers=owner)
+    assert response.status_code == 422
+
+    response = await client.get(f"{RUNS}/{run_id}", headers=owner)
+    assert response.json()["status"] == "pending"
+    response = await client.get(f"{RUNS}/{run_id}/steps", headers=owner)
+    assert response.json() == []
+
+
+@pytest.mark.asyncio
+async def test_finishing_a_run_twice_counts_it_once(client: AsyncClient, db_session: AsyncSession):
+    """Rollups and agent stats take a run in once, however often it is reported finished"""
+    headers = await auth_headers(db_session, "finish@example.com")
+    _, _, agent_id, run_id = await start_run(client, headers)
+
+    response = await client.patch(f"{RUNS}/{run_id}", json={"status": "running"}, headers=headers)
+    assert response.status_code == 200
+    for _ in range(2):
+        response = await client.patch(
+            f"{RUNS}/{run_id}", json={"status": "completed", "duration_ms": 2000}, headers=headers
+        )
+        assert response.status_code == 200
+        assert response.json()["status"] == "completed"
+
+    result = await db_session.execute(
+        select(RunRollup.total_runs, RunRollup.succeeded_runs).where(
+            RunRollup.granularity == RollupGranularity.DAY,
+            RunRollup.scope_type == RollupScope.AGENT,
+            RunRollup.scope_id == UUID(agent_id),
+        )
+    )
+    assert result.all() == [(1, 1)]
+
+    result = await db_session.execute(
+        select(AgentStats.total_runs, AgentStats.in_flight_runs).where(AgentStats.agent_id == UUID(agent_id))
+    )
+    assert result.one() == (1, 0)
+
+
+@pytest.mark.asyncio
+async def test_step_usage_reaches_run_totals_and_rollups(client: AsyncClient, db_session: AsyncSession):
+    """Repeated cumulative usage reports are counted once; a completed step lands in the sketches"""
+    headers = await auth_headers(db_session, "usage@example.com")
+    project_id, _, agent_id, run_id = await start_run(client, headers)
+
+    response = await client.post(
+        f"{RUNS}/{run_id}/steps",
+        json={"step_index": 0, "step_type": "llm", "name": "call", "agent_id": agent_id},
+        headers=headers,
+    )
+    assert response.status_code == 201
+    step_id = response.json()["id"]
+
+    usage = {"model": "gpt-4o", "tokens_prompt": 1000, "tokens_completion": 500}
+    for update in (usage, {**usage, "success": True}):
+        response = await client.patch(f"{RUNS}/{run_id}/steps/{step_id}", json=update, headers=headers)
+        assert response.status_code == 200
+
+    response = await client.get(f"{RUNS}/{run_id}", headers=headers)
+    assert response.json()["tokensPrompt"] == 1000
+    assert response.json()["tokensCompletion"] == 500
+
+    result = await db_session.execute(
+        select(CostRollup.steps, CostRollup.tokens_prompt, CostRollup.tokens_completion).where(
+            CostRollup.scope_type == RollupScope.PROJECT,
+            CostRollup.scope_id == UUID(project_id),
+        )
+    )
+    assert result.all() == [(1, 1000, 500)]
+
+    result = await db_session.execute(
+        select(LatencySketchBin.count).where(
+            LatencySketchBin.metric == SketchMetric.STEP_DURATION,
+            LatencySketchBin.granularity == RollupGranularity.DAY,
+            LatencySketchBin.scope_type == SketchScope.STEP_TYPE,
+            LatencySketchBin.scope_key == "llm",
+        )
+    )
+    assert result.scalars().all() == [1]
+
+
+@pytest.mark.asyncio
+async def test_exhausted_workflow_budget_refuses_runs(client: AsyncClient, db_session: AsyncSession):
+    """A rejecting workflow budget that is used up refuses new runs of the workflow"""
+    headers = await auth_headers(db_session, "budget@example.com")
+    workflow_id, agent_id = await exhaust_workflow_budget(client, db_session, headers, "reject")
+
+    response = await client.post(
+        f"{RUNS}/",
+        json={"workflow_id": workflow_id, "agent_id": agent_id, "env": "dev"},
+        headers=headers,
+    )
+    assert response.status_code == 402
+
+
+@pytest.mark.asyncio
+async def test_run_held_by_budget_cannot_start(client: AsyncClient, db_session: AsyncSession):
+    """A queueing budget that is used up accepts new runs but holds them pending"""
+    headers = await auth_headers(db_session, "held@example.com")
+    workflow_id, agent_id = await exhaust_workflow_budget(client, db_session, headers, "queue")
+
+    response = await client.post(
+        f"{RUNS}/",
+        json={"workflow_id": workflow_id, "agent_id": agent_id, "env": "dev"},
+        headers=headers,
+    )
+    assert response.status_code == 201
+    run_id = response.json()["id"]
+
+    response = await client.patch(f"{RUNS}/{run_id}", json={"status": "running"}, headers=headers)
+    assert response.status_code == 409
+    response = await client.post(
+        f"{RUNS}/{run_id}/steps",
+        json={"step_index": 0, "step_type": "llm", "name": "call"},
+        headers=headers,
+    )
+    assert response.status_code == 409
+
+    response = await client.get(f"{RUNS}/{run_id}", headers=headers)
+    assert response.json()["status"] == "pending"
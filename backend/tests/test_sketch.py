@@ -0,0 +1,50 @@
+"""
+Tests for latency sketches and range covering
+"""
+import random
+from datetime import datetime
+
+from app.core.sketch import RELATIVE_ACCURACY, LatencySketch
+from app.models.rollup import RollupGranularity
+from app.services.rollup_service import cover
+
+
+def test_quantiles_within_relative_accuracy():
+    """Sketch quantiles stay within the configured relative error"""
+    rng = random.Random(7)
+    values = sorted(rng.lognormvariate(6, 1.5) for _ in range(20_000))
+    sketch = LatencySketch()
+    for value in values:
+        sketch.add(value)
+
+    for q in (0.5, 0.9, 0.95, 0.99):
+        exact = values[int(q * (len(values) - 1))]
+        assert abs(sketch.quantile(q) - exact) <= exact * RELATIVE_ACCURACY + 1e-9
+
+
+def test_merge_equals_single_sketch():
+    """Merging per-bucket sketches gives the same bins as one sketch of everything"""
+    values = [float(v) for v in range(1, 5000, 7)]
+    whole = LatencySketch()
+    parts = [LatencySketch(), LatencySketch()]
+    for i, value in enumerate(values):
+        whole.add(value)
+        parts[i % 2].add(value)
+
+    merged = LatencySketch.from_bins(list(parts[0].bins.items()) + list(parts[1].bins.items()))
+    assert merged.bins == whole.bins
+    assert merged.count == whole.count == len(values)
+    assert LatencySketch().quantile(0.5) is None
+
+
+def test_cover_uses_coarsest_buckets():
+    """Whole days in the middle, hours and minutes at the edges"""
+    segments = cover(datetime(2026, 10, 1, 22, 30), datetime(2026, 10, 4, 1, 15))
+    assert segments == [
+        (RollupGranularity.MINUTE, datetime(2026, 10, 1, 22, 30), datetime(2026, 10, 1, 23, 0)),
+        (RollupGranularity.HOUR, datetime(2026, 10, 1, 23, 0), datetime(2026, 10, 2, 0, 0)),
+        (RollupGranularity.DAY, datetime(2026, 10, 2), datetime(2026, 10, 4)),
+        (RollupGranularity.HOUR, datetime(2026, 10, 4, 0, 0), datetime(2026, 10, 4, 1, 0)),
+        (RollupGranularity.MINUTE, datetime(2026, 10, 4, 1, 0), datetime(2026, 10, 4, 1, 15)),
+    ]
+    assert cover(datetime(2026, 10, 1, 5), datetime(2026, 10, 1, 5)) == []
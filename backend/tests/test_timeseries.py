@@ -0,0 +1,28 @@
+"""
+Tests for timeseries steps and rollup selection
+"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.rollup import RollupGranularity
+from app.services.timeseries_service import align, auto_step, parse_step, source_granularity
+
+
+def test_coarsest_rollup_that_tiles_the_step():
+    """Steps read from the largest bucket size dividing them"""
+    assert source_granularity(parse_step("1d")) == RollupGranularity.DAY
+    assert source_granularity(parse_step("7d")) == RollupGranularity.DAY
+    assert source_granularity(parse_step("6h")) == RollupGranularity.HOUR
+    assert source_granularity(parse_step("90m")) == RollupGranularity.MINUTE
+    assert source_granularity(parse_step("120m")) == RollupGranularity.HOUR
+    with pytest.raises(ValueError):
+        parse_step("30s")
+
+
+def test_range_is_widened_to_step_boundaries():
+    """Points start on multiples of the step and the auto step bounds the point count"""
+    lo, hi = align(datetime(2026, 5, 1, 10, 7), datetime(2026, 5, 1, 12, 1), timedelta(minutes=15))
+    assert (lo, hi) == (datetime(2026, 5, 1, 10, 0), datetime(2026, 5, 1, 12, 15))
+    assert auto_step(datetime(2026, 5, 1), datetime(2026, 5, 2), 300) == timedelta(minutes=5)
+    assert auto_step(datetime(2026, 1, 1), datetime(2026, 4, 1), 300) == timedelta(days=1)
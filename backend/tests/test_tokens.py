@@ -0,0 +1,25 @@
+"""
+Tests for the verified access-token cache
+"""
+import pytest
+from fastapi import HTTPException
+
+from app.core.security import create_access_token, decode_token_cached
+
+
+def test_verified_claims_are_reused():
+    """A token is verified once; later calls return the same claims"""
+    token = create_access_token({"sub": "user-1", "ep": 3})
+    claims = decode_token_cached(token)
+    assert claims["sub"] == "user-1" and claims["ep"] == 3
+    assert decode_token_cached(token) is claims
+
+
+def test_forged_tokens_are_rejected_every_time():
+    """Tokens failing verification are never cached"""
+    token = create_access_token({"sub": "user-1"})
+    forged = token[:-2] + ("AA" if not token.endswith("AA") else "BB")
+    for _ in range(2):
+        with pytest.raises(HTTPException) as exc:
+            decode_token_cached(forged)
+        assert exc.value.status_code == 401